@@ -27,6 +27,7 @@ from .progress import router as progress_router
 from .pipeline_control import router as pipeline_control_router
 from .debug import router as debug_router
 from .simple_progress import router as simple_progress_router
+from .media_jobs import router as media_jobs_router
 from backend.modules.clipping.interfaces.api import router as clipping_router
 from ..upload_queue import router as upload_queue_router
 from ..account_health import router as account_health_router
@@ -50,6 +51,7 @@ api_router.include_router(progress_router, prefix="/progress", tags=["progress"]
 api_router.include_router(pipeline_control_router, prefix="/pipeline", tags=["pipeline"])
 api_router.include_router(debug_router, tags=["debug"])
 api_router.include_router(simple_progress_router, tags=["simple-progress"])
+api_router.include_router(media_jobs_router, prefix="/media-jobs", tags=["media-jobs"])
 api_router.include_router(clipping_router, tags=["clipping"])
 api_router.include_router(upload_queue_router, tags=["upload-queue"])
 api_router.include_router(account_health_router, tags=["account-health"])
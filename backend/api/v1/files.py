@@ -247,12 +247,10 @@ async def get_project_clip_video(
         if clip.project_id != project_id:
             raise HTTPException(status_code=403, detail="切片不属于该项目")
         
-        if not clip.video_path:
-            raise HTTPException(status_code=404, detail="切片文件不存在")
-        
-        file_path = Path(clip.video_path)
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="切片文件不存在")
+        file_path = Path(clip.video_path) if clip.video_path else None
+        if file_path is None or not file_path.exists():
+            # 切片未预先切割（虚拟切片模式）时，从源视频按需remux
+            return _serve_virtual_clip(project, clip)
         
         # 返回视频文件，支持在线播放
         return FileResponse(
@@ -271,6 +269,144 @@ async def get_project_clip_video(
         logger.error(f"获取项目切片视频失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取项目切片视频失败: {str(e)}")
 
+def _clip_range_seconds(clip: Clip):
+    """切片的精确起止秒数（优先使用元数据中的SRT时间）"""
+    from ...utils.text_processor import TextProcessor
+    metadata = clip.clip_metadata or {}
+    try:
+        return (TextProcessor.time_to_seconds(metadata['start_time']),
+                TextProcessor.time_to_seconds(metadata['end_time']))
+    except (KeyError, ValueError, TypeError, AttributeError):
+        return float(clip.start_time), float(clip.end_time)
+
+def _serve_virtual_clip(project: Project, clip: Clip):
+    """
+    从源视频按需提供切片：缓存命中时返回文件，否则以fragmented MP4流式返回
+    """
+    from fastapi.responses import StreamingResponse
+    from ...core.worker_state import is_ffmpeg_available
+    from ...utils.virtual_clip import get_virtual_clip_cache, stream_virtual_clip
+    
+    source = Path(project.video_path) if project.video_path else None
+    if source is None or not source.exists() or not is_ffmpeg_available():
+        raise HTTPException(status_code=404, detail="切片文件不存在")
+    
+    start, end = _clip_range_seconds(clip)
+    if end <= start:
+        raise HTTPException(status_code=404, detail="切片时间范围无效")
+    
+    cache = get_virtual_clip_cache()
+    cached_path = cache.get(cache.make_key(source, start, end))
+    if cached_path is not None:
+        return FileResponse(
+            path=str(cached_path),
+            filename=f"clip_{clip.id}.mp4",
+            media_type="video/mp4",
+            headers={
+                "Accept-Ranges": "bytes",
+                "Cache-Control": "public, max-age=3600"
+            }
+        )
+    
+    return StreamingResponse(
+        stream_virtual_clip(source, start, end, cache),
+        media_type="video/mp4",
+        headers={"Cache-Control": "no-store"}
+    )
+
+def _project_hls_dir(project_id: str) -> Path:
+    from ...core.path_utils import get_projects_directory
+    from ...utils.hls_packager import HLS_DIRNAME
+    return get_projects_directory() / project_id / HLS_DIRNAME
+
+def _hls_playlist_response(project_id: str, start: float, end: float, uri_prefix: str):
+    """为 [start, end] 区间合成HLS播放列表，未打包时返回404"""
+    from fastapi.responses import Response
+    from ...utils.hls_packager import load_playlist
+    
+    playlist = load_playlist(_project_hls_dir(project_id))
+    if playlist is None:
+        raise HTTPException(status_code=404, detail="HLS预览尚未生成")
+    if end <= start:
+        raise HTTPException(status_code=400, detail="时间范围无效")
+    
+    return Response(
+        content=playlist.build_clip_playlist(start, end, uri_prefix=uri_prefix),
+        media_type="application/vnd.apple.mpegurl",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get("/projects/{project_id}/clips/{clip_id}/playlist.m3u8")
+async def get_project_clip_playlist(
+    project_id: str,
+    clip_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    获取切片的HLS播放列表（引用源视频的HLS分片，无需切割文件）
+    """
+    clip = db.query(Clip).filter(Clip.id == clip_id, Clip.project_id == project_id).first()
+    if not clip:
+        raise HTTPException(status_code=404, detail="切片不存在")
+    
+    start, end = _clip_range_seconds(clip)
+    # 播放列表位于 .../clips/{clip_id}/，分片位于 .../hls/
+    return _hls_playlist_response(project_id, start, end, uri_prefix="../../hls/")
+
+@router.get("/projects/{project_id}/hls/range.m3u8")
+async def get_project_range_playlist(
+    project_id: str,
+    start: float = Query(..., ge=0, description="开始时间（秒）"),
+    end: float = Query(..., gt=0, description="结束时间（秒）")
+):
+    """
+    获取源视频任意区间的HLS播放列表（用于编辑预览和拖动）
+    """
+    return _hls_playlist_response(project_id, start, end, uri_prefix="")
+
+@router.get("/projects/{project_id}/hls/{filename}")
+async def get_project_hls_file(project_id: str, filename: str):
+    """
+    获取项目HLS打包文件（播放列表、初始化分片或媒体分片）
+    """
+    from ...utils.hls_packager import HLS_FILENAME_RE
+    
+    if not HLS_FILENAME_RE.match(filename):
+        raise HTTPException(status_code=404, detail="文件不存在")
+    
+    file_path = _project_hls_dir(project_id) / filename
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="文件不存在")
+    
+    media_type = "application/vnd.apple.mpegurl" if filename.endswith(".m3u8") else "video/mp4"
+    return FileResponse(
+        path=str(file_path),
+        media_type=media_type,
+        headers={"Cache-Control": "public, max-age=86400"}  # 分片内容不变，可长期缓存
+    )
+
+@router.get("/projects/{project_id}/thumbnails/{filename}")
+async def get_project_thumbnail_file(project_id: str, filename: str):
+    """
+    获取项目缩略图文件（切片缩略图、拖动预览雪碧图及其WebVTT映射）
+    """
+    from ...core.path_utils import get_projects_directory
+    from ...utils.batch_thumbnailer import THUMBNAILS_DIRNAME, THUMBNAIL_FILENAME_RE
+    
+    if not THUMBNAIL_FILENAME_RE.match(filename):
+        raise HTTPException(status_code=404, detail="文件不存在")
+    
+    file_path = get_projects_directory() / project_id / "output" / THUMBNAILS_DIRNAME / filename
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="文件不存在")
+    
+    media_type = "text/vtt" if filename.endswith(".vtt") else "image/jpeg"
+    return FileResponse(
+        path=str(file_path),
+        media_type=media_type,
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
+
 @router.get("/collections/{collection_id}/download")
 async def download_collection_file(
     collection_id: str,
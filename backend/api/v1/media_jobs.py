@@ -0,0 +1,43 @@
+"""
+媒体任务API路由
+查询、轮询和取消API进程内的后台ffmpeg任务
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ...services.media_job_service import get_media_executor
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/")
+async def list_media_jobs(project_id: Optional[str] = Query(None, description="按项目过滤")) -> Dict[str, Any]:
+    """列出媒体任务（最新的在前）"""
+    jobs = get_media_executor().list_jobs(project_id)
+    return {"jobs": [job.to_dict() for job in jobs], "count": len(jobs)}
+
+
+@router.get("/{job_id}")
+async def get_media_job(job_id: str) -> Dict[str, Any]:
+    """获取媒体任务状态和进度"""
+    job = get_media_executor().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job.to_dict()
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_media_job(job_id: str) -> Dict[str, Any]:
+    """取消运行中的媒体任务"""
+    executor = get_media_executor()
+    job = executor.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if not await executor.cancel(job_id):
+        raise HTTPException(status_code=400, detail="任务已结束，无法取消")
+    logger.info(f"媒体任务已取消: {job_id}")
+    return job.to_dict()
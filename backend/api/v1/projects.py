@@ -5,7 +5,7 @@
 import logging
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from backend.core.database import get_db
 from backend.services.project_service import ProjectService
@@ -755,41 +755,82 @@ async def get_project_logs(
     lines: int = Query(50, ge=1, le=1000, description="Number of log lines to return"),
     project_service: ProjectService = Depends(get_project_service)
 ):
-    """Get project logs."""
+    """Get project logs (read backwards from the end of the project's JSON-lines log)."""
     try:
-        # 模拟日志数据，实际应该从日志服务获取
-        return {
-            "logs": [
-                {
-                    "timestamp": "2025-08-01T13:30:00.000Z",
-                    "module": "processing",
-                    "level": "INFO",
-                    "message": "开始处理项目"
-                },
-                {
-                    "timestamp": "2025-08-01T13:30:05.000Z",
-                    "module": "processing",
-                    "level": "INFO",
-                    "message": "Step 1: 提取大纲完成"
-                },
-                {
-                    "timestamp": "2025-08-01T13:30:10.000Z",
-                    "module": "processing",
-                    "level": "INFO",
-                    "message": "Step 2: 时间定位完成"
-                },
-                {
-                    "timestamp": "2025-08-01T13:30:15.000Z",
-                    "module": "processing",
-                    "level": "INFO",
-                    "message": "Step 3: 内容评分进行中..."
-                }
-            ]
-        }
+        from ...core.project_logging import read_project_log
+        
+        project = project_service.get(project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        return {"logs": read_project_log(project_id, lines)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) 
 
 
+@router.get("/{project_id}/logs/stream")
+async def stream_project_logs(
+    project_id: str,
+    request: Request,
+    lines: int = Query(50, ge=0, le=1000, description="Number of recent log lines to send first"),
+    project_service: ProjectService = Depends(get_project_service)
+):
+    """实时跟踪项目日志（Server-Sent Events）：先发送最近的日志，之后推送新增条目"""
+    import json
+    from fastapi.responses import StreamingResponse
+    from ...core.project_logging import follow_project_log
+    
+    project = project_service.get(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    poll_interval = 0.5
+    heartbeat_polls = int(15 / poll_interval)
+    
+    async def event_stream():
+        idle_polls = 0
+        async for entries in follow_project_log(project_id, lines, poll_interval):
+            if await request.is_disconnected():
+                break
+            if entries:
+                idle_polls = 0
+                for entry in entries:
+                    yield f"data: {json.dumps(entry, ensure_ascii=False)}\n\n"
+            else:
+                idle_polls += 1
+                # 定期发送注释行，防止代理断开空闲连接
+                if idle_polls >= heartbeat_polls:
+                    idle_polls = 0
+                    yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{project_id}/metrics")
+async def get_project_metrics(
+    project_id: str,
+    project_service: ProjectService = Depends(get_project_service)
+):
+    """获取项目最近一次流水线处理的指标（步骤/分块耗时、LLM调用与token、重试、ffmpeg统计）"""
+    from ...core.path_utils import get_project_directory
+    from ...core.pipeline_metrics import load_project_metrics
+    
+    project = project_service.get(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    metrics = load_project_metrics(get_project_directory(project_id))
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="No metrics recorded for this project yet")
+    return metrics
+
+
 @router.get("/{project_id}/import-status")
 async def get_import_status(
     project_id: str,
@@ -843,7 +884,8 @@ async def generate_project_thumbnail(
         
         # 生成缩略图
         from ...utils.thumbnail_generator import generate_project_thumbnail
-        thumbnail_data = generate_project_thumbnail(project_id, video_path)
+        from ...services.media_job_service import get_media_executor
+        thumbnail_data = await get_media_executor().run_blocking(generate_project_thumbnail, project_id, video_path)
         
         if thumbnail_data:
             # 保存缩略图到数据库
@@ -1187,39 +1229,65 @@ async def generate_collection_video(
         output_filename = f"{safe_name}.mp4"
         output_path = collections_dir / output_filename
         
-        # 使用VideoProcessor创建合集
-        video_processor = VideoProcessor(
-            clips_dir=str(clips_dir),
-            collections_dir=str(collections_dir)
+        # 合集渲染（重新编码）耗时较长，作为后台媒体任务执行，立即返回任务ID
+        from ...services.media_job_service import get_media_executor
+        executor = get_media_executor()
+        expected_duration = sum(
+            float(clip.duration or max((clip.end_time or 0) - (clip.start_time or 0), 0))
+            for clip in ordered_clips
         )
-        success = video_processor.create_collection(clip_video_paths, output_path)
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="合集视频生成失败")
         
-        # 生成合集封面
-        thumbnail_path = None
-        try:
-            thumbnail_filename = f"{collection_id}_{safe_name}_thumbnail.jpg"
-            thumbnail_path = collections_dir / thumbnail_filename
+        async def render_collection(job):
+            concat_file = collections_dir / f"concat_{job.id}.txt"
+            VideoProcessor.write_concat_file(clip_video_paths, concat_file)
+            try:
+                await executor.run_ffmpeg(
+                    VideoProcessor.build_collection_command(concat_file, output_path),
+                    duration=expected_duration or None,
+                    on_progress=job.report_progress
+                )
+            finally:
+                concat_file.unlink(missing_ok=True)
             
-            # 从视频中提取封面（第5秒的帧）
-            thumbnail_success = video_processor.extract_thumbnail(output_path, thumbnail_path, time_offset=5)
+            # 生成合集封面（第5秒的帧）
+            thumbnail_path = collections_dir / f"{collection_id}_{safe_name}_thumbnail.jpg"
+            thumbnail_success = await executor.run_blocking(
+                VideoProcessor.extract_thumbnail, output_path, thumbnail_path, 5
+            )
             if thumbnail_success:
-                collection.thumbnail_path = str(thumbnail_path)
                 logger.info(f"合集封面生成成功: {thumbnail_path}")
             else:
                 logger.warning(f"合集封面生成失败: {collection_id}")
-        except Exception as e:
-            logger.error(f"生成合集封面时出错: {e}")
+            
+            # 请求的数据库会话已关闭，使用新会话更新合集
+            from ...core.database import SessionLocal
+            job_db = SessionLocal()
+            try:
+                job_collection = job_db.query(Collection).filter(Collection.id == collection_id).first()
+                if job_collection:
+                    job_collection.export_path = str(output_path)
+                    if thumbnail_success:
+                        job_collection.thumbnail_path = str(thumbnail_path)
+                    job_db.commit()
+            finally:
+                job_db.close()
+            
+            return {
+                "collection_id": collection_id,
+                "output_path": str(output_path),
+                "filename": output_filename
+            }
         
-        # 更新合集的export_path
-        collection.export_path = str(output_path)
-        db.commit()
+        job = executor.submit(
+            "collection_render", render_collection,
+            project_id=project_id, message=f"生成合集视频: {collection_name}"
+        )
         
         return {
             "success": True,
-            "message": "合集视频生成成功",
+            "message": "合集视频生成任务已提交",
+            "job_id": job.id,
+            "status": job.status.value,
             "collection_id": collection_id,
             "output_path": str(output_path),
             "filename": output_filename
@@ -1374,3 +1442,77 @@ async def get_collection_thumbnail(
     except Exception as e:
         logger.error(f"获取合集封面失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取合集封面失败: {str(e)}")
+
+
+@router.get("/{project_id}/export.zip")
+async def export_project_zip(
+    project_id: str,
+    include_metadata: bool = Query(True, description="是否包含metadata目录下的JSON文件"),
+    db: Session = Depends(get_db),
+    project_service: ProjectService = Depends(get_project_service)
+):
+    """流式导出项目的全部切片、合集和元数据（ZIP64，不生成临时文件）"""
+    try:
+        from fastapi.responses import StreamingResponse
+        import urllib.parse
+        from ...models.clip import Clip
+        from ...models.collection import Collection
+        from ...core.path_utils import get_project_directory
+        from ...utils.video_processor import VideoProcessor
+        from ...utils.zip_stream import ZipEntry, iter_zip_stream
+        
+        project = project_service.get(project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="项目不存在")
+        
+        # 在返回响应前确定全部条目，流式输出期间不再访问数据库
+        entries = []
+        used_names = set()
+        
+        def _unique_arcname(folder: str, name: str, suffix: str) -> str:
+            arcname = f"{folder}/{name}{suffix}"
+            index = 2
+            while arcname in used_names:
+                arcname = f"{folder}/{name}_{index}{suffix}"
+                index += 1
+            used_names.add(arcname)
+            return arcname
+        
+        clips = db.query(Clip).filter(Clip.project_id == project_id).order_by(Clip.start_time).all()
+        for clip in clips:
+            if clip.video_path and Path(clip.video_path).exists():
+                name = VideoProcessor.sanitize_filename(clip.title or f"clip_{clip.id}")
+                entries.append(ZipEntry(_unique_arcname("clips", name, ".mp4"), path=Path(clip.video_path)))
+        
+        collections = db.query(Collection).filter(Collection.project_id == project_id).all()
+        for collection in collections:
+            video_path = collection.export_path or collection.video_path
+            if video_path and Path(video_path).exists():
+                name = VideoProcessor.sanitize_filename(collection.name or f"collection_{collection.id}")
+                entries.append(ZipEntry(_unique_arcname("collections", name, ".mp4"), path=Path(video_path)))
+        
+        if include_metadata:
+            metadata_dir = get_project_directory(project_id) / "metadata"
+            if metadata_dir.exists():
+                for json_file in sorted(metadata_dir.glob("*.json")):
+                    entries.append(ZipEntry(f"metadata/{json_file.name}", path=json_file))
+        
+        if not entries:
+            raise HTTPException(status_code=404, detail="项目没有可导出的文件")
+        
+        filename = f"{VideoProcessor.sanitize_filename(project.name or project_id)}.zip"
+        encoded_filename = urllib.parse.quote(filename.encode('utf-8'))
+        
+        return StreamingResponse(
+            iter_zip_stream(entries),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"导出项目失败: {e}")
+        raise HTTPException(status_code=500, detail=f"导出项目失败: {str(e)}")
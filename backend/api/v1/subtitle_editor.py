@@ -1,15 +1,19 @@
+import asyncio
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
-from ...utils.subtitle_processor import SubtitleProcessor
+from ...utils.subtitle_processor import SubtitleIndex, SubtitleProcessor
+from ...utils.transcript_store import transcript_dir
 from ...utils.video_editor import VideoEditor
 from ...core.path_utils import get_data_directory, get_projects_directory
 from ...core.database import get_db
 from ...services.project_service import ProjectService
+from ...services.media_job_service import get_media_executor
+from ...services.exceptions import ProcessingError
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -20,6 +24,7 @@ class SubtitleEditRequest(BaseModel):
     project_id: str
     clip_id: str
     deleted_segments: List[str]
+    frame_accurate: bool = False  # 逐帧精确剪辑（重新编码），默认按关键帧复制
 
 class SubtitleEditResponse(BaseModel):
     success: bool
@@ -27,6 +32,8 @@ class SubtitleEditResponse(BaseModel):
     edited_video_path: Optional[str] = None
     deleted_duration: Optional[float] = None
     final_duration: Optional[float] = None
+    job_id: Optional[str] = None  # 后台渲染任务ID，可通过 /media-jobs/{job_id} 查询进度或取消
+    status: Optional[str] = None
 
 class SubtitleDataResponse(BaseModel):
     segments: List[Dict]
@@ -52,6 +59,27 @@ def get_project_service(db: Session = Depends(get_db)) -> ProjectService:
     """Dependency to get project service."""
     return ProjectService(db)
 
+def _clip_seconds(subtitle_processor: SubtitleProcessor, value) -> float:
+    """片段时间转换为秒（整数直接视为秒）"""
+    if isinstance(value, int):
+        return value
+    return subtitle_processor._srt_time_to_seconds(subtitle_processor._seconds_to_srt_time_object(value))
+
+def _load_clip_subtitles(subtitle_processor: SubtitleProcessor, project_dir: Path,
+                         srt_file: Path, clip) -> Tuple[float, SubtitleIndex]:
+    """
+    读取完全落在片段时间范围内的字粒度字幕段
+    
+    Returns:
+        (片段开始秒数, 带ID/时间索引的字幕段集合)
+    """
+    clip_start = _clip_seconds(subtitle_processor, clip.start_time)
+    clip_end = _clip_seconds(subtitle_processor, clip.end_time)
+    clip_subtitles = subtitle_processor.parse_srt_to_word_level(
+        srt_file, transcript_dir(project_dir / "metadata", srt_file), clip_start, clip_end
+    )
+    return clip_start, SubtitleIndex(clip_subtitles)
+
 @router.get("/{project_id}/clips/{clip_id}/subtitles")
 async def get_clip_subtitles(
     project_id: str,
@@ -80,30 +108,8 @@ async def get_clip_subtitles(
         if not srt_file.exists():
             raise HTTPException(status_code=404, detail="字幕文件不存在")
         
-        # 解析字幕数据
-        subtitle_data = subtitle_processor.parse_srt_to_word_level(srt_file)
-        
-        # 过滤出属于当前片段的时间范围
-        # 如果start_time和end_time是整数（秒），直接使用
-        if isinstance(clip.start_time, int):
-            clip_start = clip.start_time
-        else:
-            clip_start = subtitle_processor._srt_time_to_seconds(
-                subtitle_processor._seconds_to_srt_time_object(clip.start_time)
-            )
-        
-        if isinstance(clip.end_time, int):
-            clip_end = clip.end_time
-        else:
-            clip_end = subtitle_processor._srt_time_to_seconds(
-                subtitle_processor._seconds_to_srt_time_object(clip.end_time)
-            )
-        
-        # 过滤字幕段
-        clip_subtitles = [
-            seg for seg in subtitle_data 
-            if seg['startTime'] >= clip_start and seg['endTime'] <= clip_end
-        ]
+        # 从项目的转写存储中读取属于当前片段时间范围的字幕段
+        clip_start, clip_subtitles = _load_clip_subtitles(subtitle_processor, project_dir, srt_file, clip)
         
         # 调整时间戳为相对于片段的
         for seg in clip_subtitles:
@@ -117,7 +123,7 @@ async def get_clip_subtitles(
         stats = subtitle_processor.get_subtitle_statistics(clip_subtitles)
         
         return SubtitleDataResponse(
-            segments=clip_subtitles,
+            segments=clip_subtitles.segments,
             total_duration=stats['totalDuration'],
             word_count=stats['wordCount'],
             segment_count=stats['segmentCount']
@@ -166,29 +172,8 @@ async def edit_clip_by_subtitles(
         if not srt_file.exists():
             raise HTTPException(status_code=404, detail="字幕文件不存在")
         
-        # 解析字幕数据
-        subtitle_data = subtitle_processor.parse_srt_to_word_level(srt_file)
-        
-        # 过滤出属于当前片段的时间范围
-        # 如果start_time和end_time是整数（秒），直接使用
-        if isinstance(clip.start_time, int):
-            clip_start = clip.start_time
-        else:
-            clip_start = subtitle_processor._srt_time_to_seconds(
-                subtitle_processor._seconds_to_srt_time_object(clip.start_time)
-            )
-        
-        if isinstance(clip.end_time, int):
-            clip_end = clip.end_time
-        else:
-            clip_end = subtitle_processor._srt_time_to_seconds(
-                subtitle_processor._seconds_to_srt_time_object(clip.end_time)
-            )
-        
-        clip_subtitles = [
-            seg for seg in subtitle_data 
-            if seg['startTime'] >= clip_start and seg['endTime'] <= clip_end
-        ]
+        # 从项目的转写存储中读取属于当前片段时间范围的字幕段
+        _, clip_subtitles = _load_clip_subtitles(subtitle_processor, project_dir, srt_file, clip)
         
         # 验证编辑操作
         validation = video_editor.validate_edit_operations(
@@ -206,31 +191,54 @@ async def edit_clip_by_subtitles(
         edited_video_name = f"{clip_id}_edited.mp4"
         edited_video_path = output_dir / edited_video_name
         
-        # 执行视频编辑
-        edit_result = video_editor.edit_video_by_subtitle_deletion(
-            original_video,
-            clip_subtitles,
-            request.deleted_segments,
-            edited_video_path
-        )
+        plan = video_editor.plan_subtitle_edit(clip_subtitles, request.deleted_segments)
+        if plan is None:
+            raise HTTPException(status_code=400, detail="没有保留的时间段")
+        edited_srt_path = output_dir / f"{clip_id}_edited.srt"
         
-        if not edit_result['success']:
-            raise HTTPException(status_code=500, detail=f"视频编辑失败: {edit_result['error']}")
+        # 剪辑作为后台媒体任务执行（受全局并发、超时限制，可取消），立即返回任务ID
+        executor = get_media_executor()
         
-        # 导出编辑后的字幕文件
-        edited_srt_path = output_dir / f"{clip_id}_edited.srt"
-        subtitle_processor.export_edited_srt(
-            clip_subtitles,
-            request.deleted_segments,
-            edited_srt_path
+        async def render_edit(job):
+            cmd = video_editor.prepare_edit_command(
+                original_video, plan['timeline'], edited_video_path, request.frame_accurate
+            )
+            try:
+                await executor.run_ffmpeg(
+                    cmd,
+                    duration=plan['finalDuration'] or None,
+                    on_progress=job.report_progress
+                )
+            finally:
+                video_editor.concat_list_path(edited_video_path).unlink(missing_ok=True)
+            
+            # 导出编辑后的字幕文件
+            subtitle_processor.export_edited_srt(
+                clip_subtitles,
+                request.deleted_segments,
+                edited_srt_path
+            )
+            return {
+                "clip_id": clip_id,
+                "edited_video_path": str(edited_video_path),
+                "edited_srt_path": str(edited_srt_path),
+                "deleted_duration": plan['totalDeletedDuration'],
+                "final_duration": plan['finalDuration']
+            }
+        
+        job = executor.submit(
+            "subtitle_edit", render_edit,
+            project_id=project_id, message=f"字幕剪辑片段: {clip_id}"
         )
         
         return SubtitleEditResponse(
             success=True,
-            message="视频编辑成功",
+            message="视频编辑任务已提交",
             edited_video_path=str(edited_video_path),
-            deleted_duration=edit_result['totalDeletedDuration'],
-            final_duration=edit_result['finalDuration']
+            deleted_duration=plan['totalDeletedDuration'],
+            final_duration=plan['finalDuration'],
+            job_id=job.id,
+            status=job.status.value
         )
         
     except HTTPException:
@@ -307,46 +315,83 @@ async def create_edit_preview(
         if not srt_file.exists():
             raise HTTPException(status_code=404, detail="字幕文件不存在")
         
-        # 解析字幕数据
-        subtitle_data = subtitle_processor.parse_srt_to_word_level(srt_file)
-        
-        # 过滤出属于当前片段的时间范围
-        # 如果start_time和end_time是整数（秒），直接使用
-        if isinstance(clip.start_time, int):
-            clip_start = clip.start_time
-        else:
-            clip_start = subtitle_processor._srt_time_to_seconds(
-                subtitle_processor._seconds_to_srt_time_object(clip.start_time)
-            )
-        
-        if isinstance(clip.end_time, int):
-            clip_end = clip.end_time
-        else:
-            clip_end = subtitle_processor._srt_time_to_seconds(
-                subtitle_processor._seconds_to_srt_time_object(clip.end_time)
-            )
-        
-        clip_subtitles = [
-            seg for seg in subtitle_data 
-            if seg['startTime'] >= clip_start and seg['endTime'] <= clip_end
-        ]
+        # 从项目的转写存储中读取属于当前片段时间范围的字幕段
+        _, clip_subtitles = _load_clip_subtitles(subtitle_processor, project_dir, srt_file, clip)
+        
+        # 源视频已打包为HLS时，直接返回区间播放列表，不再逐段切割
+        # （两种情况返回相同的字段，count 为预览数量）
+        from ...utils.hls_packager import HLS_DIRNAME, load_playlist
+        if load_playlist(project_dir / HLS_DIRNAME) is not None:
+            preview_playlists = [
+                {
+                    "segment_id": segment['id'],
+                    "start_time": segment['startTime'],
+                    "end_time": segment['endTime'],
+                    "playlist_url": (
+                        f"/api/v1/files/projects/{project_id}/hls/range.m3u8"
+                        f"?start={segment['startTime']:.3f}"
+                        f"&end={segment['endTime']:.3f}"
+                    )
+                }
+                for segment in clip_subtitles.resolve(request.deleted_segments)
+            ]
+            return {
+                "success": True,
+                "preview_files": [],
+                "preview_playlists": preview_playlists,
+                "count": len(preview_playlists)
+            }
         
         # 创建预览目录
         preview_dir = project_dir / "edit_previews" / clip_id
         preview_dir.mkdir(parents=True, exist_ok=True)
         
-        # 创建预览片段
-        preview_files = video_editor.create_preview_clips(
-            original_video,
-            clip_subtitles,
-            request.deleted_segments,
-            preview_dir
+        commands = video_editor.build_preview_commands(
+            original_video, clip_subtitles, request.deleted_segments, preview_dir
+        )
+        if not commands:
+            return {
+                "success": True,
+                "preview_files": [],
+                "preview_playlists": [],
+                "count": 0
+            }
+        
+        # 预览切割作为后台媒体任务执行：每个ffmpeg各占一个全局并发名额，任务结果中返回预览文件
+        executor = get_media_executor()
+        
+        async def render_previews(job):
+            done = 0
+            
+            async def extract(segment, preview_file, cmd):
+                nonlocal done
+                try:
+                    await executor.run_ffmpeg(cmd, duration=segment['endTime'] - segment['startTime'])
+                    return preview_file
+                except ProcessingError as e:
+                    logger.error(f"创建预览片段失败 {segment['id']}: {e}")
+                    return None
+                finally:
+                    done += 1
+                    job.report_progress({"percent": done * 100 / len(commands)})
+            
+            results = await asyncio.gather(*(extract(*command) for command in commands))
+            preview_files = [str(f) for f in results if f is not None]
+            return {"preview_files": preview_files, "count": len(preview_files)}
+        
+        job = executor.submit(
+            "edit_preview", render_previews,
+            project_id=project_id, message=f"生成删除预览: {clip_id}"
         )
         
         return {
             "success": True,
-            "preview_files": [str(f) for f in preview_files],
-            "count": len(preview_files)
+            "message": "预览生成任务已提交",
+            "job_id": job.id,
+            "status": job.status.value,
+            "preview_files": [],
+            "preview_playlists": [],
+            "count": len(commands)
         }
         
     except Exception as e:
@@ -0,0 +1,3 @@
+"""
+离线基准测试 - 使用假LLM提供商和合成素材测量流水线吞吐
+"""
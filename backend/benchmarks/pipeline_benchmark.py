@@ -0,0 +1,250 @@
+"""
+流水线端到端基准测试
+
+用假LLM提供商（llm_provider=fake）在合成素材上运行 SimplePipelineAdapter.process_project_sync，
+输出每个场景的步骤耗时（来自流水线写入的 metadata/metrics.json）和峰值内存（RSS），格式为JSON。
+
+每个场景在独立的子进程中运行，使峰值RSS互不影响，并在导入后端模块之前设置好环境变量。
+
+用法（在项目根目录）:
+    python -m backend.benchmarks.pipeline_benchmark --durations 1h 4h 10h --output bench.json
+    python -m backend.benchmarks.pipeline_benchmark --durations 1h --no-video --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .synthetic import ffmpeg_available, format_duration, make_test_video, parse_duration, write_synthetic_srt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DURATIONS = ["1h", "4h", "10h"]
+DEFAULT_WORKDIR = Path(os.getenv("TMPDIR", "/tmp")) / "autoclip-bench"
+
+# 步骤指标中写入报告的字段
+STEP_FIELDS = (
+    "wall_time", "llm_calls", "llm_failures", "llm_time", "queue_wait", "prompt_tokens",
+    "completion_tokens", "retries", "parse_failures", "ffmpeg_runs", "ffmpeg_time",
+)
+
+
+def _peak_rss_bytes() -> Dict[str, Optional[int]]:
+    """当前进程和已结束子进程（ffmpeg）的峰值RSS"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return {"self": None, "children": None}
+    # Linux上ru_maxrss单位为KB，macOS上为字节
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def _scenario_environment(config: Dict[str, Any]) -> Dict[str, str]:
+    """子进程的环境变量：假提供商参数、隔离的数据库，关闭需要Celery的功能"""
+    env = {
+        "FAKE_LLM_LATENCY": str(config["latency"]),
+        "FAKE_LLM_ERROR_RATE": str(config["error_rate"]),
+        "FAKE_LLM_RATE_LIMIT_RATE": str(config["rate_limit_rate"]),
+        "FAKE_LLM_MALFORMED_RATE": str(config["malformed_rate"]),
+        "FAKE_LLM_SEED": str(config["seed"]),
+        "DATABASE_URL": f"sqlite:///{Path(config['workdir']) / 'benchmark.db'}",
+        "ENABLE_HLS_PREVIEW": "false",
+        "DISTRIBUTED_RENDERING": "false",
+        "FUSED_SCORE_TITLE": "true" if config["fused"] else "false",
+    }
+    if not config["video"]:
+        # 没有视频时跳过依赖媒体的步骤，Step 6只生成虚拟切片
+        env.update({
+            "ENABLE_BOUNDARY_SNAPPING": "false",
+            "ENABLE_AUDIO_SIGNAL": "false",
+            "ENABLE_BATCH_THUMBNAILS": "false",
+            "VIRTUAL_CLIPS": "true",
+        })
+    return env
+
+
+def run_scenario(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在当前（新建的）进程中运行一个场景
+
+    Args:
+        config: 场景配置（duration、srt_path、video_path、workdir、假提供商参数等）
+
+    Returns:
+        场景结果
+    """
+    os.environ.update(_scenario_environment(config))
+    logging.basicConfig(level=config["log_level"], format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from backend.core.database import engine
+    from backend.core.llm_manager import initialize_llm_manager
+    from backend.core.path_utils import get_project_directory
+    from backend.core.pipeline_metrics import load_project_metrics
+    from backend.models.base import Base
+    from backend.services.simple_pipeline_adapter import SimplePipelineAdapter
+
+    Base.metadata.create_all(bind=engine)
+
+    settings_file = Path(config["workdir"]) / "settings.json"
+    settings_file.write_text(json.dumps({"llm_provider": "fake", "model_name": "fake-llm"}), encoding="utf-8")
+    initialize_llm_manager(settings_file)
+
+    project_id = f"bench-{config['name']}-{uuid.uuid4().hex[:8]}"
+    adapter = SimplePipelineAdapter(project_id, f"task-{project_id}")
+    started = time.perf_counter()
+    result = asyncio.run(adapter.process_project_sync(config["video_path"] or "", config["srt_path"]))
+    wall_time = time.perf_counter() - started
+
+    project_dir = get_project_directory(project_id)
+    metrics = load_project_metrics(project_dir) or {}
+    output = result.get("result") or {}
+    report = {
+        "name": config["name"],
+        "duration_seconds": config["duration"],
+        "cues": config["cues"],
+        "video": config["video"],
+        "status": result.get("status"),
+        "error": result.get("error"),
+        "wall_time": round(wall_time, 3),
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "outputs": {
+            "outlines": len(output.get("outlines") or []),
+            "timeline": len(output.get("timeline") or []),
+            "scored_clips": len(output.get("scored_clips") or []),
+            "collections": len(output.get("collections") or []),
+        },
+        "totals": metrics.get("totals", {}),
+        "steps": [
+            {
+                "name": step["name"],
+                "status": step.get("status"),
+                "chunks": len(step.get("chunks") or []),
+                **{key: step.get(key) for key in STEP_FIELDS},
+            }
+            for step in metrics.get("steps", [])
+        ],
+    }
+    if config["keep"]:
+        report["project_dir"] = str(project_dir)
+    else:
+        shutil.rmtree(project_dir, ignore_errors=True)
+    return report
+
+
+def prepare_scenarios(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """生成（或复用）各时长的合成素材，返回场景配置"""
+    workdir = Path(args.workdir)
+    media_dir = workdir / "media"
+    use_video = args.video and ffmpeg_available()
+    if args.video and not use_video:
+        logger.warning("未找到ffmpeg，跳过测试视频，仅运行LLM步骤")
+
+    scenarios = []
+    for value in args.durations:
+        duration = parse_duration(value)
+        name = format_duration(duration)
+        srt_path = media_dir / f"synthetic_{name}.srt"
+        cues = write_synthetic_srt(srt_path, duration, seed=args.seed)
+        video_path = None
+        if use_video:
+            video_path = make_test_video(media_dir / f"testsrc_{name}.mp4", duration, fps=args.fps)
+        scenarios.append({
+            "name": name,
+            "duration": duration,
+            "cues": cues,
+            "srt_path": str(srt_path),
+            "video_path": str(video_path) if video_path else None,
+            "video": video_path is not None,
+            "workdir": str(workdir),
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "malformed_rate": args.malformed_rate,
+            "seed": args.seed,
+            "fused": args.fused,
+            "keep": args.keep,
+            "log_level": args.log_level,
+        })
+    return scenarios
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """按顺序运行所有场景，每个场景一个子进程"""
+    Path(args.workdir).mkdir(parents=True, exist_ok=True)
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for scenario in prepare_scenarios(args):
+        logger.info(f"运行场景 {scenario['name']}（{scenario['cues']}条字幕，视频: {scenario['video']}）")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                results.append(executor.submit(run_scenario, scenario).result())
+            except Exception as e:
+                logger.error(f"场景 {scenario['name']} 运行失败: {e}")
+                results.append({"name": scenario["name"], "status": "error", "error": str(e)})
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fake_provider": {
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "malformed_rate": args.malformed_rate,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="AutoClip流水线离线基准测试（假LLM提供商）")
+    parser.add_argument("--durations", nargs="+", default=DEFAULT_DURATIONS,
+                        help="合成素材时长，如 1h 4h 10h 或 90m")
+    parser.add_argument("--no-video", dest="video", action="store_false",
+                        help="不生成测试视频，跳过边界吸附、音频信号和缩略图，Step 6只生成虚拟切片")
+    parser.add_argument("--fps", type=int, default=5, help="测试视频帧率")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次LLM调用的模拟延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="LLM调用抛出错误的概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="LLM调用返回429的概率")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="LLM返回无法解析内容的概率")
+    parser.add_argument("--fused", action="store_true", help="启用评分与标题合并模式")
+    parser.add_argument("--seed", type=int, default=0, help="合成素材和错误注入的随机种子")
+    parser.add_argument("--workdir", default=str(DEFAULT_WORKDIR), help="素材缓存和基准数据库目录")
+    parser.add_argument("--keep", action="store_true", help="保留每个场景生成的项目目录")
+    parser.add_argument("--output", help="结果JSON输出路径，默认输出到标准输出")
+    parser.add_argument("--log-level", default="WARNING", help="场景子进程的日志级别")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    report = run_benchmark(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        logger.info(f"基准结果已写入: {args.output}")
+    else:
+        print(text)
+    return 0 if all(s.get("status") == "succeeded" for s in report["scenarios"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+SRT时间解析基准测试
+
+对比 pysrt 与 srt_time 的向量化解析，以及时间字符串转换在有无缓存时的耗时，输出JSON。
+
+用法（在项目根目录）:
+    python -m backend.benchmarks.srt_time_benchmark --duration 20h --repeat 5
+    python -m backend.benchmarks.srt_time_benchmark --srt input.srt --output srt_bench.json
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pysrt
+
+from backend.utils import srt_time
+from .synthetic import parse_duration, write_synthetic_srt
+
+logger = logging.getLogger(__name__)
+
+# 约20000条字幕
+DEFAULT_DURATION = "20h"
+
+
+def _timed(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """运行repeat次，返回最短和中位耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {"min": round(min(timings), 6), "median": round(statistics.median(timings), 6)}
+
+
+def _pysrt_entries(srt_path: Path) -> List[Dict]:
+    """与原 TextProcessor.parse_srt 相同的pysrt解析"""
+    return [
+        {'start_time': str(sub.start), 'end_time': str(sub.end), 'text': sub.text.strip(), 'index': sub.index}
+        for sub in pysrt.open(str(srt_path), encoding='utf-8')
+    ]
+
+
+def run_benchmark(srt_path: Path, repeat: int) -> Dict[str, Any]:
+    """
+    对一个SRT文件运行全部测量
+
+    Args:
+        srt_path: SRT文件路径
+        repeat: 每项重复次数
+
+    Returns:
+        基准结果
+    """
+    arrays = srt_time.parse_srt_file(srt_path)
+    entries = arrays.to_entries()
+    time_strings = [entry['start_time'] for entry in entries] + [entry['end_time'] for entry in entries]
+    uncached = srt_time.time_to_ms.__wrapped__
+
+    def cached_pass():
+        for value in time_strings:
+            srt_time.time_to_seconds(value)
+
+    def uncached_pass():
+        for value in time_strings:
+            uncached(value) / 1000.0
+
+    srt_time.clear_time_cache()
+    cached_pass()  # 预热缓存，测量的是重复解析同一批字符串的场景
+
+    results = {
+        "pysrt_parse": _timed(lambda: _pysrt_entries(srt_path), repeat),
+        "fast_parse_arrays": _timed(lambda: srt_time.parse_srt_file(srt_path), repeat),
+        "fast_parse_entries": _timed(lambda: srt_time.parse_srt_file(srt_path).to_entries(), repeat),
+        "time_to_seconds_uncached": _timed(uncached_pass, repeat),
+        "time_to_seconds_cached": _timed(cached_pass, repeat),
+        "time_array_parse": _timed(lambda: srt_time.parse_time_array(time_strings), repeat),
+    }
+    return {
+        "srt_path": str(srt_path),
+        "cues": len(arrays),
+        "time_strings": len(time_strings),
+        "matches_pysrt": entries == _pysrt_entries(srt_path),
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "speedup_vs_pysrt": round(results["pysrt_parse"]["min"] / max(results["fast_parse_entries"]["min"], 1e-9), 1),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="SRT时间解析基准测试")
+    parser.add_argument("--srt", help="使用已有的SRT文件，不指定时生成合成字幕")
+    parser.add_argument("--duration", default=DEFAULT_DURATION, help="合成字幕时长，如 20h 或 90m")
+    parser.add_argument("--seed", type=int, default=0, help="合成字幕的随机种子")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测量的重复次数")
+    parser.add_argument("--output", help="结果JSON输出路径，默认输出到标准输出")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        srt_path = Path(args.srt) if args.srt else Path(tmp_dir) / "synthetic.srt"
+        if not args.srt:
+            write_synthetic_srt(srt_path, parse_duration(args.duration), seed=args.seed)
+        report = run_benchmark(srt_path, max(args.repeat, 1))
+        if not args.srt:
+            report["srt_path"] = None
+            report["synthetic_duration"] = args.duration
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+        logger.info(f"基准结果已写入: {args.output}")
+    else:
+        print(text)
+    return 0 if report["matches_pysrt"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+合成基准素材 - 生成指定时长的SRT字幕和ffmpeg测试视频
+
+字幕按话题分段生成（每段约5分钟使用同一组词汇），段内穿插超过1秒的停顿，
+使分块、话题定位和本地聚类都有可用的结构。结果只由时长和随机种子决定。
+"""
+import logging
+import random
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 话题词汇：每个话题段从其中一组和通用词中取词
+TOPIC_VOCABULARY = [
+    ["inversion", "bolsa", "acciones", "dividendos", "riesgo", "cartera", "mercado", "ahorro"],
+    ["cocina", "receta", "ingredientes", "horno", "sabor", "especias", "postre", "harina"],
+    ["viaje", "avion", "hotel", "playa", "montana", "equipaje", "ciudad", "museo"],
+    ["programacion", "codigo", "servidor", "base", "datos", "algoritmo", "pruebas", "errores"],
+    ["salud", "ejercicio", "correr", "dieta", "sueno", "musculos", "proteina", "descanso"],
+    ["musica", "guitarra", "concierto", "cancion", "ritmo", "banda", "escenario", "disco"],
+    ["educacion", "escuela", "profesor", "examen", "clases", "alumnos", "lectura", "tareas"],
+    ["tecnologia", "telefono", "bateria", "pantalla", "camara", "aplicacion", "nube", "chip"],
+]
+FILLER_WORDS = [
+    "entonces", "bueno", "creo", "que", "la", "el", "muy", "pero", "porque", "cuando",
+    "siempre", "nunca", "tambien", "mucho", "hoy", "gente", "cosa", "tiempo", "ejemplo", "verdad",
+]
+
+TOPIC_SEGMENT_SECONDS = 300
+
+
+def parse_duration(value: str) -> int:
+    """
+    解析时长参数，支持 10h / 90m / 45s / 纯秒数
+
+    Returns:
+        秒数
+    """
+    value = value.strip().lower()
+    units = {"h": 3600, "m": 60, "s": 1}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(float(value))
+
+
+def format_duration(seconds: int) -> str:
+    """秒数 -> 场景名（1h / 90m / 45s）"""
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+def _srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d},{millis % 1000:03d}"
+
+
+def write_synthetic_srt(path: Path, duration_seconds: int, seed: int = 0) -> int:
+    """
+    生成合成SRT字幕
+
+    Args:
+        path: 输出路径
+        duration_seconds: 字幕覆盖的总时长（秒）
+        seed: 随机种子
+
+    Returns:
+        字幕条数
+    """
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    blocks = []
+    current = 0.5
+    topic = None
+    segment_end = 0.0
+
+    while current < duration_seconds - 1:
+        if current >= segment_end:
+            topic = rng.choice(TOPIC_VOCABULARY)
+            segment_end = current + TOPIC_SEGMENT_SECONDS
+
+        cue_duration = rng.uniform(2.0, 4.5)
+        end = min(current + cue_duration, duration_seconds)
+        words = [rng.choice(topic) if rng.random() < 0.4 else rng.choice(FILLER_WORDS)
+                 for _ in range(rng.randint(6, 14))]
+        blocks.append(f"{len(blocks) + 1}\n{_srt_time(current)} --> {_srt_time(end)}\n{' '.join(words)}\n")
+
+        # 大约每8条字幕出现一次超过1秒的停顿
+        current = end + (rng.uniform(1.1, 2.0) if rng.random() < 0.12 else rng.uniform(0.05, 0.4))
+
+    path.write_text("\n".join(blocks), encoding="utf-8")
+    return len(blocks)
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def make_test_video(path: Path, duration_seconds: int, width: int = 320, height: int = 180,
+                    fps: int = 5, timeout: Optional[float] = None) -> Path:
+    """
+    用ffmpeg的testsrc/sine滤镜生成测试视频（已存在时直接复用）
+
+    Args:
+        path: 输出路径
+        duration_seconds: 时长（秒）
+        width: 宽度
+        height: 高度
+        fps: 帧率（低帧率可以缩短长视频的生成时间）
+        timeout: ffmpeg超时时间（秒）
+
+    Returns:
+        视频路径
+    """
+    if path.exists() and path.stat().st_size > 0:
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}")
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc=size={width}x{height}:rate={fps}",
+        "-f", "lavfi", "-i", "sine=frequency=440:beep_factor=4:sample_rate=16000",
+        "-t", str(duration_seconds),
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-g", str(fps * 2),
+        "-c:a", "aac", "-b:a", "32k",
+        "-f", "mp4", str(tmp_path),
+    ]
+    logger.info(f"生成测试视频: {path} ({duration_seconds}秒)")
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        tmp_path.unlink(missing_ok=True)
+        raise RuntimeError(f"生成测试视频失败: {result.stderr[-500:]}")
+    tmp_path.replace(path)
+    return path
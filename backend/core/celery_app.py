@@ -4,8 +4,10 @@ Celery应用配置
 """
 
 import os
+import logging
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun, worker_process_init, worker_process_shutdown
 from pathlib import Path
 
 # 设置默认配置模块
@@ -79,5 +81,50 @@ celery_app.autodiscover_tasks([
     'backend.tasks.import_processing'  # 添加导入处理任务
 ])
 
+
+@worker_process_init.connect
+def warm_up_worker_process(**kwargs):
+    """worker子进程启动时预热提示词、LLM客户端、HTTP连接池和ffmpeg检测"""
+    try:
+        from .worker_state import warm_up_worker
+        warm_up_worker()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Worker进程预热失败: {e}")
+    try:
+        from .project_logging import install_project_log_handler
+        install_project_log_handler()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"项目日志初始化失败: {e}")
+
+
+_project_log_tokens = {}
+
+
+@task_prerun.connect
+def bind_task_project_logs(task_id=None, task=None, args=None, kwargs=None, **extra):
+    """任务参数中带 project_id 时，任务内的日志写入该项目的日志文件"""
+    from .project_logging import bind_project_id, project_id_from_call
+    project_id = project_id_from_call(task.run, args, kwargs) if task is not None else None
+    if project_id:
+        _project_log_tokens[task_id] = bind_project_id(project_id)
+
+
+@task_postrun.connect
+def unbind_task_project_logs(task_id=None, **extra):
+    token = _project_log_tokens.pop(task_id, None)
+    if token is not None:
+        from .project_logging import unbind_project_id
+        unbind_project_id(token)
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    """worker子进程退出时释放进程级资源"""
+    try:
+        from .worker_state import shutdown_worker
+        shutdown_worker()
+    except Exception:
+        pass
+
 if __name__ == '__main__':
     celery_app.start()
\ No newline at end of file
@@ -4,6 +4,7 @@ LLM管理器 - 统一管理多个模型提供商
 import json
 import logging
 import os
+import time
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 
@@ -11,6 +12,9 @@ from .llm_providers import (
     LLMProvider, LLMProviderFactory, ProviderType, 
     ModelInfo, LLMResponse
 )
+from .llm_router import LLMRouter, LLMRoute
+from .pipeline_metrics import record_llm_call, record_llm_retry
+from ..utils.token_estimator import estimate_tokens
 from ..utils.llm_debug import (
     is_llm_debug_enabled,
     mask_secret,
@@ -27,6 +31,7 @@ class LLMManager:
     def __init__(self, settings_file: Optional[Path] = None):
         self.settings_file = settings_file or self._get_default_settings_file()
         self.current_provider: Optional[LLMProvider] = None
+        self.router: Optional[LLMRouter] = None
         self.settings = self._load_settings()
         self._initialize_provider()
     
@@ -48,7 +53,13 @@ class LLMManager:
             "chunk_size": 5000,
             "min_score_threshold": 0.7,
             "max_clips_per_collection": 5,
-            "llm_debug": False
+            "llm_debug": False,
+            # 多密钥/多提供商负载均衡
+            "llm_routes": [],
+            "llm_use_key_pool": False,
+            "llm_rpm_limit": None,
+            "llm_tpm_limit": None,
+            "llm_rate_limit_cooldown": 30
         }
         
         if self.settings_file.exists():
@@ -100,9 +111,106 @@ class LLMManager:
         except Exception as e:
             logger.error(f"初始化提供商失败: {e}")
             self.current_provider = None
+
+        self._initialize_router()
+
+    def _initialize_router(self):
+        """
+        初始化多路由负载均衡
+
+        路由来源：
+        1. 当前提供商（主路由）
+        2. settings中的 llm_routes 列表，每项可包含 provider、api_key 或 key_name、
+           model_name、weight、rpm、tpm
+        3. llm_use_key_pool 为真时，APIKeyManager中当前提供商的所有活跃密钥
+
+        只有一个路由且未配置限额时不启用路由层，保持直接调用。
+        """
+        self.router = None
+        routes: List[LLMRoute] = []
+        default_rpm = self.settings.get("llm_rpm_limit")
+        default_tpm = self.settings.get("llm_tpm_limit")
+        model_name = self.settings.get("model_name", "qwen-plus")
+        seen_keys = set()
+
+        if self.current_provider:
+            provider_type = ProviderType(self.settings.get("llm_provider", "dashscope"))
+            routes.append(LLMRoute(
+                name="primary",
+                provider_type=provider_type,
+                model_name=model_name,
+                provider=self.current_provider,
+                rpm_limit=default_rpm,
+                tpm_limit=default_tpm,
+            ))
+            seen_keys.add((provider_type, self.current_provider.api_key, model_name))
+
+        route_configs = list(self.settings.get("llm_routes") or [])
+        if self.settings.get("llm_use_key_pool") and self.current_provider:
+            route_configs.extend(self._get_key_pool_routes())
+
+        for i, config in enumerate(route_configs):
+            try:
+                provider_type = ProviderType(config.get("provider", self.settings.get("llm_provider", "dashscope")))
+                route_model = config.get("model_name") or model_name
+                api_key = config.get("api_key") or self._resolve_key_name(config.get("key_name"))
+                if not api_key:
+                    logger.warning(f"LLM路由 #{i} 缺少API密钥，已跳过")
+                    continue
+                if (provider_type, api_key, route_model) in seen_keys:
+                    continue
+                seen_keys.add((provider_type, api_key, route_model))
+
+                routes.append(LLMRoute(
+                    name=config.get("name") or f"{provider_type.value}:{route_model}#{i}",
+                    provider_type=provider_type,
+                    model_name=route_model,
+                    provider=LLMProviderFactory.create_provider(provider_type, api_key, route_model),
+                    weight=max(int(config.get("weight", 1)), 1),
+                    rpm_limit=config.get("rpm", default_rpm),
+                    tpm_limit=config.get("tpm", default_tpm),
+                ))
+            except Exception as e:
+                logger.error(f"初始化LLM路由 #{i} 失败: {e}")
+
+        if len(routes) > 1 or (routes and (default_rpm or default_tpm)):
+            self.router = LLMRouter(
+                routes,
+                cooldown_seconds=float(self.settings.get("llm_rate_limit_cooldown", 30))
+            )
+            logger.info(f"已启用LLM路由层，共{len(routes)}个路由: {[r.name for r in routes]}")
+
+    def _get_key_pool_routes(self) -> List[Dict[str, Any]]:
+        """从APIKeyManager读取当前提供商的所有活跃密钥"""
+        provider = self.settings.get("llm_provider", "dashscope")
+        try:
+            from ..utils.api_key_manager import api_key_manager
+            keys = api_key_manager.get_active_api_keys(provider)
+        except Exception as e:
+            logger.warning(f"读取密钥池失败: {e}")
+            return []
+        return [
+            {"name": f"{provider}:{key['name']}", "provider": provider, "api_key": key["api_key"]}
+            for key in keys
+        ]
+
+    def _resolve_key_name(self, key_name: Optional[str]) -> Optional[str]:
+        """按名称从APIKeyManager解析密钥"""
+        if not key_name:
+            return None
+        try:
+            from ..utils.api_key_manager import api_key_manager
+            return api_key_manager.get_api_key(key_name)
+        except Exception as e:
+            logger.warning(f"解析密钥 {key_name} 失败: {e}")
+            return None
     
     def _get_api_key_for_provider(self, provider_type: ProviderType) -> Optional[str]:
         """获取指定提供商的API密钥"""
+        if provider_type == ProviderType.FAKE:
+            # 假提供商不需要密钥
+            return "fake"
+        
         key_mapping = {
             ProviderType.DASHSCOPE: "dashscope_api_key",
             ProviderType.OPENAI: "openai_api_key",
@@ -157,12 +265,13 @@ class LLMManager:
     
     def call(self, prompt: str, input_data: Any = None, **kwargs) -> str:
         """调用LLM"""
-        if not self.current_provider:
+        if not self.current_provider and not self.router:
             raise ValueError("未配置LLM提供商，请在设置页面配置API密钥")
         
+        started = time.monotonic()
+        provider = self.settings.get("llm_provider", "dashscope")
+        model = self.settings.get("model_name", "qwen-plus")
         try:
-            provider = self.settings.get("llm_provider", "dashscope")
-            model = self.settings.get("model_name", "qwen-plus")
             write_llm_debug_event(
                 "call_start",
                 {
@@ -173,7 +282,15 @@ class LLMManager:
                     "kwargs": kwargs,
                 },
             )
-            response = self.current_provider.call(prompt, input_data, **kwargs)
+            if self.router:
+                response, route = self.router.call(
+                    prompt, input_data,
+                    estimated_tokens=self._estimate_input_tokens(prompt, input_data),
+                    **kwargs
+                )
+                provider, model = route.provider_type.value, route.model_name
+            else:
+                response = self.current_provider.call(prompt, input_data, **kwargs)
             write_llm_debug_event(
                 "call_success",
                 {
@@ -185,9 +302,11 @@ class LLMManager:
                 },
             )
             write_llm_debug_blob("llm_response", response.content or "")
+            record_llm_call(time.monotonic() - started, response.queue_wait, response.usage, provider, model)
             return response.content
         except Exception as e:
             logger.error(f"LLM调用失败: {e}")
+            record_llm_call(time.monotonic() - started, provider=provider, model=model, success=False)
             write_llm_debug_event(
                 "call_error",
                 {
@@ -198,6 +317,20 @@ class LLMManager:
             )
             raise
     
+    @staticmethod
+    def _estimate_input_tokens(prompt: str, input_data: Any = None) -> int:
+        """估算一次调用的输入token数，用于TPM预算"""
+        tokens = estimate_tokens(prompt)
+        if input_data:
+            if isinstance(input_data, (dict, list)):
+                input_data = json.dumps(input_data, ensure_ascii=False)
+            tokens += estimate_tokens(str(input_data))
+        return tokens
+
+    def get_router_status(self) -> List[Dict[str, Any]]:
+        """获取路由层状态（未启用时返回空列表）"""
+        return self.router.get_status() if self.router else []
+
     def call_with_retry(self, prompt: str, input_data: Any = None, max_retries: int = 3, **kwargs) -> str:
         """带重试机制的LLM调用"""
         for attempt in range(max_retries):
@@ -210,7 +343,7 @@ class LLMManager:
                     logger.error(f"LLM调用在{max_retries}次重试后彻底失败。")
                     raise
                 logger.warning(f"第{attempt + 1}次调用失败，准备重试: {str(e)}")
-                import time
+                record_llm_retry()
                 time.sleep(2 ** attempt)  # 指数退避
         return ""
     
@@ -238,13 +371,44 @@ class LLMManager:
             "display_name": self._get_provider_display_name(provider_type)
         }
     
+    def get_model_context_window(self, model_name: Optional[str] = None,
+                                 default: int = 8192) -> int:
+        """
+        获取模型的上下文窗口大小（token数）
+
+        Args:
+            model_name: 模型名称，默认使用当前设置的模型
+            default: 无法识别模型时返回的默认值
+
+        Returns:
+            上下文窗口token数
+        """
+        model_name = model_name or self.settings.get("model_name", "qwen-plus")
+
+        if self.current_provider:
+            try:
+                for model in self.current_provider.get_available_models():
+                    if model.name == model_name:
+                        return model.context_window or default
+            except Exception as e:
+                logger.warning(f"获取当前提供商模型列表失败: {e}")
+
+        for models in LLMProviderFactory.get_all_available_models().values():
+            for model in models:
+                if model.name == model_name:
+                    return model.context_window or default
+
+        logger.warning(f"未找到模型{model_name}的上下文窗口信息，使用默认值{default}")
+        return default
+
     def _get_provider_display_name(self, provider_type: ProviderType) -> str:
         """获取提供商显示名称"""
         display_names = {
             ProviderType.DASHSCOPE: "阿里通义千问",
             ProviderType.OPENAI: "OpenAI",
             ProviderType.GEMINI: "Google Gemini",
-            ProviderType.SILICONFLOW: "硅基流动"
+            ProviderType.SILICONFLOW: "硅基流动",
+            ProviderType.FAKE: "Fake (offline)"
         }
         return display_names.get(provider_type, provider_type.value)
     
@@ -260,6 +424,7 @@ class LLMManager:
                     "name": model.name,
                     "display_name": model.display_name,
                     "max_tokens": model.max_tokens,
+                    "context_window": model.context_window,
                     "description": model.description
                 }
                 for model in models
@@ -5,6 +5,11 @@
 import json
 import logging
 import os
+import random
+import re
+import threading
+import time
+import zlib
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional, Union
 from enum import Enum
@@ -19,6 +24,7 @@ class ProviderType(Enum):
     OPENAI = "openai"        # OpenAI
     GEMINI = "gemini"        # Google Gemini
     SILICONFLOW = "siliconflow"  # 硅基流动
+    FAKE = "fake"            # 离线假提供商（基准测试用）
 
 @dataclass
 class ModelInfo:
@@ -29,6 +35,7 @@ class ModelInfo:
     max_tokens: int
     cost_per_token: Optional[float] = None
     description: Optional[str] = None
+    context_window: Optional[int] = None  # 上下文窗口（输入+输出），max_tokens 是输出上限
 
 @dataclass
 class LLMResponse:
@@ -37,6 +44,34 @@ class LLMResponse:
     usage: Optional[Dict[str, Any]] = None
     model: Optional[str] = None
     finish_reason: Optional[str] = None
+    queue_wait: float = 0.0  # 路由层等待限额预算的时间（秒）
+
+def _read_usage(usage: Any, prompt_key: str, completion_key: str, total_key: str) -> Optional[Dict[str, int]]:
+    """
+    将SDK返回的用量（dict或属性对象）统一为 prompt_tokens/completion_tokens/total_tokens
+
+    Returns:
+        用量字典，SDK没有返回用量时为None
+    """
+    if usage is None:
+        return None
+
+    def read(key: str) -> Optional[int]:
+        value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    prompt_tokens, completion_tokens, total_tokens = read(prompt_key), read(completion_key), read(total_key)
+    if prompt_tokens is None and completion_tokens is None:
+        return None
+    prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens if total_tokens is not None else prompt_tokens + completion_tokens,
+    }
 
 class LLMProvider(ABC):
     """LLM提供商抽象基类"""
@@ -147,6 +182,8 @@ class DashScopeProvider(LLMProvider):
                 if content is not None:
                     return LLMResponse(
                         content=content,
+                        usage=_read_usage(getattr(response, 'usage', None),
+                                          "input_tokens", "output_tokens", "total_tokens"),
                         model=self.model_name,
                         finish_reason=getattr(response.output, 'finish_reason', None)
                     )
@@ -181,6 +218,7 @@ class DashScopeProvider(LLMProvider):
                 display_name="Qwen Plus",
                 provider=ProviderType.DASHSCOPE,
                 max_tokens=8192,
+                context_window=131072,
                 description="Modelo Qwen Plus de Alibaba Cloud"
             ),
             ModelInfo(
@@ -188,6 +226,7 @@ class DashScopeProvider(LLMProvider):
                 display_name="Qwen Max",
                 provider=ProviderType.DASHSCOPE,
                 max_tokens=8192,
+                context_window=32768,
                 description="Modelo Qwen Max de Alibaba Cloud"
             ),
             ModelInfo(
@@ -195,6 +234,7 @@ class DashScopeProvider(LLMProvider):
                 display_name="Qwen Turbo",
                 provider=ProviderType.DASHSCOPE,
                 max_tokens=8192,
+                context_window=131072,
                 description="Modelo Qwen Turbo de Alibaba Cloud"
             )
         ]
@@ -256,6 +296,7 @@ class OpenAIProvider(LLMProvider):
                 display_name="GPT-3.5 Turbo",
                 provider=ProviderType.OPENAI,
                 max_tokens=4096,
+                context_window=16385,
                 description="Modelo OpenAI GPT-3.5 Turbo"
             ),
             ModelInfo(
@@ -263,6 +304,7 @@ class OpenAIProvider(LLMProvider):
                 display_name="GPT-4",
                 provider=ProviderType.OPENAI,
                 max_tokens=8192,
+                context_window=8192,
                 description="Modelo OpenAI GPT-4"
             ),
             ModelInfo(
@@ -270,6 +312,7 @@ class OpenAIProvider(LLMProvider):
                 display_name="GPT-4 Turbo",
                 provider=ProviderType.OPENAI,
                 max_tokens=128000,
+                context_window=128000,
                 description="Modelo OpenAI GPT-4 Turbo"
             )
         ]
@@ -295,6 +338,8 @@ class GeminiProvider(LLMProvider):
             
             return LLMResponse(
                 content=response.text,
+                usage=_read_usage(getattr(response, 'usage_metadata', None),
+                                  "prompt_token_count", "candidates_token_count", "total_token_count"),
                 model=self.model_name,
                 finish_reason=getattr(response, 'finish_reason', None)
             )
@@ -320,6 +365,7 @@ class GeminiProvider(LLMProvider):
                 display_name="Gemini 2.5 Flash",
                 provider=ProviderType.GEMINI,
                 max_tokens=1000000,
+                context_window=1048576,
                 description="Modelo Google Gemini 2.5 Flash"
             ),
             ModelInfo(
@@ -327,6 +373,7 @@ class GeminiProvider(LLMProvider):
                 display_name="Gemini 1.5 Pro",
                 provider=ProviderType.GEMINI,
                 max_tokens=2000000,
+                context_window=2097152,
                 description="Modelo Google Gemini 1.5 Pro"
             ),
             ModelInfo(
@@ -334,6 +381,7 @@ class GeminiProvider(LLMProvider):
                 display_name="Gemini 1.5 Flash",
                 provider=ProviderType.GEMINI,
                 max_tokens=1000000,
+                context_window=1048576,
                 description="Modelo Google Gemini 1.5 Flash"
             )
         ]
@@ -348,7 +396,7 @@ class SiliconFlowProvider(LLMProvider):
     def call(self, prompt: str, input_data: Any = None, **kwargs) -> LLMResponse:
         """调用硅基流动API"""
         try:
-            import requests
+            from .worker_state import get_http_session
             
             full_input = self._build_full_input(prompt, input_data)
             
@@ -364,7 +412,7 @@ class SiliconFlowProvider(LLMProvider):
                 **kwargs
             }
             
-            response = requests.post(
+            response = get_http_session().post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
                 json=data,
@@ -405,6 +453,7 @@ class SiliconFlowProvider(LLMProvider):
                 display_name="Qwen2.5-7B",
                 provider=ProviderType.SILICONFLOW,
                 max_tokens=32768,
+                context_window=32768,
                 description="Modelo SiliconFlow Qwen2.5-7B"
             ),
             ModelInfo(
@@ -412,6 +461,7 @@ class SiliconFlowProvider(LLMProvider):
                 display_name="Qwen2.5-14B",
                 provider=ProviderType.SILICONFLOW,
                 max_tokens=32768,
+                context_window=32768,
                 description="Modelo SiliconFlow Qwen2.5-14B"
             ),
             ModelInfo(
@@ -419,6 +469,7 @@ class SiliconFlowProvider(LLMProvider):
                 display_name="Qwen2.5-32B",
                 provider=ProviderType.SILICONFLOW,
                 max_tokens=32768,
+                context_window=32768,
                 description="Modelo SiliconFlow Qwen2.5-32B"
             ),
             ModelInfo(
@@ -426,10 +477,212 @@ class SiliconFlowProvider(LLMProvider):
                 display_name="DeepSeek-V2.5",
                 provider=ProviderType.SILICONFLOW,
                 max_tokens=65536,
+                context_window=65536,
                 description="Modelo SiliconFlow DeepSeek-V2.5"
             )
         ]
 
+class FakeProvider(LLMProvider):
+    """
+    离线假提供商：根据输入数据的结构识别流水线步骤，返回符合提示词格式的确定性结果
+
+    不访问网络，用于在没有真实提供商时测量流水线吞吐。可配置每次调用的延迟，
+    并按概率注入普通错误、限流(429)错误和无法解析的响应。
+    """
+
+    _COMPACT_LINE = re.compile(r'^L(\d+)\s+(\d+):(\d{2}):(\d{2})\s')
+    _SRT_TIMES = re.compile(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})')
+    _CLIP_ID = re.compile(r'ID：(\S+)')
+
+    def __init__(self, api_key: str = "", model_name: str = "fake-llm", **kwargs):
+        super().__init__(api_key, model_name, **kwargs)
+        from .shared_config import (
+            FAKE_LLM_LATENCY, FAKE_LLM_ERROR_RATE, FAKE_LLM_RATE_LIMIT_RATE,
+            FAKE_LLM_MALFORMED_RATE, FAKE_LLM_SEED
+        )
+        self.latency = float(kwargs.get("latency", FAKE_LLM_LATENCY))
+        self.error_rate = float(kwargs.get("error_rate", FAKE_LLM_ERROR_RATE))
+        self.rate_limit_rate = float(kwargs.get("rate_limit_rate", FAKE_LLM_RATE_LIMIT_RATE))
+        self.malformed_rate = float(kwargs.get("malformed_rate", FAKE_LLM_MALFORMED_RATE))
+        self._random = random.Random(kwargs.get("seed", FAKE_LLM_SEED))
+        self._random_lock = threading.Lock()
+
+    def call(self, prompt: str, input_data: Any = None, **kwargs) -> LLMResponse:
+        """按输入结构生成响应"""
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        with self._random_lock:
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            error = RuntimeError("429 Too Many Requests (proveedor simulado)")
+            error.status_code = 429
+            raise error
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise RuntimeError("Error simulado del proveedor fake")
+
+        if roll < self.rate_limit_rate + self.error_rate + self.malformed_rate:
+            content = "Lo siento, no puedo generar la respuesta en este momento."
+        else:
+            content = self._respond(prompt, input_data)
+
+        from ..utils.token_estimator import estimate_tokens
+        prompt_tokens = estimate_tokens(self._build_full_input(prompt, input_data))
+        completion_tokens = estimate_tokens(content)
+        return LLMResponse(
+            content=content,
+            usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            },
+            model=self.model_name,
+            finish_reason="stop"
+        )
+
+    def _respond(self, prompt: str, input_data: Any) -> str:
+        """识别步骤并生成对应格式的响应"""
+        if isinstance(input_data, dict):
+            if "clusters" in input_data:
+                return self._dump(self._name_clusters(input_data["clusters"]))
+            if "srt_text" in input_data:
+                return self._dump(self._timeline(input_data.get("outline") or [], input_data["srt_text"]))
+            if "text" in input_data:
+                return self._outline(input_data["text"])
+        if isinstance(input_data, list) and input_data and isinstance(input_data[0], dict):
+            if "recommend_reason" in input_data[0]:
+                return self._dump({str(item.get("id")): self._title(item.get("title")) for item in input_data})
+            return self._dump([self._score(item, with_title="id" in item) for item in input_data])
+        if input_data is None:
+            return self._dump(self._cluster_from_prompt(prompt))
+        return "[]"
+
+    @staticmethod
+    def _dump(data: Any) -> str:
+        return json.dumps(data, ensure_ascii=False)
+
+    @staticmethod
+    def _stable_fraction(text: Any) -> float:
+        """由文本得到稳定的 [0, 1) 值"""
+        return (zlib.crc32(str(text).encode("utf-8")) % 1000) / 1000
+
+    @staticmethod
+    def _format_time(seconds: float) -> str:
+        millis = int(round(seconds * 1000))
+        return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d},{millis % 1000:03d}"
+
+    def _outline(self, text: str) -> str:
+        """Step 1：按文本长度均分为3-8个话题，输出Markdown列表"""
+        words = text.split()
+        if not words:
+            return ""
+        topic_count = min(max(len(words) // 600, 3), 8, max(len(words) // 20, 1))
+        section_size = -(-len(words) // topic_count)
+        lines = []
+        for number, start in enumerate(range(0, len(words), section_size), 1):
+            section = words[start:start + section_size]
+            lines.append(f"{number}. **{' '.join(section[:6])}**")
+            middle = len(section) // 2
+            lines.append(f"- {' '.join(section[:12])}")
+            lines.append(f"- {' '.join(section[middle:middle + 12])}")
+        return "\n".join(lines)
+
+    def _timeline(self, outlines: List[Dict[str, Any]], srt_text: str) -> List[Dict[str, Any]]:
+        """Step 2：将块内的字幕行均分给各话题"""
+        compact = []
+        for line in srt_text.splitlines():
+            match = self._COMPACT_LINE.match(line)
+            if match:
+                number, hours, minutes, seconds = (int(group) for group in match.groups())
+                compact.append((number, hours * 3600 + minutes * 60 + seconds))
+        if compact:
+            spans = [(number, number, seconds, seconds) for number, seconds in compact]
+        else:
+            spans = []
+            for start, end in self._SRT_TIMES.findall(srt_text):
+                spans.append((None, None, self._parse_time(start), self._parse_time(end)))
+        if not outlines or not spans:
+            return []
+
+        items = []
+        per_topic = max(len(spans) // len(outlines), 1)
+        for i, outline in enumerate(outlines):
+            first = i * per_topic
+            if first >= len(spans):
+                break
+            last = len(spans) - 1 if i == len(outlines) - 1 else min(first + per_topic, len(spans)) - 1
+            item = {
+                "outline": outline.get("title"),
+                "content": outline.get("subtopics") or [],
+                "start_time": self._format_time(spans[first][2]),
+                "end_time": self._format_time(spans[last][3]),
+            }
+            if compact:
+                item["start_line"], item["end_line"] = spans[first][0], spans[last][1]
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _parse_time(value: str) -> float:
+        clock, millis = value.split(",")
+        hours, minutes, seconds = (int(part) for part in clock.split(":"))
+        return hours * 3600 + minutes * 60 + seconds + int(millis) / 1000
+
+    def _title(self, outline: Any) -> str:
+        return f"Lo mejor de: {outline}"
+
+    def _score(self, item: Dict[str, Any], with_title: bool) -> Dict[str, Any]:
+        """Step 3（及合并模式的Step 3+4）：由话题文本得到稳定的分数"""
+        result = {
+            "final_score": round(0.55 + 0.4 * self._stable_fraction(item.get("outline")), 2),
+            "recommend_reason": f"Fragmento con buena densidad de informacion sobre {item.get('outline')}.",
+        }
+        if with_title:
+            result = {"id": str(item.get("id")), **result, "generated_title": self._title(item.get("outline"))}
+        return result
+
+    @staticmethod
+    def _name_clusters(clusters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Step 5：为本地聚类结果命名"""
+        results = []
+        for cluster in clusters:
+            keywords = " y ".join((cluster.get("keywords") or [])[:2]) or "temas relacionados"
+            results.append({
+                "cluster_id": str(cluster.get("cluster_id")),
+                "collection_title": f"Coleccion: {keywords}",
+                "collection_summary": f"{len(cluster.get('clips') or [])} fragmentos sobre {keywords}.",
+            })
+        return results
+
+    def _cluster_from_prompt(self, prompt: str, group_size: int = 5) -> List[Dict[str, Any]]:
+        """Step 5备选：按提示词中的切片ID顺序分组"""
+        clip_ids = self._CLIP_ID.findall(prompt)
+        return [
+            {
+                "collection_title": f"Coleccion {number}",
+                "collection_summary": "Fragmentos agrupados por orden de aparicion.",
+                "clip_ids": clip_ids[start:start + group_size],
+            }
+            for number, start in enumerate(range(0, len(clip_ids), group_size), 1)
+        ]
+
+    def test_connection(self) -> bool:
+        """假提供商始终可用"""
+        return True
+
+    def get_available_models(self) -> List[ModelInfo]:
+        """获取假提供商的模型"""
+        return [
+            ModelInfo(
+                name="fake-llm",
+                display_name="Fake LLM",
+                provider=ProviderType.FAKE,
+                max_tokens=32768,
+                context_window=32768,
+                description="Proveedor simulado sin red para pruebas y benchmarks"
+            )
+        ]
+
 class LLMProviderFactory:
     """LLM提供商工厂"""
     
@@ -438,6 +691,7 @@ class LLMProviderFactory:
         ProviderType.OPENAI: OpenAIProvider,
         ProviderType.GEMINI: GeminiProvider,
         ProviderType.SILICONFLOW: SiliconFlowProvider,
+        ProviderType.FAKE: FakeProvider,
     }
     
     @classmethod
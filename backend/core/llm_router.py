@@ -0,0 +1,306 @@
+"""
+LLM路由层 - 在多个API密钥/提供商/模型之间分摊调用
+
+- 平滑加权轮询（与nginx upstream相同的算法）选择路由
+- 每个路由独立的RPM/TPM滑动窗口预算
+- 遇到429限流时自动冷却该路由，并切换到其他路由重试
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .llm_providers import LLMProvider, LLMResponse, ProviderType
+from .pipeline_metrics import record_llm_retry
+
+logger = logging.getLogger(__name__)
+
+# 滑动窗口长度（秒）
+_WINDOW_SECONDS = 60.0
+
+# 只匹配429和限流措辞；额度耗尽（quota）等不可恢复错误不冷却重试
+_RATE_LIMIT_PATTERN = re.compile(
+    r'\b429\b|too many requests|rate.?limit|throttl',
+    re.IGNORECASE
+)
+
+
+class RateLimitExhaustedError(Exception):
+    """所有路由都处于限流/冷却状态且等待超时"""
+    pass
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """判断异常是否为限流(429)错误"""
+    status_code = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status_code is None and response is not None:
+        status_code = getattr(response, "status_code", None)
+    if status_code == 429:
+        return True
+    return bool(_RATE_LIMIT_PATTERN.search(str(error)))
+
+
+def _get_retry_after(error: Exception) -> Optional[float]:
+    """从异常携带的响应头中读取Retry-After（秒）"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class TokenUsage:
+    """滑动窗口中一次请求占用的token预算"""
+    timestamp: float
+    tokens: int
+
+
+@dataclass
+class LLMRoute:
+    """一个可用于调用的路由：提供商实例 + 密钥 + 模型"""
+    name: str
+    provider_type: ProviderType
+    model_name: str
+    provider: LLMProvider
+    weight: int = 1
+    rpm_limit: Optional[int] = None
+    tpm_limit: Optional[int] = None
+
+    current_weight: int = 0
+    cooldown_until: float = 0.0
+    consecutive_rate_limits: int = 0
+    total_calls: int = 0
+    total_tokens: int = 0
+    _request_times: Deque[float] = field(default_factory=deque)
+    _token_usage: Deque[TokenUsage] = field(default_factory=deque)
+
+    def _trim(self, now: float):
+        """移除滑动窗口外的记录"""
+        cutoff = now - _WINDOW_SECONDS
+        while self._request_times and self._request_times[0] <= cutoff:
+            self._request_times.popleft()
+        while self._token_usage and self._token_usage[0].timestamp <= cutoff:
+            self._token_usage.popleft()
+
+    def wait_time(self, now: float, tokens: int) -> float:
+        """
+        计算该路由还需等待多久才能接收一个新请求
+
+        Returns:
+            需要等待的秒数，0表示立即可用
+        """
+        self._trim(now)
+        wait = max(0.0, self.cooldown_until - now)
+
+        if self.rpm_limit and len(self._request_times) >= self.rpm_limit:
+            wait = max(wait, self._request_times[0] + _WINDOW_SECONDS - now)
+
+        if self.tpm_limit and self._token_usage:
+            used = sum(entry.tokens for entry in self._token_usage)
+            if used + tokens > self.tpm_limit:
+                # 找到释放足够额度的最早时间点
+                released = 0
+                for entry in self._token_usage:
+                    released += entry.tokens
+                    if used - released + tokens <= self.tpm_limit:
+                        wait = max(wait, entry.timestamp + _WINDOW_SECONDS - now)
+                        break
+                else:
+                    wait = max(wait, self._token_usage[-1].timestamp + _WINDOW_SECONDS - now)
+
+        return wait
+
+    def record_request(self, now: float, tokens: int) -> TokenUsage:
+        """
+        记录一次请求占用的预算
+
+        Returns:
+            该请求的预算记录，调用结束后通过 adjust_tokens 修正
+        """
+        entry = TokenUsage(now, tokens)
+        self._request_times.append(now)
+        self._token_usage.append(entry)
+        self.total_calls += 1
+        return entry
+
+    def adjust_tokens(self, entry: TokenUsage, actual: int):
+        """用实际token用量修正该请求的预估值（记录已移出窗口时只累计总量）"""
+        self.total_tokens += actual
+        entry.tokens = actual
+
+    def to_dict(self) -> Dict[str, Any]:
+        """路由状态（不含密钥）"""
+        now = time.monotonic()
+        self._trim(now)
+        return {
+            "name": self.name,
+            "provider": self.provider_type.value,
+            "model": self.model_name,
+            "weight": self.weight,
+            "rpm_limit": self.rpm_limit,
+            "tpm_limit": self.tpm_limit,
+            "requests_last_minute": len(self._request_times),
+            "tokens_last_minute": sum(entry.tokens for entry in self._token_usage),
+            "cooling_down": self.cooldown_until > now,
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - now), 1),
+            "total_calls": self.total_calls,
+            "total_tokens": self.total_tokens,
+        }
+
+
+class LLMRouter:
+    """多路由LLM调用器（线程安全）"""
+
+    def __init__(self, routes: List[LLMRoute], cooldown_seconds: float = 30.0,
+                 max_cooldown_seconds: float = 300.0, max_wait_seconds: float = 120.0):
+        """
+        Args:
+            routes: 路由列表
+            cooldown_seconds: 首次429后的冷却时间，连续429时指数增长
+            max_cooldown_seconds: 冷却时间上限
+            max_wait_seconds: 所有路由都不可用时的最长等待时间
+        """
+        if not routes:
+            raise ValueError("LLM路由列表不能为空")
+        self.routes = routes
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int, exclude: Optional[set] = None) -> LLMRoute:
+        """选择一个路由并占用其预算，见 acquire_with_usage"""
+        return self.acquire_with_usage(tokens, exclude)[0]
+
+    def acquire_with_usage(self, tokens: int,
+                           exclude: Optional[set] = None) -> Tuple[LLMRoute, TokenUsage]:
+        """
+        选择一个路由并占用其预算；所有路由都不可用时阻塞等待
+
+        Args:
+            tokens: 本次请求的预估token数
+            exclude: 本次调用中已经失败的路由名称
+
+        Returns:
+            (选中的路由, 本次请求的预算记录)
+        """
+        deadline = time.monotonic() + self.max_wait_seconds
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                candidates = [r for r in self.routes if not exclude or r.name not in exclude]
+                if not candidates:
+                    candidates = self.routes
+
+                waits = {r.name: r.wait_time(now, tokens) for r in candidates}
+                ready = [r for r in candidates if waits[r.name] <= 0]
+                if ready:
+                    route = self._pick_weighted(ready)
+                    return route, route.record_request(now, tokens)
+                min_wait = min(waits.values())
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RateLimitExhaustedError(
+                    f"所有LLM路由均已达到限额，等待{self.max_wait_seconds}秒后仍不可用"
+                )
+            sleep_for = min(min_wait, remaining)
+            logger.info(f"所有LLM路由暂不可用，等待{sleep_for:.1f}秒")
+            time.sleep(max(sleep_for, 0.05))
+
+    @staticmethod
+    def _pick_weighted(routes: List[LLMRoute]) -> LLMRoute:
+        """平滑加权轮询"""
+        total = 0
+        best = None
+        for route in routes:
+            route.current_weight += route.weight
+            total += route.weight
+            if best is None or route.current_weight > best.current_weight:
+                best = route
+        best.current_weight -= total
+        return best
+
+    def report_success(self, route: LLMRoute, entry: TokenUsage, usage: Optional[Dict[str, Any]]):
+        """记录成功调用并用实际用量修正该请求占用的TPM预算"""
+        actual = _extract_total_tokens(usage)
+        with self._lock:
+            route.consecutive_rate_limits = 0
+            route.adjust_tokens(entry, actual if actual is not None else entry.tokens)
+
+    def report_rate_limited(self, route: LLMRoute, error: Exception):
+        """将限流的路由置于冷却状态"""
+        retry_after = _get_retry_after(error)
+        with self._lock:
+            route.consecutive_rate_limits += 1
+            cooldown = retry_after or min(
+                self.cooldown_seconds * (2 ** (route.consecutive_rate_limits - 1)),
+                self.max_cooldown_seconds
+            )
+            route.cooldown_until = time.monotonic() + cooldown
+        logger.warning(f"LLM路由 {route.name} 触发限流，冷却{cooldown:.0f}秒: {error}")
+
+    def call(self, prompt: str, input_data: Any = None, estimated_tokens: int = 0,
+             **kwargs) -> Tuple[LLMResponse, LLMRoute]:
+        """
+        通过路由层调用LLM，限流时自动切换到其他路由
+
+        Returns:
+            (响应, 实际使用的路由)
+        """
+        failed = set()
+        last_error: Optional[Exception] = None
+        queue_wait = 0.0
+
+        for _ in range(len(self.routes)):
+            acquire_started = time.monotonic()
+            route, entry = self.acquire_with_usage(estimated_tokens, exclude=failed)
+            queue_wait += time.monotonic() - acquire_started
+            try:
+                response = route.provider.call(prompt, input_data, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.report_rate_limited(route, e)
+                record_llm_retry()
+                failed.add(route.name)
+                last_error = e
+                continue
+
+            self.report_success(route, entry, response.usage)
+            response.queue_wait = queue_wait
+            return response, route
+
+        raise last_error
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """获取所有路由的状态"""
+        with self._lock:
+            return [route.to_dict() for route in self.routes]
+
+
+def _extract_total_tokens(usage: Optional[Dict[str, Any]]) -> Optional[int]:
+    """从各提供商的usage结构中提取总token数"""
+    if not usage or not isinstance(usage, dict):
+        return None
+    for key in ("total_tokens", "total_token_count"):
+        if usage.get(key) is not None:
+            try:
+                return int(usage[key])
+            except (TypeError, ValueError):
+                return None
+    input_tokens = usage.get("input_tokens", usage.get("prompt_tokens"))
+    output_tokens = usage.get("output_tokens", usage.get("completion_tokens"))
+    if input_tokens is None and output_tokens is None:
+        return None
+    try:
+        return int(input_tokens or 0) + int(output_tokens or 0)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,139 @@
+"""
+流水线上下文 - 在同一次处理的各步骤之间直接传递内存中的中间结果
+
+SimplePipelineAdapter 为每次处理创建一个 PipelineContext 并绑定到上下文变量。
+Step 1 把分块结果放进上下文，Step 2 直接读取，不再经过磁盘往返；
+分块文件仍会写入 metadata 目录用于断点续跑和排查，但由后台线程以紧凑格式写出，
+LLM调用不必等待文件落盘。未绑定上下文时（单独运行某个步骤）各步骤按原方式读写文件。
+"""
+
+import contextvars
+import gzip
+import json
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_context: contextvars.ContextVar[Optional['PipelineContext']] = contextvars.ContextVar(
+    "autoclip_pipeline_context", default=None
+)
+
+
+def _artifact_path(path: Path, compress: bool) -> Path:
+    return path.with_name(path.name + ".gz") if compress else path
+
+
+def write_artifact(path: Path, content: str, compress: bool = False) -> Path:
+    """
+    写入中间产物（先写临时文件再替换），并删除另一种格式的旧文件
+
+    Args:
+        path: 未压缩时的文件路径
+        content: 文本内容
+        compress: 是否写为 gzip（文件名追加 .gz）
+
+    Returns:
+        实际写入的路径
+    """
+    target = _artifact_path(path, compress)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    data = content.encode("utf-8")
+    if compress:
+        data = gzip.compress(data, compresslevel=5)
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, target)
+    _artifact_path(path, not compress).unlink(missing_ok=True)
+    return target
+
+
+def write_json_artifact(path: Path, data: Any, compress: bool = False) -> Path:
+    """以紧凑JSON（无缩进）写入中间产物"""
+    return write_artifact(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")), compress)
+
+
+def read_artifact(path: Path) -> Optional[str]:
+    """读取中间产物，兼容压缩和未压缩两种格式；都不存在时返回None"""
+    if path.exists():
+        return path.read_text(encoding="utf-8")
+    compressed = _artifact_path(path, True)
+    if compressed.exists():
+        return gzip.decompress(compressed.read_bytes()).decode("utf-8")
+    return None
+
+
+def read_json_artifact(path: Path) -> Optional[Any]:
+    content = read_artifact(path)
+    return json.loads(content) if content is not None else None
+
+
+class PipelineContext:
+    """一次流水线处理的共享上下文"""
+
+    def __init__(self, project_id: str, metadata_dir: Path, compress_artifacts: bool = False):
+        """
+        Args:
+            project_id: 项目ID
+            metadata_dir: 项目的metadata目录
+            compress_artifacts: 中间产物是否以gzip压缩写出
+        """
+        self.project_id = project_id
+        self.metadata_dir = Path(metadata_dir)
+        self.compress_artifacts = compress_artifacts
+        # Step 1 的分块结果：chunk_index -> 块（包含 text 和 srt_entries）
+        self.step1_chunks: Dict[int, Dict] = {}
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pending: List[Future] = []
+
+    def set_step1_chunks(self, chunks: List[Dict]):
+        self.step1_chunks = {chunk["chunk_index"]: chunk for chunk in chunks}
+
+    def get_step1_chunk(self, chunk_index: int) -> Optional[Dict]:
+        return self.step1_chunks.get(chunk_index)
+
+    def submit_write(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """在后台写入线程中执行 func，写入按提交顺序进行"""
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"artifacts-{self.project_id}")
+        future = self._writer.submit(func, *args, **kwargs)
+        self._pending.append(future)
+        return future
+
+    def flush(self) -> int:
+        """
+        等待所有已提交的写入完成
+
+        Returns:
+            失败的写入数（失败只记录日志，不影响流水线结果）
+        """
+        failures = 0
+        pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                failures += 1
+                logger.warning(f"写入中间产物失败: {e}")
+        return failures
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+
+def bind_pipeline_context(context: Optional[PipelineContext]) -> contextvars.Token:
+    return _current_context.set(context)
+
+
+def unbind_pipeline_context(token: contextvars.Token):
+    _current_context.reset(token)
+
+
+def current_pipeline_context() -> Optional[PipelineContext]:
+    return _current_context.get()
@@ -0,0 +1,385 @@
+"""
+流水线指标 - 记录每个步骤、分块和LLM调用的耗时与用量
+
+SimplePipelineAdapter 为每次处理创建一个 PipelineMetrics 并绑定到上下文变量，
+LLM管理器、JSON解析和ffmpeg调用通过模块级的 record_* 函数写入当前绑定的记录器
+（未绑定时为空操作）。结果保存为项目的 metadata/metrics.json，
+并汇总为Prometheus文本格式供 /metrics 抓取。
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILENAME = "metrics.json"
+
+# 处理进行中时至少每隔这么久写一次 metrics.json（updated_at 作为心跳）
+HEARTBEAT_INTERVAL_SECONDS = 60
+# status 仍为 running 但超过这么久没有心跳的记录视为中断（进程崩溃或被杀死）
+STALE_RUN_SECONDS = 30 * 60
+
+# 步骤/分块/项目共用的累计字段
+_TOTAL_FIELDS = (
+    "llm_calls", "llm_failures", "llm_time", "queue_wait", "prompt_tokens", "completion_tokens",
+    "retries", "parse_failures", "ffmpeg_runs", "ffmpeg_failures", "ffmpeg_time",
+)
+
+_current_metrics: contextvars.ContextVar[Optional['PipelineMetrics']] = contextvars.ContextVar(
+    "autoclip_pipeline_metrics", default=None
+)
+
+
+def usage_tokens(usage: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    从各提供商的usage结构中提取 (输入token, 输出token)
+
+    兼容 OpenAI 风格（prompt_tokens/completion_tokens）、DashScope（input_tokens/output_tokens）
+    和 Gemini（prompt_token_count/candidates_token_count）。
+    """
+    if not usage or not isinstance(usage, dict):
+        return 0, 0
+
+    def first(*keys: str) -> int:
+        for key in keys:
+            value = usage.get(key)
+            if value is not None:
+                try:
+                    return int(value)
+                except (TypeError, ValueError):
+                    continue
+        return 0
+
+    return (first("prompt_tokens", "input_tokens", "prompt_token_count"),
+            first("completion_tokens", "output_tokens", "candidates_token_count"))
+
+
+def _empty_totals() -> Dict[str, float]:
+    return {name: 0 for name in _TOTAL_FIELDS}
+
+
+class PipelineMetrics:
+    """单次流水线处理的指标记录器"""
+
+    def __init__(self, project_id: str, output_path: Optional[Path] = None):
+        self.project_id = project_id
+        self.output_path = output_path
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.steps: List[Dict[str, Any]] = []
+        self.llm_calls: List[Dict[str, Any]] = []
+        self._step: Optional[Dict[str, Any]] = None
+        self._chunk: Optional[Dict[str, Any]] = None
+        self._step_started = 0.0
+        self._chunk_started = 0.0
+        self._last_saved = 0.0
+        self._lock = threading.Lock()
+
+    # ---- 步骤与分块 ----
+
+    def begin_step(self, name: str):
+        """开始一个步骤（自动结束上一个步骤），并保存阶段性结果"""
+        with self._lock:
+            self._close_step("succeeded")
+            self._step = {"name": name, "started_at": time.time(), "wall_time": 0.0,
+                          "status": "running", "chunks": [], **_empty_totals()}
+            self._step_started = time.monotonic()
+            self.steps.append(self._step)
+        self.save()
+
+    def begin_chunk(self, index: Any):
+        """开始当前步骤中的一个分块（自动结束上一个分块）"""
+        with self._lock:
+            if self._step is None:
+                return
+            self._close_chunk()
+            self._chunk = {"index": index, "wall_time": 0.0, **_empty_totals()}
+            self._chunk_started = time.monotonic()
+            self._step["chunks"].append(self._chunk)
+        self._heartbeat()
+
+    def _heartbeat(self):
+        """距上次保存超过心跳间隔时保存阶段性结果，长时间的步骤也能看出仍在运行"""
+        if self.status == "running" and time.monotonic() - self._last_saved >= HEARTBEAT_INTERVAL_SECONDS:
+            self.save()
+
+    def _close_chunk(self):
+        if self._chunk is not None:
+            self._chunk["wall_time"] = round(time.monotonic() - self._chunk_started, 3)
+            self._chunk = None
+
+    def _close_step(self, status: str):
+        self._close_chunk()
+        if self._step is not None:
+            self._step["wall_time"] = round(time.monotonic() - self._step_started, 3)
+            self._step["status"] = status
+            self._step = None
+
+    def finish(self, status: str = "succeeded", error: Optional[str] = None):
+        """结束处理：关闭当前步骤（失败时标记为failed）"""
+        with self._lock:
+            self._close_step(status)
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+
+    # ---- 事件 ----
+
+    def _add(self, **values: float):
+        """累加到当前分块、当前步骤"""
+        for target in (self._chunk, self._step):
+            if target is not None:
+                for key, value in values.items():
+                    target[key] += value
+
+    def record_llm_call(self, duration: float, queue_wait: float = 0.0, usage: Optional[Dict[str, Any]] = None,
+                        provider: Optional[str] = None, model: Optional[str] = None, success: bool = True):
+        prompt_tokens, completion_tokens = usage_tokens(usage)
+        with self._lock:
+            self.llm_calls.append({
+                "step": self._step["name"] if self._step else None,
+                "chunk": self._chunk["index"] if self._chunk else None,
+                "duration": round(duration, 3),
+                "queue_wait": round(queue_wait, 3),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "provider": provider,
+                "model": model,
+                "success": success,
+            })
+            self._add(llm_calls=1, llm_failures=0 if success else 1, llm_time=duration, queue_wait=queue_wait,
+                      prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        self._heartbeat()
+
+    def record_llm_retry(self):
+        with self._lock:
+            self._add(retries=1)
+
+    def record_parse_failure(self):
+        with self._lock:
+            self._add(parse_failures=1)
+
+    def record_ffmpeg(self, duration: float, success: bool = True):
+        with self._lock:
+            self._add(ffmpeg_runs=1, ffmpeg_failures=0 if success else 1, ffmpeg_time=duration)
+        self._heartbeat()
+
+    # ---- 输出 ----
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = [dict(step, chunks=[dict(chunk) for chunk in step["chunks"]]) for step in self.steps]
+            if self._step is not None:
+                steps[-1]["wall_time"] = round(time.monotonic() - self._step_started, 3)
+            totals = _empty_totals()
+            for step in steps:
+                for key in _TOTAL_FIELDS:
+                    totals[key] += step[key]
+            end = self.finished_at or time.time()
+            return {
+                "project_id": self.project_id,
+                "status": self.status,
+                "error": self.error,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "updated_at": time.time(),
+                "wall_time": round(end - self.started_at, 3),
+                "totals": {key: round(value, 3) for key, value in totals.items()},
+                "steps": steps,
+                "llm_calls": list(self.llm_calls),
+            }
+
+    def save(self):
+        """写入metrics.json（原子替换），失败只记录警告"""
+        if self.output_path is None:
+            return
+        self._last_saved = time.monotonic()
+        try:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.output_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.output_path)
+        except OSError as e:
+            logger.warning(f"保存流水线指标失败: {e}")
+
+
+def bind_pipeline_metrics(metrics: Optional[PipelineMetrics]) -> contextvars.Token:
+    return _current_metrics.set(metrics)
+
+
+def unbind_pipeline_metrics(token: contextvars.Token):
+    _current_metrics.reset(token)
+
+
+def current_metrics() -> Optional[PipelineMetrics]:
+    return _current_metrics.get()
+
+
+def begin_chunk(index: Any):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.begin_chunk(index)
+
+
+def record_llm_call(duration: float, queue_wait: float = 0.0, usage: Optional[Dict[str, Any]] = None,
+                    provider: Optional[str] = None, model: Optional[str] = None, success: bool = True):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_llm_call(duration, queue_wait, usage, provider, model, success)
+
+
+def record_llm_retry():
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_llm_retry()
+
+
+def record_parse_failure():
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_parse_failure()
+
+
+def record_ffmpeg(duration: float, success: bool = True):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_ffmpeg(duration, success)
+
+
+def load_project_metrics(project_dir: Path) -> Optional[Dict[str, Any]]:
+    """读取项目的metrics.json，不存在时返回None"""
+    metrics_path = project_dir / "metadata" / METRICS_FILENAME
+    if not metrics_path.exists():
+        return None
+    with open(metrics_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ---- Prometheus ----
+
+_summary_cache: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+_summary_cache_lock = threading.Lock()
+
+
+def _cached_project_metrics(metrics_path: Path) -> Optional[Dict[str, Any]]:
+    """按修改时间缓存解析结果，抓取时只重新读取变化的文件"""
+    try:
+        mtime_ns = metrics_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _summary_cache_lock:
+        cached = _summary_cache.get(metrics_path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+    try:
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    with _summary_cache_lock:
+        _summary_cache[metrics_path] = (mtime_ns, data)
+    return data
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _run_status(data: Dict[str, Any], now: float, stale_after: float) -> str:
+    """记录中的状态；running 但心跳（旧记录为开始时间）已超时的视为 stale"""
+    status = data.get("status", "unknown")
+    if status == "running":
+        last_seen = data.get("updated_at") or data.get("started_at") or 0
+        if now - last_seen > stale_after:
+            return "stale"
+    return status
+
+
+def render_prometheus(project_metrics: Iterable[Dict[str, Any]], now: Optional[float] = None,
+                      stale_after: float = STALE_RUN_SECONDS) -> str:
+    """
+    将各项目的指标汇总为Prometheus文本格式（按步骤聚合）
+
+    数值由当前保存的 metrics.json 重新汇总（项目删除或重新处理时会变小），因此全部输出为gauge。
+
+    Args:
+        project_metrics: 各项目 metrics.json 的内容
+        now: 当前时间戳，默认为 time.time()
+        stale_after: running 状态超过该秒数没有心跳时按 stale 统计
+    """
+    now = time.time() if now is None else now
+    step_totals: Dict[str, Dict[str, float]] = {}
+    step_counts: Dict[Tuple[str, str], int] = {}
+    runs: Dict[str, int] = {}
+    for data in project_metrics:
+        status = _run_status(data, now, stale_after)
+        runs[status] = runs.get(status, 0) + 1
+        for step in data.get("steps", []):
+            totals = step_totals.setdefault(step["name"], {"wall_time": 0.0, **_empty_totals()})
+            totals["wall_time"] += step.get("wall_time", 0.0)
+            for key in _TOTAL_FIELDS:
+                totals[key] += step.get(key, 0)
+            step_status = step.get("status", "unknown")
+            if step_status == "running" and status == "stale":
+                step_status = "stale"
+            count_key = (step["name"], step_status)
+            step_counts[count_key] = step_counts.get(count_key, 0) + 1
+
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{labels} {round(value, 3) if isinstance(value, float) else value}")
+
+    def by_step(key: str) -> List[Tuple[str, float]]:
+        return [(f'{{step="{_escape_label(step)}"}}', totals[key]) for step, totals in sorted(step_totals.items())]
+
+    metric("autoclip_pipeline_runs", "gauge",
+           "Pipeline runs with persisted metrics by status (stale: running without a recent heartbeat).",
+           [(f'{{status="{_escape_label(status)}"}}', count) for status, count in sorted(runs.items())])
+    metric("autoclip_pipeline_running", "gauge", "Pipeline runs currently in progress.", [("", runs.get("running", 0))])
+    metric("autoclip_step_runs", "gauge", "Pipeline step executions in persisted metrics.",
+           [(f'{{step="{_escape_label(step)}",status="{_escape_label(status)}"}}', count)
+            for (step, status), count in sorted(step_counts.items())])
+    metric("autoclip_step_seconds", "gauge", "Wall time spent in each pipeline step.", by_step("wall_time"))
+    metric("autoclip_llm_calls", "gauge", "LLM calls made by each step.", by_step("llm_calls"))
+    metric("autoclip_llm_failures", "gauge", "Failed LLM calls by step.", by_step("llm_failures"))
+    metric("autoclip_llm_seconds", "gauge", "Time spent waiting on LLM responses.", by_step("llm_time"))
+    metric("autoclip_llm_queue_wait_seconds", "gauge", "Time LLM calls waited for rate-limit budget.",
+           by_step("queue_wait"))
+    metric("autoclip_llm_prompt_tokens", "gauge", "Prompt tokens reported by providers.",
+           by_step("prompt_tokens"))
+    metric("autoclip_llm_completion_tokens", "gauge", "Completion tokens reported by providers.",
+           by_step("completion_tokens"))
+    metric("autoclip_llm_retries", "gauge", "LLM call retries.", by_step("retries"))
+    metric("autoclip_llm_parse_failures", "gauge", "LLM responses that could not be parsed as JSON.",
+           by_step("parse_failures"))
+    metric("autoclip_ffmpeg_runs", "gauge", "ffmpeg invocations by step.", by_step("ffmpeg_runs"))
+    metric("autoclip_ffmpeg_failures", "gauge", "Failed ffmpeg invocations by step.",
+           by_step("ffmpeg_failures"))
+    metric("autoclip_ffmpeg_seconds", "gauge", "Time spent in ffmpeg by step.", by_step("ffmpeg_time"))
+    return "\n".join(lines) + "\n"
+
+
+def collect_prometheus_metrics(projects_dir: Optional[Path] = None) -> str:
+    """汇总所有项目的metrics.json并输出Prometheus文本"""
+    if projects_dir is None:
+        from .path_utils import get_projects_directory
+        projects_dir = get_projects_directory()
+    project_metrics = []
+    for metrics_path in projects_dir.glob(f"*/metadata/{METRICS_FILENAME}"):
+        data = _cached_project_metrics(metrics_path)
+        if data is not None:
+            project_metrics.append(data)
+    return render_prometheus(project_metrics)
@@ -0,0 +1,316 @@
+"""
+项目日志 - 按项目写入结构化JSON行日志
+
+流水线、ffmpeg和LLM调用的日志通过上下文变量关联到当前项目，
+由挂在根logger上的 ProjectLogHandler 写入 data/projects/{id}/logs/project.{pid}.jsonl。
+API进程和各个worker进程各写各的文件并各自按大小轮转（RotatingFileHandler 不能在多个进程间
+共享同一个文件）；读取时从每个文件末尾向前查找，再按时间戳合并，不加载整个文件；
+实时跟踪通过轮询各文件的增量实现。
+"""
+
+import asyncio
+import contextvars
+import inspect
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+PROJECT_LOG_DIRNAME = "logs"
+PROJECT_LOG_FILENAME = "project.jsonl"
+# 当前日志文件（不含轮转文件）：project.{pid}.jsonl，以及旧版本的 project.jsonl
+PROJECT_LOG_GLOB = "project*.jsonl"
+
+# 同时保持打开的项目日志文件数量
+MAX_OPEN_PROJECT_LOGS = 16
+
+_current_project_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "autoclip_project_id", default=None
+)
+
+# LogRecord 自带的属性，其余属性视为 extra 字段写入日志
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def get_current_project_id() -> Optional[str]:
+    """当前上下文绑定的项目ID"""
+    return _current_project_id.get()
+
+
+def bind_project_id(project_id: Optional[str]) -> contextvars.Token:
+    """将当前上下文绑定到项目，返回用于解绑的token"""
+    return _current_project_id.set(str(project_id) if project_id else None)
+
+
+def unbind_project_id(token: contextvars.Token):
+    _current_project_id.reset(token)
+
+
+@contextmanager
+def project_log_context(project_id: Optional[str]) -> Iterator[None]:
+    """在上下文内产生的日志写入该项目的日志文件"""
+    token = bind_project_id(project_id)
+    try:
+        yield
+    finally:
+        unbind_project_id(token)
+
+
+def project_id_from_call(func: Callable, args: tuple, kwargs: dict) -> Optional[str]:
+    """从函数调用参数中取出 project_id（用于Celery任务）"""
+    try:
+        bound = inspect.signature(func).bind_partial(*(args or ()), **(kwargs or {}))
+    except (TypeError, ValueError):
+        return None
+    project_id = bound.arguments.get("project_id")
+    return str(project_id) if project_id else None
+
+
+def _projects_directory(projects_dir: Optional[Path]) -> Path:
+    if projects_dir is not None:
+        return projects_dir
+    from .path_utils import get_projects_directory
+    return get_projects_directory()
+
+
+def project_log_dir(project_id: str, projects_dir: Optional[Path] = None) -> Path:
+    """项目日志目录"""
+    return _projects_directory(projects_dir) / project_id / PROJECT_LOG_DIRNAME
+
+
+def project_log_path(project_id: str, projects_dir: Optional[Path] = None, pid: Optional[int] = None) -> Path:
+    """某个进程（默认当前进程）写入的项目日志文件路径"""
+    stem, suffix = os.path.splitext(PROJECT_LOG_FILENAME)
+    return project_log_dir(project_id, projects_dir) / f"{stem}.{pid or os.getpid()}{suffix}"
+
+
+def project_log_files(project_id: str, projects_dir: Optional[Path] = None) -> List[Path]:
+    """项目当前的日志文件（每个写过日志的进程一个，不含轮转文件）"""
+    log_dir = project_log_dir(project_id, projects_dir)
+    if not log_dir.is_dir():
+        return []
+    return sorted(log_dir.glob(PROJECT_LOG_GLOB))
+
+
+class JsonLineFormatter(logging.Formatter):
+    """将日志记录格式化为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")
+                         .replace("+00:00", "Z"),
+            "level": record.levelname,
+            "module": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRS and key not in entry and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ProjectLogHandler(logging.Handler):
+    """按项目分发日志记录的处理器，每个项目每个进程一个轮转文件"""
+
+    def __init__(self, projects_dir: Optional[Path] = None, max_bytes: int = 5 * 1024 * 1024,
+                 backup_count: int = 3, level: int = logging.INFO):
+        super().__init__(level)
+        self.projects_dir = projects_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.formatter = JsonLineFormatter()
+        self._handlers: "OrderedDict[str, RotatingFileHandler]" = OrderedDict()
+        self._handlers_lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _handler_for(self, project_id: str) -> Optional[RotatingFileHandler]:
+        with self._handlers_lock:
+            if self._pid != os.getpid():
+                # fork出的子进程不沿用父进程的文件（也不关闭，避免写出父进程缓冲区中的内容）
+                self._handlers = OrderedDict()
+                self._pid = os.getpid()
+            handler = self._handlers.get(project_id)
+            if handler is not None:
+                self._handlers.move_to_end(project_id)
+                return handler
+
+            # 项目目录不存在（已删除或ID无效）时不创建日志
+            project_dir = _projects_directory(self.projects_dir) / project_id
+            if not project_dir.is_dir():
+                return None
+            log_path = project_log_path(project_id, project_dir.parent)
+            log_path.parent.mkdir(exist_ok=True)
+            handler = RotatingFileHandler(log_path, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                                          encoding="utf-8", delay=True)
+            handler.setFormatter(self.formatter)
+            self._handlers[project_id] = handler
+
+            while len(self._handlers) > MAX_OPEN_PROJECT_LOGS:
+                _, evicted = self._handlers.popitem(last=False)
+                evicted.close()
+            return handler
+
+    def emit(self, record: logging.LogRecord):
+        project_id = getattr(record, "project_id", None) or _current_project_id.get()
+        if not project_id:
+            return
+        try:
+            handler = self._handler_for(str(project_id))
+            if handler is not None:
+                handler.handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        with self._handlers_lock:
+            for handler in self._handlers.values():
+                handler.close()
+            self._handlers.clear()
+        super().close()
+
+
+def install_project_log_handler() -> Optional[ProjectLogHandler]:
+    """在根logger上安装项目日志处理器（重复调用只安装一次）"""
+    from .shared_config import (
+        ENABLE_PROJECT_LOGS, PROJECT_LOG_BACKUP_COUNT, PROJECT_LOG_LEVEL, PROJECT_LOG_MAX_BYTES
+    )
+    if not ENABLE_PROJECT_LOGS:
+        return None
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers:
+        if isinstance(handler, ProjectLogHandler):
+            return handler
+
+    handler = ProjectLogHandler(max_bytes=PROJECT_LOG_MAX_BYTES, backup_count=PROJECT_LOG_BACKUP_COUNT,
+                                level=getattr(logging, PROJECT_LOG_LEVEL, logging.INFO))
+    root_logger.addHandler(handler)
+    return handler
+
+
+def tail_lines(path: Path, count: int, end: Optional[int] = None, block_size: int = 8192) -> List[bytes]:
+    """
+    从文件末尾向前按块读取最后若干行
+
+    Args:
+        path: 文件路径
+        count: 行数
+        end: 只读取该字节偏移之前的内容，默认读到文件末尾
+        block_size: 每次向前读取的字节数
+
+    Returns:
+        最后count行（不含换行符，按文件顺序）
+    """
+    if count <= 0:
+        return []
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END) if end is None else end
+        buffer = b""
+        while position > 0 and buffer.count(b"\n") <= count:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            buffer = f.read(size) + buffer
+    lines = buffer.splitlines()
+    if position > 0:
+        # 第一行可能被块边界截断
+        lines = lines[1:]
+    return lines[-count:]
+
+
+def _parse_lines(lines: List[bytes]) -> List[Dict[str, Any]]:
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def _entry_timestamp(entry: Dict[str, Any]) -> str:
+    return str(entry.get("timestamp", ""))
+
+
+def _tail_with_rotations(log_path: Path, lines: int, end: Optional[int] = None) -> List[bytes]:
+    """读取一个日志文件最后若干行，当前文件不足时继续读取它的轮转文件"""
+    collected: List[bytes] = []
+    candidates = [log_path] + [log_path.with_name(f"{log_path.name}.{i}") for i in range(1, 100)]
+    for index, path in enumerate(candidates):
+        if len(collected) >= lines or not path.exists():
+            break
+        collected = tail_lines(path, lines - len(collected), end if index == 0 else None) + collected
+    return collected
+
+
+def read_project_log(project_id: str, lines: int = 50, projects_dir: Optional[Path] = None,
+                     ends: Optional[Dict[Path, int]] = None) -> List[Dict[str, Any]]:
+    """
+    读取项目最近的日志，合并各进程的日志文件（当前文件不足时继续读取轮转文件）
+
+    Args:
+        project_id: 项目ID
+        lines: 条数
+        projects_dir: 项目根目录，默认为数据目录下的projects
+        ends: 各当前日志文件只读取该字节偏移之前的内容；指定时只读取其中列出的文件
+
+    Returns:
+        日志条目列表（按时间顺序）
+    """
+    log_paths = list(ends) if ends is not None else project_log_files(project_id, projects_dir)
+    entries: List[Dict[str, Any]] = []
+    for log_path in log_paths:
+        entries.extend(_parse_lines(_tail_with_rotations(log_path, lines, (ends or {}).get(log_path))))
+    entries.sort(key=_entry_timestamp)
+    return entries[-lines:] if lines > 0 else []
+
+
+async def follow_project_log(project_id: str, initial_lines: int = 50, poll_interval: float = 0.5,
+                             projects_dir: Optional[Path] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    跟踪项目日志：先返回最近的日志，之后每次轮询返回各进程日志文件新增的条目（可能为空列表）
+
+    新出现的日志文件从开头读取；文件被轮转（inode变化或变短）时从新文件开头继续读取。
+    """
+    # 日志文件 -> [inode, 已读偏移, 未完成的行]
+    positions: Dict[Path, List[Any]] = {}
+    for log_path in project_log_files(project_id, projects_dir):
+        try:
+            stat = log_path.stat()
+        except FileNotFoundError:
+            continue
+        positions[log_path] = [stat.st_ino, stat.st_size, b""]
+
+    yield read_project_log(project_id, initial_lines, projects_dir,
+                           ends={path: state[1] for path, state in positions.items()})
+
+    while True:
+        await asyncio.sleep(poll_interval)
+        entries: List[Dict[str, Any]] = []
+        for log_path in project_log_files(project_id, projects_dir):
+            try:
+                stat = log_path.stat()
+            except FileNotFoundError:
+                continue
+            state = positions.setdefault(log_path, [stat.st_ino, 0, b""])
+            if stat.st_ino != state[0] or stat.st_size < state[1]:
+                state[:] = [stat.st_ino, 0, b""]
+            if stat.st_size == state[1]:
+                continue
+
+            with open(log_path, "rb") as f:
+                f.seek(state[1])
+                chunk = f.read(stat.st_size - state[1])
+            state[1] += len(chunk)
+            *complete, state[2] = (state[2] + chunk).split(b"\n")
+            entries.extend(_parse_lines(complete))
+        entries.sort(key=_entry_timestamp)
+        yield entries
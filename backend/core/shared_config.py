@@ -96,7 +96,9 @@ PROMPT_FILES = {
     "recommendation": PROMPT_DIR / "推荐理由.txt",
     "title": PROMPT_DIR / "标题生成.txt",
     "clustering": PROMPT_DIR / "主题聚类.txt",
-    "collection_title": PROMPT_DIR / "collection_title.txt"
+    "collection_title": PROMPT_DIR / "collection_title.txt",
+    "cluster_naming": PROMPT_DIR / "合集命名.txt",
+    "score_title": PROMPT_DIR / "评分标题.txt"
 }
 
 # API配置
@@ -113,6 +115,72 @@ SPEECH_RECOGNITION_TIMEOUT = int(os.getenv("SPEECH_RECOGNITION_TIMEOUT", "1000")
 CHUNK_SIZE = 5000  # 文本分块大小
 MIN_SCORE_THRESHOLD = 0.7  # 最低评分阈值
 MAX_CLIPS_PER_COLLECTION = 5  # 每个合集最大切片数
+FUSED_SCORE_TITLE = os.getenv("FUSED_SCORE_TITLE", "false").lower() == "true"  # 评分与标题生成合并为一次LLM调用
+
+# 新增：音频高光信号参数
+ENABLE_AUDIO_SIGNAL = os.getenv("ENABLE_AUDIO_SIGNAL", "true").lower() == "true"  # 是否分析音频能量/语速
+AUDIO_SIGNAL_WEIGHT = 0.2  # 音频信号分数在final_score中的权重
+DEAD_SEGMENT_ACTIVE_RATIO = 0.2  # 有声秒数占比低于该值的片段直接跳过LLM评分
+
+# 新增：切片边界吸附参数
+ENABLE_BOUNDARY_SNAPPING = os.getenv("ENABLE_BOUNDARY_SNAPPING", "true").lower() == "true"  # 是否将切片边界吸附到停顿/镜头切换
+BOUNDARY_SNAP_TOLERANCE = 1.5  # 吸附容差（秒）
+SCENE_CUT_THRESHOLD = 0.3  # ffmpeg scene检测阈值
+SILENCE_NOISE_DB = -35.0  # silencedetect噪声阈值(dB)
+SILENCE_MIN_DURATION = 0.3  # 最短静音时长（秒）
+
+# 新增：虚拟切片参数
+VIRTUAL_CLIPS = os.getenv("VIRTUAL_CLIPS", "false").lower() == "true"  # Step 6不预先切割，播放时按需从源视频remux
+VIRTUAL_CLIP_CACHE_MAX_MB = int(os.getenv("VIRTUAL_CLIP_CACHE_MAX_MB", "2048"))  # 按需remux结果的磁盘缓存上限
+
+# 新增：HLS预览参数
+ENABLE_HLS_PREVIEW = os.getenv("ENABLE_HLS_PREVIEW", "true").lower() == "true"  # 处理时将源视频打包为HLS，用于切片预览和拖动
+HLS_SEGMENT_SECONDS = 4  # HLS目标分片时长（秒，实际在关键帧处切分）
+
+# 新增：批量缩略图参数
+ENABLE_BATCH_THUMBNAILS = os.getenv("ENABLE_BATCH_THUMBNAILS", "true").lower() == "true"  # 一次解码生成切片缩略图和雪碧图
+SPRITE_INTERVAL_SECONDS = 10  # 雪碧图每格间隔（秒）
+SPRITE_MAX_TILES = 300  # 雪碧图最大格数（超出时放大间隔）
+
+# 新增：API内媒体任务参数
+MEDIA_JOB_MAX_CONCURRENCY = int(os.getenv("MEDIA_JOB_MAX_CONCURRENCY", "2"))  # API进程内同时运行的ffmpeg数量
+MEDIA_JOB_TIMEOUT = 3600  # 单个ffmpeg进程的超时时间（秒）
+
+# 新增：分布式渲染参数
+DISTRIBUTED_RENDERING = os.getenv("DISTRIBUTED_RENDERING", "false").lower() == "true"  # Step 6切片渲染分发到video队列（没有worker消费该队列时在当前进程内渲染）
+RENDER_BATCH_SIZE = int(os.getenv("RENDER_BATCH_SIZE", "4"))  # 每个video任务渲染的切片数
+
+# 新增：项目日志参数
+ENABLE_PROJECT_LOGS = os.getenv("ENABLE_PROJECT_LOGS", "true").lower() == "true"  # 按项目写入JSON行日志（data/projects/{id}/logs）
+PROJECT_LOG_LEVEL = os.getenv("PROJECT_LOG_LEVEL", "INFO").upper()  # 写入项目日志的最低级别
+PROJECT_LOG_MAX_BYTES = 5 * 1024 * 1024  # 单个日志文件大小上限，超出后轮转
+PROJECT_LOG_BACKUP_COUNT = 3  # 保留的轮转文件数量
+
+# 新增：离线假LLM提供商参数（llm_provider为fake时生效，用于基准测试）
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))  # 每次调用的模拟延迟（秒）
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))  # 调用抛出普通错误的概率
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))  # 调用返回限流(429)错误的概率
+FAKE_LLM_MALFORMED_RATE = float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0"))  # 返回无法解析内容的概率
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))  # 错误注入的随机种子
+
+# 新增：按模型上下文窗口自动分块参数
+CONTEXT_WINDOW_FILL_RATIO = 0.5  # 单次调用输入占模型上下文窗口的比例（其余留给输出）
+DEFAULT_CONTEXT_WINDOW_TOKENS = 32768  # 无法识别模型时使用的上下文窗口大小
+MIN_CHUNK_TOKENS = 1000  # 分块最小token数，过小的尾块会并入前一块
+MAX_CHUNK_MINUTES = 60  # 单个分块最长时长（分钟），避免超长上下文模型一次吞下整场直播
+MIN_CHUNK_MINUTES = 20  # 单个分块最短时长（分钟），只在不超出上下文窗口预算时生效，避免在过早的停顿处把话题切碎
+CHUNK_OVERLAP_SECONDS = 0  # 相邻分块的重叠时长（秒），跨越分块边界的话题在后一块中也完整可见；重叠窗口中重复提取的话题由Step 2合并，0表示不重叠
+COMPRESS_CHUNK_ARTIFACTS = os.getenv("COMPRESS_CHUNK_ARTIFACTS", "false").lower() == "true"  # Step 1分块中间文件以gzip写出（仅用于续跑和排查）
+
+# 新增：Step 2紧凑字幕编码参数
+COMPACT_SRT_PROMPT = True  # 是否使用紧凑格式（行号+单一时间戳）向LLM发送字幕
+COMPACT_SRT_MERGE_GAP_MS = 300  # 相邻字幕间隔小于该值时合并为一行
+COMPACT_SRT_MAX_LINE_CHARS = 200  # 合并后单行最大字符数
+
+# 新增：Step 5本地聚类参数
+CLUSTER_SIMILARITY_THRESHOLD = 0.12  # 平均链接聚类的最低余弦相似度
+MAX_COLLECTIONS = 10  # 最多生成的合集数
+LLM_CLUSTERING_MAX_CLIPS = 40  # 本地聚类无结果时，允许整体交给LLM聚类的最大切片数
 
 # 新增：话题提取控制参数
 MIN_TOPIC_DURATION_MINUTES = 2  # 话题最小时长（分钟）
@@ -0,0 +1,193 @@
+"""
+Worker进程级预热状态
+
+Celery worker子进程启动时（worker_process_init）一次性完成：
+- 预加载所有分类的提示词
+- 初始化LLM管理器及提供商客户端
+- 创建共享的HTTP连接池
+- 检测ffmpeg/ffprobe是否可用
+- 创建常驻事件循环
+
+之后每个任务直接复用这些状态，不再重复初始化。
+"""
+import asyncio
+import logging
+import subprocess
+import threading
+import time
+from typing import Any, Coroutine, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_http_session = None
+_media_capabilities: Optional[Dict[str, Any]] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_warmed_up = False
+_state_lock = threading.Lock()
+
+
+def get_http_session():
+    """获取进程内共享的requests会话（带连接池）"""
+    global _http_session
+    if _http_session is None:
+        with _state_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def _probe_tool(name: str) -> Dict[str, Any]:
+    """检测命令行工具是否可用并读取版本"""
+    try:
+        result = subprocess.run([name, '-version'], capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            first_line = result.stdout.splitlines()[0] if result.stdout else ""
+            return {"available": True, "version": first_line}
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"{name}不可用: {e}")
+    return {"available": False, "version": None}
+
+
+def get_media_capabilities(refresh: bool = False) -> Dict[str, Any]:
+    """
+    获取ffmpeg/ffprobe的可用性（进程内只检测一次）
+
+    Returns:
+        {"ffmpeg": {"available": bool, "version": str}, "ffprobe": {...}}
+    """
+    global _media_capabilities
+    if _media_capabilities is None or refresh:
+        _media_capabilities = {
+            "ffmpeg": _probe_tool("ffmpeg"),
+            "ffprobe": _probe_tool("ffprobe"),
+        }
+    return _media_capabilities
+
+
+def is_ffmpeg_available() -> bool:
+    """ffmpeg是否可用"""
+    return get_media_capabilities()["ffmpeg"]["available"]
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """获取（必要时创建）常驻事件循环"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop
+
+
+def run_in_worker_loop(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    在常驻事件循环中运行协程，替代每个任务一次的 asyncio.run
+
+    当前线程已有运行中的事件循环时（例如eager模式下在API进程内执行），
+    退回到独立线程中用 asyncio.run 执行。
+
+    Args:
+        coro: 要运行的协程
+        timeout: 最长等待秒数，None表示不限制
+
+    Raises:
+        TimeoutError: 超过 timeout 仍未完成
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        loop = _get_worker_loop()
+        asyncio.set_event_loop(loop)
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        return loop.run_until_complete(coro)
+
+    result: Dict[str, Any] = {}
+
+    def _run():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    # 守护线程：超时后不再等待，也不阻止进程退出
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"协程在 {timeout} 秒内未完成")
+    if "error" in result:
+        raise result["error"]
+    return result.get("value")
+
+
+def _preload_all_prompts() -> int:
+    """预加载默认及所有分类的提示词"""
+    from .shared_config import VideoCategory, get_prompt_files
+    from ..utils.prompt_loader import preload_prompts
+
+    prompt_paths = set()
+    for category in VideoCategory:
+        prompt_paths.update(get_prompt_files(category.value).values())
+    return preload_prompts(prompt_paths)
+
+
+def warm_up_worker() -> Dict[str, Any]:
+    """
+    预热当前进程，重复调用时直接返回
+
+    Returns:
+        预热结果摘要
+    """
+    global _warmed_up
+    if _warmed_up:
+        return {"warmed_up": True, "skipped": True}
+
+    started = time.perf_counter()
+    summary: Dict[str, Any] = {}
+
+    try:
+        summary["prompts"] = _preload_all_prompts()
+    except Exception as e:
+        logger.warning(f"预加载提示词失败: {e}")
+
+    try:
+        from .llm_manager import get_llm_manager
+        manager = get_llm_manager()
+        summary["llm_provider"] = manager.get_current_provider_info().get("provider")
+    except Exception as e:
+        logger.warning(f"初始化LLM管理器失败: {e}")
+
+    try:
+        get_http_session()
+        summary["http_session"] = True
+    except Exception as e:
+        logger.warning(f"创建HTTP连接池失败: {e}")
+
+    capabilities = get_media_capabilities()
+    summary["ffmpeg"] = capabilities["ffmpeg"]["available"]
+    summary["ffprobe"] = capabilities["ffprobe"]["available"]
+
+    _get_worker_loop()
+    _warmed_up = True
+
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Worker进程预热完成: {summary}")
+    return summary
+
+
+def shutdown_worker():
+    """释放进程级资源"""
+    global _http_session, _worker_loop, _warmed_up
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.close()
+    _worker_loop = None
+    _warmed_up = False
@@ -3,7 +3,7 @@
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 # 导入配置管理
 from .core.config import settings, get_logging_config, get_api_key
@@ -19,6 +19,10 @@ logging.basicConfig(
     ]
 )
 
+# 按项目写入结构化日志（data/projects/{id}/logs/project.{pid}.jsonl，每个进程一个文件）
+from .core.project_logging import install_project_log_handler
+install_project_log_handler()
+
 logger = logging.getLogger(__name__)
 
 # 使用统一的API路由注册
@@ -139,6 +143,13 @@ async def get_video_categories():
         ]
     }
 
+# Prometheus抓取端点：汇总各项目流水线的 metadata/metrics.json
+@app.get("/metrics", include_in_schema=False)
+async def get_prometheus_metrics():
+    """流水线步骤耗时、LLM用量与ffmpeg统计（Prometheus文本格式）"""
+    from .core.pipeline_metrics import collect_prometheus_metrics
+    return PlainTextResponse(collect_prometheus_metrics(), media_type="text/plain; version=0.0.4")
+
 # 导入统一错误处理中间件
 from .core.error_middleware import global_exception_handler
 
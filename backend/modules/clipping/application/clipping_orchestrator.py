@@ -18,6 +18,7 @@ class ClippingOrchestrator:
         clips_dir: str,
         collections_dir: str,
         metadata_dir: str,
+        render_videos: bool = True,
     ) -> Dict[str, Any]:
         return run_step6_video(
             clips_with_titles_path,
@@ -27,4 +28,5 @@ class ClippingOrchestrator:
             clips_dir=clips_dir,
             collections_dir=collections_dir,
             metadata_dir=metadata_dir,
+            render_videos=render_videos,
         )
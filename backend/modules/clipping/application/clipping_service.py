@@ -27,6 +27,7 @@ class ClippingService:
         clips_dir: str,
         collections_dir: str,
         metadata_dir: str,
+        render_videos: bool = True,
     ) -> Dict[str, Any]:
         return self._orchestrator.export_project(
             clips_with_titles_path=clips_with_titles_path,
@@ -36,6 +37,7 @@ class ClippingService:
             clips_dir=clips_dir,
             collections_dir=collections_dir,
             metadata_dir=metadata_dir,
+            render_videos=render_videos,
         )
 
     def sync_project(self, project_id: str, project_dir: Path) -> Dict[str, Any]:
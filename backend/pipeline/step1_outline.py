@@ -8,9 +8,19 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 # 导入依赖
+from ..core.pipeline_context import current_pipeline_context, write_artifact, write_json_artifact
+from ..core.pipeline_metrics import begin_chunk
 from ..utils.llm_client import LLMClient
+from ..utils.prompt_loader import load_prompt
 from ..utils.text_processor import TextProcessor
-from ..core.shared_config import PROMPT_FILES, METADATA_DIR
+from ..utils.token_estimator import estimate_tokens
+from ..utils.subtitle_processor import SubtitleProcessor
+from ..utils.transcript_store import transcript_dir
+from ..core.shared_config import (
+    PROMPT_FILES, METADATA_DIR, CONTEXT_WINDOW_FILL_RATIO,
+    DEFAULT_CONTEXT_WINDOW_TOKENS, MIN_CHUNK_TOKENS, MAX_CHUNK_MINUTES, MIN_CHUNK_MINUTES,
+    CHUNK_OVERLAP_SECONDS, COMPRESS_CHUNK_ARTIFACTS
+)
 from ..utils.llm_debug import is_llm_debug_enabled, write_llm_debug_event
 
 logger = logging.getLogger(__name__)
@@ -32,8 +42,7 @@ class OutlineExtractor:
             prompt_files = PROMPT_FILES
         
         # 加载提示词
-        with open(prompt_files['outline'], 'r', encoding='utf-8') as f:
-            self.outline_prompt = f.read()
+        self.outline_prompt = load_prompt(prompt_files['outline'])
             
         # 创建用于存放中间文本块的目录
         self.chunks_dir = self.metadata_dir / "step1_chunks"
@@ -59,7 +68,9 @@ class OutlineExtractor:
         
         # 1. 解析SRT文件
         try:
-            srt_data = self.text_processor.parse_srt(srt_path)
+            # 优先读取项目的转写存储（内存映射），与字幕编辑器共享同一份解析结果
+            transcript = SubtitleProcessor().load_transcript(srt_path, transcript_dir(self.metadata_dir, srt_path))
+            srt_data = transcript.srt_entries() if transcript is not None else self.text_processor.parse_srt(srt_path)
             if not srt_data:
                 logger.warning("SRT文件为空或解析失败")
                 return []
@@ -67,23 +78,36 @@ class OutlineExtractor:
             logger.error(f"解析SRT文件失败: {e}")
             return []
             
-        # 2. 基于时间智能分块
-        chunks = self.text_processor.chunk_srt_data(srt_data, interval_minutes=30)
-        logger.info(f"文本已按~30分钟/块切分，共{len(chunks)}个块")
+        # 2. 按模型上下文窗口的token预算分块（仍在停顿处切分）
+        token_budget = self._get_chunk_token_budget()
+        chunks = self.text_processor.chunk_srt_data_by_tokens(
+            srt_data,
+            max_tokens=token_budget,
+            min_tokens=MIN_CHUNK_TOKENS,
+            max_interval_minutes=MAX_CHUNK_MINUTES,
+            min_interval_minutes=MIN_CHUNK_MINUTES,
+            overlap_seconds=CHUNK_OVERLAP_SECONDS
+        )
+        logger.info(f"文本已按~{token_budget} token/块切分，共{len(chunks)}个块")
         
-        # 3. 保存文本块和SRT块到中间文件
-        chunk_files = self._save_chunks_to_files(chunks)
-        self._save_srt_chunks(chunks)
+        # 3. 分块留在内存中交给Step 2；中间文件只用于续跑和排查，
+        #    绑定了流水线上下文时由后台线程写出，不阻塞LLM调用
+        context = current_pipeline_context()
+        if context is not None:
+            context.set_step1_chunks(chunks)
+            context.submit_write(self._save_chunk_artifacts, chunks, context.compress_artifacts)
+        else:
+            self._save_chunk_artifacts(chunks, COMPRESS_CHUNK_ARTIFACTS)
         
         all_outlines = []
         
-        # 4. 逐一处理每个文本块文件
-        for i, chunk_file in enumerate(chunk_files):
+        # 4. 逐一处理每个文本块
+        for i, chunk in enumerate(chunks):
+            chunk_file = self.chunks_dir / f"chunk_{i}.txt"
             logger.info(f"处理第{i+1}/{len(chunks)}个文本块: {chunk_file.name}")
+            begin_chunk(i)
             try:
-                # 读取文本块内容
-                with open(chunk_file, 'r', encoding='utf-8') as f:
-                    chunk_text = f.read()
+                chunk_text = chunk['text']
                 
                 # 为每个块调用LLM
                 input_data = {"text": chunk_text}
@@ -129,31 +153,40 @@ class OutlineExtractor:
         logger.info(f"大纲提取完成，共{len(final_outlines)}个话题")
         return final_outlines
 
-    def _save_chunks_to_files(self, chunks: List[Dict]) -> List[Path]:
+    def _get_chunk_token_budget(self) -> int:
+        """根据当前模型的上下文窗口计算每个文本块的token预算"""
+        try:
+            token_budget = self.llm_client.get_input_token_budget(
+                self.outline_prompt,
+                CONTEXT_WINDOW_FILL_RATIO,
+                default_context_window=DEFAULT_CONTEXT_WINDOW_TOKENS
+            )
+        except Exception as e:
+            logger.warning(f"计算分块token预算失败，使用默认上下文窗口: {e}")
+            token_budget = (int(DEFAULT_CONTEXT_WINDOW_TOKENS * CONTEXT_WINDOW_FILL_RATIO)
+                            - estimate_tokens(self.outline_prompt))
+        return max(token_budget, MIN_CHUNK_TOKENS)
+
+    def _save_chunk_artifacts(self, chunks: List[Dict], compress: bool = False):
+        """保存文本块和SRT块中间文件（续跑和排查用）"""
+        self._save_chunks_to_files(chunks, compress)
+        self._save_srt_chunks(chunks, compress)
+
+    def _save_chunks_to_files(self, chunks: List[Dict], compress: bool = False) -> List[Path]:
         """将文本块保存为单独的 .txt 文件"""
-        chunk_files = []
-        for chunk in chunks:
-            chunk_index = chunk['chunk_index']
-            text_content = chunk['text']
-            file_path = self.chunks_dir / f"chunk_{chunk_index}.txt"
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
-            chunk_files.append(file_path)
-        
+        chunk_files = [
+            write_artifact(self.chunks_dir / f"chunk_{chunk['chunk_index']}.txt", chunk['text'], compress)
+            for chunk in chunks
+        ]
         logger.info(f"所有文本块已保存到: {self.chunks_dir}")
         return chunk_files
 
-    def _save_srt_chunks(self, chunks: List[Dict]):
-        """将SRT数据块保存为单独的 .json 文件"""
+    def _save_srt_chunks(self, chunks: List[Dict], compress: bool = False):
+        """将SRT数据块保存为单独的 .json 文件（紧凑格式）"""
         for chunk in chunks:
-            chunk_index = chunk['chunk_index']
-            srt_entries = chunk['srt_entries']
-            file_path = self.srt_chunks_dir / f"chunk_{chunk_index}.json"
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(srt_entries, f, ensure_ascii=False, indent=2)
-        
+            write_json_artifact(
+                self.srt_chunks_dir / f"chunk_{chunk['chunk_index']}.json", chunk['srt_entries'], compress
+            )
         logger.info(f"所有SRT块已保存到: {self.srt_chunks_dir}")
 
     def _parse_outline_response(self, response: str, chunk_index: int) -> List[Dict]:
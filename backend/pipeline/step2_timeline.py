@@ -9,9 +9,16 @@ from pathlib import Path
 from collections import defaultdict
 
 # 导入依赖
+from ..core.pipeline_context import current_pipeline_context, read_json_artifact
+from ..core.pipeline_metrics import begin_chunk
 from ..utils.llm_client import LLMClient
+from ..utils.prompt_loader import load_prompt
 from ..utils.text_processor import TextProcessor
-from ..core.shared_config import PROMPT_FILES, METADATA_DIR
+from ..utils.compact_srt import CompactSrtCodec, COMPACT_SRT_FORMAT_NOTE
+from ..core.shared_config import (
+    PROMPT_FILES, METADATA_DIR, COMPACT_SRT_PROMPT,
+    COMPACT_SRT_MERGE_GAP_MS, COMPACT_SRT_MAX_LINE_CHARS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,14 +36,26 @@ class TimelineExtractor:
         
         # 加载提示词
         prompt_files_to_use = prompt_files if prompt_files is not None else PROMPT_FILES
-        with open(prompt_files_to_use['timeline'], 'r', encoding='utf-8') as f:
-            self.timeline_prompt = f.read()
+        self.timeline_prompt = load_prompt(prompt_files_to_use['timeline'])
             
         # SRT块的目录
         self.srt_chunks_dir = self.metadata_dir / "step1_srt_chunks"
         self.timeline_chunks_dir = self.metadata_dir / "step2_timeline_chunks"
         self.llm_raw_output_dir = self.metadata_dir / "step2_llm_raw_output"
 
+    def _load_srt_chunk(self, chunk_index: int, srt_chunk_path: Path) -> Optional[List[Dict]]:
+        """
+        获取Step 1的SRT块：优先使用流水线上下文中的内存结果，否则读取中间文件
+
+        Returns:
+            SRT条目列表，找不到时返回None
+        """
+        context = current_pipeline_context()
+        chunk = context.get_step1_chunk(chunk_index) if context is not None else None
+        if chunk is not None:
+            return chunk['srt_entries']
+        return read_json_artifact(srt_chunk_path)
+
     def extract_timeline(self, outlines: List[Dict]) -> List[Dict]:
         """
         提取话题时间区间。
@@ -52,7 +71,9 @@ class TimelineExtractor:
             logger.warning("大纲数据为空，无法提取时间线。")
             return []
 
-        if not self.srt_chunks_dir.exists():
+        context = current_pipeline_context()
+        has_context_chunks = context is not None and bool(context.step1_chunks)
+        if not has_context_chunks and not self.srt_chunks_dir.exists():
             logger.error(f"SRT块目录不存在: {self.srt_chunks_dir}。请先运行Step 1。")
             return []
 
@@ -73,19 +94,18 @@ class TimelineExtractor:
         # 3. 遍历每个块，批量处理，并将结果存为独立的JSON文件
         for chunk_index, chunk_outlines in outlines_by_chunk.items():
             logger.info(f"处理块 {chunk_index}，其中包含 {len(chunk_outlines)} 个话题...")
+            begin_chunk(chunk_index)
             
             # 每次都重新处理，不使用缓存
             chunk_output_path = self.timeline_chunks_dir / f"chunk_{chunk_index}.json"
 
             try:
-                # 首先加载对应的SRT块文件，无论是否使用缓存都需要这些信息
+                # 首先加载对应的SRT块，无论是否使用缓存都需要这些信息
                 srt_chunk_path = self.srt_chunks_dir / f"chunk_{chunk_index}.json"
-                if not srt_chunk_path.exists():
+                srt_chunk_data = self._load_srt_chunk(chunk_index, srt_chunk_path)
+                if srt_chunk_data is None:
                     logger.warning(f"  > 找不到对应的SRT块文件: {srt_chunk_path}，跳过整个块。")
                     continue
-                
-                with open(srt_chunk_path, 'r', encoding='utf-8') as f:
-                    srt_chunk_data = json.load(f)
 
                 if not srt_chunk_data:
                     logger.warning(f"  > SRT块文件为空: {srt_chunk_path}，跳过整个块。")
@@ -95,6 +115,13 @@ class TimelineExtractor:
                 chunk_start_time = srt_chunk_data[0]['start_time']
                 chunk_end_time = srt_chunk_data[-1]['end_time']
 
+                # 字幕编解码器：紧凑格式下合并相邻字幕，非紧凑格式下逐条对应
+                codec = CompactSrtCodec(
+                    srt_chunk_data,
+                    merge_gap_ms=COMPACT_SRT_MERGE_GAP_MS if COMPACT_SRT_PROMPT else 0,
+                    max_line_chars=COMPACT_SRT_MAX_LINE_CHARS
+                )
+
                 raw_response = ""
                 llm_cache_path = self.llm_raw_output_dir / f"chunk_{chunk_index}.txt"
 
@@ -106,9 +133,13 @@ class TimelineExtractor:
                     logger.info(f"  > 未找到LLM缓存，开始调用API...")
                     
                     # 构建用于LLM的SRT文本
-                    srt_text_for_prompt = ""
-                    for sub in srt_chunk_data:
-                        srt_text_for_prompt += f"{sub['index']}\\n{sub['start_time']} --> {sub['end_time']}\\n{sub['text']}\\n\\n"
+                    if COMPACT_SRT_PROMPT:
+                        srt_text_for_prompt = codec.encode()
+                    else:
+                        srt_text_for_prompt = "\n\n".join(
+                            f"{sub['index']}\n{sub['start_time']} --> {sub['end_time']}\n{sub['text']}"
+                            for sub in srt_chunk_data
+                        )
                     
                     # 为LLM准备一个"干净"的输入，只包含它需要的信息
                     llm_input_outlines = [
@@ -120,6 +151,9 @@ class TimelineExtractor:
                         "outline": llm_input_outlines,  # 使用干净的数据
                         "srt_text": srt_text_for_prompt
                     }
+                    if COMPACT_SRT_PROMPT:
+                        input_data["srt_format"] = COMPACT_SRT_FORMAT_NOTE
+                        logger.info(f"  > 紧凑字幕: {len(srt_chunk_data)} 条字幕合并为 {len(codec.lines)} 行")
                     
                     # 调用LLM获取原始响应，带重试机制
                     parsed_items = None
@@ -143,7 +177,8 @@ class TimelineExtractor:
                                 raw_response, 
                                 chunk_start_time, 
                                 chunk_end_time,
-                                chunk_index
+                                chunk_index,
+                                codec
                             )
                             
                             if parsed_items:
@@ -197,6 +232,9 @@ class TimelineExtractor:
                 all_timeline_data.sort(key=lambda x: self.text_processor.time_to_seconds(x['start_time']))
                 logger.info("排序完成。")
                 
+                # 相邻分块有重叠时，跨越边界的话题会在两个块中各出现一次
+                all_timeline_data = self._merge_overlap_duplicates(all_timeline_data)
+                
                 # 为所有片段按时间顺序分配固定的ID
                 logger.info("为所有片段按时间顺序分配固定ID...")
                 for i, timeline_item in enumerate(all_timeline_data):
@@ -208,8 +246,37 @@ class TimelineExtractor:
 
         return all_timeline_data
         
-    def _parse_and_validate_response(self, response: str, chunk_start: str, chunk_end: str, chunk_index: int) -> List[Dict]:
-        """增强的解析LLM的批量响应、验证并调整时间"""
+    def _merge_overlap_duplicates(self, timeline_data: List[Dict], min_overlap_ratio: float = 0.5) -> List[Dict]:
+        """
+        合并来自相邻分块的重复话题（CHUNK_OVERLAP_SECONDS>0 时重叠窗口内的话题会被两个块各提取一次）
+        
+        Args:
+            timeline_data: 已按开始时间排序的话题
+            min_overlap_ratio: 时间交集占较短话题时长的比例达到该值时视为同一话题
+            
+        Returns:
+            去重后的话题；重复时保留时长更长（更完整）的一个
+        """
+        merged: List[Dict] = []
+        last_span = None
+        for item in timeline_data:
+            span = (self.text_processor.time_to_seconds(item['start_time']),
+                    self.text_processor.time_to_seconds(item['end_time']))
+            if merged and merged[-1].get('chunk_index') != item.get('chunk_index'):
+                shortest = min(span[1] - span[0], last_span[1] - last_span[0])
+                intersection = min(span[1], last_span[1]) - max(span[0], last_span[0])
+                if shortest > 0 and intersection >= shortest * min_overlap_ratio:
+                    logger.info(f"  > 合并重叠窗口中的重复话题: '{item.get('outline')}'")
+                    if span[1] - span[0] > last_span[1] - last_span[0]:
+                        merged[-1], last_span = item, span
+                    continue
+            merged.append(item)
+            last_span = span
+        return merged
+    
+    def _parse_and_validate_response(self, response: str, chunk_start: str, chunk_end: str, chunk_index: int,
+                                     codec: Optional[CompactSrtCodec] = None) -> List[Dict]:
+        """增强的解析LLM的批量响应、验证并调整时间；提供codec时将行号/近似时间映射回精确的SRT边界"""
         validated_items = []
         
         # 保存原始响应用于调试
@@ -234,6 +301,13 @@ class TimelineExtractor:
                 if 'outline' not in timeline_item or 'start_time' not in timeline_item or 'end_time' not in timeline_item:
                     logger.warning(f"  > 从LLM返回的某个JSON对象格式不正确: {timeline_item}")
                     continue
+
+                if codec is not None:
+                    resolved_item = codec.resolve(timeline_item)
+                    if resolved_item is None:
+                        logger.warning(f"  > 无法将话题映射回SRT边界: {timeline_item}")
+                        continue
+                    timeline_item = resolved_item
                 
                 # 将 chunk_index 添加回对象中，以便后续步骤使用
                 timeline_item['chunk_index'] = chunk_index
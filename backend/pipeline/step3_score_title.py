@@ -0,0 +1,184 @@
+"""
+Step 3+4: 评分与标题合并 - 每个块一次LLM调用，同时得到评分、推荐理由和标题
+
+可选步骤（FUSED_SCORE_TITLE），输出文件与Step 3、Step 4保持兼容：
+step3_all_scored.json、step3_high_score_clips.json、step4_titles.json
+"""
+import json
+import logging
+from typing import List, Dict, Optional
+from pathlib import Path
+from collections import defaultdict
+
+# 导入依赖
+from ..core.pipeline_metrics import begin_chunk
+from ..utils.llm_client import LLMClient
+from ..utils.prompt_loader import load_prompt
+from ..utils.audio_analyzer import (
+    AudioSignal, split_dead_segments, blend_audio_scores, load_project_audio_signal
+)
+from ..core.shared_config import (
+    PROMPT_FILES, METADATA_DIR, MIN_SCORE_THRESHOLD,
+    ENABLE_AUDIO_SIGNAL, AUDIO_SIGNAL_WEIGHT, DEAD_SEGMENT_ACTIVE_RATIO
+)
+
+logger = logging.getLogger(__name__)
+
+class ScoreTitleGenerator:
+    """评分与标题生成器"""
+
+    def __init__(self, prompt_files: Dict = None, audio_signal: Optional[AudioSignal] = None):
+        self.llm_client = LLMClient()
+        self.audio_signal = audio_signal
+
+        # 加载提示词
+        prompt_files_to_use = prompt_files if prompt_files is not None else PROMPT_FILES
+        self.score_title_prompt = load_prompt(prompt_files_to_use.get('score_title', PROMPT_FILES['score_title']))
+
+    def score_and_title(self, timeline_data: List[Dict]) -> List[Dict]:
+        """
+        按块批量评分并生成标题
+
+        Args:
+            timeline_data: 时间线数据
+
+        Returns:
+            评分后的全部切片（按ID排序），仅高分切片保留 generated_title
+        """
+        if not timeline_data:
+            logger.warning("时间线数据为空，无法评分")
+            return []
+
+        logger.info(f"开始为 {len(timeline_data)} 个切片进行评分和标题生成...")
+
+        timeline_by_chunk = defaultdict(list)
+        for item in timeline_data:
+            chunk_index = item.get('chunk_index')
+            if chunk_index is not None:
+                timeline_by_chunk[chunk_index].append(item)
+            else:
+                logger.warning(f"  > 话题 '{item.get('outline', '未知')}' 缺少 chunk_index，将被跳过。")
+
+        all_scored_clips = []
+        for chunk_index, chunk_items in timeline_by_chunk.items():
+            logger.info(f"处理块 {chunk_index}，其中包含 {len(chunk_items)} 个话题...")
+            begin_chunk(chunk_index)
+            if self.audio_signal is not None:
+                # 无声片段直接记0分，不调用LLM
+                chunk_items, dead_items = split_dead_segments(
+                    chunk_items, self.audio_signal, DEAD_SEGMENT_ACTIVE_RATIO
+                )
+                all_scored_clips.extend(dead_items)
+                if not chunk_items:
+                    continue
+
+            scored_items = self._evaluate_chunk(chunk_items)
+            if self.audio_signal is not None:
+                blend_audio_scores(scored_items, self.audio_signal, AUDIO_SIGNAL_WEIGHT)
+
+            # 标题只保留给高分切片
+            for clip in scored_items:
+                if clip['final_score'] < MIN_SCORE_THRESHOLD:
+                    clip.pop('generated_title', None)
+            all_scored_clips.extend(scored_items)
+
+        # 按ID排序，保持时间顺序
+        all_scored_clips.sort(key=lambda x: int(x.get('id', 0)))
+        logger.info("所有切片评分和标题生成完成")
+        return all_scored_clips
+
+    def _evaluate_chunk(self, clips: List[Dict]) -> List[Dict]:
+        """
+        一次LLM调用为一个块内的切片补充 final_score、recommend_reason 和 generated_title
+        """
+        try:
+            input_for_llm = [
+                {
+                    "id": str(clip.get('id')),
+                    "outline": clip.get('outline'),
+                    "content": clip.get('content'),
+                    "start_time": clip.get('start_time'),
+                    "end_time": clip.get('end_time'),
+                } for clip in clips
+            ]
+
+            response = self.llm_client.call_with_retry(self.score_title_prompt, input_for_llm)
+            parsed_list = self.llm_client.parse_json_response(response)
+            if not isinstance(parsed_list, list):
+                raise ValueError(f"LLM返回的结果不是数组: {type(parsed_list)}")
+
+            # 优先按id对应，缺少id且数量一致时按顺序对应
+            results_by_id = {str(item.get('id')): item for item in parsed_list
+                             if isinstance(item, dict) and item.get('id') is not None}
+            if not results_by_id and len(parsed_list) == len(clips):
+                results_by_id = {str(clip.get('id')): item for clip, item in zip(clips, parsed_list)}
+
+            for clip in clips:
+                self._apply_result(clip, results_by_id.get(str(clip.get('id'))))
+            return clips
+
+        except Exception as e:
+            logger.error(f"LLM评分与标题生成失败: {e}")
+            for clip in clips:
+                clip['final_score'] = 0.0
+                clip['recommend_reason'] = "Fallo en la evaluacion por lotes."
+            return clips
+
+    def _apply_result(self, clip: Dict, llm_result: Optional[Dict]):
+        """将单个LLM结果合并回切片"""
+        if not llm_result or llm_result.get('final_score') is None or llm_result.get('recommend_reason') is None:
+            logger.warning(f"LLM返回的结果缺少score或reason: {llm_result}")
+            clip['final_score'] = 0.0
+            clip['recommend_reason'] = "No se pudo evaluar este fragmento."
+            return
+
+        try:
+            clip['final_score'] = round(float(llm_result['final_score']), 2)
+        except (TypeError, ValueError):
+            clip['final_score'] = 0.0
+        clip['recommend_reason'] = llm_result['recommend_reason']
+
+        generated_title = llm_result.get('generated_title')
+        if generated_title and isinstance(generated_title, str):
+            clip['generated_title'] = generated_title
+        else:
+            clip['generated_title'] = clip.get('outline', f"片段_{clip.get('id')}")  # 使用outline作为fallback
+
+        logger.info(f"  > 评分成功: {str(clip.get('outline'))[:20]}... [分数: {clip['final_score']}]")
+
+def _save_json(data: List[Dict], output_path: Path):
+    """保存JSON结果"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    logger.info(f"结果已保存到: {output_path}")
+
+def run_step3_score_and_title(timeline_path: Path, metadata_dir: Path = None, prompt_files: Dict = None) -> List[Dict]:
+    """
+    运行合并的评分与标题生成步骤
+
+    Args:
+        timeline_path: 时间线文件路径
+        metadata_dir: 元数据目录路径
+        prompt_files: 自定义提示词文件
+
+    Returns:
+        带标题的高分切片列表（与Step 4输出一致）
+    """
+    with open(timeline_path, 'r', encoding='utf-8') as f:
+        timeline_data = json.load(f)
+
+    if metadata_dir is None:
+        metadata_dir = METADATA_DIR
+    metadata_dir = Path(metadata_dir)
+
+    audio_signal = load_project_audio_signal(metadata_dir) if ENABLE_AUDIO_SIGNAL else None
+    generator = ScoreTitleGenerator(prompt_files, audio_signal=audio_signal)
+    scored_clips = generator.score_and_title(timeline_data)
+    high_score_clips = [clip for clip in scored_clips if clip['final_score'] >= MIN_SCORE_THRESHOLD]
+
+    # 与分步执行时保持相同的输出文件
+    _save_json(scored_clips, metadata_dir / "step3_all_scored.json")
+    _save_json(high_score_clips, metadata_dir / "step3_high_score_clips.json")
+    _save_json(high_score_clips, metadata_dir / "step4_titles.json")
+
+    return high_score_clips
@@ -9,23 +9,31 @@ from pathlib import Path
 from collections import defaultdict
 
 # 导入依赖
+from ..core.pipeline_metrics import begin_chunk
 from ..utils.llm_client import LLMClient
+from ..utils.prompt_loader import load_prompt
 from ..utils.text_processor import TextProcessor
-from ..core.shared_config import PROMPT_FILES, METADATA_DIR, MIN_SCORE_THRESHOLD
+from ..utils.audio_analyzer import (
+    AudioSignal, split_dead_segments, blend_audio_scores, load_project_audio_signal
+)
+from ..core.shared_config import (
+    PROMPT_FILES, METADATA_DIR, MIN_SCORE_THRESHOLD,
+    ENABLE_AUDIO_SIGNAL, AUDIO_SIGNAL_WEIGHT, DEAD_SEGMENT_ACTIVE_RATIO
+)
 
 logger = logging.getLogger(__name__)
 
 class ClipScorer:
     """内容评分器"""
     
-    def __init__(self, prompt_files: Dict = None):
+    def __init__(self, prompt_files: Dict = None, audio_signal: Optional[AudioSignal] = None):
         self.llm_client = LLMClient()
         self.text_processor = TextProcessor()
+        self.audio_signal = audio_signal
         
         # 加载提示词
         prompt_files_to_use = prompt_files if prompt_files is not None else PROMPT_FILES
-        with open(prompt_files_to_use['recommendation'], 'r', encoding='utf-8') as f:
-            self.recommendation_prompt = f.read()
+        self.recommendation_prompt = load_prompt(prompt_files_to_use['recommendation'])
     
     def score_clips(self, timeline_data: List[Dict]) -> List[Dict]:
         """
@@ -50,10 +58,26 @@ class ClipScorer:
         # 2. 遍历每个块，批量处理其中的所有话题
         for chunk_index, chunk_items in timeline_by_chunk.items():
             logger.info(f"处理块 {chunk_index}，其中包含 {len(chunk_items)} 个话题...")
+            begin_chunk(chunk_index)
             try:
+                # 无声片段直接记0分，不调用LLM
+                if self.audio_signal is not None:
+                    chunk_items, dead_items = split_dead_segments(
+                        chunk_items, self.audio_signal, DEAD_SEGMENT_ACTIVE_RATIO
+                    )
+                    if dead_items:
+                        logger.info(f"  > 跳过 {len(dead_items)} 个无声片段")
+                        all_scored_clips.extend(dead_items)
+                    if not chunk_items:
+                        continue
+                
                 # 3. 使用LLM进行批量评估
                 scored_chunk_items = self._get_llm_evaluation(chunk_items)
                 
+                # 混入音频信号分数
+                if scored_chunk_items and self.audio_signal is not None:
+                    blend_audio_scores(scored_chunk_items, self.audio_signal, AUDIO_SIGNAL_WEIGHT)
+                
                 if scored_chunk_items:
                     all_scored_clips.extend(scored_chunk_items)
                 else:
@@ -150,8 +174,12 @@ def run_step3_scoring(timeline_path: Path, metadata_dir: Path = None, output_pat
     with open(timeline_path, 'r', encoding='utf-8') as f:
         timeline_data = json.load(f)
     
-    # 创建评分器
-    scorer = ClipScorer(prompt_files)
+    if metadata_dir is None:
+        metadata_dir = METADATA_DIR
+    
+    # 创建评分器（存在音频信号时间线时一并使用）
+    audio_signal = load_project_audio_signal(metadata_dir) if ENABLE_AUDIO_SIGNAL else None
+    scorer = ClipScorer(prompt_files, audio_signal=audio_signal)
     
     # 评分
     scored_clips = scorer.score_clips(timeline_data)
@@ -159,10 +187,6 @@ def run_step3_scoring(timeline_path: Path, metadata_dir: Path = None, output_pat
     # 筛选高分切片
     high_score_clips = [clip for clip in scored_clips if clip['final_score'] >= MIN_SCORE_THRESHOLD]
     
-    # 保存结果
-    if metadata_dir is None:
-        metadata_dir = METADATA_DIR
-    
     # 保存所有评分后的片段（用于调试和分析）
     all_scored_path = metadata_dir / "step3_all_scored.json"
     scorer.save_scores(scored_clips, all_scored_path)
@@ -9,7 +9,9 @@ from pathlib import Path
 from collections import defaultdict
 
 # 导入依赖
+from ..core.pipeline_metrics import begin_chunk
 from ..utils.llm_client import LLMClient
+from ..utils.prompt_loader import load_prompt
 from ..utils.text_processor import TextProcessor
 from ..core.shared_config import PROMPT_FILES, METADATA_DIR
 
@@ -24,8 +26,7 @@ class TitleGenerator:
         
         # 加载提示词
         prompt_files_to_use = prompt_files if prompt_files is not None else PROMPT_FILES
-        with open(prompt_files_to_use['title'], 'r', encoding='utf-8') as f:
-            self.title_prompt = f.read()
+        self.title_prompt = load_prompt(prompt_files_to_use['title'])
         
         # 使用传入的metadata_dir或默认值
         if metadata_dir is None:
@@ -51,6 +52,7 @@ class TitleGenerator:
         all_clips_with_titles = []
         for chunk_index, chunk_clips in clips_by_chunk.items():
             logger.info(f"处理块 {chunk_index}，其中包含 {len(chunk_clips)} 个片段...")
+            begin_chunk(chunk_index)
             
             try:
                 logger.info(f"  > 开始调用API生成标题...")
@@ -9,7 +9,13 @@ from pathlib import Path
 
 # 导入依赖
 from ..utils.llm_client import LLMClient
-from ..core.shared_config import PROMPT_FILES, METADATA_DIR, MAX_CLIPS_PER_COLLECTION
+from ..utils.prompt_loader import load_prompt
+from ..utils.title_index import TitleIndex
+from ..utils.text_clustering import HashedTfidfVectorizer, cosine_similarity_matrix, agglomerative_cluster
+from ..core.shared_config import (
+    PROMPT_FILES, METADATA_DIR, MAX_CLIPS_PER_COLLECTION, MAX_COLLECTIONS,
+    CLUSTER_SIMILARITY_THRESHOLD, LLM_CLUSTERING_MAX_CLIPS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +27,8 @@ class ClusteringEngine:
         
         # 加载提示词
         prompt_files_to_use = prompt_files if prompt_files is not None else PROMPT_FILES
-        with open(prompt_files_to_use['clustering'], 'r', encoding='utf-8') as f:
-            self.clustering_prompt = f.read()
+        self.clustering_prompt = load_prompt(prompt_files_to_use['clustering'])
+        self.naming_prompt = load_prompt(prompt_files_to_use.get('cluster_naming', PROMPT_FILES['cluster_naming']))
         
         # 使用传入的metadata_dir或默认值
         if metadata_dir is None:
@@ -33,6 +39,9 @@ class ClusteringEngine:
         """
         对片段进行主题聚类
         
+        先在本地完成向量化和层次聚类，大模型只负责给每个分组命名；
+        本地聚类没有结果时才退回到整体交给大模型聚类。
+        
         Args:
             clips_with_titles: 带标题的片段列表
             
@@ -48,16 +57,141 @@ class ClusteringEngine:
                 'id': clip['id'],
                 'title': clip.get('generated_title', clip['outline']),
                 'summary': clip.get('recommend_reason', ''),
+                'outline': clip.get('outline', ''),
                 'score': clip.get('final_score', 0)
             })
         
+        # 本地向量化聚类
+        try:
+            local_clusters = self._local_cluster(clips_for_clustering)
+        except Exception as e:
+            logger.error(f"本地聚类失败: {str(e)}")
+            local_clusters = []
+        
+        if local_clusters:
+            collections = self._name_clusters(local_clusters)
+            logger.info(f"主题聚类完成，共{len(collections)}个合集")
+            return collections
+        
         # 首先进行基于关键词的预聚类
         pre_clusters = self._pre_cluster_by_keywords(clips_for_clustering)
         
+        if len(clips_for_clustering) <= LLM_CLUSTERING_MAX_CLIPS:
+            logger.info("本地聚类无结果，交给大模型整体聚类")
+            return self._cluster_with_llm(clips_for_clustering, clips_with_titles, pre_clusters)
+        
+        if pre_clusters:
+            logger.warning("Clustering local sin resultado; usando pre-cluster por keywords.")
+            return self._create_collections_from_pre_clusters(pre_clusters, clips_with_titles)
+        logger.warning("Clustering local y pre-cluster sin resultado; usando fallback por score.")
+        return self._create_default_collections(clips_with_titles)
+    
+    def _local_cluster(self, clips: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        基于哈希TF-IDF和平均链接层次聚类对片段分组
+        
+        Args:
+            clips: 聚类用片段列表
+            
+        Returns:
+            分组列表，每组包含 clips 和 keywords，按平均评分降序
+        """
+        if len(clips) < 2:
+            return []
+        
+        # 标题重复一次以提高权重
+        documents = [f"{clip['title']} {clip['title']} {clip['outline']} {clip['summary']}" for clip in clips]
+        vectorizer = HashedTfidfVectorizer()
+        vectors = vectorizer.fit_transform(documents)
+        similarity = cosine_similarity_matrix(vectors)
+        
+        groups = agglomerative_cluster(
+            similarity,
+            threshold=CLUSTER_SIMILARITY_THRESHOLD,
+            max_cluster_size=MAX_CLIPS_PER_COLLECTION
+        )
+        
+        clusters = []
+        for indices in groups:
+            if len(indices) < 2:
+                continue
+            members = sorted((clips[i] for i in indices), key=lambda c: c['score'], reverse=True)
+            clusters.append({
+                'clips': members,
+                'keywords': vectorizer.top_terms(vectors[indices]),
+                'score': sum(c['score'] for c in members) / len(members)
+            })
+        
+        clusters.sort(key=lambda c: c['score'], reverse=True)
+        clusters = clusters[:MAX_COLLECTIONS]
+        logger.info(f"本地聚类完成: {len(clips)}个片段 -> {len(clusters)}个分组")
+        return clusters
+    
+    def _name_clusters(self, clusters: List[Dict[str, Any]]) -> List[Dict]:
+        """
+        调用大模型为本地聚类结果命名，失败时使用关键词生成名称
+        
+        Args:
+            clusters: 本地聚类分组
+            
+        Returns:
+            合集数据列表
+        """
+        names: Dict[str, Dict] = {}
+        input_data = {
+            'clusters': [
+                {
+                    'cluster_id': str(i),
+                    'keywords': cluster['keywords'],
+                    'clips': [{'title': c['title'], 'summary': c['summary']} for c in cluster['clips']]
+                }
+                for i, cluster in enumerate(clusters, 1)
+            ]
+        }
+        
+        try:
+            response = self.llm_client.call_with_retry(self.naming_prompt, input_data)
+            parsed = self.llm_client.parse_json_response(response)
+            if isinstance(parsed, dict):
+                parsed = parsed.get('clusters', [parsed])
+            for item in parsed or []:
+                if isinstance(item, dict) and item.get('cluster_id') is not None and item.get('collection_title'):
+                    names[str(item['cluster_id'])] = item
+        except Exception as e:
+            logger.error(f"合集命名失败，使用关键词命名: {str(e)}")
+        
+        collections = []
+        for i, cluster in enumerate(clusters, 1):
+            named = names.get(str(i), {})
+            # 关键词命名时只取单词特征，避免与词对重复
+            words = [k for k in cluster['keywords'] if ' ' not in k][:2] or cluster['keywords'][:2]
+            keywords = ' y '.join(words) or 'temas relacionados'
+            collections.append({
+                'id': str(i),
+                'collection_title': named.get('collection_title') or f"Fragmentos sobre {keywords}",
+                'collection_summary': named.get('collection_summary')
+                    or f"Coleccion de {len(cluster['clips'])} fragmentos relacionados con {keywords}.",
+                'clip_ids': [c['id'] for c in cluster['clips']]
+            })
+        return collections
+    
+    def _cluster_with_llm(self, clips_for_clustering: List[Dict], clips_with_titles: List[Dict],
+                          pre_clusters: Dict[str, List[str]]) -> List[Dict]:
+        """
+        将全部片段交给大模型聚类（本地聚类无结果时的备选方案）
+        
+        Args:
+            clips_for_clustering: 聚类用片段列表
+            clips_with_titles: 片段数据
+            pre_clusters: 关键词预聚类结果
+            
+        Returns:
+            合集数据列表
+        """
         # 构建完整的提示词
-        full_prompt = self.clustering_prompt + "\n\n以下是视频切片列表：\n"
+        full_prompt = self.clustering_prompt + "\n\n以下是视频切片列表（clips 中可直接填写切片ID）：\n"
         for i, clip in enumerate(clips_for_clustering, 1):
-            full_prompt += f"{i}. 标题：{clip['title']}\n   摘要：{clip['summary']}\n   评分：{clip['score']:.2f}\n\n"
+            full_prompt += f"{i}. ID：{clip['id']}\n   标题：{clip['title']}\n   摘要：{clip['summary']}\n   评分：{clip['score']:.2f}\n\n"
         
         # 添加预聚类结果作为参考
         if pre_clusters:
@@ -224,25 +358,27 @@ class ClusteringEngine:
             验证后的合集数据
         """
         validated_collections = []
+        title_index = TitleIndex(clips_with_titles)
         
         for i, collection in enumerate(collections_data):
             try:
-                # 验证必需字段
-                if not all(key in collection for key in ['collection_title', 'collection_summary', 'clips']):
+                # 验证必需字段（片段可用标题列表clips或ID列表clip_ids给出）
+                if not all(key in collection for key in ['collection_title', 'collection_summary']):
+                    logger.warning(f"合集 {i} 缺少必需字段，跳过")
+                    continue
+                clip_refs = collection.get('clips') or collection.get('clip_ids')
+                if not clip_refs:
                     logger.warning(f"合集 {i} 缺少必需字段，跳过")
                     continue
                 
-                # 验证片段列表
-                clip_titles = collection['clips']
+                # 根据标题或ID找到对应的片段ID（去重并保持顺序）
                 valid_clip_ids = []
-                
-                for clip_title in clip_titles:
-                    # 根据标题找到对应的片段ID
-                    for clip in clips_with_titles:
-                        if (clip.get('generated_title', clip['outline']) == clip_title or 
-                            clip['outline'] == clip_title):
-                            valid_clip_ids.append(clip['id'])
-                            break
+                for clip_ref in clip_refs:
+                    clip_id = title_index.resolve(clip_ref)
+                    if clip_id is None:
+                        logger.debug(f"合集 {i} 中无法匹配的片段: {clip_ref}")
+                    elif clip_id not in valid_clip_ids:
+                        valid_clip_ids.append(clip_id)
                 
                 if len(valid_clip_ids) < 2:
                     logger.warning(f"合集 {i} 有效片段少于2个，跳过")
@@ -13,6 +13,26 @@ from ..core.shared_config import METADATA_DIR, CLIPS_DIR, COLLECTIONS_DIR
 
 logger = logging.getLogger(__name__)
 
+def build_clip_render_specs(clips_with_titles: List[Dict]) -> List[Dict]:
+    """
+    将带标题的片段数据转换为切割所需的 id/title/start_time/end_time
+    
+    Args:
+        clips_with_titles: 带标题的片段数据（来自step4）
+        
+    Returns:
+        切割参数列表
+    """
+    return [
+        {
+            'id': clip['id'],
+            'title': clip.get('generated_title', f"片段_{clip['id']}"),
+            'start_time': clip['start_time'],
+            'end_time': clip['end_time']
+        }
+        for clip in clips_with_titles
+    ]
+
 class VideoGenerator:
     """视频生成器"""
     
@@ -48,14 +68,7 @@ class VideoGenerator:
         logger.info("开始生成切片视频...")
         
         # 准备切片数据
-        clips_data = []
-        for clip in clips_with_titles:
-            clips_data.append({
-                'id': clip['id'],
-                'title': clip.get('generated_title', f"片段_{clip['id']}"),
-                'start_time': clip['start_time'],
-                'end_time': clip['end_time']
-            })
+        clips_data = build_clip_render_specs(clips_with_titles)
         
         # 批量生成切片
         successful_clips = self.video_processor.batch_extract_clips(input_video, clips_data)
@@ -136,7 +149,7 @@ class VideoGenerator:
 def run_step6_video(clips_with_titles_path: Path, collections_path: Path, 
                    input_video: Path, output_dir: Optional[Path] = None, 
                    clips_dir: Optional[str] = None, collections_dir: Optional[str] = None, 
-                   metadata_dir: Optional[str] = None) -> Dict:
+                   metadata_dir: Optional[str] = None, render_videos: bool = True) -> Dict:
     """
     运行Step 6: 视频切割
     
@@ -145,6 +158,7 @@ def run_step6_video(clips_with_titles_path: Path, collections_path: Path,
         collections_path: 合集文件路径
         input_video: 输入视频路径
         output_dir: 输出目录
+        render_videos: 是否实际切割视频；False时只保存元数据，切片由API按需从源视频提供
         
     Returns:
         生成结果信息
@@ -159,11 +173,16 @@ def run_step6_video(clips_with_titles_path: Path, collections_path: Path,
     # 创建视频生成器
     generator = VideoGenerator(clips_dir=clips_dir, collections_dir=collections_dir, metadata_dir=metadata_dir)
     
-    # 生成切片视频
-    successful_clips = generator.generate_clips(clips_with_titles, input_video)
-    
-    # 生成合集视频
-    successful_collections = generator.generate_collections(collections_data)
+    if render_videos:
+        # 生成切片视频
+        successful_clips = generator.generate_clips(clips_with_titles, input_video)
+        
+        # 生成合集视频
+        successful_collections = generator.generate_collections(collections_data)
+    else:
+        logger.info("虚拟切片模式：跳过视频切割，仅保存元数据")
+        successful_clips = []
+        successful_collections = []
     
     # 保存元数据到项目目录
     # 注意：clips_metadata.json在这里保存，包含最终的切片元数据（包含视频路径等信息）
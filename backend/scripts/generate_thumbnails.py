@@ -112,9 +112,58 @@ def generate_thumbnail_for_project(project_id: str):
     finally:
         db.close()
 
+def generate_clip_thumbnails_for_project(project_id: str):
+    """一次解码为指定项目的所有切片生成缩略图和雪碧图"""
+    from backend.core.path_utils import get_project_directory
+    from backend.models.clip import Clip
+    from backend.utils.batch_thumbnailer import THUMBNAILS_DIRNAME, generate_clip_thumbnails
+    
+    db = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project or not project.video_path or not Path(project.video_path).exists():
+            print(f"❌ 项目 {project_id} 不存在或没有视频文件")
+            return False
+        
+        project_dir = get_project_directory(project_id)
+        print(f"🎬 正在为项目 '{project.name}' 的切片批量生成缩略图...")
+        manifest = generate_clip_thumbnails(
+            Path(project.video_path),
+            project_dir / "metadata" / "clips_metadata.json",
+            project_dir / "output" / THUMBNAILS_DIRNAME
+        )
+        if not manifest:
+            print(f"❌ 项目 {project_id} 没有切片元数据")
+            return False
+        
+        # 按原始切片ID回写数据库
+        updated = 0
+        for clip in db.query(Clip).filter(Clip.project_id == project_id).all():
+            original_id = str((clip.clip_metadata or {}).get('id', (clip.clip_metadata or {}).get('original_id', '')))
+            entry = manifest["clips"].get(original_id)
+            if entry:
+                clip.thumbnail_path = entry["path"]
+                updated += 1
+        db.commit()
+        print(f"✅ 已更新 {updated} 个切片的缩略图")
+        return True
+        
+    except Exception as e:
+        print(f"❌ 处理项目 {project_id} 时发生错误: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
 def main():
     """主函数"""
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 2 and sys.argv[1] == "--clips":
+        # 为指定项目的切片批量生成缩略图
+        project_id = sys.argv[2]
+        print(f"🚀 开始为项目 {project_id} 的切片生成缩略图...")
+        if not generate_clip_thumbnails_for_project(project_id):
+            sys.exit(1)
+    elif len(sys.argv) > 1:
         # 为指定项目生成缩略图
         project_id = sys.argv[1]
         print(f"🚀 开始为项目 {project_id} 生成缩略图...")
@@ -11,6 +11,7 @@ from backend.models.clip import Clip, ClipStatus
 from backend.models.collection import Collection, CollectionStatus
 from backend.models.project import Project, ProjectStatus, ProjectType
 from backend.models.task import Task, TaskStatus, TaskType
+from backend.utils import srt_time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -221,6 +222,8 @@ class DataSyncService:
                         video_path = str(project_video_path)
                         logger.info(f"更新切片 {existing_clip.id} 的video_path: {video_path}")
                         existing_clip.video_path = video_path
+                        if clip_data.get('thumbnail_path'):
+                            existing_clip.thumbnail_path = clip_data['thumbnail_path']
                         if existing_clip.tags is None:
                             existing_clip.tags = []  # 确保tags是空列表而不是null
                         updated_count += 1
@@ -282,6 +285,7 @@ class DataSyncService:
                         duration=duration,
                         score=clip_data.get('final_score', 0.0),
                         video_path=video_path,
+                        thumbnail_path=clip_data.get('thumbnail_path'),
                         tags=[],  # 确保tags是空列表而不是null
                         clip_metadata=clip_data,
                         status=ClipStatus.COMPLETED
@@ -663,18 +667,8 @@ class DataSyncService:
     def _parse_time(self, time_str: str) -> float:
         """解析时间字符串为秒数"""
         try:
-            if ',' in time_str:
-                time_str = time_str.replace(',', '.')
-            
-            parts = time_str.split(':')
-            if len(parts) == 3:
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds = float(parts[2])
-                return hours * 3600 + minutes * 60 + seconds
-            else:
-                return 0.0
-        except Exception:
+            return srt_time.time_to_seconds(time_str)
+        except (TypeError, ValueError):
             return 0.0
     
     def _calculate_duration(self, start_time: str, end_time: str) -> float:
@@ -687,17 +681,8 @@ class DataSyncService:
         """将时间字符串转换为秒数"""
         try:
             # 处理格式 "00:00:00,120" 或 "00:00:00.120"
-            time_str = time_str.replace(',', '.')
-            parts = time_str.split(':')
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            seconds_parts = parts[2].split('.')
-            seconds = int(seconds_parts[0])
-            milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
-            
-            total_seconds = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000
-            return int(total_seconds)
-        except Exception as e:
+            return int(srt_time.time_to_seconds(time_str))
+        except (TypeError, ValueError) as e:
             logger.error(f"时间转换失败: {time_str}, 错误: {e}")
             return 0
     
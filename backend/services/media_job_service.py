@@ -0,0 +1,317 @@
+"""
+媒体任务执行器 - 在事件循环中非阻塞地运行ffmpeg
+
+所有ffmpeg进程共享一个全局并发信号量；进度从 -progress pipe:1 解析。
+耗时的渲染作为后台任务提交并立即返回任务ID，可轮询状态或通过WebSocket接收进度。
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..core.project_logging import bind_project_id
+from .exceptions import ProcessingError
+
+logger = logging.getLogger(__name__)
+
+# 内存中保留的已结束任务数量
+MAX_FINISHED_JOBS = 200
+
+
+class MediaJobStatus(str, Enum):
+    """媒体任务状态"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+def _parse_clock(value: str) -> Optional[float]:
+    """解析 HH:MM:SS.micro 格式的时间"""
+    try:
+        hours, minutes, seconds = value.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (ValueError, AttributeError):
+        return None
+
+
+class FfmpegProgressParser:
+    """逐行解析 ffmpeg -progress 输出的 key=value 块"""
+
+    def __init__(self, duration: Optional[float] = None):
+        self.duration = duration
+        self._block: Dict[str, str] = {}
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        """
+        输入一行输出，块结束（progress=continue/end）时返回进度
+
+        Returns:
+            {"out_time": 秒, "percent": 百分比或None, "speed": 倍速, "done": 是否结束}
+        """
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+        self._block[key] = value
+        if key != 'progress':
+            return None
+
+        block, self._block = self._block, {}
+        out_time = None
+        # out_time_ms 实际单位也是微秒
+        for time_key in ('out_time_us', 'out_time_ms'):
+            try:
+                out_time = int(block[time_key]) / 1_000_000
+                break
+            except (KeyError, ValueError):
+                continue
+        if out_time is None and 'out_time' in block:
+            out_time = _parse_clock(block['out_time'])
+
+        done = value == 'end'
+        percent = None
+        if done:
+            percent = 100.0
+        elif self.duration and out_time is not None and out_time >= 0:
+            percent = min(out_time / self.duration * 100, 99.9)
+
+        return {"out_time": out_time, "percent": percent, "speed": block.get('speed'), "done": done}
+
+
+def with_progress_output(cmd: List[str]) -> List[str]:
+    """在ffmpeg命令中加入 -progress pipe:1（命令本身不能输出到stdout）"""
+    return [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+
+
+@dataclass
+class MediaJob:
+    """后台媒体任务"""
+    id: str
+    kind: str
+    project_id: Optional[str] = None
+    status: MediaJobStatus = MediaJobStatus.PENDING
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _notify: Optional[Callable[['MediaJob'], None]] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (MediaJobStatus.COMPLETED, MediaJobStatus.FAILED, MediaJobStatus.CANCELLED)
+
+    def report_progress(self, progress: Dict[str, Any]):
+        """接收ffmpeg进度，整数百分比变化时推送通知"""
+        percent = progress.get("percent")
+        if percent is None:
+            return
+        previous = int(self.progress)
+        self.progress = round(percent, 1)
+        if int(self.progress) != previous and self._notify:
+            self._notify(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "project_id": self.project_id,
+            "status": self.status.value,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+async def _send_websocket_update(job: MediaJob):
+    from .websocket_notification_service import notification_service
+    await notification_service.send_task_update(
+        task_id=job.id,
+        status=job.status.value,
+        progress=int(job.progress),
+        message=job.message,
+        error=job.error
+    )
+
+
+class MediaExecutor:
+    """ffmpeg异步执行器和后台任务表"""
+
+    def __init__(self, max_concurrency: int = 2, default_timeout: Optional[float] = None,
+                 notifier: Optional[Callable[[MediaJob], Awaitable[None]]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_timeout = default_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._notifier = notifier or _send_websocket_update
+        self._jobs: Dict[str, MediaJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_ffmpeg(self, cmd: List[str], duration: Optional[float] = None,
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         timeout: Optional[float] = None) -> str:
+        """
+        在全局并发限制下运行ffmpeg，不阻塞事件循环
+
+        Args:
+            cmd: ffmpeg命令（输出不能是stdout）
+            duration: 输出预计时长（秒），用于计算百分比
+            on_progress: 进度回调
+            timeout: 超时时间（秒），默认使用执行器配置
+
+        Returns:
+            stderr末尾内容
+
+        Raises:
+            ProcessingError: ffmpeg失败或超时；任务被取消时进程会被终止并抛出CancelledError
+        """
+        timeout = timeout if timeout is not None else self.default_timeout
+        started = time.monotonic()
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *with_progress_output(cmd),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stderr_tail: deque = deque(maxlen=50)
+
+            async def pump_stdout():
+                parser = FfmpegProgressParser(duration)
+                async for raw_line in process.stdout:
+                    progress = parser.feed(raw_line.decode('utf-8', errors='ignore'))
+                    if progress and on_progress:
+                        on_progress(progress)
+
+            async def pump_stderr():
+                async for raw_line in process.stderr:
+                    stderr_tail.append(raw_line.decode('utf-8', errors='ignore'))
+
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(pump_stdout(), pump_stderr(), process.wait()),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"ffmpeg执行超时（{timeout}秒）: {' '.join(cmd)}",
+                             extra={"event": "ffmpeg", "stderr": ''.join(stderr_tail)[-2000:]})
+                raise ProcessingError(f"ffmpeg执行超时（{timeout}秒）", step_name="ffmpeg")
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+        stderr = ''.join(stderr_tail)
+        elapsed = time.monotonic() - started
+        if process.returncode != 0:
+            logger.error(f"ffmpeg执行失败（返回码 {process.returncode}）",
+                         extra={"event": "ffmpeg", "duration": round(elapsed, 3), "stderr": stderr[-2000:]})
+            raise ProcessingError(f"ffmpeg执行失败: {stderr[-500:]}", step_name="ffmpeg")
+        logger.info(f"ffmpeg执行完成: {elapsed:.2f}秒", extra={"event": "ffmpeg", "duration": round(elapsed, 3)})
+        return stderr
+
+    async def run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在并发限制下于线程池中运行同步的媒体处理函数"""
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    def submit(self, kind: str, runner: Callable[[MediaJob], Awaitable[Any]],
+               project_id: Optional[str] = None, message: Optional[str] = None) -> MediaJob:
+        """
+        提交后台媒体任务并立即返回
+
+        Args:
+            kind: 任务类型
+            runner: 接收MediaJob的协程函数，返回值作为任务结果
+            project_id: 所属项目ID
+            message: 初始状态描述
+        """
+        job = MediaJob(id=str(uuid.uuid4()), kind=kind, project_id=project_id, message=message)
+        job._notify = self._notify
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run_job(job, runner))
+        self._prune()
+        return job
+
+    async def _run_job(self, job: MediaJob, runner: Callable[[MediaJob], Awaitable[Any]]):
+        # 任务在独立的上下文副本中运行，绑定项目后其日志写入项目日志文件
+        bind_project_id(job.project_id)
+        job.status = MediaJobStatus.RUNNING
+        job.started_at = time.time()
+        self._notify(job)
+        try:
+            job.result = await runner(job)
+            job.status = MediaJobStatus.COMPLETED
+            job.progress = 100.0
+        except asyncio.CancelledError:
+            job.status = MediaJobStatus.CANCELLED
+            job.message = "任务已取消"
+            raise
+        except Exception as e:
+            logger.error(f"媒体任务失败 {job.kind} ({job.id}): {e}")
+            job.status = MediaJobStatus.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._tasks.pop(job.id, None)
+            self._notify(job)
+
+    def _notify(self, job: MediaJob):
+        try:
+            asyncio.get_running_loop().create_task(self._notifier(job))
+        except RuntimeError:
+            pass
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda j: j.finished_at or 0)[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.pop(job.id, None)
+
+    def get(self, job_id: str) -> Optional[MediaJob]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, project_id: Optional[str] = None) -> List[MediaJob]:
+        jobs = [job for job in self._jobs.values() if project_id is None or job.project_id == project_id]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    async def cancel(self, job_id: str) -> bool:
+        """取消运行中的任务（终止其ffmpeg进程），任务不存在或已结束时返回False"""
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        job = self._jobs.get(job_id)
+        if job is not None and not job.finished:
+            # 在 _run_job 开始前被取消时，协程体没有执行，由这里完成收尾
+            job.status = MediaJobStatus.CANCELLED
+            job.message = "任务已取消"
+            job.finished_at = time.time()
+            self._notify(job)
+        self._tasks.pop(job_id, None)
+        return True
+
+
+_media_executor: Optional[MediaExecutor] = None
+
+
+def get_media_executor() -> MediaExecutor:
+    """获取进程内共享的媒体任务执行器"""
+    global _media_executor
+    if _media_executor is None:
+        from ..core.shared_config import MEDIA_JOB_MAX_CONCURRENCY, MEDIA_JOB_TIMEOUT
+        _media_executor = MediaExecutor(MEDIA_JOB_MAX_CONCURRENCY, MEDIA_JOB_TIMEOUT)
+    return _media_executor
@@ -10,9 +10,21 @@ from backend.services.simple_progress import emit_progress, clear_progress
 from backend.pipeline.step1_outline import run_step1_outline
 from backend.pipeline.step2_timeline import run_step2_timeline
 from backend.pipeline.step3_scoring import run_step3_scoring
+from backend.pipeline.step3_score_title import run_step3_score_and_title
 from backend.pipeline.step4_title import run_step4_title
 from backend.pipeline.step5_clustering import run_step5_clustering
 from backend.modules.clipping.application.clipping_service import ClippingService
+from backend.core.path_utils import get_project_directory
+from backend.core.pipeline_context import PipelineContext, bind_pipeline_context, unbind_pipeline_context
+from backend.core.pipeline_metrics import (
+    METRICS_FILENAME, PipelineMetrics, bind_pipeline_metrics, unbind_pipeline_metrics
+)
+from backend.core.shared_config import (
+    FUSED_SCORE_TITLE, ENABLE_AUDIO_SIGNAL, ENABLE_BOUNDARY_SNAPPING, BOUNDARY_SNAP_TOLERANCE,
+    SCENE_CUT_THRESHOLD, SILENCE_NOISE_DB, SILENCE_MIN_DURATION, VIRTUAL_CLIPS,
+    ENABLE_HLS_PREVIEW, ENABLE_BATCH_THUMBNAILS, SPRITE_INTERVAL_SECONDS, SPRITE_MAX_TILES,
+    DISTRIBUTED_RENDERING, RENDER_BATCH_SIZE, COMPRESS_CHUNK_ARTIFACTS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -102,6 +114,127 @@ class SimplePipelineAdapter:
             logger.error(f"自动生成字幕过程中发生错误: {e}")
             return None
         
+    def _analyze_audio_signal(self, video_path: str, metadata_dir: Path, srt_path: Optional[Path]):
+        """
+        分析音频能量和语速，生成Step 3使用的信号时间线
+        
+        Args:
+            video_path: 视频文件路径
+            metadata_dir: 元数据目录
+            srt_path: 字幕文件路径
+        """
+        try:
+            if not video_path or not Path(video_path).exists():
+                logger.info("视频文件不存在，跳过音频信号分析")
+                return
+            from backend.utils.audio_analyzer import analyze_project_audio
+            analyze_project_audio(Path(video_path), metadata_dir, srt_path)
+        except Exception as e:
+            logger.warning(f"音频信号分析失败，仅使用文本评分: {e}")
+        
+    def _refine_clip_boundaries(self, video_path: str, metadata_dir: Path):
+        """
+        将Step 2切片的起止时间吸附到最近的停顿或镜头切换点
+        
+        Args:
+            video_path: 视频文件路径
+            metadata_dir: 元数据目录
+            
+        Returns:
+            修正后的时间线数据，失败时返回None
+        """
+        try:
+            if not video_path or not Path(video_path).exists():
+                logger.info("视频文件不存在，跳过切片边界修正")
+                return None
+            from backend.utils.boundary_refiner import refine_project_boundaries
+            return refine_project_boundaries(
+                Path(video_path),
+                metadata_dir,
+                metadata_dir / "step2_timeline.json",
+                tolerance=BOUNDARY_SNAP_TOLERANCE,
+                scene_threshold=SCENE_CUT_THRESHOLD,
+                silence_noise_db=SILENCE_NOISE_DB,
+                silence_min_duration=SILENCE_MIN_DURATION,
+            )
+        except Exception as e:
+            logger.warning(f"切片边界修正失败，保留原始时间: {e}")
+            return None
+        
+    def _generate_clip_thumbnails(self, video_path: str, metadata_dir: Path, output_dir: Path):
+        """
+        一次解码为所有切片生成缩略图和拖动预览雪碧图
+        
+        Args:
+            video_path: 视频文件路径
+            metadata_dir: 元数据目录
+            output_dir: 输出目录
+        """
+        try:
+            if not video_path or not Path(video_path).exists():
+                logger.info("视频文件不存在，跳过缩略图生成")
+                return
+            from backend.utils.batch_thumbnailer import THUMBNAILS_DIRNAME, generate_clip_thumbnails
+            generate_clip_thumbnails(
+                Path(video_path),
+                metadata_dir / "clips_metadata.json",
+                output_dir / THUMBNAILS_DIRNAME,
+                sprite_interval=SPRITE_INTERVAL_SECONDS,
+                sprite_max_tiles=SPRITE_MAX_TILES,
+            )
+        except Exception as e:
+            logger.warning(f"批量缩略图生成失败: {e}")
+        
+    def _video_workers_available(self) -> bool:
+        """
+        分布式渲染前确认有worker消费video队列，没有时在当前进程内渲染
+        
+        Returns:
+            是否可以分发到video队列
+        """
+        try:
+            from backend.tasks.video import video_queue_has_consumer
+            if video_queue_has_consumer():
+                return True
+        except Exception as e:
+            logger.error(f"检查video队列失败: {e}")
+        logger.warning("没有worker消费video队列，切片在当前进程内渲染")
+        return False
+        
+    def _dispatch_clip_rendering(self, video_path: str, clips_with_titles) -> Optional[str]:
+        """
+        将切片渲染分发到video队列（每批一个任务，完成后由chord回调拼接合集）
+        
+        Args:
+            video_path: 视频文件路径
+            clips_with_titles: 带标题的片段数据
+            
+        Returns:
+            chord结果ID，分发失败时返回None
+        """
+        try:
+            from backend.tasks.video import dispatch_project_render
+            return dispatch_project_render(self.project_id, video_path, clips_with_titles or [], RENDER_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"分发切片渲染失败，切片将按需从源视频提供: {e}")
+            return None
+        
+    def _schedule_hls_packaging(self, video_path: str):
+        """
+        将源视频HLS打包任务投递到video队列，与后续步骤并行执行
+        
+        Args:
+            video_path: 视频文件路径
+        """
+        try:
+            if not video_path or not Path(video_path).exists():
+                return
+            from backend.tasks.video import package_hls_stream
+            package_hls_stream.delay(self.project_id, str(video_path))
+            logger.info(f"已提交HLS打包任务: {self.project_id}")
+        except Exception as e:
+            logger.warning(f"提交HLS打包任务失败，预览将使用按需切割: {e}")
+        
     async def process_project_sync(self, input_video_path: str, input_srt_path: str) -> Dict[str, Any]:
         """
         同步处理项目 - 使用简化的进度系统
@@ -115,12 +248,22 @@ class SimplePipelineAdapter:
         """
         logger.info(f"开始处理项目: {self.project_id}")
         
+        # 各步骤的耗时、LLM用量和ffmpeg统计写入 metadata/metrics.json
+        metrics = PipelineMetrics(
+            self.project_id, get_project_directory(self.project_id) / "metadata" / METRICS_FILENAME
+        )
+        metrics_token = bind_pipeline_metrics(metrics)
+        # Step 1的分块结果经上下文直接交给Step 2，中间文件在后台写出
+        context = PipelineContext(
+            self.project_id, get_project_directory(self.project_id) / "metadata", COMPRESS_CHUNK_ARTIFACTS
+        )
+        context_token = bind_pipeline_context(context)
+        
         try:
             # 清除之前的进度数据
             clear_progress(self.project_id)
             
             # 创建必要的目录结构 - 使用正确的路径
-            from backend.core.path_utils import get_project_directory
             project_dir = get_project_directory(self.project_id)
             metadata_dir = project_dir / "metadata"
             output_dir = project_dir / "output"
@@ -133,6 +276,8 @@ class SimplePipelineAdapter:
             collections_output_dir.mkdir(parents=True, exist_ok=True)
             
             # 阶段1: 素材准备
+            if ENABLE_HLS_PREVIEW:
+                self._schedule_hls_packaging(input_video_path)
             emit_progress(self.project_id, "INGEST", "素材准备完成")
             
             # 阶段2: 字幕处理
@@ -140,9 +285,11 @@ class SimplePipelineAdapter:
             
             # Step 1: 大纲提取
             logger.info("执行Step 1: 大纲提取")
+            metrics.begin_step("step1_outline")
             if input_srt_path and Path(input_srt_path).exists():
                 logger.info(f"使用现有SRT文件: {input_srt_path}")
-                outlines = run_step1_outline(Path(input_srt_path), metadata_dir=metadata_dir)
+                srt_path = Path(input_srt_path)
+                outlines = run_step1_outline(srt_path, metadata_dir=metadata_dir)
             else:
                 logger.warning("没有SRT文件，尝试自动生成字幕")
                 # 尝试自动生成字幕
@@ -176,18 +323,40 @@ class SimplePipelineAdapter:
             # Step 2: 时间线提取
             logger.info("执行Step 2: 时间线提取")
             if outlines:  # 只有当有大纲时才执行后续步骤
+                metrics.begin_step("step2_timeline")
                 timeline_data = run_step2_timeline(
                     metadata_dir / "step1_outline.json",
                     metadata_dir=metadata_dir
                 )
                 emit_progress(self.project_id, "ANALYZE", "时间线提取完成", subpercent=50)
                 
-                # Step 3: 内容评分
-                logger.info("执行Step 3: 内容评分")
-                scored_clips = run_step3_scoring(
-                    metadata_dir / "step2_timeline.json",
-                    metadata_dir=metadata_dir
-                )
+                # 切片边界吸附到停顿/镜头切换
+                if ENABLE_BOUNDARY_SNAPPING:
+                    metrics.begin_step("boundary_snapping")
+                    refined_timeline = self._refine_clip_boundaries(input_video_path, metadata_dir)
+                    if refined_timeline is not None:
+                        timeline_data = refined_timeline
+                
+                # 音频高光信号（失败不影响后续评分）
+                if ENABLE_AUDIO_SIGNAL:
+                    metrics.begin_step("audio_signal")
+                    self._analyze_audio_signal(input_video_path, metadata_dir, srt_path)
+                
+                # Step 3: 内容评分（启用合并模式时同时生成标题）
+                if FUSED_SCORE_TITLE:
+                    logger.info("执行Step 3+4: 内容评分与标题生成")
+                    metrics.begin_step("step3_score_title")
+                    scored_clips = run_step3_score_and_title(
+                        metadata_dir / "step2_timeline.json",
+                        metadata_dir=metadata_dir
+                    )
+                else:
+                    logger.info("执行Step 3: 内容评分")
+                    metrics.begin_step("step3_scoring")
+                    scored_clips = run_step3_scoring(
+                        metadata_dir / "step2_timeline.json",
+                        metadata_dir=metadata_dir
+                    )
                 emit_progress(self.project_id, "ANALYZE", "内容分析完成", subpercent=100)
             else:
                 logger.warning("没有大纲数据，跳过时间线提取和内容评分")
@@ -210,14 +379,20 @@ class SimplePipelineAdapter:
             # Step 4: 标题生成
             logger.info("执行Step 4: 标题生成")
             if outlines:  # 只有当有大纲时才执行后续步骤
-                titled_clips = run_step4_title(
-                    metadata_dir / "step3_high_score_clips.json",
-                    metadata_dir=str(metadata_dir)
-                )
+                if FUSED_SCORE_TITLE:
+                    # 标题已在Step 3中一并生成，step4_titles.json已写入
+                    titled_clips = scored_clips
+                else:
+                    metrics.begin_step("step4_title")
+                    titled_clips = run_step4_title(
+                        metadata_dir / "step3_high_score_clips.json",
+                        metadata_dir=str(metadata_dir)
+                    )
                 emit_progress(self.project_id, "HIGHLIGHT", "标题生成完成", subpercent=40)
                 
                 # Step 5: 主题聚类
                 logger.info("执行Step 5: 主题聚类")
+                metrics.begin_step("step5_clustering")
                 collections = run_step5_clustering(
                     metadata_dir / "step4_titles.json",
                     metadata_dir=str(metadata_dir)
@@ -229,7 +404,9 @@ class SimplePipelineAdapter:
                 
                 # Step 6: 视频切割
                 logger.info("执行Step 6: 视频切割")
+                metrics.begin_step("step6_video")
                 clipping_service = ClippingService()
+                distributed_rendering = DISTRIBUTED_RENDERING and not VIRTUAL_CLIPS and self._video_workers_available()
                 video_result = clipping_service.export_project_clips(
                     project_id=self.project_id,
                     clips_with_titles_path=metadata_dir / "step4_titles.json",
@@ -239,7 +416,18 @@ class SimplePipelineAdapter:
                     clips_dir=str(clips_output_dir),
                     collections_dir=str(collections_output_dir),
                     metadata_dir=str(metadata_dir),
+                    render_videos=not (VIRTUAL_CLIPS or distributed_rendering),
                 )
+                
+                if distributed_rendering:
+                    # 切片渲染分发到video队列，合集拼接和数据库同步在全部切片完成后执行
+                    video_result["render_task_id"] = self._dispatch_clip_rendering(
+                        input_video_path, titled_clips
+                    )
+                
+                if ENABLE_BATCH_THUMBNAILS:
+                    metrics.begin_step("thumbnails")
+                    self._generate_clip_thumbnails(input_video_path, metadata_dir, output_dir)
             else:
                 logger.warning("没有大纲数据，跳过标题生成、主题聚类和视频切割")
                 # 创建空的标题和合集文件
@@ -262,6 +450,7 @@ class SimplePipelineAdapter:
             emit_progress(self.project_id, "DONE", "处理完成")
             
             # 自动同步数据到数据库
+            metrics.begin_step("data_sync")
             try:
                 from backend.services.data_sync_service import DataSyncService
                 from backend.core.database import SessionLocal
@@ -280,6 +469,7 @@ class SimplePipelineAdapter:
                 logger.error(f"数据同步失败: {e}")
             
             logger.info(f"项目处理完成: {self.project_id}")
+            metrics.finish("succeeded")
             return {
                 "status": "succeeded",
                 "project_id": self.project_id,
@@ -297,6 +487,7 @@ class SimplePipelineAdapter:
         except Exception as e:
             error_msg = f"流水线处理失败: {str(e)}"
             logger.error(error_msg)
+            metrics.finish("failed", error_msg)
             
             # 发送失败状态
             emit_progress(self.project_id, "DONE", f"处理失败: {error_msg}")
@@ -307,6 +498,11 @@ class SimplePipelineAdapter:
                 "task_id": self.task_id,
                 "error": error_msg
             }
+        finally:
+            context.close()
+            unbind_pipeline_context(context_token)
+            metrics.save()
+            unbind_pipeline_metrics(metrics_token)
 
 
 def create_simple_pipeline_adapter(project_id: str, task_id: str) -> SimplePipelineAdapter:
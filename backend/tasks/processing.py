@@ -14,44 +14,19 @@ from backend.services.websocket_notification_service import notification_service
 from backend.services.processing_service import ProcessingService
 from backend.services.pipeline_adapter import create_pipeline_adapter
 from backend.core.database import SessionLocal
+from backend.core.worker_state import run_in_worker_loop
 from backend.models.project import Project, ProjectStatus
 from backend.models.task import Task, TaskStatus, TaskType
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 单次通知的最长等待时间（秒）
+NOTIFICATION_TIMEOUT_SECONDS = 10
+
 def run_async_notification(coro):
-    """运行异步通知的辅助函数 - 修复事件循环冲突"""
-    try:
-        # 尝试获取现有的事件循环
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # 如果事件循环正在运行，使用线程池执行
-            import concurrent.futures
-            import threading
-            
-            def run_in_thread():
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-                try:
-                    return new_loop.run_until_complete(coro)
-                finally:
-                    new_loop.close()
-            
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(run_in_thread)
-                return future.result(timeout=10)  # 10秒超时
-        else:
-            # 如果事件循环没有运行，直接运行
-            return loop.run_until_complete(coro)
-    except RuntimeError:
-        # 没有事件循环，创建新的
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(coro)
-        finally:
-            loop.close()
+    """运行异步通知的辅助函数 - 复用worker进程的常驻事件循环，最多等待10秒"""
+    return run_in_worker_loop(coro, timeout=NOTIFICATION_TIMEOUT_SECONDS)
 
 @celery_app.task(bind=True, name='backend.tasks.processing.process_video_pipeline')
 def process_video_pipeline(self, project_id: str, input_video_path: str, input_srt_path: str) -> Dict[str, Any]:
@@ -101,9 +76,8 @@ def process_video_pipeline(self, project_id: str, input_video_path: str, input_s
             from backend.services.simple_pipeline_adapter import create_simple_pipeline_adapter
             pipeline_adapter = create_simple_pipeline_adapter(str(project_id), str(task.id))
             
-            # 执行Pipeline处理 - 使用异步包装器
-            import asyncio
-            result = asyncio.run(pipeline_adapter.process_project_sync(input_video_path, input_srt_path))
+            # 执行Pipeline处理 - 复用worker进程预热好的事件循环
+            result = run_in_worker_loop(pipeline_adapter.process_project_sync(input_video_path, input_srt_path))
             
             # 检查处理结果
             if result.get("status") == "failed":
@@ -4,33 +4,151 @@
 
 import os
 import logging
+import subprocess
 from pathlib import Path
 from typing import Dict, Any, Optional, List
-from celery import shared_task
+from celery import shared_task, chord, group
 from ..core.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
+# backend.tasks.video.* 路由到的队列（celery_app.task_routes）
+VIDEO_QUEUE = "video"
+
+
+def _project_video_processor(project_id: str):
+    """使用项目内输出目录的VideoProcessor"""
+    from ..core.path_utils import get_project_directory
+    from ..utils.video_processor import VideoProcessor
+    
+    output_dir = get_project_directory(project_id) / "output"
+    return VideoProcessor(clips_dir=str(output_dir / "clips"), collections_dir=str(output_dir / "collections"))
+
+
+def _project_video_path(project_id: str) -> Path:
+    """从数据库读取项目源视频路径"""
+    from ..core.database import SessionLocal
+    from ..models.project import Project
+    
+    db = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project or not project.video_path:
+            raise FileNotFoundError(f"项目没有源视频: {project_id}")
+        return Path(project.video_path)
+    finally:
+        db.close()
+
+
+def _render_collections(project_id: str, collection_data: Optional[List[Dict[str, Any]]] = None) -> List[Path]:
+    """拼接合集视频，未提供合集数据时读取项目的collections_metadata.json"""
+    if collection_data is None:
+        from ..core.path_utils import get_project_directory
+        from ..modules.clipping.infrastructure.metadata_repository import ClippingMetadataRepository
+        collection_data = ClippingMetadataRepository(get_project_directory(project_id) / "metadata").read_collections()
+    return _project_video_processor(project_id).create_collections_from_metadata(collection_data)
+
+
+def chunk_clip_specs(clip_specs: List[Dict[str, Any]], batch_size: int) -> List[List[Dict[str, Any]]]:
+    """
+    将切割参数按批次分组，每批对应一个video队列任务
+    
+    Args:
+        clip_specs: 切割参数列表
+        batch_size: 每批切片数
+        
+    Returns:
+        批次列表
+    """
+    batch_size = max(1, batch_size)
+    return [clip_specs[i:i + batch_size] for i in range(0, len(clip_specs), batch_size)]
+
+
+def build_render_workflow(project_id: str, input_video_path: str, clip_specs: List[Dict[str, Any]],
+                          batch_size: int):
+    """
+    构建渲染工作流：每批切片一个任务并行执行，全部完成后拼接合集并同步数据库
+    
+    Returns:
+        Celery chord签名
+    """
+    header = group(
+        extract_video_clips.s(project_id, batch, input_video_path)
+        for batch in chunk_clip_specs(clip_specs, batch_size)
+    )
+    return chord(header, finalize_project_render.s(project_id))
+
+
+def video_queue_has_consumer(timeout: float = 1.0) -> bool:
+    """
+    是否有worker正在消费video队列
+    
+    eager模式下任务就地执行，视为有消费者；查询失败或超时时视为没有。
+    """
+    if celery_app.conf.task_always_eager:
+        return True
+    try:
+        active_queues = celery_app.control.inspect(timeout=timeout).active_queues() or {}
+    except Exception as e:
+        logger.warning(f"查询worker队列失败: {e}")
+        return False
+    return any(
+        queue.get('name') == VIDEO_QUEUE
+        for queues in active_queues.values()
+        for queue in (queues or [])
+    )
+
+
+def dispatch_project_render(project_id: str, input_video_path: str, clips_with_titles: List[Dict[str, Any]],
+                            batch_size: int) -> Optional[str]:
+    """
+    将项目切片渲染分发到video队列
+    
+    Args:
+        project_id: 项目ID
+        input_video_path: 源视频路径
+        clips_with_titles: 带标题的片段数据（来自step4）
+        batch_size: 每个任务渲染的切片数
+        
+    Returns:
+        chord结果ID，没有切片时返回None
+    """
+    from ..pipeline.step6_video import build_clip_render_specs
+    
+    clip_specs = build_clip_render_specs(clips_with_titles)
+    if not clip_specs:
+        return None
+    result = build_render_workflow(project_id, str(input_video_path), clip_specs, batch_size).apply_async()
+    logger.info(f"已分发切片渲染: {project_id}, {len(clip_specs)}个切片, 批大小{batch_size}")
+    return result.id
+
 
 @shared_task(bind=True, name='backend.tasks.video.extract_video_clips')
-def extract_video_clips(self, project_id: str, clip_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+def extract_video_clips(self, project_id: str, clip_data: List[Dict[str, Any]],
+                        input_video_path: Optional[str] = None) -> Dict[str, Any]:
     """
     提取视频片段
     
     Args:
         project_id: 项目ID
-        clip_data: 片段数据列表
+        clip_data: 片段数据列表（id、title、start_time、end_time）
+        input_video_path: 源视频路径，为None时从数据库读取
         
     Returns:
         提取结果
     """
-    logger.info(f"开始提取视频片段: {project_id}")
+    logger.info(f"开始提取视频片段: {project_id}, {len(clip_data)}个")
     
     try:
-        logger.info(f"视频片段提取完成: {project_id}")
+        input_video = Path(input_video_path) if input_video_path else _project_video_path(project_id)
+        clip_paths = _project_video_processor(project_id).batch_extract_clips(input_video, clip_data)
+        
+        logger.info(f"视频片段提取完成: {project_id}, 成功{len(clip_paths)}/{len(clip_data)}")
         return {
             'success': True,
             'project_id': project_id,
+            'clip_paths': [str(path) for path in clip_paths],
+            'failed_count': len(clip_data) - len(clip_paths),
             'message': '视频片段提取完成'
         }
         
@@ -40,13 +158,14 @@ def extract_video_clips(self, project_id: str, clip_data: List[Dict[str, Any]])
 
 
 @shared_task(bind=True, name='backend.tasks.video.generate_video_collections')
-def generate_video_collections(self, project_id: str, collection_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+def generate_video_collections(self, project_id: str,
+                               collection_data: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
     """
     生成视频合集
     
     Args:
         project_id: 项目ID
-        collection_data: 合集数据列表
+        collection_data: 合集数据列表，为None时读取项目的合集元数据
         
     Returns:
         生成结果
@@ -54,10 +173,12 @@ def generate_video_collections(self, project_id: str, collection_data: List[Dict
     logger.info(f"开始生成视频合集: {project_id}")
     
     try:
+        collection_paths = _render_collections(project_id, collection_data)
         logger.info(f"视频合集生成完成: {project_id}")
         return {
             'success': True,
             'project_id': project_id,
+            'collection_paths': [str(path) for path in collection_paths],
             'message': '视频合集生成完成'
         }
         
@@ -66,6 +187,50 @@ def generate_video_collections(self, project_id: str, collection_data: List[Dict
         raise
 
 
+@shared_task(bind=True, name='backend.tasks.video.finalize_project_render')
+def finalize_project_render(self, render_results: List[Dict[str, Any]], project_id: str) -> Dict[str, Any]:
+    """
+    切片渲染全部完成后（chord回调）拼接合集并同步数据库
+    
+    Args:
+        render_results: 各批次extract_video_clips的结果
+        project_id: 项目ID
+        
+    Returns:
+        汇总结果
+    """
+    from ..core.database import SessionLocal
+    from ..core.path_utils import get_project_directory
+    from ..services.data_sync_service import DataSyncService
+    
+    clips_rendered = sum(len(result.get('clip_paths', [])) for result in render_results if isinstance(result, dict))
+    clips_failed = sum(result.get('failed_count', 0) for result in render_results if isinstance(result, dict))
+    logger.info(f"切片渲染完成: {project_id}, 成功{clips_rendered}个, 失败{clips_failed}个")
+    
+    try:
+        collection_paths = _render_collections(project_id)
+        
+        db = SessionLocal()
+        try:
+            sync_result = DataSyncService(db).sync_project_from_filesystem(project_id, get_project_directory(project_id))
+        finally:
+            db.close()
+        
+        return {
+            'success': True,
+            'project_id': project_id,
+            'clips_generated': clips_rendered,
+            'clips_failed': clips_failed,
+            'collections_generated': len(collection_paths),
+            'sync': sync_result,
+            'message': '视频渲染完成'
+        }
+        
+    except Exception as e:
+        logger.error(f"视频渲染收尾失败: {project_id}, 错误: {e}")
+        raise
+
+
 @shared_task(bind=True, name='backend.tasks.video.optimize_video_quality')
 def optimize_video_quality(self, project_id: str, video_path: str, quality_settings: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -74,21 +239,81 @@ def optimize_video_quality(self, project_id: str, video_path: str, quality_setti
     Args:
         project_id: 项目ID
         video_path: 视频路径
-        quality_settings: 质量设置
+        quality_settings: 质量设置（crf、preset、max_height、audio_bitrate）
         
     Returns:
         优化结果
     """
     logger.info(f"开始优化视频质量: {project_id}")
     
+    source = Path(video_path)
+    temp_path = source.with_name(f"{source.stem}.optimizing{source.suffix}")
     try:
+        cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-i', str(source),
+            '-c:v', 'libx264',
+            '-preset', str(quality_settings.get('preset', 'medium')),
+            '-crf', str(quality_settings.get('crf', 23)),
+        ]
+        max_height = quality_settings.get('max_height')
+        if max_height:
+            cmd += ['-vf', f"scale=-2:'min({int(max_height)},ih)'"]
+        cmd += [
+            '-c:a', 'aac',
+            '-b:a', str(quality_settings.get('audio_bitrate', '128k')),
+            '-movflags', '+faststart',
+            '-y', str(temp_path)
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr[-500:])
+        os.replace(temp_path, source)
+        
         logger.info(f"视频质量优化完成: {project_id}")
         return {
             'success': True,
             'project_id': project_id,
+            'video_path': str(source),
             'message': '视频质量优化完成'
         }
         
     except Exception as e:
+        temp_path.unlink(missing_ok=True)
         logger.error(f"视频质量优化失败: {project_id}, 错误: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+@shared_task(bind=True, name='backend.tasks.video.package_hls_stream')
+def package_hls_stream(self, project_id: str, video_path: str) -> Dict[str, Any]:
+    """
+    将项目源视频打包为HLS（fMP4分片），供切片预览和拖动使用
+    
+    Args:
+        project_id: 项目ID
+        video_path: 源视频路径
+        
+    Returns:
+        打包结果
+    """
+    from ..core.path_utils import get_project_directory
+    from ..core.shared_config import HLS_SEGMENT_SECONDS
+    from ..utils.hls_packager import HLS_DIRNAME, package_hls
+    
+    logger.info(f"开始HLS打包: {project_id}")
+    
+    try:
+        hls_dir = get_project_directory(project_id) / HLS_DIRNAME
+        playlist_path = package_hls(Path(video_path), hls_dir, segment_seconds=HLS_SEGMENT_SECONDS)
+        logger.info(f"HLS打包完成: {project_id}")
+        return {
+            'success': True,
+            'project_id': project_id,
+            'playlist_path': str(playlist_path),
+            'message': 'HLS打包完成'
+        }
+        
+    except Exception as e:
+        logger.error(f"HLS打包失败: {project_id}, 错误: {e}")
+        raise
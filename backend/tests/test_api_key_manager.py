@@ -0,0 +1,101 @@
+"""
+API密钥管理器单元测试
+"""
+import importlib
+import time
+
+import pytest
+
+from backend.utils.error_handler import ConfigurationError
+
+KEY = "sk-" + "a" * 30
+
+
+@pytest.fixture
+def manager_cls(tmp_path, monkeypatch):
+    """模块导入时会创建全局实例，先把HOME和主密码指向测试环境"""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("AUTO_CLIPS_MASTER_PASSWORD", "test-password")
+    return importlib.import_module("backend.utils.api_key_manager").APIKeyManager
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def _stored_usage(manager_cls, storage_path, key_name: str) -> int:
+    fresh = manager_cls(storage_path, "test-password", usage_flush_interval=0)
+    return fresh.keys[key_name]["usage_count"]
+
+
+class TestUsageBatching:
+    """测试使用统计的批量写盘"""
+
+    def test_flush_on_threshold(self, manager_cls, tmp_path):
+        """测试达到阈值后写盘，未达到时只在内存中累计"""
+        storage = tmp_path / "keys"
+        manager = manager_cls(storage, "test-password", usage_flush_interval=0, usage_flush_threshold=3)
+        manager.add_api_key("k1", KEY)
+
+        manager.get_api_key("k1")
+        manager.get_api_key("k1")
+        assert _stored_usage(manager_cls, storage, "k1") == 0
+        assert manager.list_api_keys()[0]["usage_count"] == 2
+
+        manager.get_api_key("k1")
+        assert _wait_for(lambda: _stored_usage(manager_cls, storage, "k1") == 3)
+
+    def test_flush_on_interval(self, manager_cls, tmp_path):
+        """测试未达到阈值时按间隔写盘"""
+        storage = tmp_path / "keys"
+        manager = manager_cls(storage, "test-password", usage_flush_interval=0.05, usage_flush_threshold=100)
+        manager.add_api_key("k1", KEY)
+
+        manager.get_api_key("k1")
+        assert _wait_for(lambda: _stored_usage(manager_cls, storage, "k1") == 1)
+
+    def test_failed_flush_is_requeued(self, manager_cls, tmp_path, monkeypatch):
+        """测试写盘失败时增量放回队列，下次刷新写入"""
+        storage = tmp_path / "keys"
+        manager = manager_cls(storage, "test-password", usage_flush_interval=0)
+        manager.add_api_key("k1", KEY)
+        manager.get_api_key("k1")
+
+        def fail(self):
+            raise ConfigurationError("disco lleno")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(manager_cls, "_save_keys", fail)
+            manager.flush_usage()
+        assert manager._pending_usage["k1"]["count"] == 1
+
+        manager.flush_usage()
+        assert manager._pending_usage == {}
+        assert _stored_usage(manager_cls, storage, "k1") == 1
+
+
+class TestMultipleInstances:
+    """测试多个进程（实例）共用同一个密钥文件"""
+
+    def test_mutations_and_usage_merge(self, manager_cls, tmp_path):
+        """测试各实例的增删和使用统计都以文件为基础合并，不覆盖彼此的修改"""
+        storage = tmp_path / "keys"
+        first = manager_cls(storage, "test-password", usage_flush_interval=0)
+        second = manager_cls(storage, "test-password", usage_flush_interval=0)
+
+        first.add_api_key("k1", KEY)
+        second.add_api_key("k2", KEY)
+        first.get_api_key("k1")
+        second.get_api_key("k1")
+        first.flush_usage()
+        second.flush_usage()
+        first.remove_api_key("k2")
+
+        stored = manager_cls(storage, "test-password", usage_flush_interval=0).keys
+        assert sorted(stored) == ["k1"]
+        assert stored["k1"]["usage_count"] == 2
@@ -0,0 +1,146 @@
+"""
+音频信号分析单元测试
+"""
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+from backend.utils import audio_analyzer
+from backend.utils.audio_analyzer import (
+    COL_SCORE, AudioAnalysisError, AudioSignal, blend_audio_scores, build_signal_timeline, extract_analysis_audio,
+    compute_audio_features, compute_speech_rate, load_wav_memmap, split_dead_segments
+)
+
+SAMPLE_RATE = 16000
+
+
+def _write_wav(path, samples):
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.astype('<i2').tobytes())
+
+
+def _synthetic_audio():
+    """5秒静音 + 5秒正弦语音 + 2秒白噪声（模拟掌声）"""
+    rng = np.random.default_rng(0)
+    t = np.arange(5 * SAMPLE_RATE) / SAMPLE_RATE
+    silence = np.zeros(5 * SAMPLE_RATE)
+    tone = 3000 * np.sin(2 * np.pi * 220 * t)
+    noise = rng.normal(0, 8000, 2 * SAMPLE_RATE)
+    return np.concatenate([silence, tone, noise])
+
+
+class TestAudioFeatures:
+    """测试音频特征计算"""
+
+    def test_memmap_roundtrip(self, tmp_path):
+        """测试内存映射读取WAV"""
+        samples = _synthetic_audio()
+        wav_path = tmp_path / "audio.wav"
+        _write_wav(wav_path, samples)
+
+        loaded, sample_rate = load_wav_memmap(wav_path)
+        assert sample_rate == SAMPLE_RATE
+        assert len(loaded) == len(samples)
+        assert np.array_equal(loaded, samples.astype('<i2'))
+
+    def test_silence_and_burst(self):
+        """测试静音和爆发识别"""
+        features = compute_audio_features(_synthetic_audio().astype('<i2'), SAMPLE_RATE)
+
+        assert len(features["rms_db"]) == 12
+        assert np.all(features["rms_db"][:5] < -45)
+        assert np.all(features["rms_db"][5:] > -45)
+        assert features["burst"][10:].all()
+        assert not features["burst"][5:10].any()
+
+    def test_speech_rate(self):
+        """测试字幕语速"""
+        srt_data = [
+            {"start_time": "00:00:01,000", "end_time": "00:00:03,000", "text": "uno dos tres cuatro"},
+            {"start_time": "00:00:05,000", "end_time": "00:00:06,000", "text": "你好世界"},
+        ]
+        rate = compute_speech_rate(srt_data, 8)
+
+        assert np.allclose(rate, [0, 2, 2, 0, 0, 4, 0, 0])
+
+
+class TestAudioSignal:
+    """测试信号时间线在评分中的使用"""
+
+    def _signal(self):
+        features = compute_audio_features(_synthetic_audio().astype('<i2'), SAMPLE_RATE)
+        return AudioSignal(build_signal_timeline(features, np.zeros(12)))
+
+    def test_save_and_load(self, tmp_path):
+        """测试 .npy 保存与加载"""
+        signal = self._signal()
+        path = signal.save(tmp_path / "audio_signal.npy")
+        loaded = AudioSignal.load(path)
+
+        assert loaded.duration == 12
+        assert np.allclose(loaded.timeline[:, COL_SCORE], signal.timeline[:, COL_SCORE])
+
+    def test_dead_segments_skipped(self):
+        """测试无声片段直接记0分"""
+        clips = [
+            {"id": "1", "start_time": "00:00:00,000", "end_time": "00:00:05,000"},
+            {"id": "2", "start_time": "00:00:05,000", "end_time": "00:00:12,000"},
+        ]
+        live, dead = split_dead_segments(clips, self._signal(), min_active_ratio=0.2)
+
+        assert [c["id"] for c in dead] == ["1"]
+        assert dead[0]["final_score"] == 0.0
+        assert [c["id"] for c in live] == ["2"]
+
+    def test_blend(self):
+        """测试音频分数按权重混入，且只加分不减分"""
+        signal = self._signal()
+        audio = signal.segment_stats(5, 12)["score"]
+        low = {"id": "1", "start_time": "00:00:05,000", "end_time": "00:00:12,000", "final_score": 0.3}
+        high = {"id": "2", "start_time": "00:00:05,000", "end_time": "00:00:12,000", "final_score": 0.95}
+        blend_audio_scores([low, high], signal, weight=0.2)
+
+        assert 0.0 < low["audio_score"] <= 1.0
+        assert low["final_score"] == round(max(0.3, 0.8 * 0.3 + 0.2 * audio), 2)
+        assert high["final_score"] == round(max(0.95, 0.8 * 0.95 + 0.2 * audio), 2)
+        assert low["final_score"] >= 0.3 and high["final_score"] >= 0.95
+
+
+class TestExtractAnalysisAudio:
+    """测试音频提取只在成功时生成最终文件"""
+
+    def _patch(self, monkeypatch, run):
+        monkeypatch.setattr("backend.core.worker_state.is_ffmpeg_available", lambda: True)
+        monkeypatch.setattr("backend.utils.batch_thumbnailer.probe_duration", lambda path: 36000.0)
+        monkeypatch.setattr(audio_analyzer.subprocess, "run", run)
+
+    def test_failure_leaves_no_partial_file(self, tmp_path, monkeypatch):
+        """测试超时和失败都不会留下被复用的残缺WAV，超时按时长放宽"""
+        timeouts = []
+
+        def timeout_run(cmd, **kwargs):
+            timeouts.append(kwargs["timeout"])
+            open(cmd[-1], "wb").write(b"RIFF")
+            raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+
+        self._patch(monkeypatch, timeout_run)
+        with pytest.raises(AudioAnalysisError):
+            extract_analysis_audio(tmp_path / "video.mp4", tmp_path)
+        assert timeouts == [9000.0]
+        assert list(tmp_path.iterdir()) == []
+
+    def test_success_replaces_final_file(self, tmp_path, monkeypatch):
+        """测试成功后才出现最终文件"""
+        def ok_run(cmd, **kwargs):
+            _write_wav(cmd[-1], np.zeros(SAMPLE_RATE, dtype=np.int16))
+            return subprocess.CompletedProcess(cmd, 0, "", "")
+
+        self._patch(monkeypatch, ok_run)
+        audio_path = extract_analysis_audio(tmp_path / "video.mp4", tmp_path)
+
+        assert audio_path.name == "video_audio.wav"
+        assert [p.name for p in tmp_path.iterdir()] == ["video_audio.wav"]
@@ -0,0 +1,117 @@
+"""
+批量缩略图单元测试
+"""
+import json
+import sys
+
+import numpy as np
+from PIL import Image
+
+from backend.utils.batch_thumbnailer import (
+    BatchThumbnailer, ClipThumbnailRequest, build_select_expr, build_sprite_vtt,
+    candidate_times, frame_quality, map_targets_to_frames, sprite_times
+)
+
+
+def _noise_frame(seed: int, height: int = 18, width: int = 32) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(40, 220, size=(height, width, 3), dtype=np.uint8)
+
+
+class TestFrameSelection:
+    """测试时间点与帧的选择"""
+
+    def test_candidate_and_sprite_times(self):
+        """测试候选时间点避开首尾，雪碧图格数受上限约束"""
+        assert candidate_times(10.0, 18.0, 3) == [12.0, 14.0, 16.0]
+        assert sprite_times(35.0, 10.0, 100) == [0.0, 10.0, 20.0, 30.0]
+        assert len(sprite_times(3600.0, 1.0, 50)) == 50
+
+    def test_select_expr(self):
+        """测试select表达式去重排序且每个时间点只放行一帧"""
+        expr = build_select_expr([5.0, 1.0, 5.0])
+
+        assert expr.count("gte(t,") == 2
+        assert expr.index("gte(t,1.000)") < expr.index("gte(t,5.000)")
+        assert "lt(prev_selected_t,5.000)" in expr
+        assert build_select_expr([]) == "0"
+
+    def test_map_targets_to_frames(self):
+        """测试目标时间映射到不早于它的第一帧，超出末尾取最后一帧"""
+        frame_times = [0.0, 4.04, 8.0, 12.0]
+
+        assert map_targets_to_frames([0.0, 4.0, 8.0, 30.0], frame_times) == [0, 1, 2, 3]
+        assert map_targets_to_frames([1.0], []) == []
+
+
+class TestFrameQuality:
+    """测试感知质量评分"""
+
+    def test_sharp_beats_flat_and_black(self):
+        """测试清晰帧得分高于模糊帧，黑帧为0"""
+        sharp = _noise_frame(1, 90, 160)
+        flat = np.full((90, 160, 3), 128, dtype=np.uint8)
+        black = np.zeros((90, 160, 3), dtype=np.uint8)
+
+        assert frame_quality(sharp) > frame_quality(flat)
+        assert frame_quality(black) == 0.0
+
+
+class TestSpriteVtt:
+    """测试雪碧图WebVTT映射"""
+
+    def test_cues(self):
+        """测试每格的时间段与坐标"""
+        vtt = build_sprite_vtt([0.0, 10.0, 20.0], 25.0, columns=2, tile_width=160, tile_height=90)
+        lines = vtt.splitlines()
+
+        assert lines[0] == "WEBVTT"
+        assert "00:00:10.000 --> 00:00:20.000" in lines
+        assert "sprite.jpg#xywh=160,0,160,90" in lines
+        assert "00:00:20.000 --> 00:00:25.000" in lines
+        assert "sprite.jpg#xywh=0,90,160,90" in lines
+
+
+class TestBatchThumbnailer:
+    """测试单进程批量生成"""
+
+    def test_extract_frames_from_single_process(self, tmp_path, monkeypatch):
+        """测试从一个进程的stdout读取帧并从showinfo解析时间戳"""
+        thumbnailer = BatchThumbnailer(width=4, height=2)
+        script = (
+            "import sys\n"
+            "for i, t in enumerate([0.0, 5.0, 9.5]):\n"
+            "    sys.stdout.buffer.write(bytes([i]) * 24)\n"
+            "    sys.stderr.write('[Parsed_showinfo_3 @ 0x1] n:%4d pts:%d pts_time:%s duration:1\\n' % (i, i, t))\n"
+        )
+        monkeypatch.setattr(thumbnailer, "build_command",
+                            lambda *args, **kwargs: [sys.executable, "-c", script])
+
+        frame_times, frames = thumbnailer.extract_frames(tmp_path / "src.mp4", [0.0, 5.0, 9.0])
+
+        assert frame_times == [0.0, 5.0, 9.5]
+        assert len(frames) == 3
+        assert frames[2].shape == (2, 4, 3)
+        assert int(frames[2][0, 0, 0]) == 2
+
+    def test_generate_picks_best_frame(self, tmp_path, monkeypatch):
+        """测试每个切片取最佳候选帧，并生成雪碧图、WebVTT和清单"""
+        thumbnailer = BatchThumbnailer(width=32, height=18, tile_width=16, tile_height=9,
+                                       sprite_interval=10.0, sprite_columns=2)
+        frame_times = [0.0, 2.0, 4.0, 6.0, 10.0]
+        frames = [np.zeros((18, 32, 3), dtype=np.uint8), np.zeros((18, 32, 3), dtype=np.uint8),
+                  _noise_frame(2), np.zeros((18, 32, 3), dtype=np.uint8), _noise_frame(3)]
+        monkeypatch.setattr(thumbnailer, "extract_frames", lambda *args, **kwargs: (frame_times, frames))
+
+        manifest = thumbnailer.generate(
+            tmp_path / "src.mp4", [ClipThumbnailRequest("1", 0.0, 8.0)], tmp_path / "thumbs", duration=20.0
+        )
+
+        clip_entry = manifest["clips"]["1"]
+        assert clip_entry["time"] == 4.0
+        assert clip_entry["score"] > 0
+        assert Image.open(clip_entry["path"]).size == (32, 18)
+        assert Image.open(tmp_path / "thumbs" / "sprite.jpg").size == (32, 9)
+        assert (tmp_path / "thumbs" / "sprite.vtt").read_text(encoding='utf-8').startswith("WEBVTT")
+        with open(tmp_path / "thumbs" / "thumbnails.json", encoding='utf-8') as f:
+            assert json.load(f)["sprite"] == "sprite.jpg"
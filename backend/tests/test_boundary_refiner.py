@@ -0,0 +1,58 @@
+"""
+切片边界修正单元测试
+"""
+import numpy as np
+from backend.utils.boundary_refiner import BoundaryIndex, parse_ffmpeg_events, refine_timeline
+
+FFMPEG_STDERR = """
+[Parsed_showinfo_2 @ 0x1] n:   0 pts:  12800 pts_time:10.24   duration:512 fmt:yuv420p
+[silencedetect @ 0x2] silence_start: 4.5
+[silencedetect @ 0x2] silence_end: 5.8 | silence_duration: 1.3
+[Parsed_showinfo_2 @ 0x1] n:   1 pts:  40960 pts_time:32   duration:512 fmt:yuv420p
+[silencedetect @ 0x2] silence_start: 19.6
+[silencedetect @ 0x2] silence_end: 20.1 | silence_duration: 0.5
+"""
+
+
+class TestParseEvents:
+    """测试ffmpeg输出解析"""
+
+    def test_parse(self):
+        """测试解析镜头切换和静音区间"""
+        events = parse_ffmpeg_events(FFMPEG_STDERR)
+        assert events["scene_cuts"] == [10.24, 32.0]
+        assert events["silence_starts"] == [4.5, 19.6]
+        assert events["silence_ends"] == [5.8, 20.1]
+
+
+class TestBoundaryIndex:
+    """测试边界吸附"""
+
+    def _index(self):
+        return BoundaryIndex.from_events(parse_ffmpeg_events(FFMPEG_STDERR))
+
+    def test_snap_to_pause_first(self):
+        """测试优先吸附到停顿，其次镜头切换"""
+        refined = self._index().snap(np.array([6.3, 11.0]), np.array([19.0, 31.2]), tolerance=1.0)
+
+        assert np.allclose(refined[0], [5.8, 19.6])
+        assert np.allclose(refined[1], [10.24, 32.0])
+
+    def test_out_of_tolerance_unchanged(self):
+        """测试超出容差时保持原样"""
+        refined = self._index().snap(np.array([8.0]), np.array([26.0]), tolerance=1.0)
+        assert np.allclose(refined[0], [8.0, 26.0])
+
+    def test_refine_timeline(self):
+        """测试修正时间线并保留原始时间"""
+        timeline = [
+            {"id": "1", "start_time": "00:00:06,300", "end_time": "00:00:19,000"},
+            {"id": "2", "start_time": "00:00:40,000", "end_time": "00:00:50,000"},
+        ]
+        changed = refine_timeline(timeline, self._index(), tolerance=1.0)
+
+        assert changed == 1
+        assert timeline[0]["start_time"] == "00:00:05,800"
+        assert timeline[0]["end_time"] == "00:00:19,600"
+        assert timeline[0]["original_start_time"] == "00:00:06,300"
+        assert "original_start_time" not in timeline[1]
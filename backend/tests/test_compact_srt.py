@@ -0,0 +1,85 @@
+"""
+紧凑SRT编解码单元测试
+"""
+from backend.utils.compact_srt import CompactSrtCodec, parse_loose_time
+
+
+SRT_ENTRIES = [
+    {'index': 1, 'start_time': '00:10:01,000', 'end_time': '00:10:02,000', 'text': 'hola'},
+    {'index': 2, 'start_time': '00:10:02,100', 'end_time': '00:10:03,500', 'text': 'que tal'},
+    {'index': 3, 'start_time': '00:10:05,000', 'end_time': '00:10:07,250', 'text': 'muy bien'},
+    {'index': 4, 'start_time': '00:10:09,000', 'end_time': '00:10:11,800', 'text': 'gracias'},
+]
+
+
+class TestParseLooseTime:
+    """测试宽松时间解析"""
+
+    def test_srt_format(self):
+        """测试SRT格式"""
+        assert parse_loose_time('01:02:03,450') == 3723.45
+
+    def test_short_formats(self):
+        """测试简写格式"""
+        assert parse_loose_time('1:02:03') == 3723
+        assert parse_loose_time('02:03') == 123
+        assert parse_loose_time(12.5) == 12.5
+
+    def test_invalid(self):
+        """测试无效输入"""
+        assert parse_loose_time('mañana') is None
+        assert parse_loose_time(None) is None
+
+
+class TestCompactSrtCodec:
+    """测试紧凑编码与解码"""
+
+    def test_encode_merges_short_gaps(self):
+        """测试短间隔字幕合并为一行"""
+        codec = CompactSrtCodec(SRT_ENTRIES, merge_gap_ms=300)
+        lines = codec.encode().split('\n')
+
+        assert lines == [
+            'L1 0:10:01 hola que tal',
+            'L2 0:10:05 muy bien',
+            'L3 0:10:09 gracias',
+        ]
+
+    def test_no_merge(self):
+        """测试关闭合并时逐条对应"""
+        codec = CompactSrtCodec(SRT_ENTRIES, merge_gap_ms=0)
+        assert len(codec.lines) == len(SRT_ENTRIES)
+
+    def test_resolve_by_line_numbers(self):
+        """测试按行号解析回精确边界"""
+        codec = CompactSrtCodec(SRT_ENTRIES)
+        item = codec.resolve({
+            'outline': 'saludo', 'start_line': 'L1', 'end_line': 2,
+            'start_time': '00:10:01,000', 'end_time': '00:10:07,000'
+        })
+
+        assert item['start_time'] == '00:10:01,000'
+        assert item['end_time'] == '00:10:07,250'
+        assert 'start_line' not in item
+
+    def test_resolve_by_approximate_time(self):
+        """测试近似时间吸附到最近的边界"""
+        codec = CompactSrtCodec(SRT_ENTRIES)
+        item = codec.resolve({'outline': 'x', 'start_time': '00:10:04,600', 'end_time': '00:10:11,000'})
+
+        assert item['start_time'] == '00:10:05,000'
+        assert item['end_time'] == '00:10:11,800'
+
+    def test_resolve_swapped_lines(self):
+        """测试结束行早于开始行时自动交换"""
+        codec = CompactSrtCodec(SRT_ENTRIES)
+        item = codec.resolve({'outline': 'x', 'start_line': 3, 'end_line': 1,
+                              'start_time': '', 'end_time': ''})
+
+        assert item['start_time'] == '00:10:01,000'
+        assert item['end_time'] == '00:10:11,800'
+
+    def test_resolve_unparseable(self):
+        """测试无法解析时返回None"""
+        codec = CompactSrtCodec(SRT_ENTRIES)
+        assert codec.resolve({'outline': 'x', 'start_time': 'abc', 'end_time': 'def'}) is None
@@ -0,0 +1,109 @@
+"""
+假LLM提供商和合成基准素材单元测试
+"""
+import json
+
+import pytest
+from backend.benchmarks.synthetic import format_duration, parse_duration, write_synthetic_srt
+from backend.core.llm_providers import FakeProvider, LLMProviderFactory, ProviderType
+from backend.core.llm_router import is_rate_limit_error
+from backend.utils.compact_srt import CompactSrtCodec
+from backend.utils.text_processor import TextProcessor
+
+
+def _srt_entries(count: int = 12):
+    return [
+        {"index": i + 1, "start_time": f"00:00:{i * 4:02d},000", "end_time": f"00:00:{i * 4 + 3:02d},500",
+         "text": f"frase numero {i}"}
+        for i in range(count)
+    ]
+
+
+class TestFakeProvider:
+    """测试按步骤生成的响应格式"""
+
+    def test_registered_in_factory(self):
+        """测试通过工厂创建，不需要真实密钥"""
+        provider = LLMProviderFactory.create_provider(ProviderType.FAKE, "", "fake-llm")
+        assert isinstance(provider, FakeProvider)
+        assert provider.test_connection()
+
+    def test_outline_markdown(self):
+        """测试Step 1返回带编号标题和子话题的Markdown"""
+        text = " ".join(f"palabra{i}" for i in range(2000))
+        response = FakeProvider().call("prompt", {"text": text})
+        titles = [line for line in response.content.splitlines() if line[0].isdigit()]
+
+        assert len(titles) == 3
+        assert titles[0] == "1. **palabra0 palabra1 palabra2 palabra3 palabra4 palabra5**"
+        assert response.usage["prompt_tokens"] > 0
+
+    def test_timeline_resolves_through_compact_codec(self):
+        """测试Step 2的行号能被紧凑字幕解码器映射回SRT边界"""
+        codec = CompactSrtCodec(_srt_entries(), merge_gap_ms=0)
+        outline = [{"title": "A", "subtopics": ["a"]}, {"title": "B", "subtopics": ["b"]}]
+        items = json.loads(FakeProvider().call("prompt", {"outline": outline, "srt_text": codec.encode()}).content)
+
+        resolved = [codec.resolve(item) for item in items]
+        assert [item["outline"] for item in resolved] == ["A", "B"]
+        assert resolved[0]["start_time"] == "00:00:00,000"
+        assert resolved[1]["end_time"] == "00:00:47,500"
+
+    def test_scoring_titles_and_naming(self):
+        """测试评分、标题和合集命名的结构，分数稳定"""
+        provider = FakeProvider()
+        clips = [{"outline": "A", "content": [], "start_time": "", "end_time": ""}]
+        scores = json.loads(provider.call("prompt", clips).content)
+        fused = json.loads(provider.call("prompt", [{"id": "1", **clips[0]}]).content)
+        titles = json.loads(provider.call("prompt", [{"id": "1", "title": "A", "recommend_reason": "r"}]).content)
+        names = json.loads(provider.call("prompt", {"clusters": [{"cluster_id": "1", "keywords": ["x"]}]}).content)
+
+        assert 0.55 <= scores[0]["final_score"] <= 0.95
+        assert scores == json.loads(provider.call("prompt", clips).content)
+        assert fused[0]["id"] == "1" and fused[0]["generated_title"]
+        assert list(titles) == ["1"]
+        assert names[0]["cluster_id"] == "1" and names[0]["collection_title"]
+
+    def test_error_injection(self):
+        """测试限流错误可被路由层识别，错误序列由种子决定"""
+        with pytest.raises(RuntimeError) as excinfo:
+            FakeProvider(rate_limit_rate=1.0).call("prompt", {"text": "hola"})
+        assert is_rate_limit_error(excinfo.value)
+
+        def outcomes(seed):
+            provider = FakeProvider(error_rate=0.5, seed=seed)
+            results = []
+            for _ in range(20):
+                try:
+                    provider.call("prompt", {"text": "hola"})
+                    results.append(True)
+                except RuntimeError:
+                    results.append(False)
+            return results
+
+        assert outcomes(7) == outcomes(7)
+        assert not all(outcomes(7))
+
+
+class TestSyntheticMaterial:
+    """测试合成基准素材"""
+
+    def test_synthetic_srt_is_parseable(self, tmp_path):
+        """测试合成字幕覆盖指定时长且可被解析"""
+        srt_path = tmp_path / "bench.srt"
+        count = write_synthetic_srt(srt_path, 600, seed=1)
+        entries = TextProcessor.parse_srt(srt_path)
+
+        assert len(entries) == count > 100
+        assert TextProcessor.time_to_seconds(entries[-1]["end_time"]) <= 600
+
+        first = srt_path.read_text(encoding="utf-8")
+        write_synthetic_srt(srt_path, 600, seed=1)
+        assert srt_path.read_text(encoding="utf-8") == first
+
+    def test_duration_arguments(self):
+        """测试时长参数解析"""
+        assert parse_duration("10h") == 36000
+        assert parse_duration("90m") == 5400
+        assert parse_duration("45") == 45
+        assert format_duration(14400) == "4h"
@@ -0,0 +1,96 @@
+"""
+HLS打包单元测试
+"""
+import json
+
+from backend.utils.hls_packager import (
+    HLS_FILENAME_RE, HlsPlaylist, is_packaged, load_playlist
+)
+
+SAMPLE_PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-TARGETDURATION:5
+#EXT-X-MEDIA-SEQUENCE:0
+#EXT-X-PLAYLIST-TYPE:VOD
+#EXT-X-MAP:URI="init.mp4"
+#EXTINF:4.000000,
+seg_00000.m4s
+#EXTINF:4.500000,
+seg_00001.m4s
+#EXTINF:3.500000,
+seg_00002.m4s
+#EXTINF:4.000000,
+seg_00003.m4s
+#EXT-X-ENDLIST
+"""
+
+
+class TestHlsPlaylist:
+    """测试播放列表解析与区间合成"""
+
+    def test_parse(self):
+        """测试解析分片起点和初始化分片"""
+        playlist = HlsPlaylist.parse(SAMPLE_PLAYLIST)
+
+        assert playlist.init_uri == "init.mp4"
+        assert [s.uri for s in playlist.segments] == [f"seg_{i:05d}.m4s" for i in range(4)]
+        assert [s.start for s in playlist.segments] == [0.0, 4.0, 8.5, 12.0]
+        assert playlist.duration == 16.0
+
+    def test_segment_range(self):
+        """测试只选择与区间重叠的分片"""
+        playlist = HlsPlaylist.parse(SAMPLE_PLAYLIST)
+
+        assert playlist.segment_range(5.0, 9.0) == (1, 3)
+        assert playlist.segment_range(4.0, 8.5) == (1, 2)
+        assert playlist.segment_range(0.0, 100.0) == (0, 4)
+        assert playlist.segment_range(15.0, 15.5) == (3, 4)
+        assert HlsPlaylist([]).segment_range(0, 10) == (0, 0)
+
+    def test_build_clip_playlist(self):
+        """测试合成的播放列表引用正确分片并从切片起点开始播放"""
+        playlist = HlsPlaylist.parse(SAMPLE_PLAYLIST)
+        text = playlist.build_clip_playlist(5.0, 9.0, uri_prefix="../../hls/")
+        lines = text.splitlines()
+
+        assert "#EXT-X-MEDIA-SEQUENCE:1" in lines
+        assert "#EXT-X-TARGETDURATION:5" in lines
+        assert "#EXT-X-START:TIME-OFFSET=1.000,PRECISE=YES" in lines
+        assert '#EXT-X-MAP:URI="../../hls/init.mp4"' in lines
+        assert [l for l in lines if not l.startswith('#')] == [
+            "../../hls/seg_00001.m4s", "../../hls/seg_00002.m4s"
+        ]
+        assert lines[-1] == "#EXT-X-ENDLIST"
+
+
+class TestPackageState:
+    """测试打包目录状态"""
+
+    def test_load_playlist_and_signature(self, tmp_path):
+        """测试未打包返回None，源文件变化后视为未打包"""
+        source = tmp_path / "input.mp4"
+        source.write_bytes(b"video")
+        hls_dir = tmp_path / "hls"
+
+        assert load_playlist(hls_dir) is None
+        assert not is_packaged(source, hls_dir)
+
+        hls_dir.mkdir()
+        (hls_dir / "index.m3u8").write_text(SAMPLE_PLAYLIST, encoding='utf-8')
+        stat = source.stat()
+        (hls_dir / "source.json").write_text(json.dumps(
+            {"path": str(source), "size": stat.st_size, "mtime": stat.st_mtime}
+        ), encoding='utf-8')
+
+        assert len(load_playlist(hls_dir).segments) == 4
+        assert is_packaged(source, hls_dir)
+
+        source.write_bytes(b"changed video")
+        assert not is_packaged(source, hls_dir)
+
+    def test_filename_whitelist(self):
+        """测试只允许访问打包产物"""
+        assert HLS_FILENAME_RE.match("index.m3u8")
+        assert HLS_FILENAME_RE.match("seg_00012.m4s")
+        assert not HLS_FILENAME_RE.match("source.json")
+        assert not HLS_FILENAME_RE.match("../raw/input.mp4")
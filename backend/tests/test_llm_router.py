@@ -0,0 +1,112 @@
+"""
+LLM路由层单元测试
+"""
+from unittest.mock import MagicMock
+
+import pytest
+from backend.core.llm_providers import LLMResponse, ProviderType
+from backend.core.llm_router import (
+    LLMRoute, LLMRouter, RateLimitExhaustedError, is_rate_limit_error
+)
+
+
+def _make_route(name, weight=1, rpm=None, tpm=None, side_effect=None):
+    """创建带模拟提供商的路由"""
+    provider = MagicMock()
+    if side_effect is not None:
+        provider.call.side_effect = side_effect
+    else:
+        provider.call.return_value = LLMResponse(content=name, usage={"total_tokens": 10})
+    return LLMRoute(
+        name=name,
+        provider_type=ProviderType.DASHSCOPE,
+        model_name="qwen-plus",
+        provider=provider,
+        weight=weight,
+        rpm_limit=rpm,
+        tpm_limit=tpm,
+    )
+
+
+class TestRateLimitDetection:
+    """测试限流错误识别"""
+
+    def test_status_code(self):
+        """测试通过状态码识别"""
+        error = Exception("boom")
+        error.status_code = 429
+        assert is_rate_limit_error(error)
+
+    def test_message(self):
+        """测试通过错误信息识别"""
+        assert is_rate_limit_error(Exception("API调用失败 - Status: 429, Code: Throttling"))
+        assert not is_rate_limit_error(Exception("API调用失败 - Status: 500"))
+
+    def test_quota_is_not_rate_limit(self):
+        """测试额度耗尽等非429错误不当作限流"""
+        assert not is_rate_limit_error(Exception("Arrearage: Access denied, insufficient quota"))
+        assert not is_rate_limit_error(Exception("You exceeded your current quota, please check your plan"))
+        assert is_rate_limit_error(Exception("Rate limit reached for requests"))
+
+
+class TestLLMRouter:
+    """测试路由选择与限流处理"""
+
+    def test_weighted_round_robin(self):
+        """测试按权重分配请求"""
+        router = LLMRouter([_make_route("a", weight=3), _make_route("b", weight=1)])
+        picks = [router.acquire(0).name for _ in range(8)]
+
+        assert picks.count("a") == 6
+        assert picks.count("b") == 2
+
+    def test_rpm_budget(self):
+        """测试RPM预算耗尽后切换路由"""
+        router = LLMRouter([_make_route("a", rpm=1), _make_route("b", rpm=1)], max_wait_seconds=0)
+        names = {router.acquire(0).name, router.acquire(0).name}
+
+        assert names == {"a", "b"}
+        with pytest.raises(RateLimitExhaustedError):
+            router.acquire(0)
+
+    def test_tpm_budget(self):
+        """测试TPM预算"""
+        router = LLMRouter([_make_route("a", tpm=100)], max_wait_seconds=0)
+        router.acquire(80)
+
+        with pytest.raises(RateLimitExhaustedError):
+            router.acquire(30)
+
+    def test_adjust_uses_request_handle(self):
+        """测试预估值相同的并发请求按各自的记录修正，不会改错条目"""
+        router = LLMRouter([_make_route("a", tpm=1000)])
+        route, first = router.acquire_with_usage(100)
+        _, second = router.acquire_with_usage(100)
+
+        router.report_success(route, second, {"total_tokens": 40})
+        router.report_success(route, first, {"total_tokens": 300})
+
+        assert (first.tokens, second.tokens) == (300, 40)
+        assert route.to_dict()["tokens_last_minute"] == 340
+        assert route.total_tokens == 340
+
+    def test_cooldown_on_429(self):
+        """测试429后冷却并切换到其他路由"""
+        limited = Exception("429 Too Many Requests")
+        router = LLMRouter([_make_route("a", side_effect=limited), _make_route("b")])
+
+        response, route = router.call("prompt")
+        assert route.name == "b"
+        assert response.content == "b"
+
+        status = {s["name"]: s for s in router.get_status()}
+        assert status["a"]["cooling_down"]
+        assert not status["b"]["cooling_down"]
+
+    def test_other_errors_propagate(self):
+        """测试非限流错误直接抛出"""
+        router = LLMRouter([_make_route("a", side_effect=ValueError("bad key")), _make_route("b")])
+
+        with pytest.raises(ValueError):
+            for _ in range(2):
+                router.call("prompt")
@@ -0,0 +1,132 @@
+"""
+媒体任务执行器单元测试
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+from backend.services.exceptions import ProcessingError
+from backend.services.media_job_service import (
+    FfmpegProgressParser, MediaExecutor, MediaJobStatus, with_progress_output
+)
+
+
+def _fake_ffmpeg(tmp_path, body: str):
+    """生成忽略参数的假ffmpeg可执行文件"""
+    path = tmp_path / "fake_ffmpeg"
+    path.write_text(f"#!{sys.executable}\nimport sys, time\n{body}\n", encoding='utf-8')
+    os.chmod(path, 0o755)
+    return [str(path)]
+
+
+PROGRESS_SCRIPT = (
+    "for us in (2500000, 5000000):\n"
+    "    print('out_time_us=%d' % us)\n"
+    "    print('speed=2.0x')\n"
+    "    print('progress=continue', flush=True)\n"
+    "print('out_time_us=10000000')\n"
+    "print('progress=end', flush=True)\n"
+)
+
+
+async def _noop_notifier(job):
+    pass
+
+
+class TestProgressParser:
+    """测试 -progress 输出解析"""
+
+    def test_blocks(self):
+        """测试按块返回进度，结束块为100%"""
+        parser = FfmpegProgressParser(duration=10.0)
+
+        assert parser.feed("frame=10\n") is None
+        assert parser.feed("out_time_us=5000000\n") is None
+        progress = parser.feed("progress=continue\n")
+        assert progress["out_time"] == 5.0
+        assert progress["percent"] == 50.0
+        assert not progress["done"]
+
+        parser.feed("out_time=00:00:09.500000\n")
+        assert parser.feed("progress=end\n")["percent"] == 100.0
+
+    def test_with_progress_output(self):
+        """测试 -progress 参数插入在可执行文件之后"""
+        assert with_progress_output(['ffmpeg', '-i', 'a.mp4', 'b.mp4'])[:4] == \
+            ['ffmpeg', '-progress', 'pipe:1', '-nostats']
+
+
+class TestMediaExecutor:
+    """测试ffmpeg异步执行和后台任务"""
+
+    def test_run_ffmpeg_reports_progress(self, tmp_path):
+        """测试运行进程并回调进度"""
+        executor = MediaExecutor(max_concurrency=1, notifier=_noop_notifier)
+        updates = []
+
+        asyncio.run(executor.run_ffmpeg(_fake_ffmpeg(tmp_path, PROGRESS_SCRIPT),
+                                        duration=10.0, on_progress=updates.append))
+
+        assert [u["percent"] for u in updates] == [25.0, 50.0, 100.0]
+
+    def test_run_ffmpeg_failure_and_timeout(self, tmp_path):
+        """测试失败和超时都抛出ProcessingError"""
+        executor = MediaExecutor(max_concurrency=1, notifier=_noop_notifier)
+
+        with pytest.raises(ProcessingError):
+            asyncio.run(executor.run_ffmpeg(_fake_ffmpeg(tmp_path, "sys.stderr.write('boom')\nsys.exit(1)")))
+        with pytest.raises(ProcessingError):
+            asyncio.run(executor.run_ffmpeg(_fake_ffmpeg(tmp_path, "time.sleep(30)"), timeout=0.5))
+
+    def test_job_lifecycle_and_cancel(self, tmp_path):
+        """测试任务完成后保存结果，运行中的任务可以取消"""
+        executor = MediaExecutor(max_concurrency=2, notifier=_noop_notifier)
+        progress_cmd = _fake_ffmpeg(tmp_path, PROGRESS_SCRIPT)
+        (tmp_path / "slow").mkdir()
+        slow_cmd = _fake_ffmpeg(tmp_path / "slow", "time.sleep(30)")
+
+        async def scenario():
+            async def render(job):
+                await executor.run_ffmpeg(progress_cmd, duration=10.0, on_progress=job.report_progress)
+                return {"ok": True}
+
+            async def slow(job):
+                await executor.run_ffmpeg(slow_cmd)
+
+            done_job = executor.submit("render", render, project_id="p1")
+            slow_job = executor.submit("render", slow, project_id="p2")
+            await asyncio.sleep(0.5)
+
+            assert await executor.cancel(slow_job.id)
+            while not done_job.finished:
+                await asyncio.sleep(0.05)
+            return done_job, slow_job
+
+        done_job, slow_job = asyncio.run(scenario())
+
+        assert done_job.status == MediaJobStatus.COMPLETED
+        assert done_job.result == {"ok": True}
+        assert done_job.progress == 100.0
+        assert slow_job.status == MediaJobStatus.CANCELLED
+        assert [job.id for job in executor.list_jobs("p1")] == [done_job.id]
+        assert executor.get(slow_job.id).to_dict()["status"] == "cancelled"
+
+    def test_cancel_before_start(self):
+        """测试任务开始执行前被取消时标记为已取消，且不残留任务句柄"""
+        executor = MediaExecutor(max_concurrency=1, notifier=_noop_notifier)
+
+        async def scenario():
+            async def render(job):
+                return {"ok": True}
+
+            job = executor.submit("render", render, project_id="p1")
+            assert await executor.cancel(job.id)
+            return job
+
+        job = asyncio.run(scenario())
+
+        assert job.status == MediaJobStatus.CANCELLED
+        assert job.finished_at is not None
+        assert executor._tasks == {}
@@ -0,0 +1,109 @@
+"""
+流水线上下文和Step 1/Step 2分块交接单元测试
+"""
+import json
+from unittest.mock import MagicMock
+
+from backend.core.pipeline_context import (
+    PipelineContext, bind_pipeline_context, read_json_artifact, unbind_pipeline_context, write_json_artifact
+)
+from backend.pipeline.step1_outline import OutlineExtractor
+from backend.pipeline.step2_timeline import TimelineExtractor
+
+SRT_TEXT = "".join(
+    f"{i + 1}\n00:00:{i * 3:02d},000 --> 00:00:{i * 3 + 2:02d},000\nfrase {i}\n\n" for i in range(10)
+)
+
+
+def _make_extractor(tmp_path):
+    extractor = OutlineExtractor(tmp_path)
+    extractor.llm_client = MagicMock()
+    extractor.llm_client.get_input_token_budget.return_value = 100000
+    extractor.llm_client.call_with_retry.return_value = ""
+    return extractor
+
+
+class TestArtifacts:
+    """测试中间产物的紧凑写入"""
+
+    def test_compact_and_compressed(self, tmp_path):
+        """测试无缩进JSON、gzip格式读取，以及切换格式时删除旧文件"""
+        path = tmp_path / "chunk_0.json"
+        data = [{"text": "hola", "index": 1}]
+
+        write_json_artifact(path, data)
+        assert path.read_text(encoding="utf-8") == '[{"text":"hola","index":1}]'
+
+        written = write_json_artifact(path, data, compress=True)
+        assert written.name == "chunk_0.json.gz"
+        assert not path.exists()
+        assert read_json_artifact(path) == data
+        assert read_json_artifact(tmp_path / "missing.json") is None
+
+    def test_background_write_failures_are_counted(self, tmp_path):
+        """测试后台写入按顺序完成，失败只计数"""
+        context = PipelineContext("p1", tmp_path)
+        context.submit_write(write_json_artifact, tmp_path / "a.json", [1])
+
+        def fail():
+            raise OSError("disco lleno")
+
+        context.submit_write(fail)
+        assert context.flush() == 1
+        context.close()
+        assert read_json_artifact(tmp_path / "a.json") == [1]
+
+
+class TestChunkHandoff:
+    """测试Step 1分块经上下文交给Step 2"""
+
+    def test_chunks_passed_in_memory(self, tmp_path):
+        """测试绑定上下文时Step 2直接使用内存中的分块，不依赖文件"""
+        srt_path = tmp_path / "input.srt"
+        srt_path.write_text(SRT_TEXT, encoding="utf-8")
+        extractor = _make_extractor(tmp_path)
+        context = PipelineContext("p1", tmp_path)
+        token = bind_pipeline_context(context)
+        try:
+            extractor.extract_outline(srt_path)
+            context.flush()
+            prompt_input = extractor.llm_client.call_with_retry.call_args[0][1]
+            assert prompt_input["text"].startswith("frase 0 frase 1")
+
+            artifact = tmp_path / "step1_srt_chunks" / "chunk_0.json"
+            assert len(read_json_artifact(artifact)) == 10
+            artifact.unlink()
+            assert len(TimelineExtractor(tmp_path)._load_srt_chunk(0, artifact)) == 10
+        finally:
+            unbind_pipeline_context(token)
+            context.close()
+
+    def test_falls_back_to_files(self, tmp_path):
+        """测试未绑定上下文时同步写出文件，Step 2从文件读取"""
+        srt_path = tmp_path / "input.srt"
+        srt_path.write_text(SRT_TEXT, encoding="utf-8")
+        _make_extractor(tmp_path).extract_outline(srt_path)
+
+        artifact = tmp_path / "step1_srt_chunks" / "chunk_0.json"
+        entries = TimelineExtractor(tmp_path)._load_srt_chunk(0, artifact)
+        assert entries == json.loads(artifact.read_text(encoding="utf-8"))
+        assert entries[-1]["end_time"] == "00:00:29,000"
+
+
+class TestOverlapDuplicates:
+    """测试Step 2合并相邻分块重叠窗口中的重复话题"""
+
+    def test_keeps_longer_duplicate(self, tmp_path):
+        """测试不同块中时间大部分重合的话题只保留更完整的一个，同块话题不合并"""
+        items = [
+            {"outline": "intro", "start_time": "00:00:00,000", "end_time": "00:05:00,000", "chunk_index": 0},
+            {"outline": "debate", "start_time": "00:05:00,000", "end_time": "00:09:50,000", "chunk_index": 0},
+            {"outline": "debate", "start_time": "00:05:10,000", "end_time": "00:12:00,000", "chunk_index": 1},
+            {"outline": "cierre", "start_time": "00:11:00,000", "end_time": "00:15:00,000", "chunk_index": 1},
+        ]
+
+        merged = TimelineExtractor(tmp_path)._merge_overlap_duplicates(items)
+
+        assert [(item["outline"], item["chunk_index"]) for item in merged] == [
+            ("intro", 0), ("debate", 1), ("cierre", 1)
+        ]
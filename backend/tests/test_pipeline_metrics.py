@@ -0,0 +1,152 @@
+"""
+流水线指标单元测试
+"""
+from types import SimpleNamespace
+
+from backend.core import pipeline_metrics
+from backend.core.llm_providers import DashScopeProvider, GeminiProvider
+from backend.core.pipeline_metrics import (
+    METRICS_FILENAME, PipelineMetrics, bind_pipeline_metrics, collect_prometheus_metrics,
+    load_project_metrics, render_prometheus, unbind_pipeline_metrics, usage_tokens
+)
+
+
+def _record_run(metrics: PipelineMetrics):
+    token = bind_pipeline_metrics(metrics)
+    try:
+        metrics.begin_step("step1_outline")
+        for index in range(2):
+            pipeline_metrics.begin_chunk(index)
+            pipeline_metrics.record_llm_call(1.5, queue_wait=0.5,
+                                             usage={"prompt_tokens": 100, "completion_tokens": 20},
+                                             provider="dashscope", model="qwen-plus")
+        pipeline_metrics.record_parse_failure()
+        pipeline_metrics.record_llm_retry()
+        metrics.begin_step("step6_video")
+        pipeline_metrics.record_ffmpeg(2.0, success=True)
+        pipeline_metrics.record_ffmpeg(0.5, success=False)
+        metrics.finish("succeeded")
+    finally:
+        unbind_pipeline_metrics(token)
+
+
+class TestPipelineMetrics:
+    """测试步骤与分块的累计"""
+
+    def test_steps_and_chunks_accumulate(self):
+        """测试LLM调用同时计入分块、步骤和总计"""
+        metrics = PipelineMetrics("p1")
+        _record_run(metrics)
+        data = metrics.to_dict()
+
+        outline, video = data["steps"]
+        assert outline["name"] == "step1_outline" and outline["status"] == "succeeded"
+        assert [chunk["index"] for chunk in outline["chunks"]] == [0, 1]
+        assert outline["chunks"][1]["prompt_tokens"] == 100
+        assert outline["llm_calls"] == 2
+        assert outline["queue_wait"] == 1.0
+        assert outline["parse_failures"] == 1
+        assert outline["retries"] == 1
+        assert video["ffmpeg_runs"] == 2 and video["ffmpeg_failures"] == 1
+        assert data["totals"]["completion_tokens"] == 40
+        assert data["llm_calls"][0]["step"] == "step1_outline"
+        assert data["llm_calls"][1]["chunk"] == 1
+
+    def test_failed_run_marks_current_step(self):
+        """测试处理失败时当前步骤标记为failed"""
+        metrics = PipelineMetrics("p1")
+        metrics.begin_step("step1_outline")
+        metrics.begin_step("step2_timeline")
+        metrics.finish("failed", "boom")
+        data = metrics.to_dict()
+
+        assert [step["status"] for step in data["steps"]] == ["succeeded", "failed"]
+        assert data["status"] == "failed" and data["error"] == "boom"
+
+    def test_record_helpers_without_binding(self):
+        """测试未绑定记录器时record_*为空操作"""
+        pipeline_metrics.begin_chunk(0)
+        pipeline_metrics.record_llm_call(1.0)
+        pipeline_metrics.record_ffmpeg(1.0)
+        assert pipeline_metrics.current_metrics() is None
+
+    def test_usage_tokens_provider_formats(self):
+        """测试不同提供商的用量字段"""
+        assert usage_tokens({"prompt_tokens": 3, "completion_tokens": 4}) == (3, 4)
+        assert usage_tokens({"input_tokens": 5, "output_tokens": 6}) == (5, 6)
+        assert usage_tokens({"prompt_token_count": 7, "candidates_token_count": 8}) == (7, 8)
+        assert usage_tokens(None) == (0, 0)
+
+
+class TestMetricsExport:
+    """测试持久化与Prometheus输出"""
+
+    def test_save_load_and_prometheus(self, tmp_path):
+        """测试metrics.json写入后可被读取并汇总为Prometheus文本"""
+        project_dir = tmp_path / "p1"
+        metrics = PipelineMetrics("p1", project_dir / "metadata" / METRICS_FILENAME)
+        _record_run(metrics)
+        metrics.save()
+
+        loaded = load_project_metrics(project_dir)
+        assert loaded["status"] == "succeeded"
+        assert load_project_metrics(tmp_path / "missing") is None
+
+        text = collect_prometheus_metrics(tmp_path)
+        assert '# TYPE autoclip_llm_calls gauge' in text
+        assert '_total' not in text
+        assert 'autoclip_llm_calls{step="step1_outline"} 2' in text
+        assert 'autoclip_llm_prompt_tokens{step="step1_outline"} 200' in text
+        assert 'autoclip_ffmpeg_failures{step="step6_video"} 1' in text
+        assert 'autoclip_pipeline_runs{status="succeeded"} 1' in text
+        assert text == render_prometheus([loaded])
+
+    def test_stale_running_runs(self):
+        """测试status停留在running但长时间没有心跳的记录不计入正在运行"""
+        now = 10_000.0
+        runs = [
+            {"status": "running", "updated_at": now - 5, "steps": []},
+            {"status": "running", "updated_at": now - 7200,
+             "steps": [{"name": "step2_timeline", "status": "running", "wall_time": 1.0}]},
+            {"status": "running", "started_at": now - 7200, "steps": []},
+        ]
+
+        text = render_prometheus(runs, now=now, stale_after=600)
+
+        assert 'autoclip_pipeline_running 1' in text
+        assert 'autoclip_pipeline_runs{status="stale"} 2' in text
+        assert 'autoclip_step_runs{step="step2_timeline",status="stale"} 1' in text
+
+
+class TestProviderUsage:
+    """测试DashScope和Gemini响应中的token用量"""
+
+    def test_dashscope_usage(self):
+        """测试DashScope的input_tokens/output_tokens映射为统一的用量字段"""
+        response = SimpleNamespace(
+            status_code=200,
+            output=SimpleNamespace(text="hola", finish_reason="stop"),
+            usage={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150},
+        )
+        provider = object.__new__(DashScopeProvider)
+        provider.api_key, provider.model_name = "sk-test", "qwen-plus"
+        provider.generation = SimpleNamespace(call=lambda **kwargs: response)
+
+        usage = provider.call("prompt").usage
+
+        assert usage == {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150}
+        assert usage_tokens(usage) == (120, 30)
+
+    def test_gemini_usage(self):
+        """测试Gemini的usage_metadata映射为统一的用量字段，缺失时为None"""
+        metadata = SimpleNamespace(prompt_token_count=80, candidates_token_count=20, total_token_count=100)
+        provider = object.__new__(GeminiProvider)
+        provider.api_key, provider.model_name = "key", "gemini-2.5-flash"
+        provider.model = SimpleNamespace(
+            generate_content=lambda text, **kwargs: SimpleNamespace(text="hola", usage_metadata=metadata)
+        )
+
+        assert usage_tokens(provider.call("prompt").usage) == (80, 20)
+
+        provider.model = SimpleNamespace(generate_content=lambda text, **kwargs: SimpleNamespace(text="hola"))
+        assert provider.call("prompt").usage is None
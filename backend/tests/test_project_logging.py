@@ -0,0 +1,141 @@
+"""
+项目日志单元测试
+"""
+import asyncio
+import json
+import logging
+
+from backend.core.project_logging import (
+    ProjectLogHandler, follow_project_log, project_id_from_call, project_log_context,
+    project_log_path, read_project_log, tail_lines
+)
+
+
+def _write_entries(path, *entries):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding='utf-8') as f:
+        for timestamp, message in entries:
+            f.write(json.dumps({"timestamp": timestamp, "message": message}) + "\n")
+
+
+def _logger_with_handler(handler: ProjectLogHandler) -> logging.Logger:
+    test_logger = logging.getLogger("backend.tests.project_logging")
+    test_logger.setLevel(logging.INFO)
+    test_logger.propagate = False
+    test_logger.handlers = [handler]
+    return test_logger
+
+
+class TestProjectLogHandler:
+    """测试按项目写入JSON行日志"""
+
+    def test_writes_only_bound_project(self, tmp_path):
+        """测试只有绑定了项目的日志写入，extra字段保留"""
+        (tmp_path / "p1").mkdir()
+        handler = ProjectLogHandler(projects_dir=tmp_path)
+        test_logger = _logger_with_handler(handler)
+
+        test_logger.info("sin proyecto")
+        with project_log_context("p1"):
+            test_logger.info("LLM调用完成", extra={"event": "llm_call", "duration": 1.5})
+        with project_log_context("missing"):
+            test_logger.info("项目目录不存在")
+        handler.close()
+
+        lines = project_log_path("p1", tmp_path).read_text(encoding='utf-8').splitlines()
+        entry = json.loads(lines[0])
+        assert len(lines) == 1
+        assert entry["message"] == "LLM调用完成"
+        assert entry["module"] == "backend.tests.project_logging"
+        assert entry["event"] == "llm_call"
+        assert entry["duration"] == 1.5
+        assert entry["timestamp"].endswith("Z")
+        assert not (tmp_path / "missing").exists()
+
+    def test_rotation_and_tail_across_files(self, tmp_path):
+        """测试轮转后读取最近日志会继续读取旧文件"""
+        (tmp_path / "p1").mkdir()
+        handler = ProjectLogHandler(projects_dir=tmp_path, max_bytes=2000, backup_count=2)
+        test_logger = _logger_with_handler(handler)
+        with project_log_context("p1"):
+            for i in range(40):
+                test_logger.info(f"linea {i}")
+        handler.close()
+
+        log_path = project_log_path("p1", tmp_path)
+        assert log_path.with_name(f"{log_path.name}.1").exists()
+        logs = read_project_log("p1", 30, tmp_path)
+        assert [entry["message"] for entry in logs] == [f"linea {i}" for i in range(10, 40)]
+
+    def test_project_id_from_task_arguments(self):
+        """测试从任务参数（位置或关键字）中取出project_id"""
+        def task(render_results, project_id):
+            pass
+
+        assert project_id_from_call(task, ([], "p1"), {}) == "p1"
+        assert project_id_from_call(task, ([],), {"project_id": 7}) == "7"
+        assert project_id_from_call(lambda video_path: None, ("a.mp4",), {}) is None
+
+
+class TestTailReading:
+    """测试从文件末尾读取"""
+
+    def test_tail_lines_small_blocks(self, tmp_path):
+        """测试按小块向前读取时不会截断行"""
+        path = tmp_path / "log.jsonl"
+        path.write_bytes(b"".join(f"line-{i:03d}\n".encode() for i in range(100)))
+
+        assert tail_lines(path, 3, block_size=7) == [b"line-097", b"line-098", b"line-099"]
+        assert tail_lines(path, 2, end=18, block_size=5) == [b"line-000", b"line-001"]
+        assert len(tail_lines(path, 500)) == 100
+
+    def test_follow_yields_new_entries(self, tmp_path):
+        """测试跟踪模式先返回历史日志，再返回新增条目"""
+        log_path = project_log_path("p1", tmp_path)
+        log_path.parent.mkdir(parents=True)
+        log_path.write_text(json.dumps({"message": "old"}) + "\n", encoding='utf-8')
+
+        async def scenario():
+            stream = follow_project_log("p1", 10, poll_interval=0.01, projects_dir=tmp_path)
+            first = await stream.__anext__()
+            with open(log_path, "a", encoding='utf-8') as f:
+                f.write(json.dumps({"message": "new"}) + "\n" + '{"message": "par')
+            second = await stream.__anext__()
+            await stream.aclose()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        assert [entry["message"] for entry in first] == ["old"]
+        assert [entry["message"] for entry in second] == ["new"]
+
+
+class TestMultiProcessLogs:
+    """测试每个进程写独立文件，读取时合并"""
+
+    def test_read_merges_process_files(self, tmp_path):
+        """测试按时间戳合并各进程的日志文件"""
+        _write_entries(project_log_path("p1", tmp_path, pid=101),
+                       ("2024-01-01T00:00:01.000Z", "api 1"), ("2024-01-01T00:00:03.000Z", "api 2"))
+        _write_entries(project_log_path("p1", tmp_path, pid=202),
+                       ("2024-01-01T00:00:02.000Z", "worker 1"), ("2024-01-01T00:00:04.000Z", "worker 2"))
+
+        assert [entry["message"] for entry in read_project_log("p1", 3, tmp_path)] == ["worker 1", "api 2", "worker 2"]
+        assert read_project_log("missing", 10, tmp_path) == []
+
+    def test_follow_picks_up_new_process_file(self, tmp_path):
+        """测试跟踪模式读取之后才出现的进程日志文件"""
+        _write_entries(project_log_path("p1", tmp_path, pid=101), ("2024-01-01T00:00:01.000Z", "old"))
+
+        async def scenario():
+            stream = follow_project_log("p1", 10, poll_interval=0.01, projects_dir=tmp_path)
+            first = await stream.__anext__()
+            _write_entries(project_log_path("p1", tmp_path, pid=202), ("2024-01-01T00:00:02.000Z", "new"))
+            second = await stream.__anext__()
+            await stream.aclose()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        assert [entry["message"] for entry in first] == ["old"]
+        assert [entry["message"] for entry in second] == ["new"]
@@ -0,0 +1,66 @@
+"""
+评分与标题合并步骤单元测试
+"""
+import json
+from unittest.mock import MagicMock
+
+from backend.pipeline.step3_score_title import ScoreTitleGenerator, run_step3_score_and_title
+
+
+TIMELINE = [
+    {"id": "1", "chunk_index": 0, "outline": "科技股操作策略", "content": ["避免追高"],
+     "start_time": "00:00:01,000", "end_time": "00:01:00,000"},
+    {"id": "2", "chunk_index": 0, "outline": "闲聊", "content": ["打招呼"],
+     "start_time": "00:01:00,000", "end_time": "00:02:00,000"},
+]
+
+LLM_RESULT = [
+    {"id": "2", "final_score": 0.3, "recommend_reason": "内容较散", "generated_title": "闲聊片段"},
+    {"id": "1", "final_score": 0.91, "recommend_reason": "观点犀利", "generated_title": "科技股别追高"},
+]
+
+
+def _make_generator(result):
+    generator = ScoreTitleGenerator()
+    generator.llm_client = MagicMock()
+    generator.llm_client.call_with_retry.return_value = json.dumps(result, ensure_ascii=False)
+    generator.llm_client.parse_json_response.side_effect = json.loads
+    return generator
+
+
+class TestScoreTitleGenerator:
+    """测试合并的评分与标题生成"""
+
+    def test_single_call_per_chunk(self):
+        """测试每个块只调用一次LLM，并按id合并结果"""
+        generator = _make_generator(LLM_RESULT)
+        clips = generator.score_and_title([dict(item) for item in TIMELINE])
+
+        assert generator.llm_client.call_with_retry.call_count == 1
+        assert clips[0]["final_score"] == 0.91
+        assert clips[0]["generated_title"] == "科技股别追高"
+        assert clips[1]["final_score"] == 0.3
+
+    def test_low_score_clips_have_no_title(self):
+        """测试低于阈值的切片不保留标题"""
+        generator = _make_generator(LLM_RESULT)
+        clips = generator.score_and_title([dict(item) for item in TIMELINE])
+
+        assert "generated_title" not in clips[1]
+
+    def test_writes_compatible_files(self, tmp_path, monkeypatch):
+        """测试输出文件与分步执行兼容"""
+        timeline_path = tmp_path / "step2_timeline.json"
+        timeline_path.write_text(json.dumps(TIMELINE, ensure_ascii=False), encoding="utf-8")
+        monkeypatch.setattr(
+            "backend.pipeline.step3_score_title.ScoreTitleGenerator",
+            lambda *args, **kwargs: _make_generator(LLM_RESULT)
+        )
+
+        high_score = run_step3_score_and_title(timeline_path, metadata_dir=tmp_path)
+
+        assert [clip["id"] for clip in high_score] == ["1"]
+        for name in ("step3_all_scored.json", "step3_high_score_clips.json", "step4_titles.json"):
+            assert (tmp_path / name).exists()
+        titles = json.loads((tmp_path / "step4_titles.json").read_text(encoding="utf-8"))
+        assert titles[0]["generated_title"] == "科技股别追高"
@@ -0,0 +1,84 @@
+"""
+SRT时间工具单元测试
+"""
+import numpy as np
+import pysrt
+import pytest
+
+from backend.benchmarks.synthetic import write_synthetic_srt
+from backend.utils import srt_time
+from backend.utils.text_processor import TextProcessor
+from backend.utils.video_processor import VideoProcessor
+
+
+class TestTimeConversion:
+    """测试单个时间字符串的转换"""
+
+    def test_time_to_seconds_formats(self):
+        """测试逗号、点号、无毫秒和短毫秒写法"""
+        assert srt_time.time_to_seconds("01:02:03,456") == pytest.approx(3723.456)
+        assert srt_time.time_to_seconds("00:00:06.140") == pytest.approx(6.14)
+        assert srt_time.time_to_seconds("00:01:25") == 85.0
+        assert srt_time.time_to_ms("00:00:01,5") == 1500
+        with pytest.raises(ValueError):
+            srt_time.time_to_seconds("1:2")
+
+    def test_formatting_rounds_to_milliseconds(self):
+        """测试格式化按毫秒四舍五入，负数按0处理"""
+        assert srt_time.seconds_to_time(6.14, separator='.') == "00:00:06.140"
+        assert srt_time.seconds_to_time(-3) == "00:00:00,000"
+        assert srt_time.ms_to_time(3723456) == "01:02:03,456"
+        assert VideoProcessor.convert_seconds_to_ffmpeg_time(6.14) == "00:00:06.140"
+        assert VideoProcessor.convert_ffmpeg_time_to_seconds("invalid") == 0.0
+
+    def test_array_round_trip(self):
+        """测试批量格式化与批量解析互逆，并与逐个转换一致"""
+        values = np.random.default_rng(0).integers(0, 99 * 3_600_000, 2000)
+        formatted = srt_time.format_time_array(values)
+
+        assert formatted == [srt_time.ms_to_time(v) for v in values.tolist()]
+        assert np.array_equal(srt_time.parse_time_array(formatted), values)
+        assert srt_time.parse_time_array(["1:2:3,5", "00:00:01.250"]).tolist() == [3723500, 1250]
+        assert srt_time.format_time_array([100 * 3_600_000]) == ["100:00:00,000"]
+
+
+class TestParseSrt:
+    """测试一次扫描的SRT解析"""
+
+    def test_matches_pysrt(self, tmp_path):
+        """测试与pysrt的解析结果一致"""
+        srt_path = tmp_path / "input.srt"
+        write_synthetic_srt(srt_path, 1800, seed=3)
+        expected = [
+            {'start_time': str(s.start), 'end_time': str(s.end), 'text': s.text.strip(), 'index': s.index}
+            for s in pysrt.open(str(srt_path), encoding='utf-8')
+        ]
+
+        arrays = srt_time.parse_srt_file(srt_path)
+        assert arrays.start_ms.dtype == np.int64
+        assert arrays.to_entries() == expected
+        assert TextProcessor.parse_srt(srt_path) == expected
+
+    def test_irregular_blocks(self):
+        """测试BOM、CRLF、坐标、多行文本和缺少结尾空行"""
+        text = (
+            "﻿1\r\n00:00:01,000 --> 00:00:02,500 X1:10 X2:20\r\nlinea uno\r\nlinea dos\r\n\r\n"
+            "2\r\n00:00:03.000 --> 00:00:04,000\r\nfinal"
+        )
+        arrays = srt_time.parse_srt_text(text)
+
+        assert arrays.index.tolist() == [1, 2]
+        assert arrays.start_ms.tolist() == [1000, 3000]
+        assert arrays.end_seconds.tolist() == [2.5, 4.0]
+        assert arrays.texts == ["linea uno\nlinea dos", "final"]
+
+    def test_parse_srt_falls_back_to_pysrt(self, tmp_path):
+        """测试非UTF-8文件交给pysrt处理，空文件返回空列表"""
+        latin = tmp_path / "latin.srt"
+        latin.write_bytes("1\n00:00:01,000 --> 00:00:02,000\ncanción\n".encode("latin-1"))
+        empty = tmp_path / "empty.srt"
+        empty.write_text("", encoding="utf-8")
+
+        assert isinstance(TextProcessor.parse_srt(latin), list)
+        assert TextProcessor.parse_srt(empty) == []
+        assert TextProcessor.parse_srt(tmp_path / "missing.srt") == []
@@ -0,0 +1,61 @@
+"""
+本地文本聚类单元测试
+"""
+import numpy as np
+from backend.utils.text_clustering import (
+    HashedTfidfVectorizer, agglomerative_cluster, cosine_similarity_matrix, tokenize
+)
+
+
+class TestTokenize:
+    """测试特征切分"""
+
+    def test_latin_words(self):
+        """测试去除重音和停用词"""
+        features = tokenize("La inversión en acciones")
+        assert "inversion" in features
+        assert "acciones" in features
+        assert "inversion acciones" in features
+        assert "la" not in features
+
+    def test_cjk_bigrams(self):
+        """测试中文字符二元组"""
+        assert tokenize("股票投资") == ["股票", "票投", "投资"]
+
+
+class TestAgglomerativeCluster:
+    """测试层次聚类"""
+
+    def _documents(self):
+        return [
+            "Como invertir en acciones y fondos",
+            "Errores al invertir en acciones",
+            "Rutina de ejercicio para la salud",
+            "Ejercicio diario y salud mental",
+            "Receta de paella valenciana",
+        ]
+
+    def test_groups_similar_documents(self):
+        """测试相似文档被分到同一组"""
+        vectors = HashedTfidfVectorizer().fit_transform(self._documents())
+        clusters = agglomerative_cluster(cosine_similarity_matrix(vectors), threshold=0.1)
+        groups = sorted(c for c in clusters if len(c) > 1)
+
+        assert groups == [[0, 1], [2, 3]]
+        assert [4] in clusters
+
+    def test_max_cluster_size(self):
+        """测试簇大小上限"""
+        similarity = np.ones((5, 5))
+        clusters = agglomerative_cluster(similarity, threshold=0.5, max_cluster_size=2)
+
+        assert all(len(c) <= 2 for c in clusters)
+        assert sorted(i for c in clusters for i in c) == list(range(5))
+
+    def test_top_terms(self):
+        """测试提取分组关键词"""
+        vectorizer = HashedTfidfVectorizer()
+        vectors = vectorizer.fit_transform(self._documents())
+        terms = vectorizer.top_terms(vectors[[0, 1]], limit=3)
+
+        assert "acciones" in terms or "invertir" in terms
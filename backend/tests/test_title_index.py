@@ -0,0 +1,49 @@
+"""
+标题索引单元测试
+"""
+from backend.utils.title_index import TitleIndex, normalize_title
+
+
+CLIPS = [
+    {"id": "1", "outline": "Como invertir en bolsa", "generated_title": "¿Cómo invertir en bolsa sin miedo?"},
+    {"id": "2", "outline": "Rutina de ejercicio", "generated_title": "La rutina de ejercicio perfecta"},
+    {"id": "3", "outline": "投资理财的误区", "generated_title": "散户投资最常见的三个误区"},
+]
+
+
+class TestNormalizeTitle:
+    """测试标题规范化"""
+
+    def test_strip_punctuation_and_accents(self):
+        """测试去除标点、空白和重音"""
+        assert normalize_title("¿Cómo invertir?") == "comoinvertir"
+        assert normalize_title("散户 投资，误区！") == "散户投资误区"
+
+
+class TestTitleIndex:
+    """测试标题解析"""
+
+    def test_exact_match_after_normalization(self):
+        """测试规范化后精确匹配"""
+        index = TitleIndex(CLIPS)
+        assert index.resolve("como invertir en bolsa sin miedo") == "1"
+        assert index.resolve("Rutina de ejercicio") == "2"
+
+    def test_resolve_by_id(self):
+        """测试直接使用切片ID"""
+        index = TitleIndex(CLIPS)
+        assert index.resolve("3") == "3"
+        assert index.resolve(2) == "2"
+        assert index.resolve({"id": "1"}) == "1"
+
+    def test_fuzzy_match(self):
+        """测试标题轻微变化时的模糊匹配"""
+        index = TitleIndex(CLIPS)
+        assert index.resolve("La rutina de ejercicios perfecta") == "2"
+        assert index.resolve("散户投资最常见的3个误区") == "3"
+
+    def test_no_match(self):
+        """测试无关标题返回None"""
+        index = TitleIndex(CLIPS)
+        assert index.resolve("Receta de paella valenciana") is None
+        assert index.resolve("") is None
@@ -0,0 +1,189 @@
+"""
+按token预算分块单元测试
+"""
+from unittest.mock import MagicMock
+
+from backend.utils.token_estimator import estimate_tokens
+from backend.utils.text_processor import TextProcessor
+
+
+def _make_srt(durations_and_gaps, text="hola mundo esto es una prueba"):
+    """根据(时长, 间隔)秒数列表构造SRT数据"""
+    entries = []
+    current = 0.0
+    for index, (duration, gap) in enumerate(durations_and_gaps, start=1):
+        start, end = current, current + duration
+        entries.append({
+            'index': index,
+            'start_time': _fmt(start),
+            'end_time': _fmt(end),
+            'text': text,
+        })
+        current = end + gap
+    return entries
+
+
+def _fmt(seconds):
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+class TestEstimateTokens:
+    """测试token估算"""
+
+    def test_empty_text(self):
+        """测试空文本"""
+        assert estimate_tokens("") == 0
+
+    def test_longer_text_has_more_tokens(self):
+        """测试文本越长token越多"""
+        short = estimate_tokens("hola mundo")
+        long = estimate_tokens("hola mundo " * 20)
+        assert long > short > 0
+
+    def test_cjk_text(self):
+        """测试中文文本按字符计数"""
+        assert estimate_tokens("大家好欢迎来到直播间") >= 5
+
+
+class TestChunkSrtDataByTokens:
+    """测试按token预算切分SRT"""
+
+    def setup_method(self):
+        self.processor = TextProcessor()
+
+    def test_empty_input(self):
+        """测试空输入"""
+        assert self.processor.chunk_srt_data_by_tokens([], max_tokens=100) == []
+
+    def test_chunks_respect_budget(self):
+        """测试每个块不超过token预算"""
+        srt_data = _make_srt([(2.0, 0.1)] * 200)
+        per_entry = estimate_tokens(srt_data[0]['text']) + 1
+        chunks = self.processor.chunk_srt_data_by_tokens(srt_data, max_tokens=per_entry * 30)
+
+        assert len(chunks) > 1
+        assert sum(len(c['srt_entries']) for c in chunks) == len(srt_data)
+        for chunk in chunks:
+            assert len(chunk['srt_entries']) <= 30
+        assert [c['chunk_index'] for c in chunks] == list(range(len(chunks)))
+
+    def test_cut_on_pause(self):
+        """测试优先在停顿处切分"""
+        pattern = [(2.0, 0.1)] * 27 + [(2.0, 3.0)] + [(2.0, 0.1)] * 30
+        srt_data = _make_srt(pattern)
+        per_entry = estimate_tokens(srt_data[0]['text']) + 1
+        chunks = self.processor.chunk_srt_data_by_tokens(srt_data, max_tokens=per_entry * 30)
+
+        # 第28条后有3秒停顿，应在此处切分
+        assert len(chunks[0]['srt_entries']) == 28
+
+    def test_small_tail_merged(self):
+        """测试过小的尾块会并入前一块"""
+        srt_data = _make_srt([(2.0, 0.1)] * 32)
+        per_entry = estimate_tokens(srt_data[0]['text']) + 1
+        chunks = self.processor.chunk_srt_data_by_tokens(
+            srt_data, max_tokens=per_entry * 30, min_tokens=per_entry * 5
+        )
+
+        assert len(chunks) == 1
+        assert chunks[0]['end_time'] == srt_data[-1]['end_time']
+
+    def test_max_interval(self):
+        """测试时长上限"""
+        srt_data = _make_srt([(2.0, 0.1)] * 100)
+        chunks = self.processor.chunk_srt_data_by_tokens(
+            srt_data, max_tokens=100000, max_interval_minutes=1
+        )
+
+        assert len(chunks) > 1
+
+    def test_overlap_window(self):
+        """测试重叠窗口：后一块向前包含上一块末尾的字幕，且不计入预算"""
+        srt_data = _make_srt([(2.0, 0.1)] * 100)
+        per_entry = estimate_tokens(srt_data[0]['text']) + 1
+        plain = self.processor.chunk_srt_data_by_tokens(srt_data, max_tokens=per_entry * 30)
+        overlapped = self.processor.chunk_srt_data_by_tokens(
+            srt_data, max_tokens=per_entry * 30, overlap_seconds=5
+        )
+
+        assert len(overlapped) == len(plain)
+        assert overlapped[0]['overlap_entries'] == 0
+        second = overlapped[1]
+        assert second['overlap_entries'] == 2
+        assert second['srt_entries'][second['overlap_entries']:] == plain[1]['srt_entries']
+        assert second['srt_entries'][0] is srt_data[len(plain[0]['srt_entries']) - 2]
+
+    def test_min_interval_within_budget(self):
+        """测试预算允许时不在最短时长之前的停顿处切分"""
+        srt_data = _make_srt([(2.0, 0.1)] * 24 + [(2.0, 3.0)] + [(2.0, 0.1)] * 60)
+        per_entry = estimate_tokens(srt_data[0]['text']) + 1
+
+        plain = self.processor.chunk_srt_data_by_tokens(srt_data, max_tokens=per_entry * 30)
+        floored = self.processor.chunk_srt_data_by_tokens(
+            srt_data, max_tokens=per_entry * 30, min_interval_minutes=58 / 60
+        )
+
+        assert len(plain[0]['srt_entries']) == 25
+        assert len(floored[0]['srt_entries']) == 30
+
+    def test_min_interval_never_exceeds_budget(self):
+        """测试语速密集、预算很小时最短时长不会让块超出token预算"""
+        srt_data = _make_srt([(1.0, 0.05)] * 600, text="palabra " * 20)
+        entry_tokens = estimate_tokens(srt_data[0]['text']) + 1
+        max_tokens = entry_tokens * 12
+        chunks = self.processor.chunk_srt_data_by_tokens(
+            srt_data, max_tokens=max_tokens, min_interval_minutes=20
+        )
+
+        assert len(chunks) >= 50
+        for chunk in chunks:
+            assert len(chunk['srt_entries']) * entry_tokens <= max_tokens
+
+
+class TestContextWindow:
+    """测试按上下文窗口（而非输出上限）计算预算"""
+
+    def test_context_window_not_output_cap(self):
+        """测试使用模型的上下文窗口"""
+        from backend.core.llm_manager import LLMManager
+        from backend.core.llm_providers import DashScopeProvider
+
+        manager = LLMManager.__new__(LLMManager)
+        manager.current_provider = MagicMock()
+        manager.current_provider.get_available_models.return_value = (
+            DashScopeProvider.get_available_models(None)
+        )
+        manager.settings = {"model_name": "qwen-plus"}
+        assert manager.get_model_context_window() == 131072
+
+
+class TestChunkSrtDataByTime:
+    """测试按目标时长切分SRT"""
+
+    def setup_method(self):
+        self.processor = TextProcessor()
+
+    def test_cut_on_pause_in_window(self):
+        """测试在目标时长90%~110%窗口内的第一个停顿处切分"""
+        # 每条3秒，第35条后（约105秒处）有停顿，目标时长为100秒
+        pattern = [(2.9, 0.1)] * 34 + [(2.9, 2.0)] + [(2.9, 0.1)] * 40
+        chunks = self.processor.chunk_srt_data(_make_srt(pattern), interval_minutes=100 / 60)
+
+        assert len(chunks[0]['srt_entries']) == 35
+        assert sum(len(c['srt_entries']) for c in chunks) == len(pattern)
+
+    def test_later_chunks_keep_target_length(self):
+        """测试长字幕后段的块仍接近目标时长"""
+        pattern = ([(2.9, 0.1)] * 9 + [(2.9, 1.5)]) * 400
+        chunks = self.processor.chunk_srt_data(_make_srt(pattern), interval_minutes=10)
+        durations = [
+            TextProcessor.time_to_seconds(c['end_time']) - TextProcessor.time_to_seconds(c['start_time'])
+            for c in chunks[:-1]
+        ]
+
+        assert len(chunks) > 10
+        assert min(durations) >= 9 * 60 * 0.9
@@ -0,0 +1,103 @@
+"""
+字粒度转写存储单元测试
+"""
+import os
+
+import numpy as np
+
+from backend.utils.subtitle_processor import SubtitleProcessor
+from backend.utils.text_processor import TextProcessor
+from backend.utils.transcript_store import TranscriptStore, transcript_dir
+
+SRT_TEXT = (
+    "1\n00:00:01,000 --> 00:00:03,500\n你好，世界\n\n"
+    "2\n00:00:04,000 --> 00:00:06,000\nhello there friend\n\n"
+    "3\n00:01:00,250 --> 00:01:02,000\n最后一句\n\n"
+)
+
+
+def _write_srt(tmp_path, text: str = SRT_TEXT):
+    srt_path = tmp_path / "input.srt"
+    srt_path.write_text(text, encoding='utf-8')
+    return srt_path
+
+
+class TestDeterministicIds:
+    """测试字幕段和单词ID稳定"""
+
+    def test_ids_stable_across_parses(self, tmp_path):
+        """测试重复解析（包括重新构建存储）得到相同的ID"""
+        srt_path = _write_srt(tmp_path)
+        processor = SubtitleProcessor()
+
+        first = processor.parse_srt_to_word_level(srt_path, tmp_path / "a")
+        second = processor.parse_srt_to_word_level(srt_path, tmp_path / "b")
+
+        assert [seg['id'] for seg in first] == [seg['id'] for seg in second]
+        assert first[0]['id'] == "s1-1000"
+        assert [word['id'] for word in first[1]['words']] == ["s2-4000-w0", "s2-4000-w1", "s2-4000-w2"]
+
+
+class TestTranscriptStore:
+    """测试列式存储的读写"""
+
+    def test_roundtrip_is_memory_mapped(self, tmp_path):
+        """测试第二次读取来自内存映射，内容与解析结果一致"""
+        srt_path = _write_srt(tmp_path)
+        store_dir = transcript_dir(tmp_path / "metadata", srt_path)
+        processor = SubtitleProcessor()
+
+        parsed = processor.parse_srt_to_word_level(srt_path, store_dir)
+        transcript = processor.load_transcript(srt_path, store_dir)
+
+        assert isinstance(transcript.columns["seg_start_ms"], np.memmap)
+        assert transcript.segments() == parsed
+        assert parsed[0]['text'] == "你好，世界"
+        assert [word['text'] for word in parsed[0]['words']] == ["你好", "世界"]
+        assert parsed[2]['startTime'] == 60.25
+
+    def test_time_range_and_srt_entries(self, tmp_path):
+        """测试按时间范围物化，LLM步骤的条目格式与TextProcessor一致"""
+        srt_path = _write_srt(tmp_path)
+        transcript = SubtitleProcessor().load_transcript(srt_path, tmp_path / "store")
+
+        assert [seg['index'] for seg in transcript.segments(0.5, 10.0)] == [1, 2]
+        assert transcript.srt_entries() == TextProcessor.parse_srt(srt_path)
+
+    def test_rebuilds_when_srt_changes(self, tmp_path):
+        """测试SRT修改后存储过期并重新构建"""
+        srt_path = _write_srt(tmp_path)
+        store_dir = tmp_path / "store"
+        processor = SubtitleProcessor()
+        assert len(processor.load_transcript(srt_path, store_dir)) == 3
+
+        _write_srt(tmp_path, "1\n00:00:01,000 --> 00:00:02,000\n只有一句\n\n")
+        os.utime(srt_path, ns=(0, 0))
+
+        assert TranscriptStore.load(store_dir) is not None
+        assert len(processor.load_transcript(srt_path, store_dir)) == 1
+
+    def test_resave_keeps_existing_maps(self, tmp_path):
+        """测试重新写入不覆盖已映射的列文件，旧映射仍可读取"""
+        srt_path = _write_srt(tmp_path)
+        store_dir = tmp_path / "store"
+        processor = SubtitleProcessor()
+        old = processor.load_transcript(srt_path, store_dir)
+        old_inode = os.stat(old.columns["seg_start_ms"].filename).st_ino
+
+        _write_srt(tmp_path, "1\n00:00:01,000 --> 00:00:02,000\n只有一句\n\n")
+        os.utime(srt_path, ns=(0, 0))
+        new = processor.load_transcript(srt_path, store_dir)
+
+        assert os.stat(new.columns["seg_start_ms"].filename).st_ino != old_inode
+        assert old.columns["seg_start_ms"].tolist() == [1000, 4000, 60250]
+        assert len([path for path in store_dir.iterdir() if path.name.startswith("gen-")]) == 1
+
+    def test_no_store_dir_has_no_side_effects(self, tmp_path):
+        """测试未指定存储目录时只在内存中解析，不在SRT旁创建目录"""
+        srt_path = _write_srt(tmp_path)
+
+        segments = SubtitleProcessor().parse_srt_to_word_level(srt_path, start=0.5, end=10.0)
+
+        assert [seg['index'] for seg in segments] == [1, 2]
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["input.srt"]
@@ -0,0 +1,135 @@
+"""
+字幕删除剪辑单元测试
+"""
+from pathlib import Path
+
+from backend.utils import video_editor as video_editor_module
+from backend.utils.subtitle_processor import SubtitleIndex, SubtitleProcessor
+from backend.utils.video_editor import VideoEditor
+
+
+def _subtitles(count: int):
+    return [
+        {"id": str(i), "startTime": i * 2.0, "endTime": i * 2.0 + 1.5, "text": f"s{i}"}
+        for i in range(count)
+    ]
+
+
+class TestEditCommands:
+    """测试剪辑命令的构建"""
+
+    def test_concat_list_uses_inpoint_outpoint(self):
+        """测试每个保留区间都引用源文件并带 inpoint/outpoint"""
+        text = VideoEditor.build_concat_list(Path("/data/it's.mp4"), [(12.0, 15.5), (1.0, 4.25)])
+        lines = text.splitlines()
+
+        assert lines[0] == "file '/data/it'\\''s.mp4'"
+        assert lines[1:3] == ["inpoint 1.000", "outpoint 4.250"]
+        assert lines[4:6] == ["inpoint 12.000", "outpoint 15.500"]
+
+    def test_select_command_limits_decode_range(self):
+        """测试精确模式只解码首尾区间覆盖的范围，表达式相对偏移"""
+        cmd = VideoEditor.build_select_command(Path("src.mp4"), [(10.0, 12.0), (20.0, 25.0)], Path("out.mp4"))
+
+        assert cmd[cmd.index('-ss') + 1] == "10.000"
+        assert cmd[cmd.index('-t') + 1] == "15.000"
+        assert "between(t,0.000,2.000)+between(t,10.000,15.000)" in cmd[cmd.index('-vf') + 1]
+        assert cmd[cmd.index('-af') + 1].startswith("aselect=")
+
+
+class TestSingleInvocation:
+    """测试一次编辑只调用一次ffmpeg"""
+
+    def test_edit_spawns_one_process(self, tmp_path, monkeypatch):
+        """测试删除多段字幕时只运行一个ffmpeg进程且不残留列表文件"""
+        calls = []
+
+        class Result:
+            returncode = 0
+            stderr = ""
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            list_path = Path(cmd[cmd.index('-i') + 1])
+            assert list_path.read_text(encoding='utf-8').count("inpoint") == 3
+            return Result()
+
+        monkeypatch.setattr(video_editor_module.subprocess, "run", fake_run)
+        subtitles = _subtitles(6)
+
+        editor = VideoEditor(clips_dir=str(tmp_path), collections_dir=str(tmp_path))
+        result = editor.edit_video_by_subtitle_deletion(
+            tmp_path / "src.mp4", subtitles, ["1", "3", "5"], tmp_path / "out" / "edited.mp4"
+        )
+
+        assert result["success"]
+        assert len(calls) == 1
+        assert result["finalDuration"] == 4.5
+        assert not list((tmp_path / "out").glob("*.concat.txt"))
+
+
+class TestSubtitleIndex:
+    """测试字幕段索引"""
+
+    def test_lookup_and_time_order(self):
+        """测试按ID查找、去重解析和按时间排序"""
+        index = SubtitleIndex(list(reversed(_subtitles(4))))
+
+        assert index.get("2")["text"] == "s2"
+        assert "9" not in index
+        assert [seg["id"] for seg in index.resolve(["3", "9", "1", "3"])] == ["3", "1"]
+        assert [seg["id"] for seg in index.in_time_order()] == ["0", "1", "2", "3"]
+        assert index.span() == 7.5
+        assert index.duration_of(["0", "1", "1"]) == 3.0
+
+    def test_bulk_delete_operations(self):
+        """测试大批量删除时编辑操作和时间轴正确"""
+        subtitles = _subtitles(5000)
+        deleted = [str(i) for i in range(0, 5000, 2)]
+        processor = SubtitleProcessor()
+
+        operations = processor.create_edit_operations(deleted, subtitles)
+        timeline = processor.generate_edited_video_timeline(subtitles, deleted)
+
+        assert len(operations) == 2500
+        assert operations[1]["segmentIds"] == ["2"]
+        assert timeline[0] == (2.0, 3.5)
+        assert len(timeline) == 2500
+
+
+class TestPreviewCommands:
+    """测试删除预览和剪辑任务的命令生成"""
+
+    def test_preview_commands_follow_deletion_order(self, tmp_path):
+        """测试每个删除段生成一条切割命令，忽略无效ID并保持删除顺序"""
+        editor = VideoEditor(clips_dir=str(tmp_path), collections_dir=str(tmp_path))
+
+        commands = editor.build_preview_commands(
+            tmp_path / "src.mp4", _subtitles(10), ["7", "1", "x", "9", "7"], tmp_path / "previews"
+        )
+
+        assert [path.name for _, path, _ in commands] == ["preview_7.mp4", "preview_1.mp4", "preview_9.mp4"]
+        segment, path, cmd = commands[0]
+        assert cmd[cmd.index('-ss') + 1] == str(segment['startTime'])
+        assert cmd[cmd.index('-t') + 1] == "1.5"
+        assert cmd[-1] == str(path)
+        assert (tmp_path / "previews").is_dir()
+
+    def test_prepare_edit_command(self, tmp_path):
+        """测试复制模式写入concat列表，精确模式不写列表"""
+        editor = VideoEditor(clips_dir=str(tmp_path), collections_dir=str(tmp_path))
+        plan = editor.plan_subtitle_edit(_subtitles(4), ["1"])
+        output_path = tmp_path / "out" / "edited.mp4"
+
+        cmd = editor.prepare_edit_command(tmp_path / "src.mp4", plan["timeline"], output_path)
+        list_path = editor.concat_list_path(output_path)
+        assert cmd[cmd.index('-i') + 1] == str(list_path)
+        assert list_path.read_text(encoding="utf-8").count("inpoint") == 3
+        assert plan["totalDeletedDuration"] == 1.5
+        assert plan["finalDuration"] == 4.5
+
+        list_path.unlink()
+        cmd = editor.prepare_edit_command(tmp_path / "src.mp4", plan["timeline"], output_path, frame_accurate=True)
+        assert '-vf' in cmd
+        assert not list_path.exists()
+        assert editor.plan_subtitle_edit(_subtitles(2), ["0", "1"]) is None
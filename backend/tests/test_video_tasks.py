@@ -0,0 +1,78 @@
+"""
+视频队列任务单元测试
+"""
+from pathlib import Path
+
+from backend.tasks import video as video_tasks
+from backend.tasks.video import build_render_workflow, chunk_clip_specs, extract_video_clips
+
+
+def _specs(count: int):
+    return [
+        {"id": str(i), "title": f"t{i}", "start_time": "00:00:01,000", "end_time": "00:00:05,000"}
+        for i in range(count)
+    ]
+
+
+class TestRenderWorkflow:
+    """测试切片渲染的分发结构"""
+
+    def test_chunk_clip_specs(self):
+        """测试按批次分组且不丢失切片"""
+        batches = chunk_clip_specs(_specs(10), 4)
+
+        assert [len(batch) for batch in batches] == [4, 4, 2]
+        assert [spec["id"] for batch in batches for spec in batch] == [str(i) for i in range(10)]
+        assert chunk_clip_specs([], 4) == []
+
+    def test_video_queue_consumer_detection(self, monkeypatch):
+        """测试只有worker消费video队列时才分发，查询失败时视为没有消费者"""
+        class FakeInspect:
+            def __init__(self, queues):
+                self.queues = queues
+
+            def active_queues(self):
+                if isinstance(self.queues, Exception):
+                    raise self.queues
+                return self.queues
+
+        control = video_tasks.celery_app.control
+        monkeypatch.setattr(video_tasks.celery_app.conf, "task_always_eager", False)
+        for queues, expected in [
+            ({"worker@a": [{"name": "processing"}]}, False),
+            ({"worker@a": [{"name": "processing"}], "worker@b": [{"name": "video"}]}, True),
+            (None, False),
+            (ConnectionError("redis no disponible"), False),
+        ]:
+            monkeypatch.setattr(control, "inspect", lambda timeout=1.0, queues=queues: FakeInspect(queues))
+            assert video_tasks.video_queue_has_consumer() is expected
+
+    def test_chord_structure(self):
+        """测试每批一个提取任务，回调为合集拼接与同步"""
+        workflow = build_render_workflow("p1", "/data/src.mp4", _specs(5), 2)
+
+        header = list(workflow.tasks)
+        assert len(header) == 3
+        assert all(sig.task == "backend.tasks.video.extract_video_clips" for sig in header)
+        assert header[0].args == ("p1", _specs(5)[:2], "/data/src.mp4")
+        assert workflow.body.task == "backend.tasks.video.finalize_project_render"
+        assert workflow.body.args == ("p1",)
+
+
+class TestExtractVideoClips:
+    """测试批次提取任务"""
+
+    def test_reports_rendered_and_failed(self, monkeypatch):
+        """测试返回成功路径和失败数量"""
+        class FakeProcessor:
+            def batch_extract_clips(self, input_video, clips_data):
+                assert input_video == Path("/data/src.mp4")
+                return [Path(f"/out/{clip['id']}_{clip['title']}.mp4") for clip in clips_data[:-1]]
+
+        monkeypatch.setattr(video_tasks, "_project_video_processor", lambda project_id: FakeProcessor())
+
+        result = extract_video_clips.run("p1", _specs(3), "/data/src.mp4")
+
+        assert result["success"]
+        assert result["clip_paths"] == ["/out/0_t0.mp4", "/out/1_t1.mp4"]
+        assert result["failed_count"] == 1
@@ -0,0 +1,92 @@
+"""
+虚拟切片单元测试
+"""
+import asyncio
+import os
+import sys
+
+from backend.utils import virtual_clip
+from backend.utils.virtual_clip import VirtualClipCache, build_remux_command, stream_virtual_clip
+
+
+class TestRemuxCommand:
+    """测试remux命令"""
+
+    def test_copy_and_fragmented(self, tmp_path):
+        """测试不重新编码且输出fragmented MP4到管道"""
+        cmd = build_remux_command(tmp_path / "src.mp4", 12.5, 42.25)
+
+        assert cmd[cmd.index('-ss') + 1] == "12.500"
+        assert cmd[cmd.index('-t') + 1] == "29.750"
+        assert cmd[cmd.index('-c') + 1] == "copy"
+        assert "empty_moov" in cmd[cmd.index('-movflags') + 1]
+        assert cmd[-1] == "pipe:1"
+
+
+class TestVirtualClipCache:
+    """测试LRU缓存"""
+
+    def test_key_depends_on_range(self, tmp_path):
+        """测试缓存键随区间变化"""
+        source = tmp_path / "src.mp4"
+        source.write_bytes(b"video")
+
+        assert VirtualClipCache.make_key(source, 1, 2) != VirtualClipCache.make_key(source, 1, 3)
+        assert VirtualClipCache.make_key(source, 1, 2) == VirtualClipCache.make_key(source, 1, 2)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """测试超出容量时淘汰最久未访问的条目"""
+        cache = VirtualClipCache(tmp_path / "cache", max_bytes=250)
+        for i, key in enumerate(["a", "b", "c"]):
+            path = cache.path_for(key)
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+
+        assert cache.get("a") is not None  # 刷新访问时间
+        cache.evict()
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+
+class TestStreamVirtualClip:
+    """测试流式输出与缓存写入"""
+
+    def _collect(self, source, cache):
+        async def run():
+            return [chunk async for chunk in stream_virtual_clip(source, 0, 1, cache)]
+        return asyncio.run(run())
+
+    def test_stream_then_cache(self, tmp_path, monkeypatch):
+        """测试完整输出后写入缓存"""
+        source = tmp_path / "src.mp4"
+        source.write_bytes(b"video")
+        payload = b"fragment" * 20000
+        monkeypatch.setattr(
+            virtual_clip, "build_remux_command",
+            lambda *args: [sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'fragment' * 20000)"]
+        )
+        cache = VirtualClipCache(tmp_path / "cache", max_bytes=10 * 1024 * 1024)
+
+        chunks = self._collect(source, cache)
+
+        assert b"".join(chunks) == payload
+        cached = cache.get(cache.make_key(source, 0, 1))
+        assert cached is not None and cached.read_bytes() == payload
+        assert not list(cache.cache_dir.glob("*.part"))
+
+    def test_failed_remux_not_cached(self, tmp_path, monkeypatch):
+        """测试ffmpeg失败时不写入缓存"""
+        source = tmp_path / "src.mp4"
+        source.write_bytes(b"video")
+        monkeypatch.setattr(
+            virtual_clip, "build_remux_command",
+            lambda *args: [sys.executable, "-c", "import sys; sys.stdout.write('partial'); sys.exit(1)"]
+        )
+        cache = VirtualClipCache(tmp_path / "cache", max_bytes=1024)
+
+        self._collect(source, cache)
+
+        assert cache.get(cache.make_key(source, 0, 1)) is None
+        assert not list(cache.cache_dir.iterdir())
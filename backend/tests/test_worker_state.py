@@ -0,0 +1,67 @@
+"""
+Worker进程状态和提示词缓存单元测试
+"""
+import asyncio
+import os
+
+import pytest
+
+from backend.core import worker_state
+from backend.utils import prompt_loader
+
+
+async def _value(value, delay: float = 0):
+    await asyncio.sleep(delay)
+    return value
+
+
+class TestRunInWorkerLoop:
+    """测试在常驻事件循环中运行协程"""
+
+    def test_reuses_worker_loop(self):
+        """测试多次调用复用同一个事件循环"""
+        assert worker_state.run_in_worker_loop(_value(1)) == 1
+        loop = worker_state._get_worker_loop()
+        assert worker_state.run_in_worker_loop(_value(2), timeout=1) == 2
+        assert worker_state._get_worker_loop() is loop
+
+    def test_timeout_in_worker_loop(self):
+        """测试常驻事件循环中超时抛出TimeoutError"""
+        with pytest.raises(TimeoutError):
+            worker_state.run_in_worker_loop(_value(1, delay=1), timeout=0.05)
+
+    def test_thread_fallback_inside_running_loop(self):
+        """测试已有运行中的事件循环时在线程中执行，等待时间有上限"""
+        async def caller():
+            value = worker_state.run_in_worker_loop(_value("ok"), timeout=1)
+            with pytest.raises(TimeoutError):
+                worker_state.run_in_worker_loop(_value(1, delay=1), timeout=0.05)
+            return value
+
+        assert asyncio.run(caller()) == "ok"
+
+
+class TestPromptCache:
+    """测试提示词的进程内缓存"""
+
+    def test_cached_until_mtime_changes(self, tmp_path):
+        """测试mtime不变时返回缓存内容，修改后重新读取"""
+        prompt_path = tmp_path / "prompt.txt"
+        prompt_path.write_text("versión 1", encoding="utf-8")
+        os.utime(prompt_path, ns=(1_000_000_000, 1_000_000_000))
+        assert prompt_loader.load_prompt(prompt_path) == "versión 1"
+
+        prompt_path.write_text("versión 2", encoding="utf-8")
+        os.utime(prompt_path, ns=(1_000_000_000, 1_000_000_000))
+        assert prompt_loader.load_prompt(prompt_path) == "versión 1"
+
+        os.utime(prompt_path, ns=(2_000_000_000, 2_000_000_000))
+        assert prompt_loader.load_prompt(prompt_path) == "versión 2"
+
+    def test_preload_skips_missing_files(self, tmp_path):
+        """测试预加载跳过不存在的文件，只统计成功加载的数量"""
+        prompt_path = tmp_path / "prompt.txt"
+        prompt_path.write_text("hola", encoding="utf-8")
+
+        assert prompt_loader.preload_prompts([prompt_path, tmp_path / "missing.txt"]) == 1
+        assert prompt_loader._prompt_cache[str(prompt_path)][1] == "hola"
@@ -0,0 +1,47 @@
+"""
+流式ZIP导出单元测试
+"""
+import io
+import zipfile
+
+from backend.utils.zip_stream import ZipEntry, iter_zip_stream
+
+
+class TestZipStream:
+    """测试流式ZIP生成"""
+
+    def test_archive_is_valid(self, tmp_path):
+        """测试生成的归档可正常读取，媒体文件不压缩"""
+        video = tmp_path / "clip.mp4"
+        video.write_bytes(b"\x00\x01" * 300000)
+
+        chunks = list(iter_zip_stream([
+            ZipEntry("clips/clip.mp4", path=video),
+            ZipEntry("metadata/info.json", data=b'{"ok": true}'),
+        ], chunk_size=65536))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+        assert archive.testzip() is None
+        assert archive.getinfo("clips/clip.mp4").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("metadata/info.json").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read("clips/clip.mp4") == video.read_bytes()
+
+    def test_chunks_are_bounded(self, tmp_path):
+        """测试输出按块产生，不会一次性缓存整个文件"""
+        video = tmp_path / "big.mp4"
+        video.write_bytes(b"x" * (4 * 1024 * 1024))
+
+        chunks = list(iter_zip_stream([ZipEntry("big.mp4", path=video)], chunk_size=256 * 1024))
+
+        assert len(chunks) > 10
+        assert max(len(chunk) for chunk in chunks) < 300 * 1024
+
+    def test_missing_file_skipped(self, tmp_path):
+        """测试不存在的文件被跳过"""
+        chunks = list(iter_zip_stream([
+            ZipEntry("missing.mp4", path=tmp_path / "missing.mp4"),
+            ZipEntry("a.json", data=b"{}"),
+        ]))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+        assert archive.namelist() == ["a.json"]
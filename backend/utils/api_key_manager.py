@@ -3,9 +3,12 @@ API密钥管理系统 - 提供安全的密钥存储、验证和轮换功能
 """
 import os
 import json
+import atexit
 import hashlib
 import logging
 import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
@@ -14,6 +17,11 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 from .error_handler import ConfigurationError, APIError, ValidationError
 
 logger = logging.getLogger(__name__)
@@ -21,25 +29,39 @@ logger = logging.getLogger(__name__)
 class APIKeyManager:
     """API密钥管理器"""
     
-    def __init__(self, storage_path: Optional[Path] = None, master_password: Optional[str] = None):
+    def __init__(self, storage_path: Optional[Path] = None, master_password: Optional[str] = None,
+                 usage_flush_interval: float = 60.0, usage_flush_threshold: int = 100):
         """
         初始化API密钥管理器
         
         Args:
             storage_path: 密钥存储路径
             master_password: 主密码，用于加密存储
+            usage_flush_interval: 使用统计延迟写盘的间隔（秒）
+            usage_flush_threshold: 累计多少次使用后立即写盘
         """
         self.storage_path = storage_path or Path.home() / ".auto_clips" / "api_keys"
         self.master_password = master_password or self._get_master_password()
         self.fernet = self._create_fernet()
         self.keys_file = self.storage_path / "keys.enc"
         self.metadata_file = self.storage_path / "metadata.json"
+        self.lock_file = self.storage_path / ".keys.lock"
+        
+        # 使用统计先记录在内存中，批量写盘
+        self.usage_flush_interval = usage_flush_interval
+        self.usage_flush_threshold = usage_flush_threshold
+        self._pending_usage: Dict[str, Dict[str, Any]] = {}
+        self._pending_count = 0
+        self._usage_lock = threading.Lock()
+        self._save_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
         
         # 确保存储目录存在
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
         # 加载现有密钥
         self._load_keys()
+        atexit.register(self.flush_usage)
     
     def _get_master_password(self) -> str:
         """获取主密码"""
@@ -76,14 +98,12 @@ class APIKeyManager:
         
         if self.keys_file.exists():
             try:
-                with open(self.keys_file, 'rb') as f:
-                    encrypted_data = f.read()
-                    decrypted_data = self.fernet.decrypt(encrypted_data)
-                    self.keys = json.loads(decrypted_data.decode())
+                self.keys = self._read_keys_file()
                 logger.info(f"成功加载 {len(self.keys)} 个API密钥")
             except Exception as e:
                 logger.warning(f"加载API密钥失败: {e}")
                 self.keys = {}
+        self._rebuild_expiry_cache()
         
         # 加载元数据
         self.metadata: Dict[str, Any] = {}
@@ -95,25 +115,160 @@ class APIKeyManager:
                 logger.warning(f"加载API密钥元数据失败: {e}")
                 self.metadata = {}
     
+    def _read_keys_file(self) -> Dict[str, Dict[str, Any]]:
+        """读取并解密密钥文件"""
+        with open(self.keys_file, 'rb') as f:
+            encrypted_data = f.read()
+        decrypted_data = self.fernet.decrypt(encrypted_data)
+        return json.loads(decrypted_data.decode())
+    
+    def _reload_keys(self):
+        """
+        在文件锁内重新读取密钥文件，作为读-改-写的起点
+        
+        其他进程写入的密钥和使用统计都以文件为准；读取失败时保留内存数据。
+        """
+        if self.keys_file.exists():
+            try:
+                self.keys = self._read_keys_file()
+            except Exception as e:
+                logger.warning(f"重新加载API密钥失败，使用内存数据: {e}")
+        self._rebuild_expiry_cache()
+    
+    @contextmanager
+    def _keys_transaction(self):
+        """对 self.keys 的读-改-写：持有进程内锁和跨进程文件锁，并先从文件重新加载"""
+        with self._save_lock, self._file_lock():
+            self._reload_keys()
+            yield
+    
+    def _rebuild_expiry_cache(self):
+        """预先解析过期时间，避免每次查询都解析ISO字符串"""
+        expiry_cache = {}
+        for key_name, key_info in self.keys.items():
+            expires_at = key_info.get("expires_at")
+            expiry_cache[key_name] = datetime.fromisoformat(expires_at) if expires_at else None
+        self._expiry_cache = expiry_cache
+    
+    def _is_expired(self, key_name: str, now: Optional[datetime] = None) -> bool:
+        """检查密钥是否过期"""
+        expires_at = self._expiry_cache.get(key_name)
+        if expires_at is None:
+            return False
+        return (now or datetime.now()) > expires_at
+    
+    def _atomic_write(self, path: Path, data: bytes):
+        """写入临时文件后原子替换，避免并发读到半截文件"""
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.storage_path), prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
     def _save_keys(self):
-        """保存密钥到文件"""
+        """保存密钥到文件（调用方需在 _keys_transaction 内调用）"""
         try:
-            # 加密并保存密钥
-            data = json.dumps(self.keys, ensure_ascii=False)
-            encrypted_data = self.fernet.encrypt(data.encode())
-            
-            with open(self.keys_file, 'wb') as f:
-                f.write(encrypted_data)
-            
-            # 保存元数据（不加密）
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            with self._save_lock:
+                # 加密并保存密钥
+                data = json.dumps(self.keys, ensure_ascii=False)
+                encrypted_data = self.fernet.encrypt(data.encode())
+                self._atomic_write(self.keys_file, encrypted_data)
+                
+                # 保存元数据（不加密）
+                metadata = json.dumps(self.metadata, ensure_ascii=False, indent=2)
+                self._atomic_write(self.metadata_file, metadata.encode('utf-8'))
+                self._rebuild_expiry_cache()
             
             logger.debug("API密钥已保存")
         except Exception as e:
             logger.error(f"保存API密钥失败: {e}")
             raise ConfigurationError(f"保存API密钥失败: {e}")
     
+    def _record_usage(self, key_name: str):
+        """在内存中记录一次密钥使用，达到阈值或间隔后批量写盘"""
+        with self._usage_lock:
+            usage = self._pending_usage.setdefault(key_name, {"count": 0, "last_used": None})
+            usage["count"] += 1
+            usage["last_used"] = datetime.now().isoformat()
+            self._pending_count += 1
+            flush_now = self._pending_count >= self.usage_flush_threshold
+            if not flush_now and self._flush_timer is None and self.usage_flush_interval > 0:
+                self._flush_timer = threading.Timer(self.usage_flush_interval, self.flush_usage)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        
+        if flush_now:
+            threading.Thread(target=self.flush_usage, daemon=True).start()
+    
+    def flush_usage(self):
+        """
+        将内存中的使用统计合并写入密钥文件
+        
+        在 _keys_transaction 内重新读取文件并合并增量，多个worker进程同时写入时不会互相覆盖计数。
+        """
+        with self._usage_lock:
+            pending = self._pending_usage
+            self._pending_usage = {}
+            self._pending_count = 0
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        
+        if not pending:
+            return
+        
+        try:
+            with self._keys_transaction():
+                for key_name, usage in pending.items():
+                    key_info = self.keys.get(key_name)
+                    if key_info is None:
+                        continue
+                    key_info["usage_count"] = key_info.get("usage_count", 0) + usage["count"]
+                    if usage["last_used"] and usage["last_used"] > (key_info.get("last_used") or ""):
+                        key_info["last_used"] = usage["last_used"]
+                
+                self._save_keys()
+            logger.debug(f"已写入 {len(pending)} 个API密钥的使用统计")
+        except Exception as e:
+            logger.error(f"写入API密钥使用统计失败: {e}")
+            # 写盘失败时把增量放回，等待下次刷新
+            with self._usage_lock:
+                for key_name, usage in pending.items():
+                    current = self._pending_usage.setdefault(key_name, {"count": 0, "last_used": None})
+                    current["count"] += usage["count"]
+                    current["last_used"] = max(filter(None, [current["last_used"], usage["last_used"]]), default=None)
+                    self._pending_count += usage["count"]
+    
+    @contextmanager
+    def _file_lock(self):
+        """跨进程文件锁（不支持fcntl的平台上退化为进程内锁）"""
+        if fcntl is None:
+            yield
+            return
+        
+        with open(self.lock_file, 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+    
+    def _get_usage(self, key_name: str) -> Dict[str, Any]:
+        """合并已持久化和尚未写盘的使用统计"""
+        key_info = self.keys.get(key_name, {})
+        pending = self._pending_usage.get(key_name)
+        usage_count = key_info.get("usage_count", 0)
+        last_used = key_info.get("last_used")
+        if pending:
+            usage_count += pending["count"]
+            if pending["last_used"] and pending["last_used"] > (last_used or ""):
+                last_used = pending["last_used"]
+        return {"usage_count": usage_count, "last_used": last_used}
+    
     def add_api_key(self, key_name: str, api_key: str, provider: str = "dashscope", 
                    description: str = "", expires_at: Optional[datetime] = None) -> bool:
         """
@@ -134,28 +289,29 @@ class APIKeyManager:
             if not self._validate_api_key_format(api_key, provider):
                 raise ValidationError(f"无效的{provider} API密钥格式")
             
-            # 检查密钥是否已存在
-            if key_name in self.keys:
-                logger.warning(f"密钥名称 '{key_name}' 已存在，将被覆盖")
-            
-            # 存储密钥信息
-            self.keys[key_name] = {
-                "api_key": api_key,
-                "provider": provider,
-                "description": description,
-                "created_at": datetime.now().isoformat(),
-                "expires_at": expires_at.isoformat() if expires_at else None,
-                "last_used": None,
-                "usage_count": 0,
-                "is_active": True
-            }
-            
-            # 更新元数据
-            self.metadata["last_updated"] = datetime.now().isoformat()
-            self.metadata["total_keys"] = len(self.keys)
-            
-            # 保存到文件
-            self._save_keys()
+            with self._keys_transaction():
+                # 检查密钥是否已存在
+                if key_name in self.keys:
+                    logger.warning(f"密钥名称 '{key_name}' 已存在，将被覆盖")
+                
+                # 存储密钥信息
+                self.keys[key_name] = {
+                    "api_key": api_key,
+                    "provider": provider,
+                    "description": description,
+                    "created_at": datetime.now().isoformat(),
+                    "expires_at": expires_at.isoformat() if expires_at else None,
+                    "last_used": None,
+                    "usage_count": 0,
+                    "is_active": True
+                }
+                
+                # 更新元数据
+                self.metadata["last_updated"] = datetime.now().isoformat()
+                self.metadata["total_keys"] = len(self.keys)
+                
+                # 保存到文件
+                self._save_keys()
             
             logger.info(f"成功添加API密钥: {key_name}")
             return True
@@ -174,27 +330,22 @@ class APIKeyManager:
         Returns:
             API密钥值，如果不存在或已过期则返回None
         """
-        if key_name not in self.keys:
+        key_info = self.keys.get(key_name)
+        if key_info is None:
             return None
         
-        key_info = self.keys[key_name]
-        
         # 检查是否激活
         if not key_info.get("is_active", True):
             logger.warning(f"API密钥 '{key_name}' 已停用")
             return None
         
         # 检查是否过期
-        if key_info.get("expires_at"):
-            expires_at = datetime.fromisoformat(key_info["expires_at"])
-            if datetime.now() > expires_at:
-                logger.warning(f"API密钥 '{key_name}' 已过期")
-                return None
+        if self._is_expired(key_name):
+            logger.warning(f"API密钥 '{key_name}' 已过期")
+            return None
         
-        # 更新使用统计
-        key_info["last_used"] = datetime.now().isoformat()
-        key_info["usage_count"] = key_info.get("usage_count", 0) + 1
-        self._save_keys()
+        # 更新使用统计（仅内存，批量写盘）
+        self._record_usage(key_name)
         
         return key_info["api_key"]
     
@@ -209,26 +360,43 @@ class APIKeyManager:
             活跃的API密钥，如果没有则返回None
         """
         active_keys = []
+        now = datetime.now()
         
         for key_name, key_info in self.keys.items():
             if (key_info.get("provider") == provider and 
-                key_info.get("is_active", True)):
-                
-                # 检查是否过期
-                if key_info.get("expires_at"):
-                    expires_at = datetime.fromisoformat(key_info["expires_at"])
-                    if datetime.now() > expires_at:
-                        continue
-                
+                key_info.get("is_active", True) and
+                not self._is_expired(key_name, now)):
                 active_keys.append((key_name, key_info))
         
         if not active_keys:
             return None
         
         # 优先返回最近使用的密钥
-        active_keys.sort(key=lambda x: x[1].get("last_used", ""), reverse=True)
+        active_keys.sort(key=lambda x: self._get_usage(x[0])["last_used"] or "", reverse=True)
         return active_keys[0][1]["api_key"]
     
+    def get_active_api_keys(self, provider: str = "dashscope") -> List[Dict[str, str]]:
+        """
+        获取指定提供商的所有活跃API密钥（用于多密钥负载均衡）
+        
+        Args:
+            provider: 提供商
+            
+        Returns:
+            [{"name": 密钥名称, "api_key": 密钥值}, ...]
+        """
+        now = datetime.now()
+        result = []
+        
+        for key_name, key_info in self.keys.items():
+            if key_info.get("provider") != provider or not key_info.get("is_active", True):
+                continue
+            if self._is_expired(key_name, now):
+                continue
+            result.append({"name": key_name, "api_key": key_info["api_key"]})
+        
+        return result
+    
     def remove_api_key(self, key_name: str) -> bool:
         """
         删除API密钥
@@ -239,14 +407,17 @@ class APIKeyManager:
         Returns:
             是否删除成功
         """
-        if key_name not in self.keys:
-            logger.warning(f"API密钥 '{key_name}' 不存在")
-            return False
-        
-        del self.keys[key_name]
-        self.metadata["last_updated"] = datetime.now().isoformat()
-        self.metadata["total_keys"] = len(self.keys)
-        self._save_keys()
+        with self._keys_transaction():
+            if key_name not in self.keys:
+                logger.warning(f"API密钥 '{key_name}' 不存在")
+                return False
+            
+            del self.keys[key_name]
+            self.metadata["last_updated"] = datetime.now().isoformat()
+            self.metadata["total_keys"] = len(self.keys)
+            self._save_keys()
+        with self._usage_lock:
+            self._pending_usage.pop(key_name, None)
         
         logger.info(f"成功删除API密钥: {key_name}")
         return True
@@ -262,22 +433,23 @@ class APIKeyManager:
         Returns:
             是否更新成功
         """
-        if key_name not in self.keys:
-            logger.warning(f"API密钥 '{key_name}' 不存在")
-            return False
-        
-        # 允许更新的字段
-        allowed_fields = ["description", "expires_at", "is_active"]
-        
-        for field, value in updates.items():
-            if field in allowed_fields:
-                if field == "expires_at" and value is not None:
-                    if isinstance(value, datetime):
-                        value = value.isoformat()
-                self.keys[key_name][field] = value
-        
-        self.metadata["last_updated"] = datetime.now().isoformat()
-        self._save_keys()
+        with self._keys_transaction():
+            if key_name not in self.keys:
+                logger.warning(f"API密钥 '{key_name}' 不存在")
+                return False
+            
+            # 允许更新的字段
+            allowed_fields = ["description", "expires_at", "is_active"]
+            
+            for field, value in updates.items():
+                if field in allowed_fields:
+                    if field == "expires_at" and value is not None:
+                        if isinstance(value, datetime):
+                            value = value.isoformat()
+                    self.keys[key_name][field] = value
+            
+            self.metadata["last_updated"] = datetime.now().isoformat()
+            self._save_keys()
         
         logger.info(f"成功更新API密钥: {key_name}")
         return True
@@ -292,6 +464,7 @@ class APIKeyManager:
         result = []
         
         for key_name, key_info in self.keys.items():
+            usage = self._get_usage(key_name)
             # 不返回实际的API密钥值
             safe_info = {
                 "name": key_name,
@@ -299,17 +472,13 @@ class APIKeyManager:
                 "description": key_info.get("description"),
                 "created_at": key_info.get("created_at"),
                 "expires_at": key_info.get("expires_at"),
-                "last_used": key_info.get("last_used"),
-                "usage_count": key_info.get("usage_count", 0),
+                "last_used": usage["last_used"],
+                "usage_count": usage["usage_count"],
                 "is_active": key_info.get("is_active", True)
             }
             
             # 检查是否过期
-            if key_info.get("expires_at"):
-                expires_at = datetime.fromisoformat(key_info["expires_at"])
-                safe_info["is_expired"] = datetime.now() > expires_at
-            else:
-                safe_info["is_expired"] = False
+            safe_info["is_expired"] = self._is_expired(key_name)
             
             result.append(safe_info)
         
@@ -383,24 +552,27 @@ class APIKeyManager:
         Returns:
             是否轮换成功
         """
-        if key_name not in self.keys:
-            logger.warning(f"API密钥 '{key_name}' 不存在")
-            return False
-        
-        old_key_info = self.keys[key_name]
-        
-        # 验证新密钥格式
-        if not self._validate_api_key_format(new_api_key, old_key_info.get("provider", "dashscope")):
-            raise ValidationError("新API密钥格式不正确")
-        
-        # 更新密钥
-        self.keys[key_name]["api_key"] = new_api_key
-        self.keys[key_name]["rotated_at"] = datetime.now().isoformat()
-        self.keys[key_name]["last_used"] = None
-        self.keys[key_name]["usage_count"] = 0
-        
-        self.metadata["last_updated"] = datetime.now().isoformat()
-        self._save_keys()
+        with self._keys_transaction():
+            if key_name not in self.keys:
+                logger.warning(f"API密钥 '{key_name}' 不存在")
+                return False
+            
+            old_key_info = self.keys[key_name]
+            
+            # 验证新密钥格式
+            if not self._validate_api_key_format(new_api_key, old_key_info.get("provider", "dashscope")):
+                raise ValidationError("新API密钥格式不正确")
+            
+            # 更新密钥
+            self.keys[key_name]["api_key"] = new_api_key
+            self.keys[key_name]["rotated_at"] = datetime.now().isoformat()
+            self.keys[key_name]["last_used"] = None
+            self.keys[key_name]["usage_count"] = 0
+            with self._usage_lock:
+                self._pending_usage.pop(key_name, None)
+            
+            self.metadata["last_updated"] = datetime.now().isoformat()
+            self._save_keys()
         
         logger.info(f"成功轮换API密钥: {key_name}")
         return True
@@ -417,13 +589,11 @@ class APIKeyManager:
         expired_keys = 0
         total_usage = 0
         
-        for key_info in self.keys.values():
-            if key_info.get("expires_at"):
-                expires_at = datetime.fromisoformat(key_info["expires_at"])
-                if datetime.now() > expires_at:
-                    expired_keys += 1
+        for key_name in self.keys:
+            if self._is_expired(key_name):
+                expired_keys += 1
             
-            total_usage += key_info.get("usage_count", 0)
+            total_usage += self._get_usage(key_name)["usage_count"]
         
         return {
             "total_keys": total_keys,
@@ -445,11 +615,9 @@ class APIKeyManager:
         
         keys_to_remove = []
         
-        for key_name, key_info in self.keys.items():
-            if key_info.get("expires_at"):
-                expires_at = datetime.fromisoformat(key_info["expires_at"])
-                if current_time > expires_at:
-                    keys_to_remove.append(key_name)
+        for key_name in self.keys:
+            if self._is_expired(key_name, current_time):
+                keys_to_remove.append(key_name)
         
         for key_name in keys_to_remove:
             self.remove_api_key(key_name)
@@ -0,0 +1,395 @@
+"""
+音频高光信号分析 - 基于16kHz单声道PCM的逐秒能量、峰值、爆发（笑声/掌声）和语速
+
+音频通过内存映射读取，全部计算均为NumPy向量化操作；
+结果以紧凑的 .npy 时间线保存在项目metadata目录，供Step 3评分使用。
+"""
+import logging
+import os
+import re
+import struct
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.pipeline_metrics import record_ffmpeg
+from .subtitle_processor import SubtitleProcessor
+from .text_processor import TextProcessor
+from .transcript_store import transcript_dir
+
+logger = logging.getLogger(__name__)
+
+AUDIO_SIGNAL_FILENAME = "audio_signal.npy"
+
+# .npy 时间线的列定义（每行对应1秒）
+SIGNAL_COLUMNS = ("rms_db", "peak", "burst", "speech_rate", "score")
+COL_RMS_DB, COL_PEAK, COL_BURST, COL_SPEECH_RATE, COL_SCORE = range(len(SIGNAL_COLUMNS))
+
+SILENCE_DB = -45.0  # 低于该响度视为静音
+_BLOCK_SECONDS = 600  # 每次处理的音频长度（秒）
+# 音频提取超时：至少10分钟，长视频按时长放宽
+_EXTRACT_MIN_TIMEOUT = 600
+_EXTRACT_TIMEOUT_PER_SECOND = 0.25
+_SPEECH_UNIT_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]|[^\W\d_]+(?:\'[^\W\d_]+)?')
+
+
+class AudioAnalysisError(Exception):
+    """音频分析错误"""
+    pass
+
+
+def extract_analysis_audio(video_path: Path, output_dir: Path) -> Path:
+    """
+    提取16kHz单声道PCM音频（与语音识别使用相同的文件名，已存在时直接复用）
+
+    Args:
+        video_path: 视频文件路径
+        output_dir: 输出目录
+
+    Returns:
+        WAV文件路径
+    """
+    audio_path = output_dir / f"{video_path.stem}_audio.wav"
+    if audio_path.exists():
+        return audio_path
+
+    from ..core.worker_state import is_ffmpeg_available
+    if not is_ffmpeg_available():
+        raise AudioAnalysisError("ffmpeg不可用，请安装ffmpeg")
+
+    # 先写临时文件，成功后再替换，失败或超时不会留下被后续运行复用的残缺WAV
+    tmp_path = audio_path.with_name(f".{audio_path.stem}.{os.getpid()}.tmp.wav")
+    cmd = [
+        'ffmpeg', '-i', str(video_path),
+        '-vn', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1',
+        '-y', str(tmp_path)
+    ]
+    started = time.monotonic()
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=_extract_timeout(video_path))
+    except subprocess.TimeoutExpired as e:
+        record_ffmpeg(time.monotonic() - started, False)
+        tmp_path.unlink(missing_ok=True)
+        raise AudioAnalysisError(f"音频提取超时（{e.timeout:.0f}秒）") from e
+    record_ffmpeg(time.monotonic() - started, result.returncode == 0)
+    if result.returncode != 0 or not tmp_path.exists():
+        tmp_path.unlink(missing_ok=True)
+        raise AudioAnalysisError(f"音频提取失败: {result.stderr[-500:]}")
+    os.replace(tmp_path, audio_path)
+    return audio_path
+
+
+def _extract_timeout(video_path: Path) -> float:
+    """按视频时长计算音频提取的超时时间（秒）"""
+    from .batch_thumbnailer import probe_duration
+    try:
+        duration = probe_duration(video_path)
+    except (OSError, subprocess.SubprocessError):
+        duration = 0.0
+    return max(_EXTRACT_MIN_TIMEOUT, duration * _EXTRACT_TIMEOUT_PER_SECOND)
+
+
+def load_wav_memmap(wav_path: Path) -> Tuple[np.ndarray, int]:
+    """
+    以内存映射方式读取16位PCM WAV
+
+    Returns:
+        (样本数组, 采样率)
+    """
+    with open(wav_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise AudioAnalysisError(f"不是有效的WAV文件: {wav_path}")
+
+        sample_rate = channels = bits = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise AudioAnalysisError(f"WAV文件缺少data块: {wav_path}")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                _, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+            elif chunk_id == b'data':
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+
+    if bits != 16 or channels != 1:
+        raise AudioAnalysisError(f"仅支持16位单声道PCM，实际: {bits}位 {channels}声道")
+
+    # ffmpeg输出到管道时data块大小可能为0或0xFFFFFFFF，按文件大小计算
+    n_samples = (wav_path.stat().st_size - data_offset) // 2
+    samples = np.memmap(wav_path, dtype='<i2', mode='r', offset=data_offset, shape=(n_samples,))
+    return samples, sample_rate
+
+
+def _rank_normalize(values: np.ndarray) -> np.ndarray:
+    """百分位归一化到0-1"""
+    if values.size == 0:
+        return values.astype(np.float32)
+    ranks = np.argsort(np.argsort(values, kind='stable'), kind='stable')
+    return (ranks / max(values.size - 1, 1)).astype(np.float32)
+
+
+def compute_audio_features(samples: np.ndarray, sample_rate: int) -> Dict[str, np.ndarray]:
+    """
+    计算逐秒音频特征
+
+    Returns:
+        rms_db: 逐秒响度(dBFS)；peak: 明显高于局部水平的响度峰值；
+        burst: 响度和过零率同时偏高的片段（笑声/掌声等宽带噪声）
+    """
+    n_seconds = len(samples) // sample_rate
+    if n_seconds == 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return {"rms_db": empty, "peak": empty, "burst": empty}
+
+    rms = np.empty(n_seconds, dtype=np.float32)
+    zero_crossings = np.empty(n_seconds, dtype=np.float32)
+
+    # 分块处理，避免长视频一次性载入全部样本
+    for block_start in range(0, n_seconds, _BLOCK_SECONDS):
+        block_end = min(block_start + _BLOCK_SECONDS, n_seconds)
+        frames = np.asarray(samples[block_start * sample_rate:block_end * sample_rate])
+        frames = frames.reshape(block_end - block_start, sample_rate).astype(np.float32) / 32768.0
+
+        rms[block_start:block_end] = np.sqrt(np.mean(frames * frames, axis=1))
+        # 过零率：宽带噪声（掌声、笑声）明显高于正常语音
+        zero_crossings[block_start:block_end] = (
+            np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / sample_rate
+        )
+
+    rms_db = 20.0 * np.log10(np.maximum(rms, 1e-5))
+
+    # 峰值：高于前后15秒滑动中位数6dB
+    window = 31
+    padded = np.pad(rms_db, window // 2, mode='edge')
+    local_median = np.median(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+    active = rms_db > SILENCE_DB
+    peak = (rms_db - local_median > 6.0) & active
+
+    if np.any(active):
+        loud = rms_db > np.percentile(rms_db[active], 75)
+        noisy = zero_crossings > np.percentile(zero_crossings[active], 80)
+        burst = loud & noisy
+    else:
+        burst = np.zeros(n_seconds, dtype=bool)
+
+    return {
+        "rms_db": rms_db.astype(np.float32),
+        "peak": peak.astype(np.float32),
+        "burst": burst.astype(np.float32),
+    }
+
+
+def compute_speech_rate(srt_data: List[Dict], n_seconds: int) -> np.ndarray:
+    """
+    由字幕计算逐秒语速（每秒词数，中文按字计）
+
+    Args:
+        srt_data: TextProcessor.parse_srt 的结果
+        n_seconds: 时间线长度（秒）
+    """
+    rate = np.zeros(n_seconds, dtype=np.float32)
+    if not srt_data or n_seconds == 0:
+        return rate
+
+    starts, ends, units = [], [], []
+    for entry in srt_data:
+        try:
+            start = TextProcessor.time_to_seconds(entry['start_time'])
+            end = TextProcessor.time_to_seconds(entry['end_time'])
+        except (KeyError, ValueError):
+            continue
+        starts.append(start)
+        ends.append(max(end, start + 0.001))
+        units.append(len(_SPEECH_UNIT_RE.findall(entry.get('text', ''))))
+
+    if not starts:
+        return rate
+
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    density = np.asarray(units, dtype=np.float64) / (ends - starts)
+
+    # 差分数组：每条字幕的词密度均匀分布到其覆盖的秒上
+    first = np.clip(np.floor(starts).astype(int), 0, n_seconds)
+    last = np.clip(np.ceil(ends).astype(int), 0, n_seconds)
+    delta = np.zeros(n_seconds + 1, dtype=np.float64)
+    np.add.at(delta, first, density)
+    np.add.at(delta, last, -density)
+    rate[:] = np.cumsum(delta[:-1])
+    return rate
+
+
+def build_signal_timeline(features: Dict[str, np.ndarray], speech_rate: np.ndarray) -> np.ndarray:
+    """
+    组合为 (秒数, len(SIGNAL_COLUMNS)) 的float32时间线，并计算逐秒高光分数
+    """
+    n_seconds = len(features["rms_db"])
+    speech_rate = speech_rate[:n_seconds]
+    if len(speech_rate) < n_seconds:
+        speech_rate = np.pad(speech_rate, (0, n_seconds - len(speech_rate)))
+
+    loudness = _rank_normalize(features["rms_db"])
+    pace = _rank_normalize(speech_rate)
+    score = 0.4 * loudness + 0.25 * pace + 0.15 * features["peak"] + 0.2 * features["burst"]
+    score[features["rms_db"] <= SILENCE_DB] = 0.0
+
+    timeline = np.empty((n_seconds, len(SIGNAL_COLUMNS)), dtype=np.float32)
+    timeline[:, COL_RMS_DB] = features["rms_db"]
+    timeline[:, COL_PEAK] = features["peak"]
+    timeline[:, COL_BURST] = features["burst"]
+    timeline[:, COL_SPEECH_RATE] = speech_rate
+    timeline[:, COL_SCORE] = np.clip(score, 0.0, 1.0)
+    return timeline
+
+
+class AudioSignal:
+    """逐秒音频信号时间线"""
+
+    def __init__(self, timeline: np.ndarray):
+        self.timeline = timeline
+        # 前缀和，任意区间的均值均为O(1)
+        padded = np.vstack([np.zeros((1, timeline.shape[1]), dtype=np.float64), timeline.astype(np.float64)])
+        self._cumsum = np.cumsum(padded, axis=0)
+        self._active_cumsum = np.concatenate(
+            [[0], np.cumsum((timeline[:, COL_RMS_DB] > SILENCE_DB) | (timeline[:, COL_SPEECH_RATE] > 0))]
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> 'AudioSignal':
+        """从 .npy 文件加载（内存映射）"""
+        return cls(np.load(path, mmap_mode='r'))
+
+    def save(self, path: Path) -> Path:
+        """保存为 .npy 文件"""
+        np.save(path, np.asarray(self.timeline, dtype=np.float32))
+        return path
+
+    @property
+    def duration(self) -> int:
+        return self.timeline.shape[0]
+
+    def _bounds(self, start_s: float, end_s: float) -> Tuple[int, int]:
+        start = int(np.clip(np.floor(start_s), 0, self.duration))
+        end = int(np.clip(np.ceil(end_s), start, self.duration))
+        return start, end
+
+    def segment_stats(self, start_s: float, end_s: float) -> Optional[Dict[str, float]]:
+        """
+        计算区间内的信号统计
+
+        Returns:
+            score/rms_db/peak/burst/speech_rate 的均值及活跃比例 active_ratio，区间越界时返回None
+        """
+        start, end = self._bounds(start_s, end_s)
+        if end <= start:
+            return None
+        length = end - start
+        means = (self._cumsum[end] - self._cumsum[start]) / length
+        stats = {name: float(means[i]) for i, name in enumerate(SIGNAL_COLUMNS)}
+        stats["active_ratio"] = float(self._active_cumsum[end] - self._active_cumsum[start]) / length
+        return stats
+
+    def is_dead(self, start_s: float, end_s: float, min_active_ratio: float) -> bool:
+        """区间几乎没有声音和字幕时视为无效片段"""
+        stats = self.segment_stats(start_s, end_s)
+        return stats is not None and stats["active_ratio"] < min_active_ratio
+
+
+def _load_srt_entries(srt_path: Path, metadata_dir: Path) -> List[Dict]:
+    """从项目的转写存储读取字幕条目，存储不可用时直接解析SRT"""
+    transcript = SubtitleProcessor().load_transcript(srt_path, transcript_dir(metadata_dir, srt_path))
+    return transcript.srt_entries() if transcript is not None else TextProcessor.parse_srt(srt_path)
+
+
+def analyze_project_audio(video_path: Path, metadata_dir: Path, srt_path: Optional[Path] = None) -> Path:
+    """
+    分析项目音频并保存信号时间线
+
+    Args:
+        video_path: 视频文件路径
+        metadata_dir: 项目metadata目录
+        srt_path: 字幕文件路径（用于计算语速）
+
+    Returns:
+        .npy 时间线路径
+    """
+    output_path = metadata_dir / AUDIO_SIGNAL_FILENAME
+    wav_path = extract_analysis_audio(video_path, metadata_dir)
+    samples, sample_rate = load_wav_memmap(wav_path)
+
+    features = compute_audio_features(samples, sample_rate)
+    srt_data = _load_srt_entries(srt_path, metadata_dir) if srt_path else []
+    speech_rate = compute_speech_rate(srt_data, len(features["rms_db"]))
+
+    AudioSignal(build_signal_timeline(features, speech_rate)).save(output_path)
+    logger.info(f"音频信号分析完成: {len(features['rms_db'])}秒 -> {output_path}")
+    return output_path
+
+
+def _clip_range(clip: Dict) -> Optional[Tuple[float, float]]:
+    """切片的起止秒数"""
+    try:
+        return (TextProcessor.time_to_seconds(clip['start_time']),
+                TextProcessor.time_to_seconds(clip['end_time']))
+    except (KeyError, ValueError, AttributeError):
+        return None
+
+
+def split_dead_segments(clips: List[Dict], signal: AudioSignal,
+                        min_active_ratio: float) -> Tuple[List[Dict], List[Dict]]:
+    """
+    分离出几乎无声的切片，这些切片直接记0分，不再调用LLM评分
+
+    Returns:
+        (需要评分的切片, 无效切片)
+    """
+    live, dead = [], []
+    for clip in clips:
+        clip_range = _clip_range(clip)
+        if clip_range and signal.is_dead(*clip_range, min_active_ratio):
+            clip['final_score'] = 0.0
+            clip['recommend_reason'] = "Segmento sin actividad de audio."
+            clip['audio_score'] = 0.0
+            dead.append(clip)
+        else:
+            live.append(clip)
+    return live, dead
+
+
+def blend_audio_scores(clips: List[Dict], signal: AudioSignal, weight: float):
+    """
+    将音频信号分数按权重混入LLM给出的 final_score（评分失败的切片保持不变）
+
+    音频信号只作为加分项：混合结果低于LLM分数时保留LLM分数，
+    避免百分位归一化的音频分数（平均约0.35）把原本能通过阈值的切片拉下去。
+    """
+    for clip in clips:
+        clip_range = _clip_range(clip)
+        stats = signal.segment_stats(*clip_range) if clip_range else None
+        if stats is None:
+            continue
+        clip['audio_score'] = round(stats['score'], 2)
+        if clip.get('final_score'):
+            llm_score = float(clip['final_score'])
+            blended = (1.0 - weight) * llm_score + weight * stats['score']
+            clip['final_score'] = round(max(llm_score, blended), 2)
+
+
+def load_project_audio_signal(metadata_dir: Path) -> Optional[AudioSignal]:
+    """加载项目的音频信号时间线，不存在或损坏时返回None"""
+    path = Path(metadata_dir) / AUDIO_SIGNAL_FILENAME
+    if not path.exists():
+        return None
+    try:
+        return AudioSignal.load(path)
+    except Exception as e:
+        logger.warning(f"加载音频信号失败 {path}: {e}")
+        return None
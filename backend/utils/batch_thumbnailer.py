@@ -0,0 +1,325 @@
+"""
+批量缩略图生成 - 一次解码同时得到所有切片缩略图和拖动预览雪碧图
+
+用select只放行需要的时间点，帧以rawvideo输出到管道，showinfo给出每帧时间戳；
+每个切片取若干候选帧，按清晰度/曝光/对比度评分选出最佳帧。
+"""
+import bisect
+import json
+import logging
+import math
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..core.pipeline_metrics import record_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+THUMBNAILS_DIRNAME = "thumbnails"
+THUMBNAILS_MANIFEST = "thumbnails.json"
+SPRITE_IMAGE_NAME = "sprite.jpg"
+SPRITE_VTT_NAME = "sprite.vtt"
+
+# 允许通过API访问的缩略图文件名
+THUMBNAIL_FILENAME_RE = re.compile(r'^(clip_[\w-]+\.jpg|sprite\.jpg|sprite\.vtt)$')
+
+_SHOWINFO_PTS_RE = re.compile(r'showinfo.*\bn:\s*\d+.*\bpts_time:\s*(-?[0-9.]+)')
+
+
+@dataclass
+class ClipThumbnailRequest:
+    """需要生成缩略图的切片"""
+    clip_id: str
+    start: float
+    end: float
+
+
+def candidate_times(start: float, end: float, count: int = 3) -> List[float]:
+    """切片内均匀分布的候选时间点（避开首尾的转场）"""
+    duration = max(end - start, 0.0)
+    if duration <= 0 or count <= 0:
+        return [max(start, 0.0)]
+    return [start + duration * (i + 1) / (count + 1) for i in range(count)]
+
+
+def sprite_times(duration: float, interval: float, max_tiles: int) -> List[float]:
+    """雪碧图各格的时间点，超过格数上限时自动放大间隔"""
+    if duration <= 0:
+        return []
+    interval = max(interval, duration / max_tiles)
+    return [i * interval for i in range(int(math.ceil(duration / interval)))]
+
+
+def build_select_expr(times: List[float]) -> str:
+    """
+    构建select表达式：每个时间点放行其后的第一帧
+
+    prev_selected_t 小于目标时间（或尚未选过帧）且当前帧已到达目标时间时选中。
+    """
+    terms = [
+        f"gte(t,{t:.3f})*(isnan(prev_selected_t)+lt(prev_selected_t,{t:.3f}))"
+        for t in sorted(set(round(t, 3) for t in times))
+    ]
+    return "+".join(terms) if terms else "0"
+
+
+def map_targets_to_frames(targets: List[float], frame_times: List[float]) -> List[int]:
+    """每个目标时间对应的帧下标（不早于目标的第一帧，超出末尾时取最后一帧）"""
+    if not frame_times:
+        return []
+    last = len(frame_times) - 1
+    # 容忍时间戳格式化带来的毫秒误差
+    return [min(bisect.bisect_left(frame_times, t - 1e-3), last) for t in targets]
+
+
+def frame_quality(frame: np.ndarray) -> float:
+    """
+    帧的感知质量评分（0~1）：清晰度（拉普拉斯方差）、曝光和对比度
+
+    接近全黑或全白的帧记0分。
+    """
+    gray = frame[..., :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    mean = float(gray.mean())
+    if mean < 16 or mean > 240:
+        return 0.0
+
+    laplacian = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+                 - 4 * gray[1:-1, 1:-1])
+    sharpness = min(math.log1p(float(laplacian.var())) / math.log1p(1000.0), 1.0)
+    exposure = 1.0 - abs(mean - 128.0) / 128.0
+    contrast = min(float(gray.std()) / 64.0, 1.0)
+    return round(0.5 * sharpness + 0.25 * exposure + 0.25 * contrast, 4)
+
+
+def _format_vtt_time(seconds: float) -> str:
+    total_ms = int(round(max(seconds, 0.0) * 1000))
+    hours, rest = divmod(total_ms, 3600 * 1000)
+    minutes, rest = divmod(rest, 60 * 1000)
+    secs, ms = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{ms:03d}"
+
+
+def build_sprite_vtt(times: List[float], duration: float, columns: int,
+                     tile_width: int, tile_height: int, sprite_name: str = SPRITE_IMAGE_NAME) -> str:
+    """生成雪碧图的WebVTT映射（每个时间段对应雪碧图中的一格）"""
+    lines = ["WEBVTT", ""]
+    for i, start in enumerate(times):
+        end = times[i + 1] if i + 1 < len(times) else max(duration, start)
+        x = (i % columns) * tile_width
+        y = (i // columns) * tile_height
+        lines.append(f"{_format_vtt_time(start)} --> {_format_vtt_time(end)}")
+        lines.append(f"{sprite_name}#xywh={x},{y},{tile_width},{tile_height}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def probe_duration(video_path: Path) -> float:
+    """读取视频时长（秒）"""
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+           '-of', 'default=noprint_wrappers=1:nokey=1', str(video_path)]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return 0.0
+
+
+class BatchThumbnailer:
+    """单次解码的批量缩略图生成器"""
+
+    def __init__(self, width: int = 320, height: int = 180, tile_width: int = 160, tile_height: int = 90,
+                 sprite_interval: float = 10.0, sprite_max_tiles: int = 300, sprite_columns: int = 10,
+                 candidates_per_clip: int = 3):
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.sprite_interval = sprite_interval
+        self.sprite_max_tiles = sprite_max_tiles
+        self.sprite_columns = sprite_columns
+        self.candidates_per_clip = candidates_per_clip
+
+    def build_command(self, video_path: Path, times: List[float]) -> List[str]:
+        """构建单次解码的ffmpeg命令（选中帧缩放后以rgb24输出到stdout）"""
+        w, h = self.width, self.height
+        video_filter = (
+            f"select='{build_select_expr(times)}',"
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2:black,"
+            f"showinfo"
+        )
+        return [
+            'ffmpeg', '-hide_banner', '-nostats',
+            '-i', str(video_path),
+            '-an', '-sn',
+            '-vf', video_filter,
+            '-fps_mode', 'passthrough',
+            '-pix_fmt', 'rgb24',
+            '-f', 'rawvideo',
+            'pipe:1'
+        ]
+
+    def extract_frames(self, video_path: Path, times: List[float],
+                       timeout: int = 3600) -> Tuple[List[float], List[np.ndarray]]:
+        """
+        一次ffmpeg调用提取所有时间点的帧
+
+        Returns:
+            (按顺序的帧时间戳, 帧数组列表)
+        """
+        frame_size = self.width * self.height * 3
+        started = time.monotonic()
+        process = subprocess.Popen(self.build_command(video_path, times),
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # showinfo输出量大，单独线程读取stderr避免管道阻塞
+        stderr_lines: List[str] = []
+        reader = threading.Thread(
+            target=lambda: stderr_lines.extend(line.decode('utf-8', errors='ignore') for line in process.stderr),
+            daemon=True
+        )
+        reader.start()
+
+        frames = []
+        try:
+            while True:
+                data = process.stdout.read(frame_size)
+                if len(data) < frame_size:
+                    break
+                frames.append(np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3))
+            returncode = process.wait(timeout=timeout)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        reader.join(timeout=5)
+        record_ffmpeg(time.monotonic() - started, returncode == 0)
+
+        if returncode != 0:
+            raise RuntimeError(f"批量抽帧失败: {''.join(stderr_lines)[-500:]}")
+
+        frame_times = []
+        for line in stderr_lines:
+            match = _SHOWINFO_PTS_RE.search(line)
+            if match:
+                frame_times.append(float(match.group(1)))
+        if len(frame_times) != len(frames):
+            logger.warning(f"帧时间戳数量({len(frame_times)})与帧数({len(frames)})不一致")
+            count = min(len(frame_times), len(frames))
+            frame_times, frames = frame_times[:count], frames[:count]
+        return frame_times, frames
+
+    def generate(self, video_path: Path, clips: List[ClipThumbnailRequest], output_dir: Path,
+                 duration: Optional[float] = None) -> Dict:
+        """
+        生成所有切片缩略图、雪碧图和WebVTT映射
+
+        Args:
+            video_path: 源视频路径
+            clips: 切片列表
+            output_dir: 输出目录
+            duration: 视频时长（秒），为None时用ffprobe读取
+
+        Returns:
+            清单数据（同时写入 thumbnails.json）
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if duration is None:
+            duration = probe_duration(video_path)
+
+        clip_candidates = {clip.clip_id: candidate_times(clip.start, clip.end, self.candidates_per_clip)
+                           for clip in clips}
+        tile_times = sprite_times(duration, self.sprite_interval, self.sprite_max_tiles)
+        all_times = [t for times in clip_candidates.values() for t in times] + tile_times
+
+        frame_times, frames = self.extract_frames(video_path, all_times)
+        if not frames:
+            raise RuntimeError(f"未能从视频中提取任何帧: {video_path}")
+        scores: Dict[int, float] = {}
+
+        def score_of(index: int) -> float:
+            if index not in scores:
+                scores[index] = frame_quality(frames[index])
+            return scores[index]
+
+        manifest = {"clips": {}, "sprite": None, "vtt": None}
+        for clip in clips:
+            candidates = clip_candidates[clip.clip_id]
+            indices = map_targets_to_frames(candidates, frame_times)
+            best = max(range(len(indices)), key=lambda i: score_of(indices[i]))
+            thumbnail_path = output_dir / f"clip_{clip.clip_id}.jpg"
+            Image.fromarray(frames[indices[best]]).save(thumbnail_path, quality=90)
+            manifest["clips"][clip.clip_id] = {
+                "path": str(thumbnail_path),
+                "time": round(frame_times[indices[best]], 3),
+                "score": score_of(indices[best]),
+            }
+
+        if tile_times:
+            indices = map_targets_to_frames(tile_times, frame_times)
+            columns = min(self.sprite_columns, len(indices))
+            rows = int(math.ceil(len(indices) / columns))
+            sprite = Image.new('RGB', (columns * self.tile_width, rows * self.tile_height))
+            for i, index in enumerate(indices):
+                tile = Image.fromarray(frames[index]).resize((self.tile_width, self.tile_height))
+                sprite.paste(tile, ((i % columns) * self.tile_width, (i // columns) * self.tile_height))
+            sprite.save(output_dir / SPRITE_IMAGE_NAME, quality=80)
+            (output_dir / SPRITE_VTT_NAME).write_text(
+                build_sprite_vtt(tile_times, duration, columns, self.tile_width, self.tile_height),
+                encoding='utf-8'
+            )
+            manifest["sprite"] = SPRITE_IMAGE_NAME
+            manifest["vtt"] = SPRITE_VTT_NAME
+
+        with open(output_dir / THUMBNAILS_MANIFEST, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"批量缩略图完成: {len(clips)}个切片, {len(tile_times)}格雪碧图, 解码{len(frames)}帧")
+        return manifest
+
+
+def generate_clip_thumbnails(video_path: Path, clips_metadata_path: Path, output_dir: Path,
+                             **thumbnailer_kwargs) -> Optional[Dict]:
+    """
+    为clips_metadata.json中的切片批量生成缩略图，并回写 thumbnail_path/thumbnail_score
+
+    Returns:
+        清单数据，切片元数据不存在时返回None
+    """
+    from .text_processor import TextProcessor
+
+    if not clips_metadata_path.exists():
+        return None
+    with open(clips_metadata_path, 'r', encoding='utf-8') as f:
+        clips_data = json.load(f)
+
+    requests = []
+    for clip in clips_data:
+        try:
+            requests.append(ClipThumbnailRequest(
+                clip_id=str(clip['id']),
+                start=TextProcessor.time_to_seconds(clip['start_time']),
+                end=TextProcessor.time_to_seconds(clip['end_time']),
+            ))
+        except (KeyError, ValueError, AttributeError):
+            continue
+
+    manifest = BatchThumbnailer(**thumbnailer_kwargs).generate(video_path, requests, output_dir)
+
+    for clip in clips_data:
+        entry = manifest["clips"].get(str(clip.get('id')))
+        if entry:
+            clip['thumbnail_path'] = entry["path"]
+            clip['thumbnail_score'] = entry["score"]
+    with open(clips_metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(clips_data, f, ensure_ascii=False, indent=2)
+    return manifest
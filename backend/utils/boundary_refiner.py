@@ -0,0 +1,217 @@
+"""
+切片边界修正 - 将切片起止时间吸附到最近的停顿或镜头切换点
+
+每个视频源只运行一次ffmpeg（scene检测 + silencedetect），事件列表缓存到metadata目录；
+之后整份时间线的修正只是在有序数组上的二分查找。
+"""
+import json
+import logging
+import re
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..core.pipeline_metrics import record_ffmpeg
+from .srt_time import seconds_to_time
+from .text_processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY_EVENTS_FILENAME = "boundary_events.json"
+
+_PTS_TIME_RE = re.compile(r'pts_time:\s*([0-9.]+)')
+_SILENCE_START_RE = re.compile(r'silence_start:\s*(-?[0-9.]+)')
+_SILENCE_END_RE = re.compile(r'silence_end:\s*([0-9.]+)')
+
+
+def _source_signature(video_path: Path) -> Dict:
+    stat = video_path.stat()
+    return {"path": str(video_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def parse_ffmpeg_events(stderr: str) -> Dict[str, List[float]]:
+    """
+    从ffmpeg showinfo/silencedetect输出中解析事件
+
+    Returns:
+        {"scene_cuts": [...], "silence_starts": [...], "silence_ends": [...]}
+    """
+    return {
+        "scene_cuts": sorted(float(v) for v in _PTS_TIME_RE.findall(stderr)),
+        "silence_starts": sorted(max(float(v), 0.0) for v in _SILENCE_START_RE.findall(stderr)),
+        "silence_ends": sorted(float(v) for v in _SILENCE_END_RE.findall(stderr)),
+    }
+
+
+def detect_boundary_events(video_path: Path, scene_threshold: float = 0.3,
+                           silence_noise_db: float = -35.0, silence_min_duration: float = 0.3) -> Dict[str, List[float]]:
+    """
+    一次ffmpeg调用同时检测镜头切换和静音区间
+
+    视频没有音频流（或没有视频流）时退回到只检测另一种事件。
+    """
+    video_filter = f"[0:v]scale=320:-2,select='gt(scene,{scene_threshold})',showinfo[v]"
+    audio_filter = f"[0:a]silencedetect=noise={silence_noise_db}dB:d={silence_min_duration}[a]"
+    attempts = [
+        (f"{video_filter};{audio_filter}", ["-map", "[v]", "-map", "[a]"]),
+        (video_filter, ["-map", "[v]"]),
+        (audio_filter, ["-map", "[a]"]),
+    ]
+
+    for filter_complex, maps in attempts:
+        cmd = ["ffmpeg", "-hide_banner", "-nostats", "-i", str(video_path),
+               "-filter_complex", filter_complex, *maps, "-f", "null", "-"]
+        started = time.monotonic()
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=3600)
+        record_ffmpeg(time.monotonic() - started, result.returncode == 0)
+        if result.returncode == 0:
+            return parse_ffmpeg_events(result.stderr)
+        logger.debug(f"边界事件检测失败，尝试降级: {result.stderr[-300:]}")
+
+    raise RuntimeError(f"无法检测边界事件: {video_path}")
+
+
+def load_or_detect_events(video_path: Path, metadata_dir: Path, **detect_kwargs) -> Dict[str, List[float]]:
+    """读取缓存的事件列表，视频源变化或缓存不存在时重新检测"""
+    cache_path = metadata_dir / BOUNDARY_EVENTS_FILENAME
+    signature = _source_signature(video_path)
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("source") == signature:
+                return cached["events"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取边界事件缓存失败: {e}")
+
+    events = detect_boundary_events(video_path, **detect_kwargs)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({"source": signature, "events": events}, f)
+    logger.info(f"边界事件检测完成: {len(events['scene_cuts'])}个镜头切换, {len(events['silence_starts'])}段静音")
+    return events
+
+
+def _snap(times: np.ndarray, events: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    将每个时间点吸附到容差内最近的事件，没有事件时返回NaN
+    """
+    snapped = np.full(times.shape, np.nan)
+    if events.size == 0 or times.size == 0:
+        return snapped
+
+    idx = np.searchsorted(events, times)
+    left = events[np.clip(idx - 1, 0, events.size - 1)]
+    right = events[np.clip(idx, 0, events.size - 1)]
+    nearest = np.where(np.abs(times - left) <= np.abs(right - times), left, right)
+    within = np.abs(nearest - times) <= tolerance
+    snapped[within] = nearest[within]
+    return snapped
+
+
+class BoundaryIndex:
+    """有序边界事件索引"""
+
+    def __init__(self, scene_cuts: List[float], silence_starts: List[float], silence_ends: List[float]):
+        self.scene_cuts = np.asarray(sorted(scene_cuts), dtype=np.float64)
+        # 起点吸附到说话恢复（静音结束），终点吸附到说话停止（静音开始）
+        self.start_pauses = np.asarray(sorted(silence_ends), dtype=np.float64)
+        self.end_pauses = np.asarray(sorted(silence_starts), dtype=np.float64)
+
+    @classmethod
+    def from_events(cls, events: Dict[str, List[float]]) -> 'BoundaryIndex':
+        return cls(events.get("scene_cuts", []), events.get("silence_starts", []), events.get("silence_ends", []))
+
+    def snap(self, starts: np.ndarray, ends: np.ndarray, tolerance: float,
+             min_duration: float = 1.0) -> np.ndarray:
+        """
+        批量吸附起止时间，停顿优先，其次是镜头切换
+
+        Returns:
+            形状为 (n, 2) 的新起止时间
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+
+        new_starts = _snap(starts, self.start_pauses, tolerance)
+        new_starts = np.where(np.isnan(new_starts), _snap(starts, self.scene_cuts, tolerance), new_starts)
+        new_starts = np.where(np.isnan(new_starts), starts, new_starts)
+
+        new_ends = _snap(ends, self.end_pauses, tolerance)
+        new_ends = np.where(np.isnan(new_ends), _snap(ends, self.scene_cuts, tolerance), new_ends)
+        new_ends = np.where(np.isnan(new_ends), ends, new_ends)
+
+        # 修正后过短的切片保持原样
+        too_short = new_ends - new_starts < min_duration
+        new_starts[too_short] = starts[too_short]
+        new_ends[too_short] = ends[too_short]
+        return np.column_stack([new_starts, new_ends])
+
+
+def refine_timeline(timeline_data: List[Dict], index: BoundaryIndex, tolerance: float,
+                    min_duration: float = 1.0) -> int:
+    """
+    原地修正时间线中每个切片的起止时间，原始时间保存在 original_start_time/original_end_time
+
+    Returns:
+        被修改的切片数
+    """
+    items, starts, ends = [], [], []
+    for item in timeline_data:
+        try:
+            start = TextProcessor.time_to_seconds(item['start_time'])
+            end = TextProcessor.time_to_seconds(item['end_time'])
+        except (KeyError, ValueError, AttributeError):
+            continue
+        items.append(item)
+        starts.append(start)
+        ends.append(end)
+
+    if not items:
+        return 0
+
+    refined = index.snap(np.asarray(starts), np.asarray(ends), tolerance, min_duration)
+    changed = 0
+    for item, start, end, (new_start, new_end) in zip(items, starts, ends, refined):
+        if abs(new_start - start) < 1e-3 and abs(new_end - end) < 1e-3:
+            continue
+        item.setdefault('original_start_time', item['start_time'])
+        item.setdefault('original_end_time', item['end_time'])
+        item['start_time'] = seconds_to_time(new_start)
+        item['end_time'] = seconds_to_time(new_end)
+        changed += 1
+    return changed
+
+
+def refine_project_boundaries(video_path: Path, metadata_dir: Path, timeline_path: Path,
+                              tolerance: float, scene_threshold: float = 0.3,
+                              silence_noise_db: float = -35.0,
+                              silence_min_duration: float = 0.3) -> Optional[List[Dict]]:
+    """
+    修正项目时间线文件中的切片边界并写回
+
+    Returns:
+        修正后的时间线数据，时间线不存在时返回None
+    """
+    if not timeline_path.exists():
+        return None
+
+    events = load_or_detect_events(
+        video_path, metadata_dir,
+        scene_threshold=scene_threshold,
+        silence_noise_db=silence_noise_db,
+        silence_min_duration=silence_min_duration,
+    )
+
+    with open(timeline_path, 'r', encoding='utf-8') as f:
+        timeline_data = json.load(f)
+
+    changed = refine_timeline(timeline_data, BoundaryIndex.from_events(events), tolerance)
+
+    with open(timeline_path, 'w', encoding='utf-8') as f:
+        json.dump(timeline_data, f, ensure_ascii=False, indent=2)
+    logger.info(f"切片边界修正完成: {changed}/{len(timeline_data)}个切片已调整")
+    return timeline_data
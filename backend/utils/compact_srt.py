@@ -0,0 +1,185 @@
+"""
+紧凑SRT编码 - 为Step 2提示词压缩字幕文本
+
+完整SRT中每条字幕都带有 `序号\\nHH:MM:SS,mmm --> HH:MM:SS,mmm` 的头部，
+大部分token都花在时间戳上。这里将间隔很短的相邻字幕合并为一行，每行只保留
+一个行号和一个开始时间：
+
+    L1 0:12:03 texto de la primera frase texto de la segunda
+    L2 0:12:09 ...
+
+并提供解码器，把大模型返回的行号或近似时间映射回原始SRT的精确边界。
+"""
+import bisect
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_TIME_RE = re.compile(r'^\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?\s*$')
+
+# 附加到Step 2输入中的格式说明
+COMPACT_SRT_FORMAT_NOTE = (
+    "srt_text 已压缩：每行格式为 `L行号 时:分:秒 文本`，时间为该行的开始时间，"
+    "该行持续到下一行开始。输出时请在每个对象中额外给出 `start_line` 和 `end_line`"
+    "（话题第一行和最后一行的整数行号），`start_time`/`end_time` 仍按 HH:MM:SS,mmm 格式填写。"
+)
+
+
+@dataclass
+class CompactLine:
+    """压缩后的一行，对应一段连续的原始字幕"""
+    number: int
+    first_entry: int
+    last_entry: int
+    start_seconds: float
+    end_seconds: float
+    text: str
+
+
+def parse_loose_time(value: Any) -> Optional[float]:
+    """
+    解析大模型返回的时间，兼容 HH:MM:SS,mmm / H:MM:SS / MM:SS / 秒数
+
+    Returns:
+        秒数，无法解析时返回None
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+
+    match = _TIME_RE.match(value)
+    if not match:
+        try:
+            return float(value.strip())
+        except ValueError:
+            return None
+
+    hours, minutes, seconds, millis = match.groups()
+    total = int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+    if millis:
+        total += int(millis.ljust(3, '0')) / 1000.0
+    return float(total)
+
+
+def _format_clock(seconds: float) -> str:
+    """格式化为 H:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+class CompactSrtCodec:
+    """紧凑SRT编解码器"""
+
+    def __init__(self, srt_entries: List[Dict], merge_gap_ms: int = 300,
+                 max_line_chars: int = 200):
+        """
+        Args:
+            srt_entries: SRT块条目（包含start_time、end_time、text）
+            merge_gap_ms: 相邻字幕间隔小于该值时合并为一行
+            max_line_chars: 合并后单行最大字符数
+        """
+        self.entries = srt_entries
+        self.merge_gap_ms = merge_gap_ms
+        self.max_line_chars = max_line_chars
+        self.lines: List[CompactLine] = []
+        self._build_lines()
+        self._line_starts = [line.start_seconds for line in self.lines]
+        self._line_ends = [line.end_seconds for line in self.lines]
+
+    def _build_lines(self):
+        """将相邻的短间隔字幕合并为行"""
+        current = None
+        for i, entry in enumerate(self.entries):
+            start = parse_loose_time(entry['start_time'])
+            end = parse_loose_time(entry['end_time'])
+            text = ' '.join(entry.get('text', '').split())
+
+            if current is not None:
+                gap_ms = (start - current.end_seconds) * 1000
+                if gap_ms < self.merge_gap_ms and len(current.text) + len(text) + 1 <= self.max_line_chars:
+                    current.last_entry = i
+                    current.end_seconds = end
+                    current.text = f"{current.text} {text}".strip()
+                    continue
+                self.lines.append(current)
+
+            current = CompactLine(
+                number=len(self.lines) + 1,
+                first_entry=i,
+                last_entry=i,
+                start_seconds=start,
+                end_seconds=end,
+                text=text,
+            )
+
+        if current is not None:
+            self.lines.append(current)
+
+    def encode(self) -> str:
+        """生成紧凑的字幕文本"""
+        return '\n'.join(
+            f"L{line.number} {_format_clock(line.start_seconds)} {line.text}"
+            for line in self.lines
+        )
+
+    def _line_by_number(self, value: Any) -> Optional[CompactLine]:
+        """按行号取行，兼容 "L12" 形式"""
+        if isinstance(value, str):
+            value = value.strip().lstrip('Ll')
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            return None
+        if 1 <= number <= len(self.lines):
+            return self.lines[number - 1]
+        return None
+
+    def _nearest_line(self, seconds: float, boundaries: List[float]) -> CompactLine:
+        """找到边界时间最接近给定时间的行"""
+        pos = bisect.bisect_left(boundaries, seconds)
+        if pos <= 0:
+            return self.lines[0]
+        if pos >= len(boundaries):
+            return self.lines[-1]
+        before, after = boundaries[pos - 1], boundaries[pos]
+        return self.lines[pos - 1] if seconds - before <= after - seconds else self.lines[pos]
+
+    def resolve(self, item: Dict) -> Optional[Dict]:
+        """
+        将大模型返回的一个话题映射回精确的SRT边界
+
+        优先使用 start_line/end_line，缺失或无效时用 start_time/end_time
+        吸附到最近的行边界。
+
+        Returns:
+            start_time/end_time 已替换为原始SRT时间戳的新对象，无法解析时返回None
+        """
+        if not self.lines:
+            return None
+
+        start_line = self._line_by_number(item.get('start_line'))
+        if start_line is None:
+            start_seconds = parse_loose_time(item.get('start_time'))
+            if start_seconds is None:
+                return None
+            start_line = self._nearest_line(start_seconds, self._line_starts)
+
+        end_line = self._line_by_number(item.get('end_line'))
+        if end_line is None:
+            end_seconds = parse_loose_time(item.get('end_time'))
+            if end_seconds is None:
+                return None
+            end_line = self._nearest_line(end_seconds, self._line_ends)
+
+        if end_line.number < start_line.number:
+            logger.warning(f"话题 '{item.get('outline')}' 的结束行早于开始行，已交换")
+            start_line, end_line = end_line, start_line
+
+        resolved = {k: v for k, v in item.items() if k not in ('start_line', 'end_line')}
+        resolved['start_time'] = self.entries[start_line.first_entry]['start_time']
+        resolved['end_time'] = self.entries[end_line.last_entry]['end_time']
+        return resolved
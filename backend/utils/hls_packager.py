@@ -0,0 +1,216 @@
+"""
+HLS打包 - 源视频一次性打包为fMP4分片，按需合成任意区间的播放列表
+
+打包使用 -c copy，分片边界天然落在关键帧上；
+之后任意切片预览只需要生成一个只引用 [start, end] 内分片的m3u8，不再调用ffmpeg。
+"""
+import bisect
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HLS_DIRNAME = "hls"
+HLS_PLAYLIST_NAME = "index.m3u8"
+HLS_INIT_NAME = "init.mp4"
+HLS_SOURCE_INFO = "source.json"
+
+# 允许通过API访问的HLS文件名
+HLS_FILENAME_RE = re.compile(r'^(index\.m3u8|init\.mp4|seg_\d{5}\.m4s)$')
+
+_EXTINF_RE = re.compile(r'^#EXTINF:([0-9.]+)')
+_MAP_RE = re.compile(r'^#EXT-X-MAP:URI="([^"]+)"')
+
+
+@dataclass
+class HlsSegment:
+    """播放列表中的一个分片"""
+    uri: str
+    start: float
+    duration: float
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+
+class HlsPlaylist:
+    """已解析的VOD媒体播放列表"""
+
+    def __init__(self, segments: List[HlsSegment], init_uri: Optional[str] = None):
+        self.segments = segments
+        self.init_uri = init_uri
+        self._starts = [segment.start for segment in segments]
+
+    @classmethod
+    def parse(cls, text: str) -> 'HlsPlaylist':
+        segments = []
+        init_uri = None
+        position = 0.0
+        pending_duration = None
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            map_match = _MAP_RE.match(line)
+            if map_match:
+                init_uri = os.path.basename(map_match.group(1))
+                continue
+            extinf = _EXTINF_RE.match(line)
+            if extinf:
+                pending_duration = float(extinf.group(1))
+                continue
+            if not line.startswith('#') and pending_duration is not None:
+                # 分片与播放列表在同一目录，只保留文件名
+                segments.append(HlsSegment(uri=os.path.basename(line), start=position, duration=pending_duration))
+                position += pending_duration
+                pending_duration = None
+        return cls(segments, init_uri)
+
+    @property
+    def duration(self) -> float:
+        return self.segments[-1].end if self.segments else 0.0
+
+    def segment_range(self, start: float, end: float) -> Tuple[int, int]:
+        """与 [start, end] 有重叠的分片下标区间 [first, last)"""
+        if not self.segments:
+            return 0, 0
+        first = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        last = max(bisect.bisect_left(self._starts, end), first + 1)
+        return first, last
+
+    def build_clip_playlist(self, start: float, end: float, uri_prefix: str = "") -> str:
+        """
+        合成只包含 [start, end] 范围分片的媒体播放列表
+
+        Args:
+            start: 开始时间（秒）
+            end: 结束时间（秒）
+            uri_prefix: 分片URI前缀（相对或绝对路径）
+        """
+        first, last = self.segment_range(start, end)
+        selected = self.segments[first:last]
+        target = max((math.ceil(segment.duration) for segment in selected), default=1)
+
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:7",
+            f"#EXT-X-TARGETDURATION:{target}",
+            f"#EXT-X-MEDIA-SEQUENCE:{first}",
+            "#EXT-X-PLAYLIST-TYPE:VOD",
+            "#EXT-X-INDEPENDENT-SEGMENTS",
+        ]
+        if selected:
+            # 让播放器直接从切片起点开始播放
+            offset = max(start - selected[0].start, 0.0)
+            lines.append(f"#EXT-X-START:TIME-OFFSET={offset:.3f},PRECISE=YES")
+        if self.init_uri:
+            lines.append(f'#EXT-X-MAP:URI="{uri_prefix}{self.init_uri}"')
+        for segment in selected:
+            lines.append(f"#EXTINF:{segment.duration:.6f},")
+            lines.append(f"{uri_prefix}{segment.uri}")
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+
+_playlist_cache: Dict[str, Tuple[float, HlsPlaylist]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_playlist(hls_dir: Path) -> Optional[HlsPlaylist]:
+    """读取并缓存已打包的播放列表（按mtime失效），未打包时返回None"""
+    playlist_path = Path(hls_dir) / HLS_PLAYLIST_NAME
+    try:
+        mtime = playlist_path.stat().st_mtime
+    except OSError:
+        return None
+
+    key = str(playlist_path)
+    cached = _playlist_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    playlist = HlsPlaylist.parse(playlist_path.read_text(encoding='utf-8'))
+    with _cache_lock:
+        _playlist_cache[key] = (mtime, playlist)
+    return playlist
+
+
+def _source_signature(source: Path) -> Dict:
+    stat = source.stat()
+    return {"path": str(source), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def is_packaged(source: Path, hls_dir: Path) -> bool:
+    """源视频是否已打包且未变化"""
+    info_path = Path(hls_dir) / HLS_SOURCE_INFO
+    try:
+        with open(info_path, 'r', encoding='utf-8') as f:
+            return json.load(f) == _source_signature(source)
+    except (OSError, ValueError):
+        return False
+
+
+def package_hls(source: Path, hls_dir: Path, segment_seconds: int = 4, timeout: int = 3600) -> Path:
+    """
+    将源视频打包为HLS/fMP4（不重新编码），已打包且源未变化时直接返回
+
+    Args:
+        source: 源视频路径
+        hls_dir: 输出目录
+        segment_seconds: 目标分片时长（实际在关键帧处切分）
+
+    Returns:
+        播放列表路径
+    """
+    hls_dir = Path(hls_dir)
+    if is_packaged(source, hls_dir):
+        return hls_dir / HLS_PLAYLIST_NAME
+
+    # 先输出到临时目录，完成后整体替换，避免读到半成品
+    tmp_dir = hls_dir.with_name(f"{hls_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+        '-i', str(source),
+        '-map', '0:v:0?', '-map', '0:a:0?',
+        '-c', 'copy',
+        '-f', 'hls',
+        '-hls_time', str(segment_seconds),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_type', 'fmp4',
+        '-hls_fmp4_init_filename', HLS_INIT_NAME,
+        '-hls_segment_filename', str(tmp_dir / 'seg_%05d.m4s'),
+        '-hls_flags', 'independent_segments',
+        str(tmp_dir / HLS_PLAYLIST_NAME)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise RuntimeError(f"HLS打包失败: {result.stderr[-500:]}")
+
+    with open(tmp_dir / HLS_SOURCE_INFO, 'w', encoding='utf-8') as f:
+        json.dump(_source_signature(source), f)
+
+    if hls_dir.exists():
+        old_dir = hls_dir.with_name(f"{hls_dir.name}.old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(hls_dir, old_dir)
+        os.replace(tmp_dir, hls_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    else:
+        os.replace(tmp_dir, hls_dir)
+
+    logger.info(f"HLS打包完成: {source} -> {hls_dir}")
+    return hls_dir / HLS_PLAYLIST_NAME
@@ -5,6 +5,7 @@ import json
 import logging
 import os
 import re
+import time
 from typing import Dict, Any, List
 from collections.abc import Generator
 
@@ -23,6 +24,7 @@ except ImportError:
 # 导入新的LLM管理器
 try:
     from ..core.llm_manager import get_llm_manager
+    from ..core.pipeline_metrics import record_parse_failure
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     import sys
@@ -31,6 +33,12 @@ except ImportError:
     if str(backend_path) not in sys.path:
         sys.path.insert(0, str(backend_path))
     from core.llm_manager import get_llm_manager
+    from core.pipeline_metrics import record_parse_failure
+
+try:
+    from .token_estimator import estimate_tokens
+except ImportError:
+    from utils.token_estimator import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -67,11 +75,15 @@ class LLMClient:
         Returns:
             模型响应文本
         """
+        started = time.monotonic()
         try:
-            return self.llm_manager.call(self._with_language_guard(prompt), input_data)
+            response = self.llm_manager.call(self._with_language_guard(prompt), input_data)
         except Exception as e:
-            logger.error(f"LLM调用失败: {str(e)}")
+            logger.error(f"LLM调用失败: {str(e)}",
+                         extra={"event": "llm_call", "duration": round(time.monotonic() - started, 3)})
             raise
+        self._log_timing(started, prompt, response)
+        return response
     
     def call_with_retry(self, prompt: str, input_data: Any = None, max_retries: int = 3) -> str:
         """
@@ -85,16 +97,51 @@ class LLMClient:
         Returns:
             模型响应文本
         """
+        started = time.monotonic()
         try:
-            return self.llm_manager.call_with_retry(
+            response = self.llm_manager.call_with_retry(
                 self._with_language_guard(prompt),
                 input_data,
                 max_retries
             )
         except Exception as e:
-            logger.error(f"LLM重试调用失败: {str(e)}")
+            logger.error(f"LLM重试调用失败: {str(e)}",
+                         extra={"event": "llm_call", "duration": round(time.monotonic() - started, 3)})
             raise
+        self._log_timing(started, prompt, response)
+        return response
     
+    def _log_timing(self, started: float, prompt: str, response: str):
+        """记录LLM调用耗时（写入项目日志，用于排查慢项目）"""
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"LLM调用完成: {elapsed:.2f}秒",
+            extra={
+                "event": "llm_call",
+                "duration": round(elapsed, 3),
+                "model": self.model,
+                "prompt_chars": len(prompt),
+                "response_chars": len(response or ""),
+            }
+        )
+
+    def get_input_token_budget(self, prompt: str, fill_ratio: float,
+                               default_context_window: int = 8192) -> int:
+        """
+        计算在给定提示词下，单次调用还能容纳的输入token数
+
+        Args:
+            prompt: 提示词（不含语言约束，内部会自动追加）
+            fill_ratio: 输入占上下文窗口的比例
+            default_context_window: 无法识别模型时的上下文窗口大小
+
+        Returns:
+            可用于输入内容的token数
+        """
+        context_window = self.llm_manager.get_model_context_window(default=default_context_window)
+        prompt_tokens = estimate_tokens(self._with_language_guard(prompt))
+        return int(context_window * fill_ratio) - prompt_tokens
+
     def _preprocess_llm_response(self, response: str) -> str:
         """
         预处理LLM响应，移除常见的非JSON内容
@@ -280,9 +327,11 @@ class LLMClient:
                         with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
                             f.write(response)
                             logger.error(f"原始响应已保存到 {f.name} 以便调试")
+                        record_parse_failure()
                         raise ValueError(f"无法从响应中解析出有效的JSON: {response[:200]}...") from final_e
             
             # 如果连通用正则都找不到，就彻底失败
+            record_parse_failure()
             raise ValueError(f"无法从响应中解析出有效的JSON: {response[:200]}...")
     
     def get_current_provider_info(self) -> Dict[str, Any]:
@@ -0,0 +1,56 @@
+"""
+提示词加载工具 - 进程内缓存提示词文件内容
+文件修改后（mtime变化）会自动重新读取
+"""
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_prompt_cache: Dict[str, Tuple[float, str]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_prompt(prompt_path: Union[str, Path]) -> str:
+    """
+    读取提示词文件，命中缓存时不再读盘
+
+    Args:
+        prompt_path: 提示词文件路径
+
+    Returns:
+        提示词内容
+    """
+    path = Path(prompt_path)
+    key = str(path)
+    mtime = path.stat().st_mtime
+
+    cached = _prompt_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    with _cache_lock:
+        _prompt_cache[key] = (mtime, content)
+    return content
+
+
+def preload_prompts(prompt_paths: Iterable[Union[str, Path]]) -> int:
+    """
+    预加载一批提示词文件
+
+    Returns:
+        成功加载的文件数
+    """
+    loaded = 0
+    for prompt_path in prompt_paths:
+        try:
+            load_prompt(prompt_path)
+            loaded += 1
+        except OSError as e:
+            logger.warning(f"预加载提示词失败 {prompt_path}: {e}")
+    return loaded
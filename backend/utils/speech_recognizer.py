@@ -311,10 +311,9 @@ class SpeechRecognizer:
             提取的音频文件路径
         """
         try:
-            # 检查ffmpeg是否可用
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
+            # 检查ffmpeg是否可用（进程内只检测一次）
+            from ..core.worker_state import is_ffmpeg_available
+            if not is_ffmpeg_available():
                 raise SpeechRecognitionError("ffmpeg不可用，请安装ffmpeg")
             
             # 生成音频文件路径
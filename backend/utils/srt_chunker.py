@@ -0,0 +1,175 @@
+"""
+SRT分块引擎 - 在预先计算的起止时间数组上选择分块边界
+
+字幕的起止时间只解析一次为毫秒数组，相邻字幕的停顿是一个向量化的差值数组；
+切分窗口用 bisect 在有序数组上定位，块内容是原列表的切片，不复制字幕条目。
+相邻块之间可以保留重叠窗口，跨越边界的话题在后一块中也能看到开头。
+"""
+import logging
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .srt_time import parse_time_array
+
+logger = logging.getLogger(__name__)
+
+Boundary = Tuple[int, int]
+
+
+class SrtChunker:
+    """按时间或token预算切分字幕"""
+
+    def __init__(self, srt_data: List[Dict], pause_threshold_ms: int = 1000):
+        """
+        Args:
+            srt_data: TextProcessor.parse_srt 格式的字幕条目
+            pause_threshold_ms: 识别为停顿的最小毫秒数
+        """
+        self.srt_data = srt_data
+        self.texts = [sub['text'] for sub in srt_data]
+        self.start_ms = parse_time_array([sub['start_time'] for sub in srt_data])
+        self.end_ms = parse_time_array([sub['end_time'] for sub in srt_data])
+        # gap_ms[i] 是第i条结束到第i+1条开始的停顿
+        self.gap_ms = self.start_ms[1:] - self.end_ms[:-1]
+        # 可以切分的位置（停顿之后的条目下标），升序
+        self.pause_cuts = (np.flatnonzero(self.gap_ms >= pause_threshold_ms) + 1).tolist()
+        # 起止时间的累计最大值单调不减，可直接用于二分查找（字幕偶有乱序时也成立）
+        self._search_starts = np.maximum.accumulate(self.start_ms).tolist() if len(self) else []
+        self._search_ends = np.maximum.accumulate(self.end_ms).tolist() if len(self) else []
+
+    def __len__(self) -> int:
+        return len(self.srt_data)
+
+    def _first_pause_cut(self, lo: int, hi: int) -> Optional[int]:
+        """[lo, hi] 范围内第一个停顿切分点"""
+        position = bisect_left(self.pause_cuts, lo)
+        if position < len(self.pause_cuts) and self.pause_cuts[position] <= hi:
+            return self.pause_cuts[position]
+        return None
+
+    def _last_pause_cut(self, lo: int, hi: int) -> Optional[int]:
+        """[lo, hi] 范围内最后一个停顿切分点"""
+        position = bisect_right(self.pause_cuts, hi) - 1
+        if position >= 0 and self.pause_cuts[position] >= lo:
+            return self.pause_cuts[position]
+        return None
+
+    def time_boundaries(self, interval_seconds: float) -> List[Boundary]:
+        """
+        按目标时长切分：在目标时长的90%~110%窗口内寻找第一个停顿，找不到时在目标时间处强制切分
+
+        Returns:
+            [(开始下标, 结束下标), ...]
+        """
+        total = len(self)
+        interval_ms = interval_seconds * 1000
+        boundaries = []
+        chunk_start = 0
+        last_cut_ms = 0
+
+        while chunk_start < total:
+            target_ms = last_cut_ms + interval_ms
+            # 窗口相对上一个切分点计算，长视频后段的块不会越切越短
+            lo = bisect_left(self._search_starts, last_cut_ms + interval_ms * 0.9, chunk_start)
+            hi = bisect_right(self._search_starts, last_cut_ms + interval_ms * 1.1, lo)
+            cut = self._first_pause_cut(lo + 1, min(hi, total - 1))
+            if cut is None:
+                cut = bisect_left(self._search_starts, target_ms, chunk_start)
+            if cut <= chunk_start:
+                # 切分点无效时，剩余部分作为一个块
+                cut = total
+
+            boundaries.append((chunk_start, cut))
+            last_cut_ms = int(self.end_ms[cut - 1])
+            chunk_start = cut
+        return boundaries
+
+    def token_boundaries(self, entry_tokens: Sequence[int], max_tokens: int, min_tokens: int = 0,
+                         max_seconds: Optional[float] = None,
+                         min_seconds: Optional[float] = None) -> List[Boundary]:
+        """
+        按token预算切分：贪心填满预算后，在块的后20%范围内从后向前寻找停顿
+
+        Args:
+            entry_tokens: 每条字幕的token数（均为正数）
+            max_tokens: 每个块的目标token上限
+            min_tokens: 尾块小于该token数时并入前一块
+            max_seconds: 每个块的最长时间（秒），None表示不限制
+            min_seconds: 每个块的最短时间（秒），只在token预算允许的范围内生效，块不会因此超出max_tokens
+
+        Returns:
+            [(开始下标, 结束下标), ...]
+        """
+        total = len(self)
+        cumulative = [0, *accumulate(entry_tokens)]
+        boundaries = []
+        chunk_start = 0
+
+        while chunk_start < total:
+            # 1. 贪心累加直到达到token预算或时长上限（至少包含一条）
+            hard_end = bisect_right(cumulative, cumulative[chunk_start] + max_tokens) - 1
+            min_end = chunk_start + 1
+            if min_seconds:
+                # 第一条结束时间达到最短时长的字幕也包含在块内，但不超过token预算
+                min_ms = self.start_ms[chunk_start] + min_seconds * 1000
+                min_end = min(bisect_left(self._search_ends, min_ms, chunk_start) + 1, max(hard_end, min_end))
+            if max_seconds:
+                limit_ms = self.start_ms[chunk_start] + max_seconds * 1000
+                hard_end = min(hard_end, bisect_right(self._search_ends, limit_ms, chunk_start + 1))
+            hard_end = min(max(hard_end, chunk_start + 1), total)
+
+            if hard_end >= total:
+                boundaries.append((chunk_start, total))
+                break
+
+            # 2. 在块的后20%（按token）范围内选择最靠后的停顿；
+            #    找不到达到阈值的停顿时，选择窗口内最长的停顿
+            used_tokens = cumulative[hard_end] - cumulative[chunk_start]
+            lo = max(bisect_left(cumulative, cumulative[hard_end] - used_tokens * 0.2), min(min_end, hard_end))
+            cut = self._last_pause_cut(lo, hard_end)
+            if cut is None:
+                window = self.gap_ms[lo - 1:hard_end][::-1]
+                longest = int(np.argmax(window))
+                cut = hard_end - longest if window[longest] > -1000 else hard_end
+
+            boundaries.append((chunk_start, cut))
+            chunk_start = cut
+
+        # 3. 过小的尾块并入前一块，避免浪费一次LLM调用
+        if len(boundaries) > 1 and min_tokens > 0:
+            last_start, last_end = boundaries[-1]
+            if cumulative[last_end] - cumulative[last_start] < min_tokens:
+                boundaries[-2:] = [(boundaries[-2][0], last_end)]
+        return boundaries
+
+    def build_chunks(self, boundaries: List[Boundary], overlap_seconds: float = 0) -> List[Dict]:
+        """
+        根据边界构造块结构
+
+        Args:
+            boundaries: [(开始下标, 结束下标), ...]
+            overlap_seconds: 每个块向前包含上一块末尾这段时长内的字幕
+
+        Returns:
+            块列表；overlap_entries 为开头重复自上一块的条目数
+        """
+        chunks = []
+        previous_start = 0
+        for chunk_index, (start, end) in enumerate(boundaries):
+            first = start
+            if overlap_seconds > 0 and chunk_index > 0:
+                first = bisect_left(self._search_starts, self.start_ms[start] - overlap_seconds * 1000,
+                                    previous_start, start)
+            chunks.append({
+                "chunk_index": chunk_index,
+                "text": " ".join(self.texts[first:end]),
+                "start_time": self.srt_data[first]['start_time'],
+                "end_time": self.srt_data[end - 1]['end_time'],
+                "srt_entries": self.srt_data[first:end],
+                "overlap_entries": start - first,
+            })
+            previous_start = start
+        return chunks
@@ -0,0 +1,214 @@
+"""
+SRT时间工具 - 统一的时间字符串解析/格式化与向量化SRT解析
+
+项目各处都要在 "HH:MM:SS,mmm" / "HH:MM:SS.mmm" 与秒数之间转换，且同一批时间字符串
+（块边界、话题起止时间）会被反复解析，因此字符串 -> 毫秒的转换做了缓存。
+
+parse_srt_text 用一次正则扫描取出整份字幕的序号、时间和文本，定宽时间字符串按字节
+批量转换为 NumPy int64 毫秒数组，不再逐条创建pysrt对象再转回字符串。
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+_TIME_RE = re.compile(r'^\s*(\d+):(\d{1,2}):(\d{1,2})(?:[,.](\d+))?\s*$')
+
+# 一个字幕块：序号行、时间行（允许带坐标等附加内容）、直到空行为止的文本行
+_BLOCK_RE = re.compile(
+    r'^[ \t]*(\d+)[ \t]*\n'
+    r'[ \t]*(\d+:\d{1,2}:\d{1,2}[,.]\d{1,3})[ \t]*-->[ \t]*'
+    r'(\d+:\d{1,2}:\d{1,2}[,.]\d{1,3})[^\n]*(?:\n|$)'
+    r'((?:[^\n]*\S[^\n]*(?:\n|$))*)',
+    re.MULTILINE
+)
+
+# 字符串 -> 毫秒缓存的条目数，足够容纳一个长项目的全部字幕时间
+TIME_CACHE_SIZE = 1 << 17
+
+
+@lru_cache(maxsize=TIME_CACHE_SIZE)
+def time_to_ms(time_str: str) -> int:
+    """
+    时间字符串转为毫秒（带缓存）
+
+    Args:
+        time_str: "HH:MM:SS,mmm"、"HH:MM:SS.mmm" 或 "HH:MM:SS"
+
+    Returns:
+        毫秒数
+
+    Raises:
+        ValueError: 格式无效
+    """
+    match = _TIME_RE.match(time_str)
+    if not match:
+        raise ValueError(f"无效的时间格式: {time_str}")
+    hours, minutes, seconds, millis = match.groups()
+    total = (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000
+    if millis:
+        total += int(millis[:3].ljust(3, '0'))
+    return total
+
+
+def time_to_seconds(time_str: str) -> float:
+    """时间字符串转为秒数，格式无效时抛出ValueError"""
+    return time_to_ms(time_str) / 1000.0
+
+
+def ms_to_time(ms: int, separator: str = ',') -> str:
+    """
+    毫秒转为 HH:MM:SS,mmm
+
+    Args:
+        ms: 毫秒数（负数按0处理）
+        separator: 秒与毫秒之间的分隔符，FFmpeg格式用 '.'
+    """
+    hours, rest = divmod(max(int(ms), 0), 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+
+def seconds_to_time(seconds: float, separator: str = ',') -> str:
+    """秒数转为 HH:MM:SS,mmm（按毫秒四舍五入）"""
+    return ms_to_time(int(round(max(seconds, 0.0) * 1000)), separator)
+
+
+def clear_time_cache():
+    time_to_ms.cache_clear()
+
+
+# 定宽 "HH:MM:SS,mmm" 中各数字字符的位置和权重（毫秒）
+_FIXED_WIDTH = 12
+_DIGIT_WEIGHTS = {
+    0: 36_000_000, 1: 3_600_000, 3: 600_000, 4: 60_000, 6: 10_000, 7: 1_000, 9: 100, 10: 10, 11: 1,
+}
+
+
+def parse_time_array(values: Sequence[str]) -> np.ndarray:
+    """
+    批量将时间字符串转为int64毫秒数组
+
+    全部为定宽 HH:MM:SS,mmm（或 .mmm）时按字节批量计算，否则逐个解析（带缓存）。
+
+    Raises:
+        ValueError: 存在无效的时间字符串
+    """
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    if all(len(value) == _FIXED_WIDTH for value in values):
+        try:
+            chars = np.frombuffer(''.join(values).encode('ascii'), dtype=np.uint8).reshape(-1, _FIXED_WIDTH)
+        except UnicodeEncodeError:
+            chars = None
+        if chars is not None:
+            digits = chars[:, list(_DIGIT_WEIGHTS)]
+            if ((chars[:, 2] == ord(':')) & (chars[:, 5] == ord(':')) & np.isin(chars[:, 8], (ord(','), ord('.')))
+                    & (digits >= ord('0')).all(axis=1) & (digits <= ord('9')).all(axis=1)).all():
+                weights = np.array(list(_DIGIT_WEIGHTS.values()), dtype=np.int64)
+                return (digits.astype(np.int64) - ord('0')) @ weights
+    return np.fromiter((time_to_ms(value) for value in values), dtype=np.int64, count=len(values))
+
+
+def format_time_array(ms: np.ndarray, separator: str = ',') -> List[str]:
+    """
+    批量将毫秒数组格式化为 HH:MM:SS,mmm
+
+    Args:
+        ms: 毫秒数组（负数按0处理）
+        separator: 秒与毫秒之间的分隔符
+    """
+    ms = np.maximum(np.asarray(ms, dtype=np.int64), 0)
+    if len(ms) == 0:
+        return []
+    if ms.max() >= 100 * 3_600_000:
+        # 超过99小时无法定宽表示
+        return [ms_to_time(value, separator) for value in ms.tolist()]
+
+    hours, rest = np.divmod(ms, 3_600_000)
+    minutes, rest = np.divmod(rest, 60_000)
+    seconds, millis = np.divmod(rest, 1000)
+    chars = np.empty((len(ms), _FIXED_WIDTH), dtype=np.uint8)
+    for position, column in ((0, hours // 10), (1, hours % 10), (3, minutes // 10), (4, minutes % 10),
+                             (6, seconds // 10), (7, seconds % 10), (9, millis // 100),
+                             (10, millis // 10 % 10), (11, millis % 10)):
+        chars[:, position] = column + ord('0')
+    chars[:, 2] = chars[:, 5] = ord(':')
+    chars[:, 8] = ord(separator)
+    text = chars.tobytes().decode('ascii')
+    return [text[i:i + _FIXED_WIDTH] for i in range(0, len(text), _FIXED_WIDTH)]
+
+
+@dataclass
+class SrtArrays:
+    """按列保存的SRT字幕：时间为int64毫秒数组"""
+    index: np.ndarray
+    start_ms: np.ndarray
+    end_ms: np.ndarray
+    texts: List[str]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def start_seconds(self) -> np.ndarray:
+        return self.start_ms / 1000.0
+
+    @property
+    def end_seconds(self) -> np.ndarray:
+        return self.end_ms / 1000.0
+
+    def to_entries(self) -> List[Dict]:
+        """
+        转为 TextProcessor.parse_srt 的条目格式
+
+        Returns:
+            [{'start_time': 'HH:MM:SS,mmm', 'end_time': ..., 'text': ..., 'index': ...}, ...]
+        """
+        return [
+            {'start_time': start, 'end_time': end, 'text': text, 'index': index}
+            for start, end, text, index in zip(
+                format_time_array(self.start_ms), format_time_array(self.end_ms), self.texts, self.index.tolist()
+            )
+        ]
+
+
+def parse_srt_text(text: str) -> SrtArrays:
+    """
+    一次正则扫描解析SRT文本
+
+    Args:
+        text: SRT文件内容
+
+    Returns:
+        SrtArrays，文本为去除首尾空白后的多行字符串
+    """
+    text = text.lstrip('\ufeff').replace('\r\n', '\n').replace('\r', '\n')
+    matches = _BLOCK_RE.findall(text)
+    if not matches:
+        empty = np.empty(0, dtype=np.int64)
+        return SrtArrays(index=empty, start_ms=empty.copy(), end_ms=empty.copy(), texts=[])
+
+    indexes, starts, ends, blocks = zip(*matches)
+    return SrtArrays(
+        index=np.fromiter(map(int, indexes), dtype=np.int64, count=len(indexes)),
+        start_ms=parse_time_array(starts),
+        end_ms=parse_time_array(ends),
+        texts=[block.strip() for block in blocks],
+    )
+
+
+def parse_srt_file(srt_path: Union[str, Path]) -> SrtArrays:
+    """
+    读取并解析SRT文件（UTF-8，兼容BOM）
+
+    Raises:
+        OSError: 文件无法读取
+        UnicodeDecodeError: 文件不是UTF-8编码
+    """
+    with open(srt_path, 'r', encoding='utf-8-sig') as f:
+        return parse_srt_text(f.read())
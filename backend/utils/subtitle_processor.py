@@ -1,13 +1,65 @@
 import logging
 import re
-import uuid
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import pysrt
 from pysrt import SubRipItem, SubRipTime
 
+from .srt_time import seconds_to_time
+from .transcript_store import TranscriptStore, make_segment_id, make_word_id, source_signature
+
 logger = logging.getLogger(__name__)
 
+class SubtitleIndex:
+    """字幕段集合及其索引：ID -> 字幕段的哈希索引，以及按开始时间排序的索引"""
+    
+    def __init__(self, segments: List[Dict]):
+        self.segments = list(segments)
+        self._by_id = {seg['id']: seg for seg in self.segments}
+        self._time_order = sorted(self.segments, key=lambda seg: (seg['startTime'], seg['endTime']))
+    
+    @classmethod
+    def of(cls, data) -> 'SubtitleIndex':
+        """已是索引时直接返回，否则为字幕段列表建立索引"""
+        return data if isinstance(data, cls) else cls(data)
+    
+    def __len__(self) -> int:
+        return len(self.segments)
+    
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.segments)
+    
+    def __contains__(self, segment_id: str) -> bool:
+        return segment_id in self._by_id
+    
+    def get(self, segment_id: str) -> Optional[Dict]:
+        return self._by_id.get(segment_id)
+    
+    def resolve(self, segment_ids: Iterable[str]) -> List[Dict]:
+        """按给定顺序返回存在的字幕段（忽略未知和重复的ID）"""
+        seen = set()
+        resolved = []
+        for segment_id in segment_ids:
+            segment = self._by_id.get(segment_id)
+            if segment is not None and segment_id not in seen:
+                seen.add(segment_id)
+                resolved.append(segment)
+        return resolved
+    
+    def in_time_order(self) -> List[Dict]:
+        """按开始时间排序的字幕段"""
+        return self._time_order
+    
+    def span(self) -> float:
+        """第一个字幕段开始到最后一个字幕段结束的时长"""
+        if not self.segments:
+            return 0.0
+        return max(seg['endTime'] for seg in self.segments) - self._time_order[0]['startTime']
+    
+    def duration_of(self, segment_ids: Iterable[str]) -> float:
+        """指定字幕段的总时长"""
+        return sum(seg['endTime'] - seg['startTime'] for seg in self.resolve(segment_ids))
+
 class SubtitleProcessor:
     """字幕处理器 - 支持字粒度的字幕解析和处理"""
     
@@ -15,22 +67,75 @@ class SubtitleProcessor:
         # 修复正则表达式中的无效转义序列，使用原始字符串
         self.word_separators = r'[，。！？；：""''（）【】、\s]+'
     
-    def parse_srt_to_word_level(self, srt_path: Path) -> List[Dict]:
+    def parse_srt_to_word_level(self, srt_path: Path, store_dir: Optional[Path] = None,
+                                start: Optional[float] = None, end: Optional[float] = None) -> List[Dict]:
         """
-        将SRT字幕解析为字粒度的数据结构
+        将SRT字幕解析为字粒度的数据结构（通过持久化的转写存储读取）
         
         Args:
             srt_path: SRT文件路径
+            store_dir: 转写存储目录，为None时只在内存中解析，不写入任何文件
+            start: 只返回完全落在该时间（秒）之后的字幕段
+            end: 只返回完全落在该时间（秒）之前的字幕段
             
         Returns:
             字粒度字幕数据列表
         """
+        transcript = self.load_transcript(srt_path, store_dir)
+        if transcript is None:
+            return []
+        return transcript.segments(start, end)
+    
+    def load_transcript(self, srt_path: Path, store_dir: Optional[Path] = None) -> Optional[TranscriptStore]:
+        """
+        打开SRT对应的转写存储，不存在或SRT已修改时重新解析并写入
+        
+        Args:
+            srt_path: SRT文件路径
+            store_dir: 转写存储目录，为None时只在内存中解析，不写入任何文件
+            
+        Returns:
+            转写存储（指定store_dir时为内存映射），SRT不存在或解析失败时返回None
+        """
         if not srt_path.exists():
             logger.error(f"SRT文件不存在: {srt_path}")
-            return []
+            return None
+        
+        if store_dir is None:
+            word_level_data = self._parse_srt_file(srt_path)
+            return TranscriptStore.from_segments(word_level_data) if word_level_data is not None else None
         
+        source = source_signature(srt_path)
+        transcript = TranscriptStore.load(store_dir, source)
+        if transcript is not None:
+            return transcript
+        
+        word_level_data = self._parse_srt_file(srt_path)
+        if word_level_data is None:
+            return None
         try:
-            subs = pysrt.open(str(srt_path), encoding='utf-8')
+            TranscriptStore.from_segments(word_level_data).save(store_dir, source)
+            logger.info(f"转写存储已写入: {store_dir}")
+            return TranscriptStore.load(store_dir, source)
+        except OSError as e:
+            logger.warning(f"写入转写存储失败，使用内存数据: {e}")
+            return TranscriptStore.from_segments(word_level_data)
+    
+    def _parse_srt_file(self, srt_path: Path) -> Optional[List[Dict]]:
+        """
+        用pysrt完整解析SRT文件
+        
+        Args:
+            srt_path: SRT文件路径
+            
+        Returns:
+            字粒度字幕数据列表，解析失败时返回None
+        """
+        try:
+            try:
+                subs = pysrt.open(str(srt_path), encoding='utf-8')
+            except UnicodeDecodeError:
+                subs = pysrt.open(str(srt_path), encoding='utf-8-sig')
             word_level_data = []
             
             for sub in subs:
@@ -42,7 +147,7 @@ class SubtitleProcessor:
             
         except Exception as e:
             logger.error(f"解析SRT文件失败: {e}")
-            return []
+            return None
     
     def _process_subtitle_segment(self, sub: SubRipItem) -> Dict:
         """
@@ -58,11 +163,14 @@ class SubtitleProcessor:
         start_seconds = self._srt_time_to_seconds(sub.start)
         end_seconds = self._srt_time_to_seconds(sub.end)
         
+        # ID由序号和开始时间确定，重复解析结果一致
+        segment_id = make_segment_id(sub.index, sub.start.ordinal)
+        
         # 分解文本为单词
-        words = self._split_text_to_words(sub.text, start_seconds, end_seconds)
+        words = self._split_text_to_words(sub.text, start_seconds, end_seconds, segment_id)
         
         return {
-            'id': str(uuid.uuid4()),
+            'id': segment_id,
             'startTime': start_seconds,
             'endTime': end_seconds,
             'text': sub.text.strip(),
@@ -70,7 +178,8 @@ class SubtitleProcessor:
             'index': sub.index
         }
     
-    def _split_text_to_words(self, text: str, start_time: float, end_time: float) -> List[Dict]:
+    def _split_text_to_words(self, text: str, start_time: float, end_time: float,
+                             segment_id: str = "") -> List[Dict]:
         """
         将文本分解为单词，并分配时间戳
         
@@ -78,6 +187,7 @@ class SubtitleProcessor:
             text: 字幕文本
             start_time: 开始时间（秒）
             end_time: 结束时间（秒）
+            segment_id: 所属字幕段ID，用于生成单词ID
             
         Returns:
             单词列表，每个单词包含时间戳
@@ -107,7 +217,7 @@ class SubtitleProcessor:
             word_end = word_start + word_duration
             
             words.append({
-                'id': str(uuid.uuid4()),
+                'id': make_word_id(segment_id, i),
                 'text': word_text,
                 'startTime': word_start,
                 'endTime': word_end
@@ -164,29 +274,27 @@ class SubtitleProcessor:
         
         Args:
             deleted_segments: 要删除的字幕段ID列表
-            original_data: 原始字幕数据
+            original_data: 原始字幕数据（列表或SubtitleIndex）
             
         Returns:
             编辑操作列表
         """
         operations = []
         
-        for segment_id in deleted_segments:
-            segment = next((s for s in original_data if s['id'] == segment_id), None)
-            if segment:
-                operation = {
-                    'type': 'delete',
-                    'segmentIds': [segment_id],
-                    'timestamp': segment['startTime'],
-                    'metadata': {
-                        'originalText': segment['text'],
-                        'timeRange': {
-                            'start': segment['startTime'],
-                            'end': segment['endTime']
-                        }
+        for segment in SubtitleIndex.of(original_data).resolve(deleted_segments):
+            operation = {
+                'type': 'delete',
+                'segmentIds': [segment['id']],
+                'timestamp': segment['startTime'],
+                'metadata': {
+                    'originalText': segment['text'],
+                    'timeRange': {
+                        'start': segment['startTime'],
+                        'end': segment['endTime']
                     }
                 }
-                operations.append(operation)
+            }
+            operations.append(operation)
         
         return operations
     
@@ -196,7 +304,7 @@ class SubtitleProcessor:
         生成编辑后的视频时间轴
         
         Args:
-            original_data: 原始字幕数据
+            original_data: 原始字幕数据（列表或SubtitleIndex）
             deleted_segments: 要删除的字幕段ID列表
             
         Returns:
@@ -205,7 +313,8 @@ class SubtitleProcessor:
         deleted_ids = set(deleted_segments)
         timeline = []
         
-        for segment in original_data:
+        # 按时间顺序遍历，保证相邻区间合并正确
+        for segment in SubtitleIndex.of(original_data).in_time_order():
             if segment['id'] not in deleted_ids:
                 timeline.append((segment['startTime'], segment['endTime']))
         
@@ -278,12 +387,7 @@ class SubtitleProcessor:
         Returns:
             SRT时间格式字符串
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds % 1) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+        return seconds_to_time(seconds)
     
     def get_subtitle_statistics(self, data: List[Dict]) -> Dict:
         """
@@ -303,7 +407,7 @@ class SubtitleProcessor:
                 'averageWordsPerSegment': 0
             }
         
-        total_duration = max(seg['endTime'] for seg in data) - min(seg['startTime'] for seg in data)
+        total_duration = SubtitleIndex.of(data).span()
         word_count = sum(len(seg['words']) for seg in data)
         segment_count = len(data)
         
@@ -0,0 +1,161 @@
+"""
+本地文本聚类工具 - 哈希TF-IDF向量化 + 余弦相似度 + 平均链接层次聚类
+
+不依赖大模型，用于Step 5在本地完成切片分组，大模型只负责给每个分组命名。
+"""
+import logging
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'[0-9a-z]+|[\u3400-\u4dbf\u4e00-\u9fff]+')
+
+# 常见的西语/英语停用词，聚类时不作为特征
+_STOPWORDS = frozenset("""
+a al algo como con cual cuando de del desde donde el ella ellos en entre era es esa ese eso esta
+este esto estos fue ha hay la las le les lo los mas me mi muy nada ni no nos o para pero poco por
+porque que se ser si sin sobre son su sus tambien te tiene todo tu un una uno unos y ya yo
+the and for with that this from are was were you your our not but have has how what why
+""".split())
+
+
+def normalize_text(text: str) -> str:
+    """小写化并去除重音符号"""
+    text = unicodedata.normalize('NFKD', (text or '').casefold())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分为聚类特征：拉丁文单词及相邻词对；中文按字符二元组切分
+    """
+    features = []
+    words = []
+    for token in _WORD_RE.findall(normalize_text(text)):
+        if token[0] >= '\u3400':
+            # 中文没有空格分隔，使用字符二元组
+            features.extend(token[i:i + 2] for i in range(max(len(token) - 1, 1)))
+        elif len(token) > 2 and token not in _STOPWORDS:
+            words.append(token)
+
+    features.extend(words)
+    features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return features
+
+
+class HashedTfidfVectorizer:
+    """特征哈希版TF-IDF，无需预先构建词表"""
+
+    def __init__(self, n_features: int = 2 ** 13):
+        self.n_features = n_features
+        self.idf: Optional[np.ndarray] = None
+        # 哈希桶 -> 原始词（用于给聚类生成关键词）
+        self.feature_terms: Dict[int, str] = {}
+
+    def _bucket(self, term: str) -> int:
+        return zlib.crc32(term.encode('utf-8')) % self.n_features
+
+    def fit_transform(self, documents: Sequence[str]) -> np.ndarray:
+        """
+        向量化文档集合
+
+        Returns:
+            形状为 (文档数, n_features) 的L2归一化矩阵
+        """
+        n_docs = len(documents)
+        matrix = np.zeros((n_docs, self.n_features), dtype=np.float32)
+        term_counts: Dict[int, Counter] = defaultdict(Counter)
+
+        for row, document in enumerate(documents):
+            for term in tokenize(document):
+                bucket = self._bucket(term)
+                matrix[row, bucket] += 1.0
+                term_counts[bucket][term] += 1
+
+        self.feature_terms = {bucket: counts.most_common(1)[0][0] for bucket, counts in term_counts.items()}
+
+        # 平滑IDF: log((1 + n) / (1 + df)) + 1
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        self.idf = (np.log((1.0 + n_docs) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+
+        # 次线性TF
+        np.log1p(matrix, out=matrix)
+        matrix *= self.idf
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def top_terms(self, vectors: np.ndarray, limit: int = 5) -> List[str]:
+        """返回一组向量质心中权重最高的词"""
+        if vectors.size == 0:
+            return []
+        centroid = vectors.mean(axis=0)
+        terms = []
+        for bucket in np.argsort(centroid)[::-1]:
+            if centroid[bucket] <= 0 or len(terms) >= limit:
+                break
+            term = self.feature_terms.get(int(bucket))
+            if term and term not in terms:
+                terms.append(term)
+        return terms
+
+
+def cosine_similarity_matrix(vectors: np.ndarray) -> np.ndarray:
+    """计算L2归一化向量的余弦相似度矩阵"""
+    return vectors @ vectors.T
+
+
+def agglomerative_cluster(similarity: np.ndarray, threshold: float,
+                          max_cluster_size: Optional[int] = None) -> List[List[int]]:
+    """
+    平均链接层次聚类
+
+    Args:
+        similarity: 相似度矩阵
+        threshold: 两个簇的平均相似度低于该值时停止合并
+        max_cluster_size: 簇的最大成员数
+
+    Returns:
+        簇列表，每个簇为原始下标列表（包含单元素簇）
+    """
+    n = similarity.shape[0]
+    if n == 0:
+        return []
+
+    sim = similarity.astype(np.float64, copy=True)
+    np.fill_diagonal(sim, -np.inf)
+    members: Dict[int, List[int]] = {i: [i] for i in range(n)}
+
+    while len(members) > 1:
+        flat_index = int(np.argmax(sim))
+        i, j = divmod(flat_index, n)
+        if sim[i, j] < threshold:
+            break
+
+        size_i, size_j = len(members[i]), len(members[j])
+        if max_cluster_size and size_i + size_j > max_cluster_size:
+            # 合并后超出上限，这对簇不再考虑
+            sim[i, j] = sim[j, i] = -np.inf
+            continue
+
+        # 平均链接：新簇与其他簇的相似度为按大小加权的平均值
+        merged_row = (sim[i] * size_i + sim[j] * size_j) / (size_i + size_j)
+        blocked = np.isneginf(sim[i]) | np.isneginf(sim[j])
+        merged_row[blocked] = -np.inf
+        sim[i, :] = merged_row
+        sim[:, i] = merged_row
+        sim[i, i] = -np.inf
+        sim[j, :] = -np.inf
+        sim[:, j] = -np.inf
+
+        members[i].extend(members.pop(j))
+
+    return [sorted(indices) for indices in members.values()]
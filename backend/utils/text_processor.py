@@ -10,6 +10,9 @@ from pathlib import Path
 # 修复导入问题
 try:
     from ..core.shared_config import CHUNK_SIZE
+    from .token_estimator import estimate_tokens
+    from . import srt_time
+    from .srt_chunker import SrtChunker
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     import sys
@@ -18,6 +21,9 @@ except ImportError:
     if str(backend_path) not in sys.path:
         sys.path.insert(0, str(backend_path))
     from core.shared_config import CHUNK_SIZE
+    from utils.token_estimator import estimate_tokens
+    from utils import srt_time
+    from utils.srt_chunker import SrtChunker
 
 import pysrt
 
@@ -78,7 +84,8 @@ class TextProcessor:
         
         return chunks
     
-    def chunk_srt_data(self, srt_data: List[Dict], interval_minutes: int = 30, pause_threshold_ms: int = 1000) -> List[Dict]:
+    def chunk_srt_data(self, srt_data: List[Dict], interval_minutes: int = 30, pause_threshold_ms: int = 1000,
+                       overlap_seconds: float = 0) -> List[Dict]:
         """
         根据停顿时间，将SRT数据切分为大约相等时间长度的块。
         这可以避免在对话中间断开。
@@ -87,95 +94,55 @@ class TextProcessor:
             srt_data: SRT数据列表
             interval_minutes: 每个块的目标时间长度（分钟）
             pause_threshold_ms: 识别为停顿的最小毫秒数
+            overlap_seconds: 相邻块的重叠时长（秒），每个块向前包含上一块末尾的字幕
 
         Returns:
-            结构化的块列表，其中的 srt_entries 不包含临时处理字段。
+            结构化的块列表，srt_entries 是原列表的切片（与输入共享条目）
         """
         if not srt_data:
             return []
 
-        # 创建一个带有秒数的新列表，而不是修改原始数据
-        srt_data_with_seconds = []
-        for sub in srt_data:
-            entry = sub.copy()
-            entry['start_seconds'] = self.time_to_seconds(sub['start_time'])
-            entry['end_seconds'] = self.time_to_seconds(sub['end_time'])
-            srt_data_with_seconds.append(entry)
+        chunker = SrtChunker(srt_data, pause_threshold_ms)
+        return chunker.build_chunks(chunker.time_boundaries(interval_minutes * 60), overlap_seconds)
 
-        interval_seconds = interval_minutes * 60
-        chunks = []
-        current_chunk_start_index = 0
-        chunk_index = 0
-        
-        last_cut_time = 0
-        
-        while current_chunk_start_index < len(srt_data_with_seconds):
-            target_cut_time = last_cut_time + interval_seconds
-            
-            # 寻找接近目标时间的最佳切分点
-            best_cut_index = -1
-            
-            # 查找从当前块开始后的 90% 到 110% 目标时间内的一个停顿
-            search_start_index = current_chunk_start_index
-            while search_start_index < len(srt_data_with_seconds) and srt_data_with_seconds[search_start_index]['start_seconds'] < target_cut_time * 0.9:
-                search_start_index += 1
+    def chunk_srt_data_by_tokens(self, srt_data: List[Dict], max_tokens: int,
+                                 pause_threshold_ms: int = 1000,
+                                 min_tokens: int = 0,
+                                 max_interval_minutes: Optional[float] = None,
+                                 overlap_seconds: float = 0,
+                                 min_interval_minutes: Optional[float] = None) -> List[Dict]:
+        """
+        按token预算将SRT数据切分为块，并尽量在停顿处切分。
+        语速快的内容会得到较短的块，稀疏的内容会得到较长的块。
 
-            # 从搜索起点开始寻找超过阈值的停顿
-            for i in range(search_start_index, len(srt_data_with_seconds) - 1):
-                current_sub = srt_data_with_seconds[i]
-                next_sub = srt_data_with_seconds[i+1]
-                
-                # 如果我们已经超出了目标时间的110%，就停止搜索
-                if current_sub['start_seconds'] > target_cut_time * 1.1:
-                    break
-                
-                # 计算两个字幕条目之间的停顿时间
-                pause = next_sub['start_seconds'] - current_sub['end_seconds']
-                if pause * 1000 >= pause_threshold_ms:
-                    best_cut_index = i + 1  # 在停顿后切分
-                    break
-            
-            # 如果没有找到合适的停顿点，就在目标时间点强制切分
-            if best_cut_index == -1:
-                # 寻找最接近目标时间的字幕条目
-                i = current_chunk_start_index
-                while i < len(srt_data_with_seconds) and srt_data_with_seconds[i]['start_seconds'] < target_cut_time:
-                    i += 1
-                best_cut_index = i if i < len(srt_data_with_seconds) else len(srt_data_with_seconds)
+        Args:
+            srt_data: SRT数据列表
+            max_tokens: 每个块的目标token上限
+            pause_threshold_ms: 识别为停顿的最小毫秒数
+            min_tokens: 尾块小于该token数时并入前一块
+            max_interval_minutes: 每个块的最长时间（分钟），None表示不限制
+            min_interval_minutes: 每个块的最短时间（分钟），只在不超出token预算时生效；None表示不限制
+            overlap_seconds: 相邻块的重叠时长（秒），重叠部分不计入token预算
 
-            # 如果切分点无效或过小，则将所有剩余部分作为一个块
-            if best_cut_index <= current_chunk_start_index:
-                 best_cut_index = len(srt_data_with_seconds)
+        Returns:
+            与 chunk_srt_data 结构相同的块列表
+        """
+        if not srt_data:
+            return []
 
-            # 创建块
-            chunk_entries_with_seconds = srt_data_with_seconds[current_chunk_start_index:best_cut_index]
-            if not chunk_entries_with_seconds:
-                break
+        max_tokens = max(int(max_tokens), 1)
+        max_seconds = max_interval_minutes * 60 if max_interval_minutes else None
+        min_seconds = min_interval_minutes * 60 if min_interval_minutes else None
+        # 每条字幕在块文本中以空格拼接，额外计1个token
+        entry_tokens = [estimate_tokens(sub['text']) + 1 for sub in srt_data]
 
-            # 移除临时字段，得到干净的srt_entries
-            chunk_entries = []
-            for entry in chunk_entries_with_seconds:
-                clean_entry = entry.copy()
-                del clean_entry['start_seconds']
-                del clean_entry['end_seconds']
-                chunk_entries.append(clean_entry)
-            
-            start_time = chunk_entries[0]['start_time']
-            end_time = chunk_entries[-1]['end_time']
-            text = " ".join([entry['text'] for entry in chunk_entries])
-            
-            chunks.append({
-                "chunk_index": chunk_index,
-                "text": text,
-                "start_time": start_time,
-                "end_time": end_time,
-                "srt_entries": chunk_entries
-            })
-            
-            chunk_index += 1
-            last_cut_time = chunk_entries_with_seconds[-1]['end_seconds']
-            current_chunk_start_index = best_cut_index
-            
+        chunker = SrtChunker(srt_data, pause_threshold_ms)
+        boundaries = chunker.token_boundaries(entry_tokens, max_tokens, min_tokens, max_seconds, min_seconds)
+        chunks = chunker.build_chunks(boundaries, overlap_seconds)
+        logger.info(
+            f"按token预算({max_tokens})切分SRT，共{len(chunks)}个块，"
+            f"平均每块{sum(entry_tokens) // max(len(chunks), 1)}个token"
+        )
         return chunks
 
     @staticmethod
@@ -197,6 +164,17 @@ class TextProcessor:
             logger.warning(f"SRT文件为空: {srt_path}")
             return []
 
+        try:
+            subtitles = srt_time.parse_srt_file(srt_path).to_entries()
+            if subtitles:
+                return subtitles
+            logger.warning(f"快速解析未得到字幕条目，改用pysrt解析: {srt_path}")
+        except UnicodeDecodeError:
+            logger.warning(f"SRT文件不是UTF-8编码，改用pysrt解析: {srt_path}")
+        except OSError as e:
+            logger.error(f"读取SRT文件失败: {srt_path}, 错误: {e}")
+            return []
+
         try:
             try:
                 subs = pysrt.open(str(srt_path), encoding='utf-8')
@@ -265,18 +243,7 @@ class TextProcessor:
         Returns:
             秒数
         """
-        time_str = time_str.replace(',', '.')
-        parts = time_str.split(':')
-        
-        if len(parts) == 3:
-            h = int(parts[0])
-            m = int(parts[1])
-            s_parts = parts[2].split('.')
-            s = int(s_parts[0])
-            ms = int(s_parts[1]) if len(s_parts) > 1 else 0
-            return h * 3600 + m * 60 + s + ms / 1000.0
-        
-        raise ValueError(f"无效的时间格式: {time_str}")
+        return srt_time.time_to_seconds(time_str)
     
     @staticmethod
     def seconds_to_time(seconds: float) -> str:
@@ -0,0 +1,107 @@
+"""
+标题索引 - 将大模型返回的切片标题（或ID）解析为切片ID
+
+一次性构建索引：
+- 规范化精确映射：小写、去重音、去除空白和标点
+- 字符三元组倒排索引：精确匹配失败时做模糊匹配
+"""
+import logging
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_title(title: Any) -> str:
+    """
+    规范化标题：小写、去重音、仅保留字母数字和中文字符
+    """
+    text = unicodedata.normalize('NFKD', str(title or '').casefold())
+    return ''.join(
+        ch for ch in text
+        if not unicodedata.combining(ch) and unicodedata.category(ch)[0] in ('L', 'N')
+    )
+
+
+def _ngrams(text: str, n: int = 3) -> Set[str]:
+    """字符n元组集合，短文本整体作为一个元组"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class TitleIndex:
+    """切片标题索引"""
+
+    def __init__(self, clips: Iterable[Dict], min_similarity: float = 0.6, ngram_size: int = 3):
+        """
+        Args:
+            clips: 切片列表（需包含id，可选generated_title/outline）
+            min_similarity: 模糊匹配的最低Dice系数
+            ngram_size: 模糊匹配使用的字符n元组长度
+        """
+        self.min_similarity = min_similarity
+        self.ngram_size = ngram_size
+        self.ids: Set[str] = set()
+        self.exact: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, List[str]] = defaultdict(list)
+
+        for clip in clips:
+            clip_id = str(clip['id'])
+            self.ids.add(clip_id)
+            for field in ('generated_title', 'outline'):
+                key = normalize_title(clip.get(field))
+                if not key or key in self.exact:
+                    continue
+                self.exact[key] = clip_id
+                grams = _ngrams(key, ngram_size)
+                self._grams[key] = grams
+                for gram in grams:
+                    self._postings[gram].append(key)
+
+    def resolve(self, reference: Any) -> Optional[str]:
+        """
+        将标题或ID解析为切片ID
+
+        Args:
+            reference: 大模型返回的标题、切片ID或 {"id": ...}/{"title": ...}
+
+        Returns:
+            切片ID，无法解析时返回None
+        """
+        if isinstance(reference, dict):
+            reference = reference.get('id') or reference.get('clip_id') or reference.get('title')
+        if reference is None:
+            return None
+
+        raw = str(reference).strip()
+        if raw in self.ids:
+            return raw
+
+        key = normalize_title(raw)
+        if not key:
+            return None
+        if key in self.exact:
+            return self.exact[key]
+        return self._fuzzy_match(key)
+
+    def _fuzzy_match(self, key: str) -> Optional[str]:
+        """通过n元组倒排索引查找最相近的标题"""
+        grams = _ngrams(key, self.ngram_size)
+        shared = Counter()
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += 1
+
+        best_key, best_score = None, 0.0
+        for candidate, overlap in shared.items():
+            score = 2.0 * overlap / (len(grams) + len(self._grams[candidate]))
+            if score > best_score:
+                best_key, best_score = candidate, score
+
+        if best_key is not None and best_score >= self.min_similarity:
+            logger.debug(f"模糊匹配标题: {key} -> {best_key} ({best_score:.2f})")
+            return self.exact[best_key]
+        return None
@@ -0,0 +1,69 @@
+"""
+Token估算工具 - 按模型上下文窗口打包提示词
+优先使用tiktoken精确计数，未安装时退化为基于字符类别的启发式估算
+"""
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 中日韩字符：大多数分词器中约1个字符对应1个token
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+# 拉丁文单词（含西语重音字符）
+_WORD_RE = re.compile(r'[0-9A-Za-z\u00c0-\u024f]+')
+# 其余非空白字符（标点、符号等）
+_OTHER_RE = re.compile(
+    r'[^\s0-9A-Za-z\u00c0-\u024f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]'
+)
+
+# 启发式估算中平均每个token覆盖的拉丁字符数
+_CHARS_PER_WORD_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoder() -> Optional[Any]:
+    """获取tiktoken编码器（进程内只加载一次）"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.debug("未安装tiktoken，使用启发式token估算")
+        return None
+
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"加载tiktoken编码失败，使用启发式token估算: {e}")
+        return None
+
+
+def _heuristic_token_count(text: str) -> int:
+    """基于字符类别的token估算"""
+    cjk_tokens = len(_CJK_RE.findall(text))
+    word_tokens = sum(
+        max(1, math.ceil(len(word) / _CHARS_PER_WORD_TOKEN))
+        for word in _WORD_RE.findall(text)
+    )
+    other_tokens = len(_OTHER_RE.findall(text))
+    return cjk_tokens + word_tokens + other_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数量
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return _heuristic_token_count(text)
@@ -0,0 +1,254 @@
+"""
+字粒度转写存储 - 将SRT解析结果按列持久化为 .npy 文件
+
+每个项目解析一次SRT，字幕段和单词的起止时间、文本偏移分别保存为NumPy列（位于清单指向的 gen-<id> 子目录），
+文本按字幕段和单词分别拼接为UTF-8字节数组。之后的读取通过 np.load(mmap_mode='r') 映射，
+只在需要时物化指定时间范围内的字幕段。
+
+字幕段和单词的ID由序号和时间确定，多次解析得到相同的ID。
+"""
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .srt_time import format_time_array
+
+logger = logging.getLogger(__name__)
+
+# 项目 metadata 目录下的转写存储目录名
+TRANSCRIPT_DIRNAME = "transcript"
+TRANSCRIPT_MANIFEST = "manifest.json"
+TRANSCRIPT_FORMAT_VERSION = 2
+
+# 列名 -> dtype
+TRANSCRIPT_COLUMNS = {
+    "seg_index": np.int64,           # SRT序号
+    "seg_start_ms": np.int64,        # 字幕段开始（毫秒，与SRT精度一致）
+    "seg_end_ms": np.int64,          # 字幕段结束（毫秒）
+    "seg_text_offsets": np.int64,    # 字幕段文本在seg_text中的偏移，长度为段数+1
+    "seg_word_offsets": np.int64,    # 字幕段的单词在word_*中的偏移，长度为段数+1
+    "word_start": np.float64,        # 单词开始（秒）
+    "word_end": np.float64,          # 单词结束（秒）
+    "word_text_offsets": np.int64,   # 单词文本在word_text中的偏移，长度为单词数+1
+    "seg_text": np.uint8,            # 字幕段UTF-8文本
+    "word_text": np.uint8,           # 单词UTF-8文本
+}
+
+
+def make_segment_id(index: int, start_ms: int) -> str:
+    """由SRT序号和开始毫秒生成字幕段ID"""
+    return f"s{index}-{start_ms}"
+
+
+def make_word_id(segment_id: str, position: int) -> str:
+    """由字幕段ID和单词在段内的位置生成单词ID"""
+    return f"{segment_id}-w{position}"
+
+
+def transcript_dir(metadata_dir: Path, srt_path: Path) -> Path:
+    """项目中某个SRT对应的转写存储目录（按文件名区分，避免不同字幕互相覆盖）"""
+    return metadata_dir / TRANSCRIPT_DIRNAME / srt_path.stem
+
+
+def source_signature(path: Path) -> Dict[str, int]:
+    """源文件签名（大小和修改时间），用于判断存储是否过期"""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class TranscriptStore:
+    """按列存储的字粒度转写"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        missing = set(TRANSCRIPT_COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"转写存储缺少列: {sorted(missing)}")
+        self.columns = columns
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict[str, Any]]) -> 'TranscriptStore':
+        """
+        由字粒度字幕段打包
+
+        Args:
+            segments: SubtitleProcessor 输出的字幕段（startTime/endTime/text/words/index）
+        """
+        seg_text, word_text = bytearray(), bytearray()
+        seg_index, seg_start, seg_end = [], [], []
+        seg_text_offsets, seg_word_offsets = [0], [0]
+        word_start, word_end, word_text_offsets = [], [], [0]
+
+        for segment in segments:
+            seg_index.append(int(segment['index']))
+            seg_start.append(int(round(segment['startTime'] * 1000)))
+            seg_end.append(int(round(segment['endTime'] * 1000)))
+            seg_text += segment['text'].encode('utf-8')
+            seg_text_offsets.append(len(seg_text))
+            for word in segment['words']:
+                word_start.append(word['startTime'])
+                word_end.append(word['endTime'])
+                word_text += word['text'].encode('utf-8')
+                word_text_offsets.append(len(word_text))
+            seg_word_offsets.append(len(word_start))
+
+        values = {
+            "seg_index": seg_index, "seg_start_ms": seg_start, "seg_end_ms": seg_end,
+            "seg_text_offsets": seg_text_offsets, "seg_word_offsets": seg_word_offsets,
+            "word_start": word_start, "word_end": word_end, "word_text_offsets": word_text_offsets,
+        }
+        columns = {name: np.asarray(values[name], dtype=TRANSCRIPT_COLUMNS[name]) for name in values}
+        columns["seg_text"] = np.frombuffer(bytes(seg_text), dtype=np.uint8)
+        columns["word_text"] = np.frombuffer(bytes(word_text), dtype=np.uint8)
+        return cls(columns)
+
+    def save(self, store_dir: Path, source: Optional[Dict[str, int]] = None):
+        """
+        写入存储目录：列写入新的 gen-<id> 子目录，再原子替换清单指向它
+
+        其他进程可能正以内存映射读取旧的列文件，原地覆盖会让这些映射读到截断的数据（SIGBUS）；
+        旧目录只在清单替换后删除，已打开的映射继续持有旧文件。
+
+        Args:
+            store_dir: 存储目录
+            source: 源SRT签名
+        """
+        store_dir.mkdir(parents=True, exist_ok=True)
+        generation = f"gen-{uuid.uuid4().hex[:12]}"
+        tmp_dir = store_dir / f".{generation}.tmp"
+        tmp_dir.mkdir()
+        try:
+            for name in TRANSCRIPT_COLUMNS:
+                with open(tmp_dir / f"{name}.npy", 'wb') as f:
+                    np.save(f, np.ascontiguousarray(self.columns[name]))
+            os.replace(tmp_dir, store_dir / generation)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        manifest = {
+            "version": TRANSCRIPT_FORMAT_VERSION,
+            "generation": generation,
+            "source": source,
+            "segment_count": len(self),
+            "word_count": self.word_count,
+        }
+        manifest_path = store_dir / TRANSCRIPT_MANIFEST
+        tmp_path = store_dir / f".{TRANSCRIPT_MANIFEST}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+        self._remove_stale(store_dir, generation)
+
+    @staticmethod
+    def _remove_stale(store_dir: Path, current: str):
+        """删除旧版本的列文件和旧的 gen 目录（已映射的文件在解除映射前仍可读）"""
+        for path in store_dir.iterdir():
+            if path.name == current or path.name.startswith('.'):
+                continue
+            if path.is_dir() and path.name.startswith("gen-"):
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.suffix == ".npy":
+                path.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, store_dir: Path, source: Optional[Dict[str, int]] = None) -> Optional['TranscriptStore']:
+        """
+        以内存映射方式打开存储
+
+        Args:
+            store_dir: 存储目录
+            source: 期望的源SRT签名，不一致时视为过期
+
+        Returns:
+            存储对象；不存在、版本不符或已过期时返回None
+        """
+        manifest_path = store_dir / TRANSCRIPT_MANIFEST
+        if not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") != TRANSCRIPT_FORMAT_VERSION:
+                return None
+            if source is not None and manifest.get("source") != source:
+                return None
+            generation_dir = store_dir / manifest["generation"]
+            columns = {name: np.load(generation_dir / f"{name}.npy", mmap_mode='r') for name in TRANSCRIPT_COLUMNS}
+            return cls(columns)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取转写存储失败 {store_dir}: {e}")
+            return None
+
+    def __len__(self) -> int:
+        return len(self.columns["seg_index"])
+
+    @property
+    def word_count(self) -> int:
+        return len(self.columns["word_start"])
+
+    def _text(self, kind: str, position: int) -> str:
+        offsets = self.columns[f"{kind}_text_offsets"]
+        start, end = int(offsets[position]), int(offsets[position + 1])
+        return bytes(self.columns[f"{kind}_text"][start:end]).decode('utf-8')
+
+    def segment_id(self, position: int) -> str:
+        return make_segment_id(int(self.columns["seg_index"][position]),
+                               int(self.columns["seg_start_ms"][position]))
+
+    def positions_in_range(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """完全落在 [start, end] 秒内的字幕段位置"""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.columns["seg_start_ms"] >= int(round(start * 1000))
+        if end is not None:
+            mask &= self.columns["seg_end_ms"] <= int(round(end * 1000))
+        return np.flatnonzero(mask)
+
+    def segment(self, position: int) -> Dict[str, Any]:
+        """物化单个字幕段（与SubtitleProcessor的字典格式一致）"""
+        segment_id = self.segment_id(position)
+        word_lo = int(self.columns["seg_word_offsets"][position])
+        word_hi = int(self.columns["seg_word_offsets"][position + 1])
+        words = [
+            {
+                'id': make_word_id(segment_id, i - word_lo),
+                'text': self._text("word", i),
+                'startTime': float(self.columns["word_start"][i]),
+                'endTime': float(self.columns["word_end"][i]),
+            }
+            for i in range(word_lo, word_hi)
+        ]
+        return {
+            'id': segment_id,
+            'startTime': int(self.columns["seg_start_ms"][position]) / 1000,
+            'endTime': int(self.columns["seg_end_ms"][position]) / 1000,
+            'text': self._text("seg", position),
+            'words': words,
+            'index': int(self.columns["seg_index"][position]),
+        }
+
+    def segments(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+        """物化时间范围内的字幕段，不传范围时返回全部"""
+        return [self.segment(int(position)) for position in self.positions_in_range(start, end)]
+
+    def srt_entries(self) -> List[Dict[str, Any]]:
+        """
+        按 TextProcessor.parse_srt 的格式输出全部字幕条目，供LLM步骤使用
+
+        Returns:
+            [{'start_time': 'HH:MM:SS,mmm', 'end_time': ..., 'text': ..., 'index': ...}, ...]
+        """
+        starts = format_time_array(self.columns["seg_start_ms"])
+        ends = format_time_array(self.columns["seg_end_ms"])
+        return [
+            {'start_time': start, 'end_time': end, 'text': self._text("seg", i), 'index': index}
+            for i, (start, end, index) in enumerate(zip(starts, ends, self.columns["seg_index"].tolist()))
+        ]
+
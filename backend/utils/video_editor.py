@@ -1,10 +1,9 @@
 import logging
 import subprocess
-import tempfile
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from .video_processor import VideoProcessor
-from .subtitle_processor import SubtitleProcessor
+from .subtitle_processor import SubtitleIndex, SubtitleProcessor
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +25,8 @@ class VideoEditor:
                                       video_path: Path,
                                       subtitle_data: List[Dict],
                                       deleted_segments: List[str],
-                                      output_path: Path) -> Dict:
+                                      output_path: Path,
+                                      frame_accurate: bool = False) -> Dict:
         """
         基于字幕删除编辑视频
         
@@ -35,39 +35,30 @@ class VideoEditor:
             subtitle_data: 字幕数据
             deleted_segments: 要删除的字幕段ID列表
             output_path: 输出视频路径
+            frame_accurate: 是否逐帧精确剪辑（重新编码），默认按关键帧复制
             
         Returns:
             编辑结果信息
         """
         try:
             logger.info(f"开始基于字幕删除编辑视频: {video_path}")
-            
-            # 生成编辑后的时间轴
-            timeline = self.subtitle_processor.generate_edited_video_timeline(
-                subtitle_data, deleted_segments
-            )
-            
-            if not timeline:
+            plan = self.plan_subtitle_edit(subtitle_data, deleted_segments)
+            if plan is None:
                 logger.warning("没有保留的时间段，无法生成视频")
                 return {
                     'success': False,
                     'error': '没有保留的时间段'
                 }
-            
-            # 计算删除的总时长
-            total_deleted_duration = self._calculate_deleted_duration(
-                subtitle_data, deleted_segments
-            )
+            timeline = plan['timeline']
+            total_deleted_duration = plan['totalDeletedDuration']
+            final_duration = plan['finalDuration']
             
             # 执行视频剪辑
             success = self._concatenate_video_segments(
-                video_path, timeline, output_path
+                video_path, timeline, output_path, frame_accurate
             )
             
             if success:
-                # 获取最终视频时长
-                final_duration = self._get_video_duration(output_path)
-                
                 result = {
                     'success': True,
                     'originalVideoPath': str(video_path),
@@ -94,61 +85,187 @@ class VideoEditor:
                 'error': str(e)
             }
     
+    def plan_subtitle_edit(self, subtitle_data: List[Dict],
+                           deleted_segments: List[str]) -> Optional[Dict]:
+        """
+        计算字幕删除后的保留时间轴和时长
+        
+        Args:
+            subtitle_data: 字幕数据（列表或SubtitleIndex）
+            deleted_segments: 要删除的字幕段ID列表
+            
+        Returns:
+            包含 timeline、totalDeletedDuration、finalDuration 的字典；没有保留区间时返回None
+        """
+        subtitle_data = SubtitleIndex.of(subtitle_data)
+        timeline = self.subtitle_processor.generate_edited_video_timeline(
+            subtitle_data, deleted_segments
+        )
+        if not timeline:
+            return None
+        return {
+            'timeline': timeline,
+            'totalDeletedDuration': self._calculate_deleted_duration(subtitle_data, deleted_segments),
+            # 最终时长即保留区间的总长，不再额外调用ffprobe
+            'finalDuration': sum(end - start for start, end in timeline)
+        }
+    
     def _calculate_deleted_duration(self, subtitle_data: List[Dict], 
                                   deleted_segments: List[str]) -> float:
         """
         计算删除的总时长
         
         Args:
-            subtitle_data: 字幕数据
+            subtitle_data: 字幕数据（列表或SubtitleIndex）
             deleted_segments: 删除的字幕段ID列表
             
         Returns:
             删除的总时长（秒）
         """
-        deleted_ids = set(deleted_segments)
-        total_duration = 0.0
-        
-        for segment in subtitle_data:
-            if segment['id'] in deleted_ids:
-                duration = segment['endTime'] - segment['startTime']
-                total_duration += duration
-        
-        return total_duration
+        return SubtitleIndex.of(subtitle_data).duration_of(deleted_segments)
     
     def _concatenate_video_segments(self, video_path: Path, 
                                   timeline: List[Tuple[float, float]], 
-                                  output_path: Path) -> bool:
+                                  output_path: Path,
+                                  frame_accurate: bool = False) -> bool:
         """
-        拼接视频片段
+        按保留区间一次ffmpeg调用生成剪辑结果
         
         Args:
             video_path: 原始视频路径
             timeline: 时间轴 [(start, end), ...]
             output_path: 输出路径
+            frame_accurate: True时使用select/aselect滤镜重新编码，否则用concat的inpoint/outpoint复制
             
         Returns:
             是否成功
         """
+        list_path = self.concat_list_path(output_path)
         try:
-            # 确保输出目录存在
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+            cmd = self.prepare_edit_command(video_path, timeline, output_path, frame_accurate)
+            
+            result = subprocess.run(cmd, capture_output=True, text=True)
             
-            if len(timeline) == 1:
-                # 只有一个片段，直接提取
-                start_time, end_time = timeline[0]
-                return self._extract_single_segment(
-                    video_path, start_time, end_time, output_path
-                )
+            if result.returncode == 0:
+                logger.info(f"成功剪辑 {len(timeline)} 个保留区间")
+                return True
             else:
-                # 多个片段，需要拼接
-                return self._concatenate_multiple_segments(
-                    video_path, timeline, output_path
-                )
+                logger.error(f"剪辑视频失败: {result.stderr}")
+                return False
                 
         except Exception as e:
             logger.error(f"拼接视频片段失败: {e}")
             return False
+        finally:
+            list_path.unlink(missing_ok=True)
+    
+    @staticmethod
+    def concat_list_path(output_path: Path) -> Path:
+        """剪辑输出对应的concat列表文件路径"""
+        return output_path.with_name(f"{output_path.stem}.concat.txt")
+    
+    def prepare_edit_command(self, video_path: Path,
+                             timeline: List[Tuple[float, float]],
+                             output_path: Path,
+                             frame_accurate: bool = False) -> List[str]:
+        """
+        生成剪辑用的ffmpeg命令（复制模式会写入concat列表文件，由调用方在结束后删除）
+        
+        Args:
+            video_path: 原始视频路径
+            timeline: 时间轴 [(start, end), ...]
+            output_path: 输出路径
+            frame_accurate: True时使用select/aselect滤镜重新编码，否则用concat的inpoint/outpoint复制
+            
+        Returns:
+            ffmpeg命令
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if frame_accurate:
+            return self.build_select_command(video_path, timeline, output_path)
+        list_path = self.concat_list_path(output_path)
+        list_path.write_text(self.build_concat_list(video_path, timeline), encoding='utf-8')
+        return self.build_concat_command(list_path, output_path)
+    
+    @staticmethod
+    def build_concat_list(video_path: Path, timeline: List[Tuple[float, float]]) -> str:
+        """
+        生成concat demuxer列表：同一源文件按 inpoint/outpoint 引用每个保留区间
+        """
+        escaped_path = str(Path(video_path).absolute()).replace("'", "'\\''")
+        lines = []
+        for start_time, end_time in sorted(timeline):
+            lines.append(f"file '{escaped_path}'")
+            lines.append(f"inpoint {start_time:.3f}")
+            lines.append(f"outpoint {end_time:.3f}")
+        return "\n".join(lines) + "\n"
+    
+    @staticmethod
+    def build_concat_command(list_path: Path, output_path: Path) -> List[str]:
+        """按列表复制流的ffmpeg命令（不重新编码）"""
+        return [
+            'ffmpeg',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', str(list_path),
+            '-map', '0:v:0?', '-map', '0:a:0?',
+            '-c', 'copy',
+            '-avoid_negative_ts', 'make_zero',
+            '-movflags', '+faststart',
+            '-y',
+            str(output_path)
+        ]
+    
+    @staticmethod
+    def build_select_expr(timeline: List[Tuple[float, float]], offset: float = 0.0) -> str:
+        """保留区间对应的select表达式（时间相对于 offset）"""
+        return "+".join(
+            f"between(t,{start_time - offset:.3f},{end_time - offset:.3f})"
+            for start_time, end_time in sorted(timeline)
+        )
+    
+    @staticmethod
+    def build_select_command(video_path: Path, timeline: List[Tuple[float, float]],
+                             output_path: Path) -> List[str]:
+        """
+        逐帧精确剪辑的ffmpeg命令：只解码首尾保留区间覆盖的范围，用select/aselect丢弃删除部分
+        """
+        ordered = sorted(timeline)
+        offset = ordered[0][0]
+        duration = ordered[-1][1] - offset
+        expr = VideoEditor.build_select_expr(ordered, offset)
+        return [
+            'ffmpeg',
+            '-ss', f"{offset:.3f}",
+            '-t', f"{duration:.3f}",
+            '-i', str(video_path),
+            '-vf', f"select='{expr}',setpts=N/FRAME_RATE/TB",
+            '-af', f"aselect='{expr}',asetpts=N/SR/TB",
+            '-c:v', 'libx264',
+            '-preset', 'veryfast',
+            '-crf', '20',
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            '-movflags', '+faststart',
+            '-y',
+            str(output_path)
+        ]
+    
+    @staticmethod
+    def build_extract_command(video_path: Path, start_time: float, end_time: float,
+                              output_path: Path) -> List[str]:
+        """按关键帧复制提取单个区间的ffmpeg命令"""
+        return [
+            'ffmpeg',
+            '-ss', str(start_time),
+            '-i', str(video_path),
+            '-t', str(end_time - start_time),
+            '-c:v', 'copy',
+            '-c:a', 'copy',
+            '-avoid_negative_ts', 'make_zero',
+            '-y',
+            str(output_path)
+        ]
     
     def _extract_single_segment(self, video_path: Path, 
                               start_time: float, end_time: float, 
@@ -166,19 +283,7 @@ class VideoEditor:
             是否成功
         """
         try:
-            duration = end_time - start_time
-            
-            cmd = [
-                'ffmpeg',
-                '-ss', str(start_time),
-                '-i', str(video_path),
-                '-t', str(duration),
-                '-c:v', 'copy',
-                '-c:a', 'copy',
-                '-avoid_negative_ts', 'make_zero',
-                '-y',
-                str(output_path)
-            ]
+            cmd = self.build_extract_command(video_path, start_time, end_time, output_path)
             
             result = subprocess.run(cmd, capture_output=True, text=True)
             
@@ -193,70 +298,6 @@ class VideoEditor:
             logger.error(f"提取视频片段异常: {e}")
             return False
     
-    def _concatenate_multiple_segments(self, video_path: Path, 
-                                     timeline: List[Tuple[float, float]], 
-                                     output_path: Path) -> bool:
-        """
-        拼接多个视频片段
-        
-        Args:
-            video_path: 原始视频路径
-            timeline: 时间轴 [(start, end), ...]
-            output_path: 输出路径
-            
-        Returns:
-            是否成功
-        """
-        try:
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
-                # 提取所有片段
-                segment_files = []
-                for i, (start_time, end_time) in enumerate(timeline):
-                    segment_file = temp_path / f"segment_{i:03d}.mp4"
-                    
-                    success = self._extract_single_segment(
-                        video_path, start_time, end_time, segment_file
-                    )
-                    
-                    if success:
-                        segment_files.append(segment_file)
-                    else:
-                        logger.error(f"提取片段 {i} 失败")
-                        return False
-                
-                # 创建文件列表
-                file_list_path = temp_path / "file_list.txt"
-                with open(file_list_path, 'w', encoding='utf-8') as f:
-                    for segment_file in segment_files:
-                        f.write(f"file '{segment_file}'\n")
-                
-                # 拼接所有片段
-                cmd = [
-                    'ffmpeg',
-                    '-f', 'concat',
-                    '-safe', '0',
-                    '-i', str(file_list_path),
-                    '-c', 'copy',
-                    '-y',
-                    str(output_path)
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                
-                if result.returncode == 0:
-                    logger.info(f"成功拼接 {len(segment_files)} 个视频片段")
-                    return True
-                else:
-                    logger.error(f"拼接视频片段失败: {result.stderr}")
-                    return False
-                    
-        except Exception as e:
-            logger.error(f"拼接多个视频片段异常: {e}")
-            return False
-    
     def _get_video_duration(self, video_path: Path) -> float:
         """
         获取视频时长
@@ -289,48 +330,32 @@ class VideoEditor:
             logger.error(f"获取视频时长异常: {e}")
             return 0.0
     
-    def create_preview_clips(self, video_path: Path, 
-                           subtitle_data: List[Dict],
-                           deleted_segments: List[str],
-                           output_dir: Path) -> List[Path]:
+    def build_preview_commands(self, video_path: Path,
+                               subtitle_data: List[Dict],
+                               deleted_segments: List[str],
+                               output_dir: Path) -> List[Tuple[Dict, Path, List[str]]]:
         """
-        创建预览片段，用于编辑前的预览
+        生成删除预览的ffmpeg命令，由媒体执行器在全局并发限制下运行
         
         Args:
             video_path: 原始视频路径
-            subtitle_data: 字幕数据
+            subtitle_data: 字幕数据（列表或SubtitleIndex）
             deleted_segments: 要删除的字幕段ID列表
             output_dir: 输出目录
             
         Returns:
-            预览片段文件路径列表
+            (字幕段, 预览文件路径, ffmpeg命令) 列表（与删除顺序一致）
         """
-        try:
-            output_dir.mkdir(parents=True, exist_ok=True)
-            preview_files = []
-            
-            # 为每个要删除的片段创建预览
-            for segment_id in deleted_segments:
-                segment = next((s for s in subtitle_data if s['id'] == segment_id), None)
-                if segment:
-                    preview_file = output_dir / f"preview_{segment_id}.mp4"
-                    
-                    success = self._extract_single_segment(
-                        video_path,
-                        segment['startTime'],
-                        segment['endTime'],
-                        preview_file
-                    )
-                    
-                    if success:
-                        preview_files.append(preview_file)
-            
-            logger.info(f"创建了 {len(preview_files)} 个预览片段")
-            return preview_files
-            
-        except Exception as e:
-            logger.error(f"创建预览片段失败: {e}")
-            return []
+        output_dir.mkdir(parents=True, exist_ok=True)
+        commands = []
+        for segment in SubtitleIndex.of(subtitle_data).resolve(deleted_segments):
+            preview_file = output_dir / f"preview_{segment['id']}.mp4"
+            commands.append((
+                segment,
+                preview_file,
+                self.build_extract_command(video_path, segment['startTime'], segment['endTime'], preview_file)
+            ))
+        return commands
     
     def validate_edit_operations(self, subtitle_data: List[Dict], 
                                deleted_segments: List[str]) -> Dict:
@@ -338,28 +363,29 @@ class VideoEditor:
         验证编辑操作的有效性
         
         Args:
-            subtitle_data: 字幕数据
+            subtitle_data: 字幕数据（列表或SubtitleIndex）
             deleted_segments: 要删除的字幕段ID列表
             
         Returns:
             验证结果
         """
         try:
+            subtitle_data = SubtitleIndex.of(subtitle_data)
+            
             # 检查删除的字幕段是否存在
-            existing_ids = {seg['id'] for seg in subtitle_data}
             deleted_ids = set(deleted_segments)
             
-            invalid_ids = deleted_ids - existing_ids
+            invalid_ids = [segment_id for segment_id in deleted_ids if segment_id not in subtitle_data]
             if invalid_ids:
                 return {
                     'valid': False,
-                    'error': f'无效的字幕段ID: {list(invalid_ids)}'
+                    'error': f'无效的字幕段ID: {invalid_ids}'
                 }
             
             # 检查删除后是否还有剩余内容
-            remaining_segments = [seg for seg in subtitle_data if seg['id'] not in deleted_ids]
+            remaining_count = len(subtitle_data) - len(deleted_ids)
             
-            if not remaining_segments:
+            if remaining_count <= 0:
                 return {
                     'valid': False,
                     'error': '删除所有字幕段后没有剩余内容'
@@ -371,7 +397,7 @@ class VideoEditor:
             )
             
             # 计算总时长
-            total_duration = max(seg['endTime'] for seg in subtitle_data) - min(seg['startTime'] for seg in subtitle_data)
+            total_duration = subtitle_data.span()
             
             return {
                 'valid': True,
@@ -379,7 +405,7 @@ class VideoEditor:
                 'deletedDuration': total_deleted_duration,
                 'remainingDuration': total_duration - total_deleted_duration,
                 'deletedSegments': len(deleted_segments),
-                'remainingSegments': len(remaining_segments)
+                'remainingSegments': remaining_count
             }
             
         except Exception as e:
@@ -5,9 +5,13 @@ import subprocess
 import json
 import logging
 import re
+import time
 from typing import List, Dict, Optional
 from pathlib import Path
 
+from ..core.pipeline_metrics import record_ffmpeg
+from . import srt_time
+
 # 修复导入问题
 try:
     from ..core.shared_config import CLIPS_DIR, COLLECTIONS_DIR
@@ -89,12 +93,7 @@ class VideoProcessor:
         Returns:
             FFmpeg时间格式 (如 "00:00:06.140")
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds % 1) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+        return srt_time.seconds_to_time(seconds, separator='.')
     
     @staticmethod
     def convert_ffmpeg_time_to_seconds(time_str: str) -> float:
@@ -108,19 +107,8 @@ class VideoProcessor:
             秒数
         """
         try:
-            # 处理毫秒部分
-            if '.' in time_str:
-                time_part, ms_part = time_str.split('.')
-                milliseconds = int(ms_part)
-            else:
-                time_part = time_str
-                milliseconds = 0
-            
-            # 解析时分秒
-            h, m, s = map(int, time_part.split(':'))
-            
-            return h * 3600 + m * 60 + s + milliseconds / 1000
-        except Exception as e:
+            return srt_time.time_to_seconds(time_str)
+        except (TypeError, ValueError) as e:
             logger.error(f"时间格式转换失败: {time_str}, 错误: {e}")
             return 0.0
     
@@ -167,7 +155,9 @@ class VideoProcessor:
             ]
             
             # 执行命令
+            started = time.monotonic()
             result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            record_ffmpeg(time.monotonic() - started, result.returncode == 0)
             
             if result.returncode == 0:
                 logger.info(f"成功提取视频片段: {output_path} ({ffmpeg_start_time} -> {ffmpeg_end_time}, 时长: {duration:.2f}秒)")
@@ -180,6 +170,46 @@ class VideoProcessor:
             logger.error(f"视频处理异常: {str(e)}")
             return False
     
+    @staticmethod
+    def write_concat_file(clips_list: List[Path], concat_file: Path) -> Path:
+        """
+        写入ffmpeg concat demuxer使用的文件列表
+        
+        Args:
+            clips_list: 视频片段路径列表
+            concat_file: 列表文件路径
+            
+        Returns:
+            列表文件路径
+        """
+        with open(concat_file, 'w', encoding='utf-8') as f:
+            for clip_path in clips_list:
+                # 使用绝对路径并转义单引号
+                abs_path = clip_path.absolute()
+                escaped_path = str(abs_path).replace("'", "'\"'\"'")
+                f.write(f"file '{escaped_path}'\n")
+        return concat_file
+    
+    @staticmethod
+    def build_collection_command(concat_file: Path, output_path: Path) -> List[str]:
+        """
+        构建合集拼接的FFmpeg命令 - 使用H.264编码确保兼容性
+        """
+        return [
+            'ffmpeg',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', str(concat_file),
+            '-c:v', 'libx264',  # 使用H.264视频编码
+            '-preset', 'ultrafast',  # 使用最快的编码预设
+            '-crf', '28',  # 稍微降低质量以加快编码速度
+            '-c:a', 'aac',  # 使用AAC音频编码
+            '-b:a', '128k',  # 音频比特率
+            '-movflags', '+faststart',  # 优化网络播放
+            '-y',
+            str(output_path)
+        ]
+    
     @staticmethod
     def create_collection(clips_list: List[Path], output_path: Path) -> bool:
         """
@@ -215,13 +245,7 @@ class VideoProcessor:
             
             # 创建concat文件
             concat_file = output_path.parent / "concat_list.txt"
-            
-            with open(concat_file, 'w', encoding='utf-8') as f:
-                for clip_path in valid_clips:
-                    # 使用绝对路径并转义单引号
-                    abs_path = clip_path.absolute()
-                    escaped_path = str(abs_path).replace("'", "'\"'\"'")
-                    f.write(f"file '{escaped_path}'\n")
+            VideoProcessor.write_concat_file(valid_clips, concat_file)
             
             # 验证concat文件内容
             if concat_file.stat().st_size == 0:
@@ -229,26 +253,14 @@ class VideoProcessor:
                 concat_file.unlink(missing_ok=True)
                 return False
             
-            # 构建FFmpeg命令 - 使用H.264编码确保兼容性
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', str(concat_file),
-                '-c:v', 'libx264',  # 使用H.264视频编码
-                '-preset', 'ultrafast',  # 使用最快的编码预设
-                '-crf', '28',  # 稍微降低质量以加快编码速度
-                '-c:a', 'aac',  # 使用AAC音频编码
-                '-b:a', '128k',  # 音频比特率
-                '-movflags', '+faststart',  # 优化网络播放
-                '-y',
-                str(output_path)
-            ]
+            cmd = VideoProcessor.build_collection_command(concat_file, output_path)
             
             logger.info(f"执行FFmpeg命令: {' '.join(cmd)}")
             
             # 执行命令
+            started = time.monotonic()
             result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            record_ffmpeg(time.monotonic() - started, result.returncode == 0)
             
             # 清理临时文件
             concat_file.unlink(missing_ok=True)
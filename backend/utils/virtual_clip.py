@@ -0,0 +1,153 @@
+"""
+虚拟切片 - 不预先切割文件，按需从源视频remux出 [start, end] 区间
+
+ffmpeg以fragmented MP4输出到管道，边转封装边返回给客户端；
+完整输出的结果同时写入磁盘LRU缓存，下次请求直接返回文件（支持Range）。
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_READ_SIZE = 64 * 1024
+
+
+def build_remux_command(source: Path, start: float, end: float) -> List[str]:
+    """
+    构建按区间remux的ffmpeg命令（不重新编码，输出fragmented MP4到stdout）
+    """
+    return [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-ss', f"{start:.3f}",
+        '-i', str(source),
+        '-t', f"{max(end - start, 0.0):.3f}",
+        '-map', '0:v:0?', '-map', '0:a:0?',
+        '-c', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        '-f', 'mp4',
+        '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+        'pipe:1'
+    ]
+
+
+class VirtualClipCache:
+    """虚拟切片的磁盘LRU缓存（按最近访问时间淘汰）"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(source: Path, start: float, end: float) -> str:
+        """源文件（路径、大小、修改时间）+ 区间决定缓存键"""
+        stat = source.stat()
+        raw = f"{source.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{start:.3f}|{end:.3f}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp4"
+
+    def get(self, key: str) -> Optional[Path]:
+        """命中时刷新访问时间并返回文件路径"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def commit(self, key: str, part_path: Path) -> Path:
+        """将完整写入的临时文件转为缓存条目，并按容量淘汰"""
+        path = self.path_for(key)
+        os.replace(part_path, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        """淘汰最久未访问的条目，直到总大小不超过上限"""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob("*.mp4"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+
+
+async def stream_virtual_clip(source: Path, start: float, end: float,
+                              cache: Optional[VirtualClipCache] = None) -> AsyncIterator[bytes]:
+    """
+    按需remux切片并逐块返回；完整结束时写入缓存
+
+    客户端中途断开时终止ffmpeg并丢弃未完成的缓存文件。
+    """
+    key = cache.make_key(source, start, end) if cache else None
+    part_path = cache.cache_dir / f"{key}.{uuid.uuid4().hex}.part" if cache else None
+    part_file = open(part_path, 'wb') if part_path else None
+
+    process = await asyncio.create_subprocess_exec(
+        *build_remux_command(source, start, end),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    completed = False
+    try:
+        while True:
+            chunk = await process.stdout.read(_READ_SIZE)
+            if not chunk:
+                break
+            if part_file:
+                part_file.write(chunk)
+            yield chunk
+
+        stderr = await process.stderr.read()
+        returncode = await process.wait()
+        if returncode != 0:
+            logger.error(f"虚拟切片remux失败 ({source} {start:.3f}-{end:.3f}): {stderr.decode(errors='ignore')[-500:]}")
+        else:
+            completed = True
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        if part_file:
+            part_file.close()
+            if completed:
+                cache.commit(key, part_path)
+            else:
+                part_path.unlink(missing_ok=True)
+
+
+_default_cache: Optional[VirtualClipCache] = None
+
+
+def get_virtual_clip_cache() -> VirtualClipCache:
+    """获取进程内共享的虚拟切片缓存"""
+    global _default_cache
+    if _default_cache is None:
+        from ..core.path_utils import get_data_directory
+        from ..core.shared_config import VIRTUAL_CLIP_CACHE_MAX_MB
+        _default_cache = VirtualClipCache(
+            get_data_directory() / "cache" / "virtual_clips",
+            VIRTUAL_CLIP_CACHE_MAX_MB * 1024 * 1024
+        )
+    return _default_cache
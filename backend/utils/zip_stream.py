@@ -0,0 +1,108 @@
+"""
+流式ZIP打包 - 边读文件边输出ZIP64数据，不写临时文件
+
+zipfile写入一个不可seek的缓冲区时会自动使用数据描述符（data descriptor），
+每写完一块就把缓冲区内容交给调用方，内存占用与导出总大小无关。
+"""
+import io
+import logging
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# 已压缩的媒体文件直接存储，不再重复压缩
+_STORED_SUFFIXES = {'.mp4', '.mov', '.mkv', '.webm', '.m4a', '.mp3', '.aac', '.jpg', '.jpeg', '.png', '.webp', '.zip'}
+
+
+@dataclass
+class ZipEntry:
+    """ZIP中的一个条目：磁盘文件或内存数据"""
+    arcname: str
+    path: Optional[Path] = None
+    data: Optional[bytes] = None
+
+
+class _UnseekableBuffer(io.RawIOBase):
+    """只追加、不可seek的写缓冲区"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _compression_for(arcname: str) -> int:
+    return zipfile.ZIP_STORED if Path(arcname).suffix.lower() in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def _make_zipinfo(entry: ZipEntry) -> zipfile.ZipInfo:
+    if entry.path is not None:
+        stat = entry.path.stat()
+        zinfo = zipfile.ZipInfo(entry.arcname, date_time=time.localtime(stat.st_mtime)[:6])
+        zinfo.file_size = stat.st_size
+    else:
+        zinfo = zipfile.ZipInfo(entry.arcname, date_time=time.localtime()[:6])
+        zinfo.file_size = len(entry.data or b'')
+    zinfo.compress_type = _compression_for(entry.arcname)
+    zinfo.external_attr = 0o644 << 16
+    return zinfo
+
+
+def iter_zip_stream(entries: Iterable[ZipEntry], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    逐块生成ZIP64归档数据
+
+    Args:
+        entries: 待打包条目（惰性迭代，不存在的文件会被跳过）
+        chunk_size: 每次读取的字节数
+
+    Yields:
+        ZIP数据块
+    """
+    buffer = _UnseekableBuffer()
+    with zipfile.ZipFile(buffer, mode='w', allowZip64=True) as archive:
+        for entry in entries:
+            try:
+                zinfo = _make_zipinfo(entry)
+            except OSError as e:
+                logger.warning(f"打包文件不可读，已跳过 {entry.arcname}: {e}")
+                continue
+
+            with archive.open(zinfo, mode='w', force_zip64=True) as dest:
+                if entry.path is not None:
+                    with open(entry.path, 'rb') as src:
+                        while True:
+                            block = src.read(chunk_size)
+                            if not block:
+                                break
+                            dest.write(block)
+                            data = buffer.drain()
+                            if data:
+                                yield data
+                else:
+                    dest.write(entry.data or b'')
+            data = buffer.drain()
+            if data:
+                yield data
+
+    # 中央目录
+    data = buffer.drain()
+    if data:
+        yield data
@@ -5,6 +5,7 @@ import ReactPlayer from 'react-player'
 import { Clip } from '../store/useProjectStore'
 import SubtitleEditor from './SubtitleEditor'
 import { subtitleEditorApi } from '../services/subtitleEditorApi'
+import { mediaJobApi } from '../services/api'
 import { SubtitleSegment, VideoEditOperation } from '../types/subtitle'
 import BilibiliManager from './BilibiliManager'
 import EditableTitle from './EditableTitle'
@@ -107,8 +108,14 @@ const ClipCard: React.FC<ClipCardProps> = ({
         deletedSegments
       )
 
+      // 剪辑在后台媒体任务中执行，等待任务结束
+      const job = result.job_id ? await mediaJobApi.waitForJob(result.job_id) : undefined
+      if (job && job.status !== 'completed') {
+        throw new Error(job.error || job.status)
+      }
+
       if (result.success) {
-        console.log('视频编辑成功:', result)
+        console.log('视频编辑成功:', job?.result ?? result)
       }
     } catch (error) {
       console.error('视频编辑失败:', error)
@@ -1,4 +1,4 @@
-import React, { useState, useRef } from 'react'
+import React, { useState, useRef, useEffect } from 'react'
 import { Modal, Typography, Button, Tag, Space, Row, Col, Divider, message } from 'antd'
 import { 
   PlayCircleOutlined, 
@@ -10,7 +10,7 @@ import {
 } from '@ant-design/icons'
 import ReactPlayer from 'react-player'
 import { Clip } from '../store/useProjectStore'
-import { projectApi } from '../services/api'
+import { projectApi, mediaJobApi } from '../services/api'
 import SubtitleEditor from './SubtitleEditor'
 import { subtitleEditorApi } from '../services/subtitleEditorApi'
 import EditableTitle from './EditableTitle'
@@ -37,8 +37,22 @@ const ClipDetailModal: React.FC<ClipDetailModalProps> = ({
   const [downloading, setDownloading] = useState(false)
   const [showSubtitleEditor, setShowSubtitleEditor] = useState(false)
   const [subtitleData, setSubtitleData] = useState<SubtitleSegment[]>([])
+  const [previewUrl, setPreviewUrl] = useState<string | null>(null)
   const playerRef = useRef<ReactPlayer>(null)
 
+  // 项目已打包HLS时按区间播放列表预览，只加载切片范围内的分片
+  useEffect(() => {
+    if (!visible || !clip) return
+    let cancelled = false
+    setPreviewUrl(null)
+    projectApi.resolveClipPreviewUrl(projectId, clip.id).then(url => {
+      if (!cancelled) setPreviewUrl(url)
+    })
+    return () => {
+      cancelled = true
+    }
+  }, [visible, projectId, clip?.id])
+
   const formatTime = (timeStr: string) => {
     if (!timeStr) return '00:00:00'
     // 移除小数点后的毫秒部分，只保留时分秒
@@ -107,8 +121,14 @@ const ClipDetailModal: React.FC<ClipDetailModalProps> = ({
         deletedSegments
       )
 
+      // 剪辑在后台媒体任务中执行，等待任务结束
+      const job = result.job_id ? await mediaJobApi.waitForJob(result.job_id) : undefined
+      if (job && job.status !== 'completed') {
+        throw new Error(job.error || job.status)
+      }
+
       if (result.success) {
-        console.log('视频编辑成功:', result)
+        console.log('视频编辑成功:', job?.result ?? result)
         // 这里可以添加成功提示
         // 可以刷新片段列表或更新UI
       }
@@ -168,7 +188,7 @@ const ClipDetailModal: React.FC<ClipDetailModalProps> = ({
               }}>
                 <ReactPlayer
                   ref={playerRef}
-                  url={projectApi.getClipVideoUrl(projectId, clip.id, clip.title || clip.generated_title)}
+                  url={previewUrl || projectApi.getClipVideoUrl(projectId, clip.id, clip.title || clip.generated_title)}
                   width="100%"
                   height="300px"
                   playing={playing}
@@ -226,6 +226,11 @@ export const projectApi = {
     return api.get(`/projects/${id}/logs?lines=${lines}`)
   },
 
+  // 实时跟踪项目日志（SSE），每条消息为一条JSON日志
+  getProjectLogStreamUrl: (id: string, lines: number = 50): string => {
+    return `${API_BASE_URL}/projects/${id}/logs/stream?lines=${lines}`
+  },
+
   // 获取项目切片
   getClips: async (projectId: string): Promise<any[]> => {
     try {
@@ -384,7 +389,7 @@ export const projectApi = {
   },
 
   // 生成合集视频
-  generateCollectionVideo: (projectId: string, collectionId: string) => {
+  generateCollectionVideo: (projectId: string, collectionId: string): Promise<{ success: boolean, job_id: string, status: string, filename: string }> => {
     return api.post(`/projects/${projectId}/collections/${collectionId}/generate`)
   },
 
@@ -461,6 +466,25 @@ export const projectApi = {
     return `http://localhost:8000/api/v1/projects/${projectId}/clips/${clipId}`
   },
 
+  // 获取切片的HLS播放列表URL（引用源视频的HLS分片，无需下载整个切片文件）
+  getClipPlaylistUrl: (projectId: string, clipId: string): string => {
+    return `http://localhost:8000/api/v1/files/projects/${projectId}/clips/${clipId}/playlist.m3u8`
+  },
+
+  // 获取切片预览URL：项目已打包HLS时使用播放列表，否则使用切片视频
+  resolveClipPreviewUrl: async (projectId: string, clipId: string): Promise<string> => {
+    const playlistUrl = projectApi.getClipPlaylistUrl(projectId, clipId)
+    try {
+      const response = await fetch(playlistUrl)
+      if (response.ok) {
+        return playlistUrl
+      }
+    } catch (error) {
+      console.warn('HLS预览不可用，使用切片视频:', error)
+    }
+    return projectApi.getClipVideoUrl(projectId, clipId)
+  },
+
   // 获取合集视频URL
   getCollectionVideoUrl: (projectId: string, collectionId: string): string => {
     // 使用files路由获取合集视频
@@ -534,6 +558,40 @@ export const bilibiliApi = {
   }
 }
 
+// 媒体任务（后台ffmpeg渲染）相关API
+export interface MediaJob {
+  job_id: string
+  kind: string
+  project_id?: string
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled'
+  progress: number
+  message?: string
+  result?: any
+  error?: string
+}
+
+export const mediaJobApi = {
+  getJob: (jobId: string): Promise<MediaJob> => {
+    return api.get(`/media-jobs/${jobId}`)
+  },
+
+  cancelJob: (jobId: string): Promise<MediaJob> => {
+    return api.post(`/media-jobs/${jobId}/cancel`)
+  },
+
+  // 轮询直到任务结束
+  waitForJob: async (jobId: string, onProgress?: (job: MediaJob) => void, intervalMs = 1000): Promise<MediaJob> => {
+    for (;;) {
+      const job = await mediaJobApi.getJob(jobId)
+      onProgress?.(job)
+      if (job.status === 'completed' || job.status === 'failed' || job.status === 'cancelled') {
+        return job
+      }
+      await new Promise(resolve => setTimeout(resolve, intervalMs))
+    }
+  }
+}
+
 // 系统状态相关API
 export const systemApi = {
   // 获取系统状态
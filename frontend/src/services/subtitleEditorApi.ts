@@ -19,6 +19,9 @@ export interface SubtitleEditResponse {
   edited_video_path?: string
   deleted_duration?: number
   final_duration?: number
+  // 后台渲染任务ID，通过 mediaJobApi.waitForJob 等待完成
+  job_id?: string
+  status?: string
 }
 
 export interface EditPreviewRequest {
@@ -27,9 +30,23 @@ export interface EditPreviewRequest {
   deleted_segments: string[]
 }
 
+export interface EditPreviewPlaylist {
+  segment_id: string
+  start_time: number
+  end_time: number
+  playlist_url: string
+}
+
 export interface EditPreviewResponse {
   success: boolean
+  // 逐段切割时为后台任务ID，预览文件在任务结果的 preview_files 中
+  job_id?: string
+  status?: string
+  // 逐段切割出的预览文件；源视频已打包为HLS或任务尚未完成时为空
   preview_files: string[]
+  // 源视频已打包为HLS时，每个删除段对应的区间播放列表
+  preview_playlists: EditPreviewPlaylist[]
+  // 预览数量（预览文件或播放列表）
   count: number
 }
 
@@ -123,6 +140,19 @@ class SubtitleEditorApi {
     return `${this.baseUrl}/${projectId}/clips/${clipId}/preview/${segmentId}`
   }
 
+  /**
+   * 获取预览的可播放URL（HLS区间播放列表或预览片段文件）
+   */
+  getEditPreviewUrls(projectId: string, clipId: string, preview: EditPreviewResponse): string[] {
+    if (preview.preview_playlists.length) {
+      return preview.preview_playlists.map(playlist => playlist.playlist_url)
+    }
+    return preview.preview_files.map(file => {
+      const segmentId = file.split(/[\\/]/).pop()!.replace(/^preview_/, '').replace(/\.mp4$/, '')
+      return this.getPreviewSegmentUrl(projectId, clipId, segmentId)
+    })
+  }
+
   /**
    * 下载编辑后的视频
    */